@@ -0,0 +1,206 @@
+"""
+Real-time analytics counters.
+
+Domain events (message created, order paid, appointment booked, ...)
+increment Redis hashes keyed by tenant and day, with per-hour fields
+alongside the daily totals. Dashboards read today's numbers from these
+hashes instead of scanning the messages table, and a periodic task
+flushes them into AnalyticsDaily. The nightly rollup later recomputes
+exact values from source tables, so counters only need to be close.
+
+Hash layout (analytics:rt:{tenant_id}:{YYYY-MM-DD}):
+    msgs_in            -> daily total
+    msgs_in:h13        -> count for 13:00-13:59 (server local time)
+    revenue            -> float total (HINCRBYFLOAT)
+"""
+import logging
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'analytics:rt'
+
+# Counter fields that map directly onto AnalyticsDaily columns
+COUNTER_FIELDS = [
+    'msgs_in', 'msgs_out', 'conversations', 'enquiries', 'orders',
+    'revenue', 'bookings', 'campaign_sends',
+]
+
+# Float-valued counters
+FLOAT_FIELDS = {'revenue'}
+
+
+def _redis_client():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _counter_key(tenant_id, day):
+    return f"{KEY_PREFIX}:{tenant_id}:{day.isoformat()}"
+
+
+def _dirty_key(day):
+    return f"{KEY_PREFIX}:dirty:{day.isoformat()}"
+
+
+def _parse_counters(raw):
+    """Convert a raw counter hash into totals plus an hourly breakdown."""
+    if not raw:
+        return None
+
+    totals = {field: 0 for field in COUNTER_FIELDS}
+    totals['revenue'] = Decimal('0')
+    hourly = {}
+
+    for field, value in raw.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        value = value.decode() if isinstance(value, bytes) else value
+        metric, _, hour = field.partition(':h')
+        if metric not in totals:
+            continue
+        parsed = (
+            Decimal(value).quantize(Decimal('0.01'))
+            if metric in FLOAT_FIELDS else int(value)
+        )
+        if hour:
+            hourly.setdefault(metric, {})[int(hour)] = parsed
+        else:
+            totals[metric] = parsed
+
+    totals['hourly'] = hourly
+    return totals
+
+
+class RealtimeCounters:
+    """
+    Service for incrementing and reading per-tenant real-time counters.
+
+    All methods fail open: if Redis is unavailable, increments are
+    dropped (the nightly rollup is authoritative) and reads return None
+    so callers can fall back to AnalyticsDaily.
+    """
+
+    @staticmethod
+    def increment(tenant_id, metric, amount=1, at=None):
+        """
+        Increment a counter for the tenant's current day and hour.
+
+        Args:
+            tenant_id: Tenant UUID
+            metric: Counter name from COUNTER_FIELDS
+            amount: Increment (int, or Decimal/float for revenue)
+            at: Event datetime (defaults to now)
+        """
+        at = timezone.localtime(at or timezone.now())
+        day = at.date()
+        key = _counter_key(tenant_id, day)
+        hour_field = f"{metric}:h{at.hour:02d}"
+
+        try:
+            pipe = _redis_client().pipeline(transaction=False)
+            if metric in FLOAT_FIELDS:
+                pipe.hincrbyfloat(key, metric, float(amount))
+                pipe.hincrbyfloat(key, hour_field, float(amount))
+            else:
+                pipe.hincrby(key, metric, int(amount))
+                pipe.hincrby(key, hour_field, int(amount))
+            pipe.expire(key, settings.ANALYTICS_COUNTER_TTL)
+            pipe.sadd(_dirty_key(day), str(tenant_id))
+            pipe.expire(_dirty_key(day), settings.ANALYTICS_COUNTER_TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to increment analytics counter {metric}: {e}")
+
+    @staticmethod
+    def increment_on_commit(tenant_id, metric, amount=1, at=None):
+        """
+        Increment after the current transaction commits.
+
+        Rolled-back writes never reach the counters; outside a
+        transaction the increment runs immediately. at selects the
+        day and hour to count under (defaults to now).
+        """
+        at = at or timezone.now()
+        transaction.on_commit(
+            lambda: RealtimeCounters.increment(tenant_id, metric, amount, at)
+        )
+
+    @staticmethod
+    def get_day(tenant_id, day):
+        """
+        Read counters for a tenant and day.
+
+        Args:
+            tenant_id: Tenant UUID
+            day: Date object
+
+        Returns:
+            dict: Totals for COUNTER_FIELDS plus 'hourly' breakdown
+                ({metric: {hour: value}}), or None if unavailable
+        """
+        try:
+            raw = _redis_client().hgetall(_counter_key(tenant_id, day))
+        except Exception as e:
+            logger.warning(f"Failed to read analytics counters: {e}")
+            return None
+
+        return _parse_counters(raw)
+
+    @staticmethod
+    def flush(day=None):
+        """
+        Write counters for a day into AnalyticsDaily.
+
+        Only counter columns are updated; derived metrics (rates, first
+        response time) are left for the nightly rollup. Past days are not
+        flushed because the rollup has already written exact values.
+
+        Args:
+            day: Date object (defaults to today)
+
+        Returns:
+            int: Number of tenant rows written
+        """
+        from apps.analytics.models import AnalyticsDaily
+
+        day = day or timezone.localdate()
+
+        try:
+            client = _redis_client()
+            tenant_ids = [
+                tenant_id.decode() if isinstance(tenant_id, bytes) else tenant_id
+                for tenant_id in client.smembers(_dirty_key(day))
+            ]
+            pipe = client.pipeline(transaction=False)
+            for tenant_id in tenant_ids:
+                pipe.hgetall(_counter_key(tenant_id, day))
+            hashes = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to read analytics counters for flush: {e}")
+            return 0
+
+        rows = []
+        for tenant_id, raw in zip(tenant_ids, hashes):
+            counters = _parse_counters(raw)
+            if counters is None:
+                continue
+            rows.append(AnalyticsDaily(
+                tenant_id=tenant_id,
+                date=day,
+                **{field: counters[field] for field in COUNTER_FIELDS}
+            ))
+
+        if rows:
+            with transaction.atomic():
+                AnalyticsDaily.objects.bulk_create(
+                    rows,
+                    batch_size=500,
+                    update_conflicts=True,
+                    unique_fields=['tenant', 'date'],
+                    update_fields=COUNTER_FIELDS + ['updated_at'],
+                )
+
+        return len(rows)
@@ -2,7 +2,7 @@
 Analytics service for metric calculation and reporting.
 
 Provides methods for:
-- Overview metrics with date range aggregation
+- Overview metrics with date range aggregation (today from real-time counters)
 - Daily metrics retrieval
 - Booking conversion rate calculation
 - No-show rate calculation
@@ -13,6 +13,7 @@ from decimal import Decimal
 from django.db.models import Sum, Count, Avg, Q, F
 from django.utils import timezone
 from apps.analytics.models import AnalyticsDaily
+from apps.analytics.counters import RealtimeCounters, COUNTER_FIELDS
 from apps.messaging.models import Message, Conversation
 from apps.orders.models import Order
 from apps.services.models import Appointment
@@ -52,13 +53,19 @@ class AnalyticsService:
         """
         # Parse date range
         days = int(date_range.rstrip('d'))
-        end_date = timezone.now().date()
+        end_date = timezone.localdate()
         start_date = end_date - timedelta(days=days)
         
+        # Today's counters come from Redis; fall back to AnalyticsDaily
+        # when they are unavailable
+        today_counters = RealtimeCounters.get_day(self.tenant.id, end_date)
+        
         # Aggregate from AnalyticsDaily
         daily_records = AnalyticsDaily.objects.for_date_range(
             self.tenant, start_date, end_date
         )
+        if today_counters is not None:
+            daily_records = daily_records.exclude(date=end_date)
         
         aggregates = daily_records.aggregate(
             msgs_in=Sum('msgs_in'),
@@ -74,6 +81,10 @@ class AnalyticsService:
             avg_first_response_secs=Avg('avg_first_response_secs'),
         )
         
+        if today_counters is not None:
+            for field in COUNTER_FIELDS:
+                aggregates[field] = (aggregates[field] or 0) + today_counters[field]
+        
         # Calculate derived metrics
         avg_order_value = Decimal('0')
         if aggregates['orders'] and aggregates['orders'] > 0:
@@ -0,0 +1,81 @@
+"""
+Analytics signals for real-time counters.
+
+Increments per-tenant Redis counters when:
+- A message is created (inbound/outbound, campaign sends)
+- A conversation is started
+- An enquiry intent is recorded
+- An order is created or becomes paid
+- An appointment is booked
+
+Increments run after the surrounding transaction commits.
+"""
+import logging
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from apps.analytics.counters import RealtimeCounters
+from apps.analytics.tasks import ENQUIRY_INTENTS
+from apps.bot.models import IntentEvent
+from apps.messaging.models import Message, Conversation
+from apps.orders.models import Order
+from apps.services.models import Appointment
+
+logger = logging.getLogger(__name__)
+
+# Order statuses counted as revenue
+REVENUE_STATUSES = ('paid', 'fulfilled')
+
+
+@receiver(post_save, sender=Message)
+def count_message(sender, instance, created, **kwargs):
+    """Count inbound/outbound messages and campaign sends."""
+    if not created:
+        return
+
+    tenant_id = instance.conversation.tenant_id
+    if instance.direction == 'in':
+        RealtimeCounters.increment_on_commit(tenant_id, 'msgs_in')
+    elif instance.direction == 'out':
+        RealtimeCounters.increment_on_commit(tenant_id, 'msgs_out')
+        if instance.message_type == 'scheduled_promotional':
+            RealtimeCounters.increment_on_commit(tenant_id, 'campaign_sends')
+
+
+@receiver(post_save, sender=Conversation)
+def count_conversation(sender, instance, created, **kwargs):
+    """Count new conversations."""
+    if created:
+        RealtimeCounters.increment_on_commit(instance.tenant_id, 'conversations')
+
+
+@receiver(post_save, sender=IntentEvent)
+def count_enquiry(sender, instance, created, **kwargs):
+    """Count product/service enquiry intents."""
+    if created and instance.intent_name in ENQUIRY_INTENTS:
+        RealtimeCounters.increment_on_commit(instance.tenant_id, 'enquiries')
+
+
+@receiver(post_save, sender=Order)
+def count_order(sender, instance, created, **kwargs):
+    """
+    Count new orders and revenue when an order becomes paid.
+
+    Revenue is counted under the day the order was created, as the
+    rollup does, not the day it was paid. Relies on _previous_status
+    set by the orders pre_save signal.
+    """
+    if created:
+        RealtimeCounters.increment_on_commit(instance.tenant_id, 'orders')
+
+    previous_status = getattr(instance, '_previous_status', None)
+    if instance.status in REVENUE_STATUSES and previous_status not in REVENUE_STATUSES:
+        RealtimeCounters.increment_on_commit(
+            instance.tenant_id, 'revenue', instance.total, at=instance.created_at
+        )
+
+
+@receiver(post_save, sender=Appointment)
+def count_booking(sender, instance, created, **kwargs):
+    """Count new appointments."""
+    if created:
+        RealtimeCounters.increment_on_commit(instance.tenant_id, 'bookings')
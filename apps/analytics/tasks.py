@@ -4,16 +4,24 @@ Celery tasks for analytics aggregation.
 Implements nightly rollup of metrics for each tenant,
 aggregating messages, conversations, orders, bookings,
 and calculating conversion rates.
+
+Metrics are computed with a handful of grouped queries across all
+tenants (GROUP BY tenant, day with conditional counts) and upserted
+into AnalyticsDaily in bulk, so query count does not grow with the
+number of tenants or days in the range.
 """
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta
 from decimal import Decimal
 from django.db import transaction
-from django.db.models import Count, Sum, Avg, Q, F
+from django.db.models import Count, Sum, Q, F, OuterRef, Subquery
+from django.db.models.functions import TruncDate
 from django.utils import timezone
-from celery import shared_task
+from celery import shared_task, group
 from apps.tenants.models import Tenant
 from apps.analytics.models import AnalyticsDaily
+from apps.analytics.counters import RealtimeCounters
 from apps.messaging.models import Message, Conversation
 from apps.orders.models import Order
 from apps.services.models import Appointment
@@ -21,6 +29,26 @@ from apps.bot.models import IntentEvent
 
 logger = logging.getLogger(__name__)
 
+# Fields written to AnalyticsDaily by the rollup
+METRIC_FIELDS = [
+    'msgs_in', 'msgs_out', 'conversations', 'avg_first_response_secs',
+    'handoffs', 'enquiries', 'orders', 'revenue', 'bookings',
+    'booking_conversion_rate', 'no_show_rate', 'campaign_sends',
+    'campaign_responses',
+]
+
+# Product/service intents counted as enquiries
+ENQUIRY_INTENTS = [
+    'BROWSE_PRODUCTS', 'PRODUCT_DETAILS', 'PRICE_CHECK',
+    'BROWSE_SERVICES', 'SERVICE_DETAILS', 'CHECK_AVAILABILITY'
+]
+
+# Rows per INSERT ... ON CONFLICT statement
+UPSERT_BATCH_SIZE = 500
+
+# Default number of days per parallel backfill chunk
+BACKFILL_CHUNK_DAYS = 7
+
 
 @shared_task(name='analytics.rollup_daily_metrics')
 def rollup_daily_metrics(date_str=None):
@@ -58,29 +86,153 @@ def rollup_daily_metrics(date_str=None):
         'errors': []
     }
     
+    _rollup_isolated(tenants, target_date, target_date, results)
+    
+    logger.info(
+        f"Analytics rollup completed: {results['tenants_processed']} processed, "
+        f"{results['tenants_failed']} failed"
+    )
+    
+    return results
+
+
+@shared_task(name='analytics.rollup_metrics_range')
+def rollup_metrics_range(start_date_str, end_date_str):
+    """
+    Roll up analytics for every active tenant over an inclusive date range.
+    
+    Used by backfill_daily_metrics; each invocation handles one chunk
+    with the same grouped queries as the nightly rollup.
+    
+    Args:
+        start_date_str: First date (YYYY-MM-DD)
+        end_date_str: Last date (YYYY-MM-DD)
+    
+    Returns:
+        dict: Summary of the range, rows written and any errors
+    """
+    start_date = datetime.fromisoformat(start_date_str).date()
+    end_date = datetime.fromisoformat(end_date_str).date()
+    tenants = Tenant.objects.filter(status__in=['active', 'trial'])
+    
+    results = {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'tenants_processed': 0,
+        'tenants_failed': 0,
+        'errors': []
+    }
+    
+    _rollup_isolated(tenants, start_date, end_date, results)
+    
+    days = (end_date - start_date).days + 1
+    results['rows_written'] = results['tenants_processed'] * days
+    
+    logger.info(
+        f"Analytics range rollup {start_date} to {end_date}: "
+        f"{results['tenants_processed']} processed, "
+        f"{results['tenants_failed']} failed, {days} days"
+    )
+    
+    return results
+
+
+@shared_task(name='analytics.backfill_daily_metrics')
+def backfill_daily_metrics(start_date_str, end_date_str, chunk_days=BACKFILL_CHUNK_DAYS):
+    """
+    Backfill analytics for a date range in parallel chunks.
+    
+    Splits the range into chunks of chunk_days and dispatches one
+    rollup_metrics_range task per chunk as a Celery group, so workers
+    process chunks concurrently.
+    
+    Args:
+        start_date_str: First date (YYYY-MM-DD)
+        end_date_str: Last date (YYYY-MM-DD)
+        chunk_days: Days per chunk (at least 1)
+    
+    Returns:
+        dict: Dispatched chunks and group id
+    """
+    start_date = datetime.fromisoformat(start_date_str).date()
+    end_date = datetime.fromisoformat(end_date_str).date()
+    
+    if end_date < start_date:
+        raise ValueError("end_date must not be before start_date")
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1")
+    
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        chunks.append((chunk_start.isoformat(), chunk_end.isoformat()))
+        chunk_start = chunk_end + timedelta(days=1)
+    
+    result = group(
+        rollup_metrics_range.s(chunk_start, chunk_end)
+        for chunk_start, chunk_end in chunks
+    ).apply_async()
+    
+    logger.info(
+        f"Dispatched analytics backfill {start_date} to {end_date} "
+        f"in {len(chunks)} chunks"
+    )
+    
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'chunks': chunks,
+        'group_id': result.id,
+    }
+
+
+@shared_task(name='analytics.flush_realtime_counters')
+def flush_realtime_counters():
+    """
+    Flush today's real-time counters into AnalyticsDaily.
+    
+    Returns:
+        dict: Date flushed and number of tenant rows written
+    """
+    today = timezone.localdate()
+    rows = RealtimeCounters.flush(today)
+    
+    logger.info(f"Flushed real-time analytics counters for {today}: {rows} tenants")
+    
+    return {'date': today.isoformat(), 'tenants_flushed': rows}
+
+
+def _rollup_isolated(tenants, start_date, end_date, results):
+    """
+    Roll up tenants over a date range without letting one tenant fail the rest.
+    
+    All tenants are upserted together first. If that fails, each tenant
+    is retried in its own transaction and failures are logged and
+    recorded in results.
+    
+    Args:
+        tenants: Tenant queryset
+        start_date: First date (inclusive)
+        end_date: Last date (inclusive)
+        results: Summary dict with tenants_processed, tenants_failed and errors
+    """
+    try:
+        with transaction.atomic():
+            results['tenants_processed'] = _rollup_date_range(tenants, start_date, end_date)
+        return
+    except Exception as e:
+        logger.warning(
+            f"Grouped analytics rollup {start_date} to {end_date} failed, "
+            f"retrying per tenant: {str(e)}"
+        )
+    
     for tenant in tenants:
         try:
-            logger.info(f"Processing analytics for tenant: {tenant.name} ({tenant.id})")
-            
-            # Aggregate metrics within transaction
             with transaction.atomic():
-                # Aggregate metrics for this tenant and date
-                metrics = _aggregate_tenant_metrics(tenant, target_date)
-                
-                # Create or update AnalyticsDaily record
-                analytics, created = AnalyticsDaily.objects.update_or_create(
-                    tenant=tenant,
-                    date=target_date,
-                    defaults=metrics
+                _rollup_date_range(
+                    Tenant.objects.filter(pk=tenant.pk), start_date, end_date
                 )
-            
-            action = "Created" if created else "Updated"
-            logger.info(
-                f"{action} analytics for {tenant.name}: "
-                f"{metrics['msgs_in']} msgs_in, {metrics['orders']} orders, "
-                f"{metrics['bookings']} bookings"
-            )
-            
             results['tenants_processed'] += 1
             
         except Exception as e:
@@ -95,12 +247,48 @@ def rollup_daily_metrics(date_str=None):
                 'error': str(e)
             })
     
-    logger.info(
-        f"Analytics rollup completed: {results['tenants_processed']} processed, "
-        f"{results['tenants_failed']} failed"
+
+def _rollup_date_range(tenants, start_date, end_date):
+    """
+    Aggregate and upsert AnalyticsDaily rows for tenants over a date range.
+    
+    Every (tenant, date) pair gets a row, including days with no activity.
+    Must be called inside a transaction.
+    
+    Args:
+        tenants: Tenant queryset
+        start_date: First date (inclusive)
+        end_date: Last date (inclusive)
+    
+    Returns:
+        int: Number of tenants rolled up
+    """
+    tenant_ids = list(tenants.values_list('id', flat=True))
+    metrics = _aggregate_metrics(tenants, start_date, end_date)
+    
+    days = [
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+    ]
+    rows = [
+        AnalyticsDaily(
+            tenant_id=tenant_id,
+            date=day,
+            **metrics.get((tenant_id, day), _empty_metrics())
+        )
+        for tenant_id in tenant_ids
+        for day in days
+    ]
+    
+    AnalyticsDaily.objects.bulk_create(
+        rows,
+        batch_size=UPSERT_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['tenant', 'date'],
+        update_fields=METRIC_FIELDS + ['updated_at'],
     )
     
-    return results
+    return len(tenant_ids)
 
 
 def _aggregate_tenant_metrics(tenant, date):
@@ -114,225 +302,234 @@ def _aggregate_tenant_metrics(tenant, date):
     Returns:
         dict: Metrics dictionary for AnalyticsDaily
     """
-    # Define date range for the target date
-    start_dt = timezone.make_aware(datetime.combine(date, datetime.min.time()))
-    end_dt = timezone.make_aware(datetime.combine(date, datetime.max.time()))
-    
-    # Messaging Metrics
-    msgs_in = Message.objects.filter(
-        conversation__tenant=tenant,
-        direction='in',
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
-    ).count()
-    
-    msgs_out = Message.objects.filter(
-        conversation__tenant=tenant,
-        direction='out',
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
-    ).count()
-    
-    # New conversations started on this date
-    conversations = Conversation.objects.filter(
-        tenant=tenant,
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
-    ).count()
-    
-    # Calculate average first response time
-    # (time between first customer message and first bot response)
-    avg_first_response = _calculate_avg_first_response(tenant, start_dt, end_dt)
+    metrics = _aggregate_metrics(Tenant.objects.filter(pk=tenant.pk), date, date)
+    return metrics.get((tenant.pk, date), _empty_metrics())
     
-    # Handoffs to human agents
-    handoffs = Conversation.objects.filter(
-        tenant=tenant,
-        status='handoff',
-        updated_at__gte=start_dt,
-        updated_at__lte=end_dt
-    ).count()
-    
-    # Enquiries (product/service intent events)
-    enquiry_intents = [
-        'BROWSE_PRODUCTS', 'PRODUCT_DETAILS', 'PRICE_CHECK',
-        'BROWSE_SERVICES', 'SERVICE_DETAILS', 'CHECK_AVAILABILITY'
-    ]
-    enquiries = IntentEvent.objects.filter(
-        conversation__tenant=tenant,
-        intent_name__in=enquiry_intents,
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
-    ).count()
-    
-    # Commerce Metrics
-    orders = Order.objects.filter(
-        tenant=tenant,
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
-    ).count()
-    
-    # Revenue from paid/fulfilled orders
-    revenue_data = Order.objects.filter(
-        tenant=tenant,
-        status__in=['paid', 'fulfilled'],
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
-    ).aggregate(total=Sum('total'))
-    
-    revenue = revenue_data['total'] or Decimal('0')
-    
-    # Services Metrics
-    bookings = Appointment.objects.filter(
-        tenant=tenant,
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
-    ).count()
-    
-    # Booking conversion rate
-    booking_conversion_rate = _calculate_booking_conversion_rate(
-        tenant, start_dt, end_dt
-    )
-    
-    # No-show rate
-    no_show_rate = _calculate_no_show_rate(tenant, start_dt, end_dt)
-    
-    # Campaign Metrics
-    campaign_sends = Message.objects.filter(
-        conversation__tenant=tenant,
-        direction='out',
-        message_type='scheduled_promotional',
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
-    ).count()
-    
-    # Campaign responses (inbound messages after campaign sends)
-    campaign_responses = 0  # Simplified for now
     
+def _empty_metrics():
+    """Metrics for a tenant-day with no activity."""
     return {
-        'msgs_in': msgs_in,
-        'msgs_out': msgs_out,
-        'conversations': conversations,
-        'avg_first_response_secs': avg_first_response,
-        'handoffs': handoffs,
-        'enquiries': enquiries,
-        'orders': orders,
-        'revenue': revenue,
-        'bookings': bookings,
-        'booking_conversion_rate': booking_conversion_rate,
-        'no_show_rate': no_show_rate,
-        'campaign_sends': campaign_sends,
-        'campaign_responses': campaign_responses,
+        'msgs_in': 0,
+        'msgs_out': 0,
+        'conversations': 0,
+        'avg_first_response_secs': None,
+        'handoffs': 0,
+        'enquiries': 0,
+        'orders': 0,
+        'revenue': Decimal('0'),
+        'bookings': 0,
+        'booking_conversion_rate': None,
+        'no_show_rate': None,
+        'campaign_sends': 0,
+        # Campaign responses (inbound messages after campaign sends)
+        'campaign_responses': 0,  # Simplified for now
     }
 
 
-def _calculate_avg_first_response(tenant, start_dt, end_dt):
+def _grouped(queryset, tenant_field, date_field, tenants, start_dt, end_dt, **aggregates):
     """
-    Calculate average first response time for conversations.
+    Run one aggregate query grouped by tenant and local date.
     
     Args:
-        tenant: Tenant instance
-        start_dt: Start datetime
-        end_dt: End datetime
+        queryset: Base queryset
+        tenant_field: Lookup path to the tenant id
+        date_field: Datetime field used for the date range and grouping
+        tenants: Tenant queryset (applied as a subquery)
+        start_dt: Range start (inclusive)
+        end_dt: Range end (exclusive)
+        **aggregates: Aggregate expressions to annotate
     
     Returns:
-        float: Average response time in seconds or None
+        list: Dicts with group_tenant, day and the aggregate values
     """
-    # Get conversations started in this period
-    conversations = Conversation.objects.filter(
-        tenant=tenant,
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
+    return list(
+        queryset.filter(**{
+            f'{tenant_field}__in': tenants.values('id'),
+            f'{date_field}__gte': start_dt,
+            f'{date_field}__lt': end_dt,
+        })
+        .order_by()
+        .values(group_tenant=F(tenant_field), day=TruncDate(date_field))
+        .annotate(**aggregates)
     )
     
-    response_times = []
     
-    for conv in conversations:
-        # Get first customer message
-        first_customer_msg = Message.objects.filter(
-            conversation=conv,
-            direction='in'
-        ).order_by('created_at').first()
+def _aggregate_metrics(tenants, start_date, end_date):
+    """
+    Aggregate metrics for many tenants and days with grouped queries.
         
-        if not first_customer_msg:
-            continue
+    Args:
+        tenants: Tenant queryset
+        start_date: First date (inclusive)
+        end_date: Last date (inclusive)
         
-        # Get first bot response after customer message
-        first_bot_msg = Message.objects.filter(
-            conversation=conv,
-            direction='out',
-            created_at__gt=first_customer_msg.created_at
-        ).order_by('created_at').first()
+    Returns:
+        dict: (tenant_id, date) -> metrics dictionary for AnalyticsDaily
+    """
+    # Define datetime range covering the target dates
+    start_dt = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+    end_dt = timezone.make_aware(
+        datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    )
         
-        if first_bot_msg:
-            delta = first_bot_msg.created_at - first_customer_msg.created_at
-            response_times.append(delta.total_seconds())
+    metrics = defaultdict(_empty_metrics)
+    
+    def merge(rows, **field_map):
+        for row in rows:
+            entry = metrics[(row['group_tenant'], row['day'])]
+            for field, key in field_map.items():
+                entry[field] = row[key]
+        return rows
+    
+    # Messaging and campaign metrics
+    merge(
+        _grouped(
+            Message.objects, 'conversation__tenant_id', 'created_at',
+            tenants, start_dt, end_dt,
+            msgs_in=Count('id', filter=Q(direction='in')),
+            msgs_out=Count('id', filter=Q(direction='out')),
+            campaign_sends=Count('id', filter=Q(
+                direction='out', message_type='scheduled_promotional'
+            )),
+        ),
+        msgs_in='msgs_in', msgs_out='msgs_out', campaign_sends='campaign_sends'
+    )
     
-    if response_times:
-        return sum(response_times) / len(response_times)
-    return None
-
-
-def _calculate_booking_conversion_rate(tenant, start_dt, end_dt):
-    """
-    Calculate booking conversion rate: bookings / availability checks.
+    # New conversations started on each date
+    merge(
+        _grouped(
+            Conversation.objects, 'tenant_id', 'created_at',
+            tenants, start_dt, end_dt,
+            conversations=Count('id'),
+        ),
+        conversations='conversations'
+    )
     
-    Args:
-        tenant: Tenant instance
-        start_dt: Start datetime
-        end_dt: End datetime
+    # Handoffs to human agents
+    merge(
+        _grouped(
+            Conversation.objects.filter(status='handoff'), 'tenant_id', 'updated_at',
+            tenants, start_dt, end_dt,
+            handoffs=Count('id'),
+        ),
+        handoffs='handoffs'
+    )
     
-    Returns:
-        float: Conversion rate as percentage or None
-    """
-    # Count CHECK_AVAILABILITY intents
-    availability_checks = IntentEvent.objects.filter(
-        conversation__tenant=tenant,
-        intent_name='CHECK_AVAILABILITY',
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
-    ).count()
-    
-    # Count confirmed bookings
-    bookings = Appointment.objects.filter(
-        tenant=tenant,
-        status__in=['confirmed', 'done'],
-        created_at__gte=start_dt,
-        created_at__lte=end_dt
-    ).count()
-    
-    if availability_checks > 0:
-        return (bookings / availability_checks) * 100
-    return None
+    # Enquiries (product/service intent events) and availability checks
+    intent_rows = merge(
+        _grouped(
+            IntentEvent.objects, 'conversation__tenant_id', 'created_at',
+            tenants, start_dt, end_dt,
+            enquiries=Count('id', filter=Q(intent_name__in=ENQUIRY_INTENTS)),
+            availability_checks=Count('id', filter=Q(intent_name='CHECK_AVAILABILITY')),
+        ),
+        enquiries='enquiries'
+    )
+    
+    # Commerce metrics, revenue from paid/fulfilled orders
+    merge(
+        _grouped(
+            Order.objects, 'tenant_id', 'created_at',
+            tenants, start_dt, end_dt,
+            orders=Count('id'),
+            revenue=Sum('total', filter=Q(status__in=['paid', 'fulfilled'])),
+        ),
+        orders='orders', revenue='revenue'
+    )
+    
+    # Bookings created on each date
+    booking_rows = merge(
+        _grouped(
+            Appointment.objects, 'tenant_id', 'created_at',
+            tenants, start_dt, end_dt,
+            bookings=Count('id'),
+            confirmed_bookings=Count('id', filter=Q(status__in=['confirmed', 'done'])),
+        ),
+        bookings='bookings'
+    )
+    
+    # Booking conversion rate: confirmed bookings / availability checks
+    confirmed_bookings = {
+        (row['group_tenant'], row['day']): row['confirmed_bookings']
+        for row in booking_rows
+    }
+    for row in intent_rows:
+        key = (row['group_tenant'], row['day'])
+        if row['availability_checks'] > 0:
+            metrics[key]['booking_conversion_rate'] = (
+                confirmed_bookings.get(key, 0) / row['availability_checks']
+            ) * 100
+    
+    # No-show rate: no-shows / confirmed appointments scheduled on each date
+    for row in _grouped(
+        Appointment.objects, 'tenant_id', 'start_dt',
+        tenants, start_dt, end_dt,
+        confirmed=Count('id', filter=Q(status__in=['confirmed', 'done', 'no_show'])),
+        no_shows=Count('id', filter=Q(status='no_show')),
+    ):
+        if row['confirmed'] > 0:
+            metrics[(row['group_tenant'], row['day'])]['no_show_rate'] = (
+                row['no_shows'] / row['confirmed']
+            ) * 100
+    
+    for key, avg_secs in _average_first_response(tenants, start_dt, end_dt).items():
+        metrics[key]['avg_first_response_secs'] = avg_secs
+    
+    for entry in metrics.values():
+        if entry['revenue'] is None:
+            entry['revenue'] = Decimal('0')
+    
+    return dict(metrics)
 
 
-def _calculate_no_show_rate(tenant, start_dt, end_dt):
+def _average_first_response(tenants, start_dt, end_dt):
     """
-    Calculate no-show rate: no-shows / confirmed appointments.
+    Calculate average first response time per tenant and date.
+    
+    First response is the time between the first customer message and
+    the first bot response after it, for conversations started in the
+    range. Both timestamps are fetched with correlated subqueries in a
+    single query.
     
     Args:
-        tenant: Tenant instance
-        start_dt: Start datetime
-        end_dt: End datetime
+        tenants: Tenant queryset
+        start_dt: Range start (inclusive)
+        end_dt: Range end (exclusive)
     
     Returns:
-        float: No-show rate as percentage or None
+        dict: (tenant_id, date) -> average response time in seconds
     """
-    # Count confirmed appointments (that could have been no-shows)
-    confirmed = Appointment.objects.filter(
-        tenant=tenant,
-        status__in=['confirmed', 'done', 'no_show'],
-        start_dt__gte=start_dt,
-        start_dt__lte=end_dt
-    ).count()
-    
-    # Count no-shows
-    no_shows = Appointment.objects.filter(
-        tenant=tenant,
-        status='no_show',
-        start_dt__gte=start_dt,
-        start_dt__lte=end_dt
-    ).count()
-    
-    if confirmed > 0:
-        return (no_shows / confirmed) * 100
-    return None
+    first_in = Message.objects.filter(
+        conversation=OuterRef('pk'),
+        direction='in'
+    ).order_by('created_at').values('created_at')[:1]
+    
+    first_out = Message.objects.filter(
+        conversation=OuterRef('pk'),
+        direction='out',
+        created_at__gt=OuterRef('first_in')
+    ).order_by('created_at').values('created_at')[:1]
+    
+    rows = (
+        Conversation.objects.filter(
+            tenant_id__in=tenants.values('id'),
+            created_at__gte=start_dt,
+            created_at__lt=end_dt
+        )
+        .order_by()
+        .annotate(first_in=Subquery(first_in))
+        .annotate(first_out=Subquery(first_out))
+        .filter(first_out__isnull=False)
+        .values_list('tenant_id', TruncDate('created_at'), 'first_in', 'first_out')
+    )
+    
+    response_times = defaultdict(list)
+    for tenant_id, day, first_in_at, first_out_at in rows:
+        response_times[(tenant_id, day)].append(
+            (first_out_at - first_in_at).total_seconds()
+        )
+    
+    return {
+        key: sum(times) / len(times)
+        for key, times in response_times.items()
+    }
@@ -0,0 +1,204 @@
+"""
+Tests for real-time analytics counters and their use in overview metrics.
+"""
+import pytest
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.utils import timezone
+
+from apps.analytics.counters import RealtimeCounters
+from apps.analytics.models import AnalyticsDaily
+from apps.analytics.services import AnalyticsService
+from apps.analytics.tasks import rollup_daily_metrics
+from apps.messaging.models import Conversation, Message
+from apps.orders.models import Order
+from apps.tenants.models import Tenant, Customer
+
+
+class FakeRedis:
+    """In-memory stand-in for the hash and set commands used by counters."""
+
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+        self.sets = defaultdict(set)
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    def hincrby(self, key, field, amount):
+        self.hashes[key][field] = int(self.hashes[key].get(field, 0)) + amount
+
+    def hincrbyfloat(self, key, field, amount):
+        self.hashes[key][field] = float(self.hashes[key].get(field, 0)) + amount
+
+    def hgetall(self, key):
+        return {k: str(v) for k, v in self.hashes.get(key, {}).items()}
+
+    def sadd(self, key, member):
+        self.sets[key].add(member)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def expire(self, key, ttl):
+        pass
+
+
+class FakePipeline:
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def command(*args):
+            self.calls.append((name, args))
+        return command
+
+    def execute(self):
+        results = [getattr(self.redis, name)(*args) for name, args in self.calls]
+        self.calls = []
+        return results
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with patch('apps.analytics.counters._redis_client', return_value=redis):
+        yield redis
+
+
+@pytest.fixture
+def shop(db):
+    return Tenant.objects.create(
+        name='Counter Shop',
+        slug='counter-shop',
+        status='active',
+        whatsapp_number='+254700000301'
+    )
+
+
+@pytest.fixture
+def customer(shop):
+    return Customer.objects.create(tenant=shop, phone_e164='+254700000302')
+
+
+class TestRealtimeCounters:
+    """Counters accumulate daily totals with an hourly breakdown."""
+
+    def test_increment_and_read(self, fake_redis):
+        at = timezone.now().replace(hour=13)
+        RealtimeCounters.increment('tenant-1', 'msgs_in', at=at)
+        RealtimeCounters.increment('tenant-1', 'msgs_in', at=at)
+        RealtimeCounters.increment('tenant-1', 'revenue', Decimal('12.50'), at=at)
+
+        counters = RealtimeCounters.get_day('tenant-1', timezone.localtime(at).date())
+
+        assert counters['msgs_in'] == 2
+        assert counters['revenue'] == Decimal('12.50')
+        assert counters['orders'] == 0
+        assert counters['hourly']['msgs_in'][timezone.localtime(at).hour] == 2
+
+    def test_missing_redis_returns_none(self):
+        with patch('apps.analytics.counters._redis_client', side_effect=ConnectionError('down')):
+            RealtimeCounters.increment('tenant-1', 'msgs_in')
+            assert RealtimeCounters.get_day('tenant-1', timezone.localdate()) is None
+
+
+@pytest.mark.django_db
+class TestCounterSignals:
+    """Model signals increment counters after commit."""
+
+    def test_message_and_order_events(
+        self, fake_redis, shop, customer, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            conversation = Conversation.objects.create(
+                tenant=shop, customer=customer, status='open'
+            )
+            Message.objects.create(
+                conversation=conversation, direction='in',
+                message_type='customer_inbound', text='hi'
+            )
+            Message.objects.create(
+                conversation=conversation, direction='out',
+                message_type='scheduled_promotional', text='sale'
+            )
+            order = Order.objects.create(
+                tenant=shop, customer=customer, currency='USD',
+                subtotal=Decimal('30.00'), total=Decimal('30.00'), status='placed'
+            )
+
+        with patch('apps.messaging.tasks.send_payment_confirmation.delay'):
+            with django_capture_on_commit_callbacks(execute=True):
+                order.status = 'paid'
+                order.save()
+
+        counters = RealtimeCounters.get_day(shop.id, timezone.localdate())
+        assert counters['conversations'] == 1
+        assert counters['msgs_in'] == 1
+        assert counters['msgs_out'] == 1
+        assert counters['campaign_sends'] == 1
+        assert counters['orders'] == 1
+        assert counters['revenue'] == Decimal('30.00')
+
+    def test_revenue_counted_on_order_creation_day(
+        self, fake_redis, shop, customer, django_capture_on_commit_callbacks
+    ):
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        order = Order.objects.create(
+            tenant=shop, customer=customer, currency='USD',
+            subtotal=Decimal('30.00'), total=Decimal('30.00'), status='placed'
+        )
+        Order.objects.filter(id=order.id).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        order.refresh_from_db()
+
+        with patch('apps.messaging.tasks.send_payment_confirmation.delay'):
+            with django_capture_on_commit_callbacks(execute=True):
+                order.status = 'paid'
+                order.save()
+        rollup_daily_metrics(yesterday.isoformat())
+
+        counters = RealtimeCounters.get_day(shop.id, yesterday)
+        daily = AnalyticsDaily.objects.get(tenant=shop, date=yesterday)
+        assert counters['revenue'] == daily.revenue == Decimal('30.00')
+        assert RealtimeCounters.get_day(shop.id, today) is None
+
+
+@pytest.mark.django_db
+class TestOverviewUsesCounters:
+    """Overview combines AnalyticsDaily history with today's counters."""
+
+    def test_today_read_from_counters(self, fake_redis, shop):
+        today = timezone.localdate()
+        AnalyticsDaily.objects.create(
+            tenant=shop, date=today - timedelta(days=1),
+            msgs_in=10, orders=1, revenue=Decimal('50.00')
+        )
+        # Stale row for today written by an earlier flush
+        AnalyticsDaily.objects.create(tenant=shop, date=today, msgs_in=1)
+        RealtimeCounters.increment(shop.id, 'msgs_in', 5)
+        RealtimeCounters.increment(shop.id, 'orders')
+        RealtimeCounters.increment(shop.id, 'revenue', Decimal('25.00'))
+
+        overview = AnalyticsService(shop).get_overview('7d')
+
+        assert overview['msgs_in'] == 15
+        assert overview['orders'] == 2
+        assert overview['revenue'] == 75.0
+
+    def test_flush_writes_counter_columns(self, fake_redis, shop):
+        today = timezone.localdate()
+        RealtimeCounters.increment(shop.id, 'msgs_out', 4)
+        RealtimeCounters.increment(shop.id, 'bookings')
+
+        assert RealtimeCounters.flush(today) == 1
+
+        daily = AnalyticsDaily.objects.get(tenant=shop, date=today)
+        assert daily.msgs_out == 4
+        assert daily.bookings == 1
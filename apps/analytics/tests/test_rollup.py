@@ -0,0 +1,200 @@
+"""
+Tests for the grouped analytics rollup and backfill tasks.
+"""
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+from django.utils import timezone
+
+from apps.analytics.models import AnalyticsDaily
+from apps.analytics import tasks
+from apps.analytics.tasks import (
+    rollup_daily_metrics, rollup_metrics_range, backfill_daily_metrics
+)
+from apps.messaging.models import Conversation, Message
+from apps.orders.models import Order
+from apps.tenants.models import Tenant, Customer
+
+
+TARGET_DATE = (timezone.now() - timedelta(days=1)).date()
+
+
+def _at(day, hour):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=hour)
+
+
+def _make_tenant(slug, phone):
+    tenant = Tenant.objects.create(
+        name=slug.title(),
+        slug=slug,
+        status='active',
+        whatsapp_number=phone
+    )
+    customer = Customer.objects.create(tenant=tenant, phone_e164=phone)
+    return tenant, customer
+
+
+def _seed_activity(tenant, customer, day, msgs_in, orders_paid):
+    conversation = Conversation.objects.create(
+        tenant=tenant, customer=customer, status='open'
+    )
+    Conversation.objects.filter(id=conversation.id).update(created_at=_at(day, 9))
+
+    for i in range(msgs_in):
+        msg = Message.objects.create(
+            conversation=conversation, direction='in',
+            message_type='customer_inbound', text=f'hi {i}'
+        )
+        Message.objects.filter(id=msg.id).update(created_at=_at(day, 10 + i))
+    reply = Message.objects.create(
+        conversation=conversation, direction='out',
+        message_type='bot_response', text='hello'
+    )
+    Message.objects.filter(id=reply.id).update(
+        created_at=_at(day, 10) + timedelta(seconds=30)
+    )
+
+    for _ in range(orders_paid):
+        order = Order.objects.create(
+            tenant=tenant, customer=customer, currency='USD',
+            subtotal=Decimal('40.00'), total=Decimal('40.00'), status='paid'
+        )
+        Order.objects.filter(id=order.id).update(created_at=_at(day, 12))
+
+
+@pytest.mark.django_db
+class TestGroupedRollup:
+    """Rollup computes per-tenant metrics with a fixed number of queries."""
+
+    def test_rollup_computes_metrics_for_all_tenants(self):
+        shop_a, customer_a = _make_tenant('shop-a', '+254700000101')
+        shop_b, customer_b = _make_tenant('shop-b', '+254700000102')
+        _seed_activity(shop_a, customer_a, TARGET_DATE, msgs_in=3, orders_paid=2)
+        _seed_activity(shop_b, customer_b, TARGET_DATE, msgs_in=1, orders_paid=0)
+
+        result = rollup_daily_metrics(TARGET_DATE.isoformat())
+
+        assert result['tenants_processed'] == 2
+        assert result['tenants_failed'] == 0
+
+        daily_a = AnalyticsDaily.objects.get(tenant=shop_a, date=TARGET_DATE)
+        assert daily_a.msgs_in == 3
+        assert daily_a.msgs_out == 1
+        assert daily_a.conversations == 1
+        assert daily_a.orders == 2
+        assert daily_a.revenue == Decimal('80.00')
+        assert daily_a.avg_first_response_secs == pytest.approx(30.0)
+
+        daily_b = AnalyticsDaily.objects.get(tenant=shop_b, date=TARGET_DATE)
+        assert daily_b.msgs_in == 1
+        assert daily_b.orders == 0
+        assert daily_b.revenue == Decimal('0')
+
+    def test_rollup_upserts_existing_rows(self):
+        shop, customer = _make_tenant('shop-a', '+254700000101')
+        existing = AnalyticsDaily.objects.create(
+            tenant=shop, date=TARGET_DATE, msgs_in=99, orders=42
+        )
+        _seed_activity(shop, customer, TARGET_DATE, msgs_in=2, orders_paid=1)
+
+        rollup_daily_metrics(TARGET_DATE.isoformat())
+
+        rows = AnalyticsDaily.objects.filter(tenant=shop, date=TARGET_DATE)
+        assert rows.count() == 1
+        assert rows.get().id == existing.id
+        assert rows.get().msgs_in == 2
+        assert rows.get().orders == 1
+
+    def test_query_count_independent_of_tenant_count(self, django_assert_max_num_queries):
+        for i in range(10):
+            tenant, customer = _make_tenant(f'shop-{i}', f'+25470000020{i}')
+            _seed_activity(tenant, customer, TARGET_DATE, msgs_in=1, orders_paid=1)
+
+        with django_assert_max_num_queries(15):
+            rollup_daily_metrics(TARGET_DATE.isoformat())
+
+        assert AnalyticsDaily.objects.filter(date=TARGET_DATE).count() == 10
+
+    def test_failing_tenant_does_not_block_others(self):
+        shop_a, customer_a = _make_tenant('shop-a', '+254700000101')
+        shop_b, customer_b = _make_tenant('shop-b', '+254700000102')
+        _seed_activity(shop_a, customer_a, TARGET_DATE, msgs_in=2, orders_paid=1)
+        _seed_activity(shop_b, customer_b, TARGET_DATE, msgs_in=1, orders_paid=0)
+        aggregate = tasks._aggregate_metrics
+
+        def failing_for_b(tenants, start_date, end_date):
+            if tenants.filter(pk=shop_b.pk).exists():
+                raise RuntimeError('boom')
+            return aggregate(tenants, start_date, end_date)
+
+        with patch('apps.analytics.tasks._aggregate_metrics', side_effect=failing_for_b):
+            result = rollup_daily_metrics(TARGET_DATE.isoformat())
+
+        assert result['tenants_processed'] == 1
+        assert result['tenants_failed'] == 1
+        assert result['errors'][0]['tenant_id'] == str(shop_b.id)
+        assert AnalyticsDaily.objects.get(tenant=shop_a, date=TARGET_DATE).msgs_in == 2
+        assert not AnalyticsDaily.objects.filter(tenant=shop_b).exists()
+
+
+@pytest.mark.django_db
+class TestBackfill:
+    """Backfill splits ranges into chunks rolled up in parallel."""
+
+    def test_range_rollup_writes_row_per_tenant_day(self):
+        shop, customer = _make_tenant('shop-a', '+254700000101')
+        first_day = TARGET_DATE - timedelta(days=2)
+        _seed_activity(shop, customer, first_day, msgs_in=2, orders_paid=0)
+        _seed_activity(shop, customer, TARGET_DATE, msgs_in=1, orders_paid=1)
+
+        result = rollup_metrics_range(first_day.isoformat(), TARGET_DATE.isoformat())
+
+        assert result['rows_written'] == 3
+        rows = {row.date: row for row in AnalyticsDaily.objects.filter(tenant=shop)}
+        assert rows[first_day].msgs_in == 2
+        assert rows[first_day + timedelta(days=1)].msgs_in == 0
+        assert rows[TARGET_DATE].orders == 1
+
+    @patch('apps.analytics.tasks.group')
+    def test_backfill_dispatches_chunks(self, mock_group):
+        mock_group.return_value.apply_async.return_value = MagicMock(id='group-1')
+
+        result = backfill_daily_metrics('2025-01-01', '2025-01-17', chunk_days=7)
+
+        assert result['chunks'] == [
+            ('2025-01-01', '2025-01-07'),
+            ('2025-01-08', '2025-01-14'),
+            ('2025-01-15', '2025-01-17'),
+        ]
+        assert result['group_id'] == 'group-1'
+        assert len(list(mock_group.call_args[0][0])) == 3
+
+    def test_backfill_rejects_inverted_range(self):
+        with pytest.raises(ValueError):
+            backfill_daily_metrics('2025-01-10', '2025-01-01')
+
+    @pytest.mark.parametrize('chunk_days', [0, -1])
+    def test_backfill_rejects_empty_chunks(self, chunk_days):
+        with pytest.raises(ValueError):
+            backfill_daily_metrics('2025-01-01', '2025-01-10', chunk_days=chunk_days)
+
+    def test_range_rollup_isolates_failing_tenant(self):
+        shop_a, customer_a = _make_tenant('shop-a', '+254700000101')
+        shop_b, _ = _make_tenant('shop-b', '+254700000102')
+        first_day = TARGET_DATE - timedelta(days=1)
+        _seed_activity(shop_a, customer_a, first_day, msgs_in=1, orders_paid=0)
+        aggregate = tasks._aggregate_metrics
+
+        def failing_for_b(tenants, start_date, end_date):
+            if tenants.filter(pk=shop_b.pk).exists():
+                raise RuntimeError('boom')
+            return aggregate(tenants, start_date, end_date)
+
+        with patch('apps.analytics.tasks._aggregate_metrics', side_effect=failing_for_b):
+            result = rollup_metrics_range(first_day.isoformat(), TARGET_DATE.isoformat())
+
+        assert result['tenants_processed'] == 1
+        assert result['tenants_failed'] == 1
+        assert result['rows_written'] == 2
+        assert AnalyticsDaily.objects.filter(tenant=shop_a).count() == 2
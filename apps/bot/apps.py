@@ -59,6 +59,12 @@ class BotConfig(AppConfig):
         except Exception as e:
             logging.getLogger(__name__).warning(f"Monitoring integration setup failed: {e}")
         
+        # Count SQL queries against node profiling spans
+        from django.conf import settings
+        if getattr(settings, 'BOT_NODE_PROFILING', False):
+            from apps.core.profiling import enable_query_profiling
+            enable_query_profiling()
+        
         # Import signals to ensure they are registered
         try:
             from apps.bot import signals  # noqa
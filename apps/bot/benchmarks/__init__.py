@@ -0,0 +1,49 @@
+"""
+Reproducible benchmarks for the bot's hot paths.
+
+Synthetic tenants of configurable size (generators), stub LLM, embedding,
+vector and Twilio providers with injectable latency (stubs), a timing
+runner with JSON output for comparing runs across commits (runner) and
+the hot-path benchmark definitions (suite). Run them with
+``python manage.py run_benchmarks``. The replay harness (replay) drives
+a message corpus through the whole inbound pipeline at a chosen rate;
+run it with ``python manage.py replay_load``. The serving benchmark
+(serving) compares the concurrent connections a WSGI and an ASGI worker
+hold open; run it with ``python manage.py serving_capacity``.
+"""
+from .generators import PROFILES, SyntheticTenant, TenantProfile, generate_tenant, hashed_embedding
+from .replay import (
+    LatencyDistribution, ReplayHarness, ReplayMessage, arrival_offsets, is_sustainable,
+    load_corpus, synthetic_corpus,
+)
+from .runner import BenchmarkResult, compare_results, load_results, run_benchmark, write_results
+from .serving import SERVING_MODES, run_serving_benchmark
+from .stubs import StubEmbeddingClient, StubLLMProvider, StubVectorStore, stub_providers
+from .suite import BENCHMARKS
+
+__all__ = [
+    'PROFILES',
+    'SyntheticTenant',
+    'TenantProfile',
+    'generate_tenant',
+    'hashed_embedding',
+    'LatencyDistribution',
+    'ReplayHarness',
+    'ReplayMessage',
+    'arrival_offsets',
+    'is_sustainable',
+    'load_corpus',
+    'synthetic_corpus',
+    'BenchmarkResult',
+    'compare_results',
+    'load_results',
+    'run_benchmark',
+    'write_results',
+    'SERVING_MODES',
+    'run_serving_benchmark',
+    'StubEmbeddingClient',
+    'StubLLMProvider',
+    'StubVectorStore',
+    'stub_providers',
+    'BENCHMARKS',
+]
@@ -0,0 +1,330 @@
+"""
+Synthetic tenant generators for benchmarks.
+
+Builds a tenant with a catalog, bookable services, customers,
+conversation history and an embedded knowledge base from a seeded RNG,
+so two runs with the same profile and seed produce the same data.
+Rows are bulk-inserted; model signals (analytics counters, runtime
+invalidation) are deliberately skipped for everything but the tenant.
+"""
+import math
+import random
+import re
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from datetime import time, timedelta
+from decimal import Decimal
+from typing import List
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.bot.models import ConversationContext, KnowledgeEntry
+from apps.catalog.models import Product
+from apps.messaging.models import Conversation, CustomerPreferences, Message
+from apps.services.models import Appointment, AvailabilityWindow, Service, ServiceVariant
+from apps.tenants.models import Customer, Tenant
+
+
+@dataclass(frozen=True)
+class TenantProfile:
+    """Size of a synthetic tenant."""
+
+    name: str
+    products: int
+    services: int
+    customers: int
+    conversations: int
+    messages_per_conversation: int
+    knowledge_entries: int
+    appointments: int = 0
+    consent_ratio: float = 0.7
+    embedding_dimensions: int = 1536
+
+
+PROFILES = {
+    'tiny': TenantProfile(
+        name='tiny', products=20, services=3, customers=20, conversations=5,
+        messages_per_conversation=10, knowledge_entries=20, appointments=5,
+        embedding_dimensions=64
+    ),
+    'small': TenantProfile(
+        name='small', products=200, services=20, customers=200, conversations=50,
+        messages_per_conversation=20, knowledge_entries=100, appointments=40
+    ),
+    'medium': TenantProfile(
+        name='medium', products=2000, services=100, customers=2000, conversations=200,
+        messages_per_conversation=60, knowledge_entries=500, appointments=200
+    ),
+    'large': TenantProfile(
+        name='large', products=10000, services=300, customers=10000, conversations=1000,
+        messages_per_conversation=120, knowledge_entries=2000, appointments=1000
+    ),
+}
+
+COLOURS = ['red', 'blue', 'black', 'white', 'green', 'grey', 'navy', 'maroon', 'beige', 'pink']
+MATERIALS = ['cotton', 'leather', 'denim', 'wool', 'linen', 'silk', 'canvas', 'suede']
+ITEMS = [
+    'shirt', 't-shirt', 'dress', 'jacket', 'sneakers', 'sandals', 'handbag', 'backpack',
+    'hoodie', 'skirt', 'trousers', 'cap', 'scarf', 'belt', 'wallet', 'kitenge',
+]
+SERVICE_NAMES = [
+    'haircut', 'braiding', 'manicure', 'pedicure', 'facial', 'massage', 'consultation',
+    'tailoring', 'alteration', 'styling session',
+]
+TOPICS = [
+    ('delivery', 'We deliver within Nairobi in 24 hours and countrywide in 3 days.'),
+    ('returns', 'Items can be returned within 7 days with the original receipt.'),
+    ('payment', 'We accept M-Pesa, card payments and cash on delivery.'),
+    ('opening hours', 'The shop is open Monday to Saturday from 8am to 6pm.'),
+    ('sizes', 'Sizes run from XS to XXL; see the size guide for measurements.'),
+    ('warranty', 'Electronics carry a 12 month warranty against manufacturing defects.'),
+    ('booking', 'Appointments can be booked up to 30 days in advance.'),
+    ('discounts', 'Loyalty customers get 10% off every fifth order.'),
+]
+CUSTOMER_LINES = [
+    'Do you have a {item} in {colour}?',
+    'How much is the {material} {item}?',
+    'Can I book a {service} tomorrow?',
+    'What are your delivery charges?',
+    'Is the {colour} {item} still in stock?',
+    'I want to return my order',
+]
+BOT_LINES = [
+    'Yes, we have the {colour} {material} {item} in stock.',
+    'The {material} {item} costs KES {price}.',
+    'We have {service} slots available tomorrow morning.',
+    'Delivery within Nairobi is KES 200.',
+]
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def hashed_embedding(text: str, dimensions: int) -> List[float]:
+    """
+    Deterministic bag-of-words embedding via feature hashing.
+
+    Texts sharing words get a high cosine similarity, so semantic search
+    over generated entries returns plausible matches without a model.
+    """
+    vector = [0.0] * dimensions
+    for token in TOKEN_RE.findall(text.lower()):
+        digest = zlib.crc32(token.encode())
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % dimensions] += sign
+    norm = math.sqrt(sum(value * value for value in vector))
+    if not norm:
+        return vector
+    return [value / norm for value in vector]
+
+
+@dataclass
+class SyntheticTenant:
+    """A generated tenant and the rows created for it."""
+
+    tenant: Tenant
+    profile: TenantProfile
+    seed: int
+    products: List[Product] = field(default_factory=list)
+    services: List[Service] = field(default_factory=list)
+    customers: List[Customer] = field(default_factory=list)
+    conversations: List[Conversation] = field(default_factory=list)
+    knowledge_entries: List[KnowledgeEntry] = field(default_factory=list)
+
+    def product_queries(self, count: int = 10) -> List[str]:
+        """Customer-style product queries, some with typos."""
+        rng = random.Random(self.seed + 1)
+        queries = []
+        for index in range(count):
+            title = rng.choice(self.products).title.lower() if self.products else 'shirt'
+            if index % 3 == 1 and len(title) > 4:
+                # Drop a character to exercise the fuzzy path
+                position = rng.randrange(1, len(title) - 1)
+                title = title[:position] + title[position + 1:]
+            elif index % 3 == 2:
+                title = ' '.join(title.split()[-2:])
+            queries.append(title)
+        return queries
+
+    def knowledge_queries(self, count: int = 10) -> List[str]:
+        """Questions about the generated knowledge topics."""
+        return [f"what is your {TOPICS[index % len(TOPICS)][0]} policy" for index in range(count)]
+
+    def busiest_conversation(self) -> Conversation:
+        """The conversation with the longest history."""
+        return self.conversations[0]
+
+    def delete(self):
+        """Hard-delete the tenant and everything generated for it."""
+        self.tenant.hard_delete()
+
+
+def generate_tenant(profile: TenantProfile, seed: int = 0) -> SyntheticTenant:
+    """
+    Create a synthetic tenant of the given size.
+
+    Args:
+        profile: TenantProfile (see PROFILES)
+        seed: RNG seed; the same seed produces the same catalog and history
+
+    Returns:
+        SyntheticTenant with the created rows
+    """
+    rng = random.Random(seed)
+    suffix = uuid.uuid4().hex[:8]
+
+    with transaction.atomic():
+        tenant = Tenant.objects.create(
+            name=f"Benchmark {profile.name.title()} {suffix}",
+            slug=f"bench-{profile.name}-{suffix}",
+            status='active',
+            whatsapp_number=f"+1555{int(suffix, 16) % 10 ** 7:07d}"
+        )
+        synthetic = SyntheticTenant(tenant=tenant, profile=profile, seed=seed)
+
+        synthetic.products = _generate_products(tenant, profile, rng)
+        synthetic.services = _generate_services(tenant, profile, rng)
+        synthetic.customers = _generate_customers(tenant, profile)
+        synthetic.conversations = _generate_conversations(tenant, profile, synthetic, rng)
+        synthetic.knowledge_entries = _generate_knowledge(tenant, profile, rng)
+        _generate_appointments(tenant, profile, synthetic, rng)
+
+    return synthetic
+
+
+def _generate_products(tenant, profile, rng):
+    products = []
+    for index in range(profile.products):
+        colour, material, item = rng.choice(COLOURS), rng.choice(MATERIALS), rng.choice(ITEMS)
+        products.append(Product(
+            tenant=tenant,
+            title=f"{colour.title()} {material.title()} {item.title()} {index}",
+            description=f"A {colour} {item} made from {material}. Style number {index}.",
+            price=Decimal(rng.randrange(300, 15000)),
+            currency='KES',
+            sku=f"SKU-{index:06d}",
+            stock=rng.randrange(0, 50),
+            is_active=rng.random() > 0.05
+        ))
+    return Product.objects.bulk_create(products, batch_size=1000)
+
+
+def _generate_services(tenant, profile, rng):
+    services = Service.objects.bulk_create([
+        Service(
+            tenant=tenant,
+            title=f"{SERVICE_NAMES[index % len(SERVICE_NAMES)].title()} {index}",
+            description=f"Professional {SERVICE_NAMES[index % len(SERVICE_NAMES)]} service.",
+            base_price=Decimal(rng.randrange(500, 5000)),
+            currency='KES',
+            requires_slot=True
+        )
+        for index in range(profile.services)
+    ])
+    ServiceVariant.objects.bulk_create([
+        ServiceVariant(service=service, title='Standard', duration_minutes=rng.choice([30, 45, 60]))
+        for service in services
+    ])
+    # Weekday opening hours, split around lunch
+    AvailabilityWindow.objects.bulk_create([
+        AvailabilityWindow(
+            tenant=tenant, service=service, weekday=weekday,
+            start_time=start, end_time=end, capacity=rng.randrange(1, 4),
+            timezone='Africa/Nairobi'
+        )
+        for service in services
+        for weekday in range(6)
+        for start, end in ((time(8, 0), time(12, 0)), (time(13, 0), time(18, 0)))
+    ], batch_size=1000)
+    return services
+
+
+def _generate_customers(tenant, profile):
+    customers = Customer.objects.bulk_create([
+        Customer(
+            tenant=tenant,
+            phone_e164=f"+2547{index:08d}",
+            name=f"Customer {index}",
+            tags=['vip'] if index % 10 == 0 else ['regular']
+        )
+        for index in range(profile.customers)
+    ], batch_size=1000)
+    opted_in = int(len(customers) * profile.consent_ratio)
+    CustomerPreferences.objects.bulk_create([
+        CustomerPreferences(tenant=tenant, customer=customer, promotional_messages=index < opted_in)
+        for index, customer in enumerate(customers)
+    ], batch_size=1000)
+    return customers
+
+
+def _render(line, rng):
+    return line.format(
+        item=rng.choice(ITEMS), colour=rng.choice(COLOURS), material=rng.choice(MATERIALS),
+        service=rng.choice(SERVICE_NAMES), price=rng.randrange(300, 15000)
+    )
+
+
+def _generate_conversations(tenant, profile, synthetic, rng):
+    conversations = Conversation.objects.bulk_create([
+        Conversation(tenant=tenant, customer=customer, status='bot', channel='whatsapp')
+        for customer in synthetic.customers[:profile.conversations]
+    ])
+    messages = []
+    for position, conversation in enumerate(conversations):
+        # History length tapers off so the first conversation is the longest
+        length = max(2, profile.messages_per_conversation // (1 + position % 4))
+        for index in range(length):
+            inbound = index % 2 == 0
+            messages.append(Message(
+                conversation=conversation,
+                direction='in' if inbound else 'out',
+                message_type='customer_inbound' if inbound else 'bot_response',
+                text=_render(rng.choice(CUSTOMER_LINES if inbound else BOT_LINES), rng)
+            ))
+    Message.objects.bulk_create(messages, batch_size=1000)
+    # Seed summaries so context building does not call an LLM to summarise
+    ConversationContext.objects.bulk_create([
+        ConversationContext(
+            conversation=conversation,
+            conversation_summary='Customer is browsing the catalog and asking about prices.',
+            context_expires_at=timezone.now() + timedelta(days=1)
+        )
+        for conversation in conversations
+    ])
+    return conversations
+
+
+def _generate_knowledge(tenant, profile, rng):
+    entries = []
+    for index in range(profile.knowledge_entries):
+        topic, answer = TOPICS[index % len(TOPICS)]
+        title = f"What is your {topic} policy? ({index})"
+        entries.append(KnowledgeEntry(
+            tenant=tenant,
+            entry_type='faq' if index % 4 else 'policy',
+            title=title,
+            content=answer,
+            keywords=topic,
+            embedding=hashed_embedding(f"{title}\n\n{answer}", profile.embedding_dimensions),
+            priority=rng.randrange(0, 100)
+        ))
+    return KnowledgeEntry.objects.bulk_create(entries, batch_size=500)
+
+
+def _generate_appointments(tenant, profile, synthetic, rng):
+    if not synthetic.services or not synthetic.customers:
+        return
+    day = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    appointments = []
+    for index in range(profile.appointments):
+        start = day + timedelta(days=1 + index % 7, hours=rng.randrange(0, 8))
+        appointments.append(Appointment(
+            tenant=tenant,
+            customer=rng.choice(synthetic.customers),
+            service=synthetic.services[index % len(synthetic.services)],
+            start_dt=start,
+            end_dt=start + timedelta(minutes=60),
+            status='confirmed'
+        ))
+    Appointment.objects.bulk_create(appointments, batch_size=1000)
@@ -0,0 +1,625 @@
+"""
+End-to-end message replay load harness.
+
+Replays a corpus of WhatsApp conversations against a synthetic tenant
+through the real inbound path: a signed POST to twilio_webhook, the
+process_inbound_message task, the LangGraph orchestrator and the Twilio
+send, with LLM, embedding, vector and Twilio calls served by the stubs.
+Messages arrive open-loop at a fixed rate (Poisson or evenly spaced)
+and are served by a pool of workers standing in for Celery workers:
+forked processes by default, mirroring the prefork pool, or threads.
+Thread workers share one sync_to_async executor for database work, so
+use them for smoke tests rather than capacity numbers.
+
+Each message reports queue wait, webhook and pipeline time, time spent
+in every orchestrator node, SQL queries (including those issued from
+sync_to_async threads) and cache hits and misses. Stepping the rate
+(ramp) finds the highest offered rate the workers sustain.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import math
+import multiprocessing
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Dict, Iterable, List, Optional
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from apps.bot.benchmarks.generators import CUSTOMER_LINES, _render
+from apps.bot.services.monitoring.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+# Per-message probe; contextvars follow sync_to_async into its threads
+_current_probe: ContextVar[Optional['_Probe']] = ContextVar('replay_probe', default=None)
+
+# Signing token configured on the replay tenant
+REPLAY_TWILIO_SID = 'ACreplay0000000000000000000000000'
+REPLAY_TWILIO_TOKEN = 'replay-auth-token'
+
+_MISSING = object()
+
+
+class ReplayError(Exception):
+    """A replayed message was not processed."""
+
+
+@dataclass(frozen=True)
+class ReplayMessage:
+    """One inbound message of the corpus."""
+
+    conversation: int
+    phone: str
+    body: str
+
+
+class LatencyDistribution:
+    """
+    Seeded log-normal latency given its median and p95 in milliseconds.
+
+    Calling the instance returns the next sample in seconds, so it can be
+    passed anywhere the stubs accept a latency.
+    """
+
+    def __init__(self, median_ms: float, p95_ms: Optional[float] = None, seed: int = 0):
+        if median_ms < 0 or (p95_ms is not None and p95_ms < median_ms):
+            raise ValueError('Latency needs 0 <= median <= p95')
+        self.median_ms = median_ms
+        self.p95_ms = median_ms if p95_ms is None else p95_ms
+        # p95 of a log-normal sits 1.645 sigma above the median
+        self.sigma = math.log(self.p95_ms / median_ms) / 1.645 if median_ms else 0.0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, seed: int = 0) -> 'LatencyDistribution':
+        """Parse ``"median"`` or ``"median:p95"`` (milliseconds)."""
+        parts = spec.split(':')
+        if len(parts) > 2:
+            raise ValueError(f"Invalid latency {spec!r}; expected MEDIAN or MEDIAN:P95")
+        return cls(*(float(part) for part in parts), seed=seed)
+
+    def __call__(self) -> float:
+        if not self.median_ms:
+            return 0.0
+        with self._lock:
+            sample = self._rng.lognormvariate(math.log(self.median_ms), self.sigma)
+        return sample / 1000
+
+    def __repr__(self) -> str:
+        return f"LatencyDistribution(median_ms={self.median_ms}, p95_ms={self.p95_ms})"
+
+
+def load_corpus(path: str) -> List[ReplayMessage]:
+    """
+    Read a recorded corpus.
+
+    The file is JSON lines, one conversation per line:
+    ``{"phone": "+254700000001", "messages": ["Hi", "Do you have shoes?"]}``.
+    Messages may also be objects with a ``body`` (or Twilio-style
+    ``Body``) key. Conversations are interleaved turn by turn, the order
+    in which concurrent customers would write.
+    """
+    conversations = []
+    with open(path) as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            phone = record.get('phone') or f"+25479{line_number:07d}"
+            bodies = [
+                message if isinstance(message, str) else message.get('body') or message.get('Body', '')
+                for message in record.get('messages', [])
+            ]
+            conversations.append((phone, [body for body in bodies if body]))
+    return _interleave(conversations)
+
+
+def synthetic_corpus(conversations: int = 20, messages_per_conversation: int = 5, seed: int = 0) -> List[ReplayMessage]:
+    """Generate a corpus from the generator's customer lines."""
+    rng = random.Random(seed)
+    return _interleave([
+        (f"+25471{seed % 100:02d}{index:05d}", [
+            _render(rng.choice(CUSTOMER_LINES), rng) for _ in range(messages_per_conversation)
+        ])
+        for index in range(conversations)
+    ])
+
+
+def _interleave(conversations) -> List[ReplayMessage]:
+    messages = []
+    longest = max((len(bodies) for _, bodies in conversations), default=0)
+    for turn in range(longest):
+        for index, (phone, bodies) in enumerate(conversations):
+            if turn < len(bodies):
+                messages.append(ReplayMessage(conversation=index, phone=phone, body=bodies[turn]))
+    return messages
+
+
+def arrival_offsets(count: int, rate: float, poisson: bool = True, seed: int = 0) -> List[float]:
+    """
+    Arrival times in seconds from the start of a step.
+
+    A rate of 0 offers every message at once (a backlog), which measures
+    raw throughput instead of behaviour at a given load.
+    """
+    if rate <= 0:
+        return [0.0] * count
+    rng = random.Random(seed)
+    offsets, now = [], 0.0
+    for _ in range(count):
+        offsets.append(now)
+        now += rng.expovariate(rate) if poisson else 1 / rate
+    return offsets
+
+
+class _Probe:
+    """Counters for the message being processed."""
+
+    def __init__(self):
+        self.queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.nodes: List[tuple] = []
+        self.dispatched: List[str] = []
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+
+def _count_cache(hits: int, misses: int):
+    probe = _current_probe.get()
+    if probe is not None:
+        probe.add(cache_hits=hits, cache_misses=misses)
+
+
+class CountingLocMemCache(LocMemCache):
+    """Local-memory cache counting hits and misses per replayed message."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        hit = value is not _MISSING
+        _count_cache(int(hit), int(not hit))
+        return value if hit else default
+
+
+try:
+    from django_redis.cache import RedisCache
+except ImportError:  # pragma: no cover - django_redis is a hard dependency in production
+    CountingRedisCache = None
+else:
+    class CountingRedisCache(RedisCache):
+        """Redis cache counting hits and misses per replayed message."""
+
+        def get(self, key, default=None, version=None, client=None):
+            value = super().get(key, _MISSING, version=version, client=client)
+            hit = value is not _MISSING
+            _count_cache(int(hit), int(not hit))
+            return value if hit else default
+
+        def get_many(self, keys, version=None, client=None):
+            keys = list(keys)
+            values = super().get_many(keys, version=version, client=client)
+            _count_cache(len(values), len(keys) - len(values))
+            return values
+
+
+def counting_caches(shared: bool = False) -> Dict[str, Any]:
+    """
+    CACHES setting for a replay.
+
+    By default every worker gets a private local-memory cache. With
+    ``shared`` the configured Redis cache is used, so workers share
+    entries the way production workers do.
+    """
+    if shared:
+        if CountingRedisCache is None:
+            raise ImportError('django_redis is required for a shared replay cache')
+        config = dict(settings.CACHES['default'])
+        config['BACKEND'] = f"{__name__}.CountingRedisCache"
+        return {'default': config}
+    return {'default': {'BACKEND': f"{__name__}.CountingLocMemCache", 'LOCATION': 'replay-load'}}
+
+
+def _count_query(execute, sql, params, many, context):
+    probe = _current_probe.get()
+    if probe is not None:
+        probe.add(queries=1)
+    return execute(sql, params, many, context)
+
+
+def _watch_connection(sender, connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def _timed_node(name: str, method):
+    @wraps(method)
+    async def run(self, state):
+        started = time.perf_counter()
+        try:
+            return await method(self, state)
+        finally:
+            probe = _current_probe.get()
+            if probe is not None:
+                probe.nodes.append((name, time.perf_counter() - started))
+    return run
+
+
+def _node_methods(cls) -> Dict[str, str]:
+    """Map orchestrator node methods to node labels."""
+    return {
+        attribute: re.sub(r'^_|_node$', '', attribute)
+        for attribute in vars(cls)
+        if attribute.startswith('_') and attribute.endswith('_node')
+    }
+
+
+def _summarize(sketch: QuantileSketch, scale: float = 1000) -> Dict[str, Optional[float]]:
+    if not sketch.count:
+        return {'count': 0, 'p50': None, 'p95': None, 'p99': None, 'mean': None, 'max': None}
+    return {
+        'count': sketch.count,
+        'p50': round(sketch.quantile(0.5) * scale, 3),
+        'p95': round(sketch.quantile(0.95) * scale, 3),
+        'p99': round(sketch.quantile(0.99) * scale, 3),
+        'mean': round(sketch.mean * scale, 3),
+        'max': round(sketch.max * scale, 3),
+    }
+
+
+class ReplayStats:
+    """Latency sketches and counters for one step, mergeable across workers."""
+
+    SERIES = ('end_to_end', 'queue_wait', 'service', 'webhook', 'pipeline')
+
+    def __init__(self):
+        self.latency = {name: QuantileSketch() for name in self.SERIES}
+        self.nodes: Dict[str, QuantileSketch] = {}
+        self.queries = QuantileSketch()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.completed = 0
+        self.errors: Counter = Counter()
+        self.first_arrival: Optional[float] = None
+        self.last_finish: Optional[float] = None
+
+    def _span(self, arrival: float, finished: float):
+        self.first_arrival = arrival if self.first_arrival is None else min(self.first_arrival, arrival)
+        self.last_finish = finished if self.last_finish is None else max(self.last_finish, finished)
+
+    def record(self, arrival: float, started: float, finished: float, webhook: float, pipeline: float, probe: _Probe):
+        """Record a processed message; times are seconds."""
+        self.completed += 1
+        self._span(arrival, finished)
+        self.latency['end_to_end'].add(finished - arrival)
+        self.latency['queue_wait'].add(max(0.0, started - arrival))
+        self.latency['service'].add(finished - started)
+        self.latency['webhook'].add(webhook)
+        self.latency['pipeline'].add(pipeline)
+        for name, seconds in probe.nodes:
+            self.nodes.setdefault(name, QuantileSketch()).add(seconds)
+        self.queries.add(probe.queries)
+        self.cache_hits += probe.cache_hits
+        self.cache_misses += probe.cache_misses
+
+    def record_error(self, arrival: float, finished: float, error: Exception):
+        """Record a message that failed."""
+        self._span(arrival, finished)
+        self.errors[f"{type(error).__name__}: {error}"[:200]] += 1
+
+    def merge(self, other: 'ReplayStats'):
+        """Fold another worker's stats into this one."""
+        for name in self.SERIES:
+            self.latency[name].merge(other.latency[name])
+        for name, sketch in other.nodes.items():
+            self.nodes.setdefault(name, QuantileSketch()).merge(sketch)
+        self.queries.merge(other.queries)
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.completed += other.completed
+        self.errors.update(other.errors)
+        if other.first_arrival is not None:
+            self._span(other.first_arrival, other.last_finish)
+
+    def summary(self, offered_rate: float, sent: int, concurrency: int) -> Dict[str, Any]:
+        """Report for the step, times in milliseconds."""
+        elapsed = (self.last_finish - self.first_arrival) if self.first_arrival is not None else 0.0
+        lookups = self.cache_hits + self.cache_misses
+        service_mean = self.latency['service'].mean
+        return {
+            'offered_rate': offered_rate,
+            'sent': sent,
+            'completed': self.completed,
+            'errors': sum(self.errors.values()),
+            'error_samples': [message for message, _ in self.errors.most_common(5)],
+            'elapsed_s': round(elapsed, 3),
+            'achieved_rate': round(self.completed / elapsed, 3) if elapsed else None,
+            # Little's law: busy workers = rate x service time
+            'capacity_estimate': round(concurrency / service_mean, 3) if service_mean else None,
+            'latency_ms': {name: _summarize(self.latency[name]) for name in self.SERIES},
+            'nodes_ms': {name: _summarize(self.nodes[name]) for name in sorted(self.nodes)},
+            'queries_per_message': {
+                'mean': round(self.queries.mean, 2) if self.queries.count else None,
+                'p95': self.queries.quantile(0.95) if self.queries.count else None,
+                'max': self.queries.max if self.queries.count else None,
+            },
+            'cache': {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'hit_ratio': round(self.cache_hits / lookups, 4) if lookups else None,
+            },
+        }
+
+
+def is_sustainable(step: Dict[str, Any], max_queue_wait_ms: float, max_error_ratio: float = 0.01) -> bool:
+    """
+    Whether the workers kept up with a step.
+
+    They keep up when they complete at least 95% of the offered rate,
+    the p95 queue wait stays under ``max_queue_wait_ms`` and no more
+    than ``max_error_ratio`` of the messages fail.
+    """
+    if not step['sent'] or step['errors'] > step['sent'] * max_error_ratio:
+        return False
+    if step['offered_rate'] and (step['achieved_rate'] or 0) < step['offered_rate'] * 0.95:
+        return False
+    queue_wait = step['latency_ms']['queue_wait']['p95']
+    return queue_wait is not None and queue_wait <= max_queue_wait_ms
+
+
+class ReplayHarness:
+    """
+    Replay a corpus against a synthetic tenant.
+
+    Use as a context manager: entering points the tenant's Twilio
+    credentials at the replay signing token, installs the node timers,
+    query counter and counting cache and routes queued processing to the
+    workers; leaving undoes all of it. Run inside stub_providers.
+
+    Args:
+        synthetic: SyntheticTenant to replay against
+        corpus: Messages to replay; steps cycle through them
+        concurrency: Number of workers
+        processes: Fork worker processes (True) or use threads
+        shared_cache: Use the configured Redis cache instead of a
+            private local-memory cache per worker
+    """
+
+    def __init__(self, synthetic, corpus: List[ReplayMessage], concurrency: int = 4,
+                 processes: bool = True, shared_cache: bool = False):
+        if not corpus:
+            raise ValueError('Replay corpus is empty')
+        if concurrency < 1:
+            raise ValueError('Replay needs at least one worker')
+        self.synthetic = synthetic
+        self.corpus = corpus
+        self.concurrency = concurrency
+        self.processes = processes
+        self.shared_cache = shared_cache
+        self._cursor = 0
+        self._stack: Optional[ExitStack] = None
+
+    def __enter__(self):
+        from apps.bot.langgraph.orchestrator import LangGraphOrchestrator
+        from apps.bot.tasks import process_inbound_message
+
+        stack = ExitStack()
+        try:
+            stack.enter_context(override_settings(
+                CACHES=counting_caches(self.shared_cache),
+                ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver'],
+                TWILIO_WEBHOOK_FAST_ACK=False,
+                BOT_BURST_COALESCING=False,
+            ))
+            for attribute, name in _node_methods(LangGraphOrchestrator).items():
+                stack.enter_context(patch.object(
+                    LangGraphOrchestrator, attribute, _timed_node(name, getattr(LangGraphOrchestrator, attribute))
+                ))
+            stack.enter_context(patch.object(process_inbound_message, 'delay', side_effect=self._capture))
+            connection_created.connect(_watch_connection)
+            stack.callback(connection_created.disconnect, _watch_connection)
+            for connection in connections.all():
+                _watch_connection(None, connection)
+                stack.callback(self._unwatch, connection)
+
+            tenant_settings = self.synthetic.tenant.settings
+            previous = (tenant_settings.twilio_sid, tenant_settings.twilio_token)
+            tenant_settings.twilio_sid, tenant_settings.twilio_token = REPLAY_TWILIO_SID, REPLAY_TWILIO_TOKEN
+            tenant_settings.save()
+            stack.callback(self._restore_credentials, tenant_settings, previous)
+        except BaseException:
+            stack.close()
+            raise
+        self._stack = stack
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+        return False
+
+    @staticmethod
+    def _unwatch(connection):
+        if _count_query in connection.execute_wrappers:
+            connection.execute_wrappers.remove(_count_query)
+
+    @staticmethod
+    def _restore_credentials(tenant_settings, previous):
+        tenant_settings.refresh_from_db()
+        if tenant_settings.twilio_sid == REPLAY_TWILIO_SID:
+            tenant_settings.twilio_sid, tenant_settings.twilio_token = previous
+            tenant_settings.save()
+
+    @staticmethod
+    def _capture(message_id):
+        probe = _current_probe.get()
+        if probe is None:
+            raise ReplayError('process_inbound_message queued outside a replayed message')
+        probe.dispatched.append(message_id)
+
+    def _next_messages(self, count: int) -> List[ReplayMessage]:
+        messages = [self.corpus[(self._cursor + index) % len(self.corpus)] for index in range(count)]
+        self._cursor += count
+        return messages
+
+    def _payload(self, message: ReplayMessage) -> Dict[str, str]:
+        return {
+            'AccountSid': REPLAY_TWILIO_SID,
+            'MessageSid': f"SM{uuid.uuid4().hex}",
+            'From': f"whatsapp:{message.phone}",
+            'To': f"whatsapp:{self.synthetic.tenant.whatsapp_number}",
+            'Body': message.body,
+            'NumMedia': '0',
+        }
+
+    @staticmethod
+    def _sign(url: str, payload: Dict[str, str]) -> str:
+        data = url + ''.join(f'{key}{value}' for key, value in sorted(payload.items()))
+        digest = hmac.new(REPLAY_TWILIO_TOKEN.encode('utf-8'), data.encode('utf-8'), hashlib.sha1).digest()
+        return base64.b64encode(digest).decode('utf-8')
+
+    def _replay_one(self, client: Client, stats: ReplayStats, arrival: float, message: ReplayMessage):
+        from apps.bot.tasks import process_inbound_message
+
+        path = reverse('integrations:twilio-webhook')
+        payload = self._payload(message)
+        probe = _Probe()
+        token = _current_probe.set(probe)
+        started = time.time()
+        try:
+            response = client.post(
+                path, payload, secure=True,
+                HTTP_X_TWILIO_SIGNATURE=self._sign(f"https://testserver{path}", payload)
+            )
+            webhook_done = time.time()
+            if response.status_code != 200 or not probe.dispatched:
+                raise ReplayError(
+                    f"Webhook returned {response.status_code} ({response.content[:100].decode(errors='replace')}) "
+                    f"without dispatching; see its WebhookLog"
+                )
+            for message_id in probe.dispatched:
+                result = process_inbound_message(message_id)
+                if result.get('status') == 'error':
+                    raise ReplayError(result.get('error') or 'processing failed')
+        except Exception as e:
+            stats.record_error(arrival, time.time(), e)
+        else:
+            finished = time.time()
+            stats.record(arrival, started, finished, webhook_done - started, finished - webhook_done, probe)
+        finally:
+            _current_probe.reset(token)
+
+    def _serve(self, work, results):
+        """Worker loop: replay messages until a None sentinel arrives."""
+        stats = ReplayStats()
+        client = Client()
+        try:
+            while True:
+                item = work.get()
+                if item is None:
+                    break
+                self._replay_one(client, stats, *item)
+        finally:
+            connections.close_all()
+            results.put(stats)
+
+    def _forked_worker(self, work, results):
+        from asgiref.sync import SyncToAsync
+
+        # The parent's sync_to_async thread does not survive the fork
+        SyncToAsync.single_thread_executor = ThreadPoolExecutor(max_workers=1)
+        self._serve(work, results)
+
+    def run_step(self, rate: float, messages: int, poisson: bool = True, seed: int = 0) -> Dict[str, Any]:
+        """
+        Offer ``messages`` messages at ``rate`` per second and wait for them.
+
+        Returns:
+            Step summary (see ReplayStats.summary)
+        """
+        batch = self._next_messages(messages)
+        offsets = arrival_offsets(messages, rate, poisson=poisson, seed=seed)
+
+        if self.processes:
+            # Children must open their own database connections
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            work, results = context.Queue(), context.Queue()
+            workers = [context.Process(target=self._forked_worker, args=(work, results), daemon=True)
+                       for _ in range(self.concurrency)]
+        else:
+            work, results = queue.Queue(), queue.Queue()
+            workers = [threading.Thread(target=self._serve, args=(work, results), daemon=True)
+                       for _ in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+
+        start = time.time()
+        for offset, message in zip(offsets, batch):
+            delay = start + offset - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            work.put((start + offset, message))
+        for _ in workers:
+            work.put(None)
+
+        stats = ReplayStats()
+        for _ in workers:
+            stats.merge(results.get())
+        for worker in workers:
+            worker.join()
+        return stats.summary(rate, messages, self.concurrency)
+
+    def ramp(self, rates: Iterable[float], messages: int, max_queue_wait_ms: float = 1000.0,
+             poisson: bool = True, seed: int = 0, on_step=None) -> Dict[str, Any]:
+        """
+        Run one step per rate and find the highest sustainable one.
+
+        Args:
+            rates: Offered rates in messages per second, in order
+            messages: Messages per step
+            max_queue_wait_ms: p95 queue wait a sustainable step may reach
+            poisson: Poisson arrivals (True) or evenly spaced
+            seed: Arrival seed; step i uses seed + i
+            on_step: Optional callable receiving each step summary
+
+        Returns:
+            dict with the steps and max_sustainable_rate (None when no
+            step was sustainable)
+        """
+        steps = []
+        for index, rate in enumerate(rates):
+            step = self.run_step(rate, messages, poisson=poisson, seed=seed + index)
+            step['sustainable'] = is_sustainable(step, max_queue_wait_ms)
+            steps.append(step)
+            if on_step:
+                on_step(step)
+        sustainable = [step['offered_rate'] for step in steps if step['sustainable']]
+        return {
+            'steps': steps,
+            'max_sustainable_rate': max(sustainable) if sustainable else None,
+        }
@@ -0,0 +1,184 @@
+"""
+Benchmark runner and JSON result files.
+
+Each benchmark is a setup callable (untimed, run before every round)
+and a timed callable. Rounds record wall time and the number of SQL
+queries issued on the calling thread's default connection (queries
+made from sync_to_async worker threads are not counted). Results are
+written as JSON so runs on different commits can be compared with
+compare_results.
+"""
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the result file changes
+RESULTS_SCHEMA_VERSION = 1
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings and query counts for one benchmark."""
+
+    name: str
+    timings_ms: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def median_ms(self) -> Optional[float]:
+        return statistics.median(self.timings_ms) if self.timings_ms else None
+
+    @property
+    def p95_ms(self) -> Optional[float]:
+        if not self.timings_ms:
+            return None
+        ordered = sorted(self.timings_ms)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    @property
+    def median_queries(self) -> Optional[float]:
+        return statistics.median(self.queries) if self.queries else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary statistics plus the raw samples."""
+        timings = self.timings_ms
+        return {
+            'name': self.name,
+            'rounds': len(timings),
+            'min_ms': min(timings) if timings else None,
+            'median_ms': self.median_ms,
+            'mean_ms': statistics.mean(timings) if timings else None,
+            'p95_ms': self.p95_ms,
+            'max_ms': max(timings) if timings else None,
+            'stdev_ms': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            'queries': self.median_queries,
+            'timings_ms': [round(value, 3) for value in timings],
+            'error': self.error,
+        }
+
+
+def run_benchmark(
+    name: str,
+    func: Callable[[Any], Any],
+    setup: Optional[Callable[[], Any]] = None,
+    rounds: int = 10,
+    warmup: int = 1
+) -> BenchmarkResult:
+    """
+    Time a callable over several rounds.
+
+    Args:
+        name: Benchmark name
+        func: Timed callable; receives the value returned by setup
+        setup: Untimed callable run before every round (warmup included)
+        rounds: Number of recorded rounds
+        warmup: Unrecorded rounds run first
+
+    Returns:
+        BenchmarkResult; an exception stops the benchmark and is recorded
+        in ``error`` instead of propagating
+    """
+    result = BenchmarkResult(name=name)
+    try:
+        for index in range(warmup + rounds):
+            argument = setup() if setup else None
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                func(argument)
+                elapsed = time.perf_counter() - started
+            if index >= warmup:
+                result.timings_ms.append(elapsed * 1000)
+                result.queries.append(len(captured.captured_queries))
+    except Exception as e:
+        logger.error(f"Benchmark {name} failed: {e}", exc_info=True)
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build_report(results: List[BenchmarkResult], metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Assemble the JSON document for a run."""
+    return {
+        'schema': RESULTS_SCHEMA_VERSION,
+        'created_at': timezone.now().isoformat(),
+        'commit': _git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'machine': platform.machine(),
+        },
+        'metadata': metadata or {},
+        'results': [result.to_dict() for result in results],
+    }
+
+
+def write_results(path: str, results: List[BenchmarkResult], metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Write a run to ``path`` as JSON and return the document."""
+    report = build_report(results, metadata)
+    with open(path, 'w') as handle:
+        json.dump(report, handle, indent=2, default=str)
+    return report
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Read a result file written by write_results."""
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    max_regression: float = 0.2
+) -> List[Dict[str, Any]]:
+    """
+    Compare two runs benchmark by benchmark.
+
+    A benchmark regresses when its median time grows by more than
+    ``max_regression`` (a fraction) or it issues more queries.
+
+    Returns:
+        One row per benchmark present in both runs
+    """
+    baseline_by_name = {row['name']: row for row in baseline.get('results', [])}
+    rows = []
+    for row in current.get('results', []):
+        before = baseline_by_name.get(row['name'])
+        if not before or before.get('median_ms') is None or row.get('median_ms') is None:
+            continue
+        change = (row['median_ms'] - before['median_ms']) / before['median_ms'] if before['median_ms'] else 0.0
+        more_queries = (row.get('queries') or 0) > (before.get('queries') or 0)
+        rows.append({
+            'name': row['name'],
+            'baseline_ms': before['median_ms'],
+            'current_ms': row['median_ms'],
+            'change': change,
+            'baseline_queries': before.get('queries'),
+            'current_queries': row.get('queries'),
+            'regressed': change > max_regression or more_queries,
+        })
+    return rows
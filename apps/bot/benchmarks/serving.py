@@ -0,0 +1,265 @@
+"""
+Concurrent connection capacity of the WSGI and ASGI serving paths.
+
+Both modes serve a webhook-shaped probe (a form-encoded POST whose view
+waits on a simulated provider call) through the project's real
+middleware stack, driven in process without sockets:
+
+- ``wsgi``: a synchronous probe under Django's WSGIHandler with a fixed
+  pool of worker threads, like gunicorn sync or gthread workers.
+- ``asgi``: an async probe under Django's ASGIHandler with every
+  connection a coroutine on one event loop, like one uvicorn worker.
+
+Clients keep ``connections`` requests open at once. Each mode reports
+throughput, latency percentiles and the peak number of requests inside
+the view at once, which is how many slow provider calls one worker can
+have outstanding. The probe waits with time.sleep or asyncio.sleep, so
+the numbers measure the serving model and middleware, not the database.
+"""
+import asyncio
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.http import HttpResponse
+from django.test import override_settings
+from django.urls import path
+
+from apps.bot.benchmarks.replay import LatencyDistribution, _summarize
+from apps.bot.services.monitoring.quantile_sketch import QuantileSketch
+
+# Under /v1/webhooks/ so tenant resolution and rate limiting are skipped,
+# as they are for the signature-verified provider webhooks
+PROBE_PATHS = {
+    'wsgi': '/v1/webhooks/serving-probe/sync/',
+    'asgi': '/v1/webhooks/serving-probe/async/',
+}
+
+SERVING_MODES = tuple(PROBE_PATHS)
+
+
+class _InFlight:
+    """Requests currently inside a probe view and the peak seen."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.current = self.peak = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.current -= 1
+
+
+_in_flight = _InFlight()
+_probe_latency: Callable[[], float] = LatencyDistribution(0)
+
+
+def sync_probe(request):
+    """Webhook-shaped view blocking on a simulated provider call."""
+    with _in_flight:
+        request.POST.get('Body')
+        time.sleep(_probe_latency())
+    return HttpResponse('OK')
+
+
+async def async_probe(request):
+    """Webhook-shaped view awaiting a simulated provider call."""
+    with _in_flight:
+        request.POST.get('Body')
+        await asyncio.sleep(_probe_latency())
+    return HttpResponse('OK')
+
+
+# What csrf_exempt sets; the decorator itself wraps views in a sync
+# function on Django 4.2
+sync_probe.csrf_exempt = True
+async_probe.csrf_exempt = True
+
+# ROOT_URLCONF while a benchmark runs
+urlpatterns = [
+    path(PROBE_PATHS['wsgi'].lstrip('/'), sync_probe),
+    path(PROBE_PATHS['asgi'].lstrip('/'), async_probe),
+]
+
+_BODY = urlencode({
+    'MessageSid': 'SMserving-probe',
+    'From': 'whatsapp:+254700000001',
+    'Body': 'Do you have the leather bag in brown?',
+    'NumMedia': '0',
+}).encode('utf-8')
+
+
+def _wsgi_request(handler: WSGIHandler) -> int:
+    environ = {
+        'REQUEST_METHOD': 'POST',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': PROBE_PATHS['wsgi'],
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '443',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': 'testserver',
+        'HTTP_X_FORWARDED_PROTO': 'https',
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(_BODY)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'https',
+        'wsgi.input': io.BytesIO(_BODY),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    response = handler(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        b''.join(response)
+    finally:
+        # Fires request_finished, as a WSGI server would
+        response.close()
+    return int(status[0].split()[0])
+
+
+async def _asgi_request(handler: ASGIHandler) -> int:
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'POST',
+        'scheme': 'https',
+        'path': PROBE_PATHS['asgi'],
+        'raw_path': PROBE_PATHS['asgi'].encode('ascii'),
+        'root_path': '',
+        'query_string': b'',
+        'headers': [
+            (b'host', b'testserver'),
+            (b'x-forwarded-proto', b'https'),
+            (b'content-type', b'application/x-www-form-urlencoded'),
+            (b'content-length', str(len(_BODY)).encode('ascii')),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 443),
+    }
+    disconnected = asyncio.Event()
+    status = []
+
+    async def receive():
+        if not status:
+            status.append(None)
+            return {'type': 'http.request', 'body': _BODY, 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    try:
+        await handler(scope, receive, send)
+    finally:
+        disconnected.set()
+    return status[1]
+
+
+async def _drive(request: Callable, connections: int, requests: int) -> Dict[str, Any]:
+    """Closed loop: ``connections`` clients send ``requests`` in total."""
+    latency = QuantileSketch()
+    errors: List[str] = []
+    remaining = [requests]
+
+    async def client():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            sent = time.perf_counter()
+            try:
+                status = await request()
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}"[:200])
+                continue
+            if status != 200:
+                errors.append(f"HTTP {status}")
+                continue
+            latency.add(time.perf_counter() - sent)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    return {
+        'completed': latency.count,
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(latency.count / elapsed, 3) if elapsed else None,
+        'latency_ms': _summarize(latency),
+    }
+
+
+def run_serving_benchmark(mode: str, connections: int = 100, requests: int = 500,
+                          workers: int = 4, latency: Optional[Callable[[], float]] = None) -> Dict[str, Any]:
+    """
+    Serve ``requests`` probe requests from ``connections`` concurrent clients.
+
+    Args:
+        mode: 'wsgi' or 'asgi'
+        connections: Clients with a request open at once
+        requests: Total requests to send
+        workers: WSGI worker threads (ignored for ASGI, which uses one loop)
+        latency: Simulated provider latency in seconds per call
+            (default: LatencyDistribution(200, 600))
+
+    Returns:
+        Report with throughput, latency percentiles (ms) and
+        ``peak_in_flight``, the most requests inside the view at once
+    """
+    global _probe_latency
+
+    if mode not in PROBE_PATHS:
+        raise ValueError(f"Unknown serving mode {mode!r}; expected one of {', '.join(SERVING_MODES)}")
+    if connections < 1 or requests < 1 or workers < 1:
+        raise ValueError('Connections, requests and workers must be at least 1')
+
+    with override_settings(
+        ROOT_URLCONF=__name__,
+        ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver'],
+    ):
+        _probe_latency = latency or LatencyDistribution(200, 600)
+        _in_flight.reset()
+        try:
+            if mode == 'wsgi':
+                handler = WSGIHandler()
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wsgi-worker') as pool:
+                    async def request():
+                        loop = asyncio.get_running_loop()
+                        return await loop.run_in_executor(pool, _wsgi_request, handler)
+                    result = asyncio.run(_drive(request, connections, requests))
+            else:
+                handler = ASGIHandler()
+                result = asyncio.run(_drive(lambda: _asgi_request(handler), connections, requests))
+        finally:
+            _probe_latency = LatencyDistribution(0)
+
+    return {
+        'mode': mode,
+        'connections': connections,
+        'workers': workers if mode == 'wsgi' else 1,
+        'peak_in_flight': _in_flight.peak,
+        **result,
+    }
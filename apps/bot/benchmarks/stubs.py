@@ -0,0 +1,261 @@
+"""
+Stub providers for benchmarks.
+
+Stand-ins for the OpenAI client (embeddings and chat completions), the
+LLM providers, the Pinecone vector store and Twilio. Each call sleeps
+for an injectable latency so a run can model network time separately
+from the CPU and database work being measured. A latency is either a
+fixed number of seconds or a callable returning one per call (see
+replay.LatencyDistribution).
+"""
+import json
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import override_settings
+
+from apps.bot.benchmarks.generators import hashed_embedding
+from apps.bot.services.llm.base import LLMProvider, LLMResponse, ModelInfo
+from apps.bot.services.vector_store import VectorSearchResult, VectorStore
+
+# Superset of the keys the structured-output nodes validate, so every
+# node parses the stub reply instead of taking its error path
+DEFAULT_LLM_REPLY = {
+    'intent': 'sales_discovery',
+    'confidence': 0.9,
+    'notes': 'benchmark stub',
+    'suggested_journey': 'sales',
+    'classification': 'business',
+    'recommended_action': 'proceed',
+    'response_language': 'en',
+    'should_ask_language_question': False,
+    'response': 'Here are some options from our catalog.',
+}
+
+
+def _sleep(latency):
+    seconds = latency() if callable(latency) else latency
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class StubEmbeddingClient:
+    """OpenAI client stand-in serving hashed embeddings and canned chat replies."""
+
+    def __init__(self, latency: float = 0.0, dimensions: int = 1536, reply: str = 'Summary unavailable.'):
+        self.latency = latency
+        self.dimensions = dimensions
+        self.reply = reply
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.embeddings = SimpleNamespace(create=self._create_embedding)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def _create_embedding(self, model: str, input, **kwargs):
+        self._count()
+        _sleep(self.latency)
+        texts = input if isinstance(input, list) else [input]
+        data = [
+            SimpleNamespace(embedding=hashed_embedding(text, self.dimensions), index=index)
+            for index, text in enumerate(texts)
+        ]
+        tokens = sum(_estimate_tokens(text) for text in texts)
+        return SimpleNamespace(data=data, model=model, usage=SimpleNamespace(total_tokens=tokens, prompt_tokens=tokens))
+
+    def _create_completion(self, model: str, messages, **kwargs):
+        self._count()
+        _sleep(self.latency)
+        tokens = sum(_estimate_tokens(message.get('content', '')) for message in messages)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply), finish_reason='stop')],
+            model=model,
+            usage=SimpleNamespace(prompt_tokens=tokens, completion_tokens=20, total_tokens=tokens + 20)
+        )
+
+
+class StubLLMProvider(LLMProvider):
+    """LLM provider answering every call with a fixed JSON reply."""
+
+    def __init__(self, api_key: str = 'benchmark', latency: float = 0.0, reply: Optional[Dict[str, Any]] = None, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.latency = latency
+        self.reply = json.dumps(reply or DEFAULT_LLM_REPLY)
+        self.calls = 0
+
+    def generate(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        **kwargs
+    ) -> LLMResponse:
+        """Return the canned reply after the configured latency."""
+        self.calls += 1
+        _sleep(self.latency)
+        input_tokens = sum(_estimate_tokens(message.get('content', '')) for message in messages)
+        output_tokens = _estimate_tokens(self.reply)
+        return LLMResponse(
+            content=self.reply,
+            model=model,
+            provider=self.provider_name,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens,
+            estimated_cost=Decimal('0'),
+            finish_reason='stop',
+            metadata={}
+        )
+
+    def call_llm(self, system_prompt: str, user_message: str, model: str, **kwargs) -> LLMResponse:
+        """Prompt-pair entry point used by LLMRouter."""
+        return self.generate(
+            messages=[
+                {'role': 'system', 'content': system_prompt},
+                {'role': 'user', 'content': user_message},
+            ],
+            model=model,
+            **kwargs
+        )
+
+    def get_available_models(self) -> List[ModelInfo]:
+        """Single free stub model."""
+        return [ModelInfo(
+            name='stub', display_name='Stub', provider=self.provider_name, context_window=128000,
+            input_cost_per_1k=Decimal('0'), output_cost_per_1k=Decimal('0'),
+            capabilities=['chat'], description='Benchmark stub'
+        )]
+
+    @property
+    def provider_name(self) -> str:
+        return 'stub'
+
+
+class StubVectorStore(VectorStore):
+    """In-memory vector store with brute-force cosine search."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.namespaces: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = None) -> Dict[str, Any]:
+        """Store vectors by id."""
+        _sleep(self.latency)
+        store = self.namespaces.setdefault(namespace or '', {})
+        for vector in vectors:
+            store[vector['id']] = vector
+        return {'upserted_count': len(vectors)}
+
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter_dict: Dict[str, Any] = None,
+        namespace: str = None,
+        min_score: Optional[float] = None
+    ) -> List[VectorSearchResult]:
+        """Score every stored vector in the namespace."""
+        _sleep(self.latency)
+        results = []
+        for vector in self.namespaces.get(namespace or '', {}).values():
+            metadata = vector.get('metadata') or {}
+            if filter_dict and any(metadata.get(key) != value for key, value in filter_dict.items()):
+                continue
+            score = sum(a * b for a, b in zip(query_vector, vector['values']))
+            if min_score is None or score >= min_score:
+                results.append(VectorSearchResult(id=vector['id'], score=score, metadata=metadata))
+        results.sort(key=lambda result: result.score, reverse=True)
+        return results[:top_k]
+
+    def delete(self, ids: List[str] = None, filter_dict: Dict[str, Any] = None, namespace: str = None) -> Dict[str, Any]:
+        """Delete vectors by id."""
+        store = self.namespaces.get(namespace or '', {})
+        deleted = [store.pop(vector_id) for vector_id in ids or [] if vector_id in store]
+        return {'deleted_count': len(deleted)}
+
+
+class StubTwilioService:
+    """Twilio stand-in that accepts every send."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent = []
+
+    def send_whatsapp(self, to: str, body: str, media_url: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Record the message and report it queued."""
+        _sleep(self.latency)
+        self.sent.append((to, body))
+        return {'sid': f"SM{uuid.uuid4().hex}", 'status': 'queued', 'to': to, 'body': body}
+
+    def retry_send_whatsapp(self, to: str, body: str, max_retries: int = 3, media_url: Optional[str] = None,
+                            message_id: Optional[str] = None) -> Dict[str, Any]:
+        """Same as send_whatsapp; stub sends never fail."""
+        return self.send_whatsapp(to, body, media_url=media_url)
+
+
+@contextmanager
+def stub_providers(
+    llm_latency: float = 0.0,
+    embedding_latency: float = 0.0,
+    vector_latency: float = 0.0,
+    twilio_latency: float = 0.0,
+    dimensions: int = 1536
+):
+    """
+    Route every external provider call to the stubs.
+
+    Patches the OpenAI client in the embedding, knowledge base and
+    summary services, both LLMProviderFactory constructors, the Pinecone
+    factory, the Twilio factories and the queued send task. Latencies
+    are in seconds, or callables returning seconds.
+
+    Yields:
+        SimpleNamespace with the llm, openai, vector_store and twilio stubs
+    """
+    stubs = SimpleNamespace(
+        llm=StubLLMProvider(latency=llm_latency),
+        openai=StubEmbeddingClient(latency=embedding_latency, dimensions=dimensions),
+        vector_store=StubVectorStore(latency=vector_latency),
+        twilio=StubTwilioService(latency=twilio_latency),
+    )
+    openai_factory = lambda *args, **kwargs: stubs.openai
+    provider_factory = classmethod(lambda cls, *args, **kwargs: stubs.llm)
+    twilio_factory = lambda *args, **kwargs: stubs.twilio
+
+    from apps.bot.services.llm.factory import LLMProviderFactory
+    from apps.bot.services.vector_store import PineconeVectorStore
+    from apps.integrations.tasks import send_whatsapp_message
+
+    with ExitStack() as stack:
+        stack.enter_context(override_settings(OPENAI_API_KEY=settings.OPENAI_API_KEY or 'benchmark-stub'))
+        for module in (
+            'apps.bot.services.knowledge_base_service',
+            'apps.bot.services.embedding_service',
+            'apps.bot.services.conversation_summary_service',
+        ):
+            stack.enter_context(patch(f"{module}.OpenAI", side_effect=openai_factory))
+        stack.enter_context(patch.object(LLMProviderFactory, 'create_from_tenant_settings', provider_factory))
+        stack.enter_context(patch.object(LLMProviderFactory, 'get_provider', provider_factory))
+        stack.enter_context(patch.object(
+            PineconeVectorStore, 'create_from_settings', classmethod(lambda cls: stubs.vector_store)
+        ))
+        for module in ('apps.integrations.services.twilio_service', 'apps.messaging.services.messaging_service'):
+            stack.enter_context(patch(f"{module}.create_twilio_service_for_tenant", side_effect=twilio_factory))
+        # Queued deliveries must never reach a real broker
+        stack.enter_context(patch.object(send_whatsapp_message, 'delay'))
+        yield stubs
@@ -0,0 +1,141 @@
+"""
+Hot-path benchmark definitions.
+
+Every entry in BENCHMARKS takes a SyntheticTenant and returns a
+``(setup, func)`` pair for run_benchmark. Setups clear the default
+cache so each round measures the cold path; run the suite with an
+isolated cache (run_benchmarks swaps in a local-memory backend).
+Writing benchmarks run each round inside a rolled-back transaction so
+rounds stay identical and no queued delivery is ever committed.
+"""
+import itertools
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.messaging.models import Message, MessageCampaign
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _rolled_back(func):
+    """Run func in a transaction that is always rolled back."""
+    def run(argument):
+        try:
+            with transaction.atomic():
+                func(argument)
+                raise _Rollback()
+        except _Rollback:
+            pass
+    return run
+
+
+def _cold(values):
+    """Setup that clears the cache and hands out the next value."""
+    cycle = itertools.cycle(values)
+
+    def setup():
+        cache.clear()
+        return next(cycle)
+    return setup
+
+
+def build_context(synthetic):
+    """ContextBuilderService.build_context on the longest conversation."""
+    from apps.bot.services.context_builder_service import ContextBuilderService
+    from apps.bot.services.knowledge_base_service import KnowledgeBaseService
+
+    builder = ContextBuilderService(knowledge_service=KnowledgeBaseService(api_key='benchmark'))
+    conversation = synthetic.busiest_conversation()
+    message = Message.objects.filter(conversation=conversation, direction='in').order_by('-created_at').first()
+
+    return _cold([message]), lambda message: builder.build_context(conversation, message, synthetic.tenant)
+
+
+def match_product(synthetic):
+    """FuzzyMatcherService.match_product over the whole catalog."""
+    from apps.bot.services.fuzzy_matcher_service import FuzzyMatcherService
+
+    matcher = FuzzyMatcherService()
+    return _cold(synthetic.product_queries()), lambda query: matcher.match_product(query, synthetic.tenant)
+
+
+def knowledge_search(synthetic):
+    """KnowledgeBaseService.search with stub embeddings."""
+    from apps.bot.services.knowledge_base_service import KnowledgeBaseService
+
+    service = KnowledgeBaseService(api_key='benchmark')
+    return _cold(synthetic.knowledge_queries()), lambda query: service.search(synthetic.tenant, query)
+
+
+def find_availability(synthetic):
+    """BookingService.find_availability for one service over the next week."""
+    from apps.services.services.booking_service import BookingService
+
+    booking = BookingService(synthetic.tenant)
+    service_id = str(synthetic.services[0].id)
+    from_dt = (timezone.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    to_dt = from_dt + timedelta(days=7)
+
+    return _cold([service_id]), lambda service_id: booking.find_availability(service_id, from_dt, to_dt)
+
+
+def execute_campaign(synthetic):
+    """CampaignService.execute_campaign to every customer of the tenant."""
+    from apps.messaging.services.campaign_service import CampaignService
+
+    service = CampaignService()
+
+    def setup():
+        cache.clear()
+        return MessageCampaign(
+            tenant=synthetic.tenant,
+            name='Benchmark campaign',
+            message_content='New arrivals this week - reply SHOP to browse.',
+            target_criteria={},
+            status='draft'
+        )
+
+    def run(campaign):
+        campaign.save()
+        service.execute_campaign(campaign)
+
+    return setup, _rolled_back(run)
+
+
+def process_inbound_message(synthetic):
+    """The full inbound pipeline (orchestrator, state store, reply) on stubs."""
+    from apps.bot.tasks import process_inbound_message as task
+
+    conversation = synthetic.busiest_conversation()
+    texts = itertools.cycle(synthetic.product_queries())
+
+    def setup():
+        cache.clear()
+        return Message.objects.create(
+            conversation=conversation,
+            direction='in',
+            message_type='customer_inbound',
+            text=f"Do you have {next(texts)}?"
+        )
+
+    def run(message):
+        result = task(str(message.id))
+        if result.get('status') == 'error':
+            raise RuntimeError(result.get('error'))
+
+    return setup, run
+
+
+BENCHMARKS = {
+    'build_context': build_context,
+    'match_product': match_product,
+    'knowledge_search': knowledge_search,
+    'find_availability': find_availability,
+    'execute_campaign': execute_campaign,
+    'process_inbound_message': process_inbound_message,
+}
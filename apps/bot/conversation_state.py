@@ -4,7 +4,8 @@ ConversationState schema and management for LangGraph orchestration.
 Implements the canonical ConversationState dataclass with exact fields from design
 and provides serialization/deserialization for persistence.
 """
-from dataclasses import dataclass, field, asdict
+from copy import deepcopy
+from dataclasses import dataclass, field, fields
 from typing import Any, Dict, List, Optional, Literal
 import json
 from datetime import datetime
@@ -23,7 +24,7 @@ Lang = Literal["en", "sw", "sheng", "mixed"]
 GovernorClass = Literal["business", "casual", "spam", "abuse"]
 
 
-@dataclass
+@dataclass(slots=True)
 class ConversationState:
     """
     Canonical ConversationState dataclass with exact fields from design.
@@ -33,6 +34,11 @@ class ConversationState:
     
     All fields are exactly as specified in the design document to ensure
     compatibility with the LangGraph state machine.
+    
+    Inside the graph, state moves between nodes as a shallow dict
+    (to_graph_state/from_graph_state) that shares list and dict values
+    with the dataclass, so nodes never deep-copy carts or catalog results.
+    to_dict/to_json make full copies and belong at the persistence boundary.
     """
     
     # Identity & scoping
@@ -130,15 +136,57 @@ class ConversationState:
     
     # General metadata for storing temporary data across nodes
     metadata: Dict[str, Any] = field(default_factory=dict)  # Temporary metadata storage
+    
+    # Tenant runtime snapshot attached by the tenant resolver and carried
+    # between nodes for this turn; transient, never serialized
+    tenant_runtime: Optional[Any] = field(
+        default=None, repr=False, compare=False, metadata={'transient': True}
+    )
 
     def to_dict(self) -> Dict[str, Any]:
         """
         Convert ConversationState to dictionary for serialization.
         
+        Transient fields (tenant_runtime) are left out.
+        
         Returns:
             Dict representation suitable for JSON serialization
         """
-        return asdict(self)
+        return {name: deepcopy(getattr(self, name)) for name in PERSISTED_FIELD_NAMES}
+    
+    def to_graph_state(self) -> Dict[str, Any]:
+        """
+        Convert ConversationState to a LangGraph state dict without copying.
+        
+        Values are shared with this instance, so nested lists and dicts
+        mutated by later nodes are the same objects.
+        
+        Returns:
+            Shallow dict of all state fields
+        """
+        return {name: getattr(self, name) for name in STATE_FIELD_NAMES}
+    
+    @classmethod
+    def from_graph_state(cls, data: Dict[str, Any]) -> 'ConversationState':
+        """
+        Create ConversationState from a LangGraph state dict without copying.
+        
+        Keys that are not state fields (routing flags set by the graph)
+        are ignored.
+        
+        Args:
+            data: State dict produced by to_graph_state or a graph node
+            
+        Returns:
+            ConversationState sharing nested values with data
+            
+        Raises:
+            ValueError: If required fields are missing
+        """
+        for field_name in REQUIRED_FIELD_NAMES:
+            if field_name not in data:
+                raise ValueError(f"Required field '{field_name}' missing from state data")
+        return cls(**{name: data[name] for name in STATE_FIELD_NAMES if name in data})
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ConversationState':
@@ -358,6 +406,13 @@ class ConversationState:
         self.handoff_ticket_id = None
 
 
+STATE_FIELD_NAMES = tuple(f.name for f in fields(ConversationState))
+PERSISTED_FIELD_NAMES = tuple(
+    f.name for f in fields(ConversationState) if not f.metadata.get('transient')
+)
+REQUIRED_FIELD_NAMES = ('tenant_id', 'conversation_id', 'request_id')
+
+
 class ConversationStateManager:
     """
     Manager for ConversationState persistence and retrieval.
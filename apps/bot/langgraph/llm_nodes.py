@@ -12,6 +12,7 @@ import json
 from apps.bot.langgraph.nodes import LLMNode
 from apps.bot.conversation_state import ConversationState, Intent, Journey, Lang, GovernorClass
 from apps.bot.services.llm_router import LLMRouter
+from apps.bot.services.tenant_runtime import TenantRuntimeService
 
 logger = logging.getLogger(__name__)
 
@@ -120,12 +121,12 @@ Return JSON with exact schema:
             Intent classification result with exact JSON schema
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
             await llm_router._ensure_config_loaded()
             
             # Check budget first
@@ -483,12 +484,12 @@ Return JSON with exact schema:
             Language policy result with exact JSON schema
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
             await llm_router._ensure_config_loaded()
             
             # Check budget first
@@ -885,12 +886,12 @@ Return JSON with exact schema:
             Governance classification result with exact JSON schema
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
             await llm_router._ensure_config_loaded()
             
             # Check budget first
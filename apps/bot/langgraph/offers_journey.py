@@ -14,6 +14,7 @@ import json
 from apps.bot.conversation_state import ConversationState
 from apps.bot.langgraph.nodes import LLMNode
 from apps.bot.services.llm_router import LLMRouter
+from apps.bot.services.tenant_runtime import TenantRuntimeService
 from apps.bot.tools.registry import get_tool
 
 logger = logging.getLogger(__name__)
@@ -110,12 +111,12 @@ You respond with natural language text only. No JSON or structured output."""
             Offers answer result
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
 
             await llm_router._ensure_config_loaded()
 
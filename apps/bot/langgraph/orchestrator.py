@@ -8,7 +8,6 @@ comprehensive error handling and observability.
 import logging
 import time
 from typing import Dict, Any, Optional, List, Callable
-from dataclasses import asdict
 
 from langgraph.graph import StateGraph, END
 from langgraph.graph.state import CompiledStateGraph
@@ -28,6 +27,8 @@ from apps.bot.services.observability import (
 from apps.bot.services.error_handling import ComponentType
 from apps.bot.services.logging_service import enhanced_logging_service, performance_tracking
 from apps.bot.services.metrics_collector import metrics_collector
+from apps.bot.services.monitoring.node_metrics import instrument_node
+from apps.bot.services.tenant_runtime import TenantRuntimeService
 
 logger = logging.getLogger(__name__)
 
@@ -62,31 +63,35 @@ class LangGraphOrchestrator:
         # Create state graph with dict schema instead of ConversationState
         workflow = StateGraph(dict)
         
+        def add_node(name, node):
+            # Per-node timing, queries, cache and token metrics
+            workflow.add_node(name, instrument_node(name, node))
+        
         # Entry nodes
-        workflow.add_node("webhook_entry", self._webhook_entry_node)
-        workflow.add_node("tenant_resolver", self._tenant_resolver_node)
-        workflow.add_node("customer_resolver", self._customer_resolver_node)
+        add_node("webhook_entry", self._webhook_entry_node)
+        add_node("tenant_resolver", self._tenant_resolver_node)
+        add_node("customer_resolver", self._customer_resolver_node)
         
         # Classification nodes
-        workflow.add_node("intent_classify", self._intent_classify_node)
-        workflow.add_node("language_policy", self._language_policy_node)
-        workflow.add_node("governor_spam_casual", self._governor_node)
+        add_node("intent_classify", self._intent_classify_node)
+        add_node("language_policy", self._language_policy_node)
+        add_node("governor_spam_casual", self._governor_node)
         
         # Journey router
-        workflow.add_node("journey_router", self._journey_router_node)
+        add_node("journey_router", self._journey_router_node)
         
         # Journey subgraphs (placeholders for now)
-        workflow.add_node("sales_journey", self._sales_journey_node)
-        workflow.add_node("support_journey", self._support_journey_node)
-        workflow.add_node("orders_journey", self._orders_journey_node)
-        workflow.add_node("offers_journey", self._offers_journey_node)
-        workflow.add_node("preferences_journey", self._preferences_journey_node)
-        workflow.add_node("governance_response", self._governance_response_node)
-        workflow.add_node("unknown_handler", self._unknown_handler_node)
+        add_node("sales_journey", self._sales_journey_node)
+        add_node("support_journey", self._support_journey_node)
+        add_node("orders_journey", self._orders_journey_node)
+        add_node("offers_journey", self._offers_journey_node)
+        add_node("preferences_journey", self._preferences_journey_node)
+        add_node("governance_response", self._governance_response_node)
+        add_node("unknown_handler", self._unknown_handler_node)
         
         # Response generation and exit
-        workflow.add_node("response_generator", self._response_generator_node)
-        workflow.add_node("state_persistence", self._state_persistence_node)
+        add_node("response_generator", self._response_generator_node)
+        add_node("state_persistence", self._state_persistence_node)
         
         # Set entry point
         workflow.set_entry_point("webhook_entry")
@@ -209,14 +214,14 @@ class LangGraphOrchestrator:
                             }
                         )
                         
-                        # Convert state to dict for LangGraph processing
-                        state_dict = asdict(state)
+                        # Shallow dict for LangGraph; nested values are shared, not copied
+                        state_dict = state.to_graph_state()
                         
                         # Run the graph
                         result = await self._graph.ainvoke(state_dict, config=config)
                         
                         # Convert result back to ConversationState
-                        updated_state = ConversationState.from_dict(result)
+                        updated_state = ConversationState.from_graph_state(result)
                         updated_state.validate()
                         
                         # Log successful completion
@@ -284,7 +289,7 @@ class LangGraphOrchestrator:
         Returns:
             Journey name for routing
         """
-        conv_state = ConversationState.from_dict(state)
+        conv_state = ConversationState.from_graph_state(state)
         route_decision = self.router.route_conversation(conv_state)
         
         # Handle clarification requests for medium confidence
@@ -339,6 +344,17 @@ class LangGraphOrchestrator:
         """Resolve tenant context using tenant_get_context tool."""
         # TODO: Implement tenant_get_context tool call
         logger.debug(f"Resolving tenant context for tenant_id: {state.get('tenant_id')}")
+        # Attach the runtime snapshot once; later nodes read it from the state
+        runtime = state.get("tenant_runtime")
+        if runtime is None or runtime.tenant_id != str(state["tenant_id"]):
+            try:
+                state["tenant_runtime"] = await TenantRuntimeService.aget(state["tenant_id"])
+            except Exception as e:
+                # Nodes resolve it themselves (and fall back) if it is missing
+                logger.warning(
+                    f"Failed to resolve tenant runtime: {e}",
+                    extra={"tenant_id": state.get("tenant_id")}
+                )
         return state
     
     async def _customer_resolver_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
@@ -353,7 +369,7 @@ class LangGraphOrchestrator:
         from apps.bot.langgraph.llm_nodes import IntentClassificationNode
         
         # Convert dict state to ConversationState for node processing
-        conv_state = ConversationState.from_dict(state)
+        conv_state = ConversationState.from_graph_state(state)
         
         # Track node execution start
         observability_service.track_journey_start(conv_state.conversation_id, "intent_classification")
@@ -400,7 +416,7 @@ class LangGraphOrchestrator:
             )
             
             # Convert back to dict for LangGraph
-            return asdict(updated_state)
+            return updated_state.to_graph_state()
             
         except Exception as e:
             # Log node execution failure
@@ -425,7 +441,7 @@ class LangGraphOrchestrator:
         from apps.bot.langgraph.llm_nodes import LanguagePolicyNode
         
         # Convert dict state to ConversationState for node processing
-        conv_state = ConversationState.from_dict(state)
+        conv_state = ConversationState.from_graph_state(state)
         
         # Track performance
         start_time = time.time()
@@ -464,7 +480,7 @@ class LangGraphOrchestrator:
             )
             
             # Convert back to dict for LangGraph
-            return asdict(updated_state)
+            return updated_state.to_graph_state()
             
         except Exception as e:
             # Log node execution failure
@@ -482,7 +498,7 @@ class LangGraphOrchestrator:
         from apps.bot.langgraph.llm_nodes import ConversationGovernorNode
         
         # Convert dict state to ConversationState for node processing
-        conv_state = ConversationState.from_dict(state)
+        conv_state = ConversationState.from_graph_state(state)
         
         # Create and execute conversation governor node
         governor_node = ConversationGovernorNode()
@@ -492,7 +508,7 @@ class LangGraphOrchestrator:
             updated_state = await governor_node.execute(conv_state)
             
             # Convert back to dict for LangGraph
-            return asdict(updated_state)
+            return updated_state.to_graph_state()
             
         except Exception as e:
             logger.error(
@@ -507,7 +523,7 @@ class LangGraphOrchestrator:
             
             # Fallback to business classification
             conv_state.update_governor("business", 0.5)
-            return asdict(conv_state)
+            return conv_state.to_graph_state()
     
     async def _journey_router_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -515,7 +531,7 @@ class LangGraphOrchestrator:
         
         Implements journey transition tracking and state updates for observability.
         """
-        conv_state = ConversationState.from_dict(state)
+        conv_state = ConversationState.from_graph_state(state)
         
         # Store previous journey for transition tracking
         previous_journey = conv_state.journey
@@ -646,13 +662,13 @@ class LangGraphOrchestrator:
         logger.debug("Processing offers journey")
         
         # Convert dict state to ConversationState
-        conversation_state = ConversationState.from_dict(state)
+        conversation_state = ConversationState.from_graph_state(state)
         
         # Execute offers journey
         updated_state = await offers_journey_entry(conversation_state)
         
         # Convert back to dict and return
-        return updated_state.to_dict()
+        return updated_state.to_graph_state()
     
     async def _preferences_journey_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Handle preferences journey workflow."""
@@ -662,13 +678,13 @@ class LangGraphOrchestrator:
         
         try:
             # Convert dict state to ConversationState for journey processing
-            conv_state = ConversationState.from_dict(state)
+            conv_state = ConversationState.from_graph_state(state)
             
             # Execute preferences journey subgraph
             updated_state = await preferences_journey_entry(conv_state)
             
             # Convert back to dict for LangGraph
-            return asdict(updated_state)
+            return updated_state.to_graph_state()
             
         except Exception as e:
             logger.error(
@@ -699,7 +715,7 @@ class LangGraphOrchestrator:
         - abuse_stop: Stop conversation due to abuse
         - escalation: Handle human handoff
         """
-        conv_state = ConversationState.from_dict(state)
+        conv_state = ConversationState.from_graph_state(state)
         
         classification = conv_state.governor_classification
         casual_turns = conv_state.casual_turns
@@ -837,7 +853,7 @@ class LangGraphOrchestrator:
                 )
             
             # Update state with conversation state changes
-            state.update(asdict(conv_state))
+            state.update(conv_state.to_graph_state())
             
             return state
             
@@ -847,7 +863,7 @@ class LangGraphOrchestrator:
             # Fallback response
             state["response_text"] = "I'm experiencing technical difficulties. Please contact our support team directly for assistance."
             conv_state.set_escalation(f"Escalation handler error: {str(e)}")
-            state.update(asdict(conv_state))
+            state.update(conv_state.to_graph_state())
             
             return state
     
@@ -884,7 +900,7 @@ class LangGraphOrchestrator:
         - For low confidence intents: provide general help message
         - Handle escalation if required
         """
-        conv_state = ConversationState.from_dict(state)
+        conv_state = ConversationState.from_graph_state(state)
         
         # Check if escalation is required first
         if state.get("escalation_required", False):
@@ -8,11 +8,11 @@ with disambiguation.
 import logging
 from typing import Dict, Any, Optional, List
 import json
-from dataclasses import asdict
 
 from apps.bot.langgraph.nodes import LLMNode, ToolNode
 from apps.bot.conversation_state import ConversationState
 from apps.bot.services.llm_router import LLMRouter
+from apps.bot.services.tenant_runtime import TenantRuntimeService
 
 logger = logging.getLogger(__name__)
 
@@ -171,12 +171,12 @@ Return JSON with exact schema:
             Order status response result with exact JSON schema
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
 
             await llm_router._ensure_config_loaded()
 
@@ -504,7 +504,7 @@ async def execute_orders_journey_node(state: Dict[str, Any]) -> Dict[str, Any]:
         Updated conversation state dictionary
     """
     # Convert dict state to ConversationState
-    conv_state = ConversationState.from_dict(state)
+    conv_state = ConversationState.from_graph_state(state)
     
     logger.info(
         f"Starting orders journey",
@@ -524,7 +524,7 @@ async def execute_orders_journey_node(state: Dict[str, Any]) -> Dict[str, Any]:
             # Need more information
             conv_state.response_text = "I can help you check your order status. Please provide your order reference number or the phone number you used to place the order."
             conv_state.orders_step = "awaiting_order_info"
-            return asdict(conv_state)
+            return conv_state.to_graph_state()
         
         # Step 2: Call order_get_status tool
         from apps.bot.tools.registry import get_tool_registry
@@ -535,7 +535,7 @@ async def execute_orders_journey_node(state: Dict[str, Any]) -> Dict[str, Any]:
             logger.error("order_get_status tool not found in registry")
             conv_state.response_text = "I'm having trouble accessing order information right now. Please try again in a moment."
             conv_state.set_escalation("order_get_status tool not available")
-            return asdict(conv_state)
+            return conv_state.to_graph_state()
         
         # Execute tool with tenant scoping
         tool_params = {
@@ -573,7 +573,7 @@ async def execute_orders_journey_node(state: Dict[str, Any]) -> Dict[str, Any]:
                 conv_state.set_escalation(f"Order lookup error: {error_code}")
             
             conv_state.orders_step = "error"
-            return asdict(conv_state)
+            return conv_state.to_graph_state()
         
         # Store order lookup results in state
         conv_state.order_lookup_results = tool_response.data
@@ -606,8 +606,7 @@ async def execute_orders_journey_node(state: Dict[str, Any]) -> Dict[str, Any]:
         )
         
         # Convert back to dict for LangGraph
-        from dataclasses import asdict
-        return asdict(conv_state)
+        return conv_state.to_graph_state()
         
     except Exception as e:
         logger.error(
@@ -624,8 +623,7 @@ async def execute_orders_journey_node(state: Dict[str, Any]) -> Dict[str, Any]:
         conv_state.response_text = "I'm having trouble processing your order request. Let me connect you with someone who can help."
         conv_state.set_escalation(f"Orders journey error: {str(e)}")
         
-        from dataclasses import asdict
-        return asdict(conv_state)
+        return conv_state.to_graph_state()
 
 
 def _parse_order_lookup_request(state: ConversationState) -> Optional[Dict[str, Any]]:
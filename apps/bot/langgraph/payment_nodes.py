@@ -11,6 +11,7 @@ import json
 from apps.bot.langgraph.nodes import LLMNode
 from apps.bot.conversation_state import ConversationState
 from apps.bot.services.llm_router import LLMRouter
+from apps.bot.services.tenant_runtime import TenantRuntimeService
 
 logger = logging.getLogger(__name__)
 
@@ -135,12 +136,12 @@ Return JSON with exact schema:
             Payment routing result with exact JSON schema
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
 
             await llm_router._ensure_config_loaded()
 
@@ -12,6 +12,7 @@ import re
 from apps.bot.conversation_state import ConversationState, Lang
 from apps.bot.langgraph.nodes import LLMNode
 from apps.bot.services.llm_router import LLMRouter
+from apps.bot.services.tenant_runtime import TenantRuntimeService
 from apps.bot.tools.registry import get_tool
 
 logger = logging.getLogger(__name__)
@@ -143,12 +144,12 @@ Return JSON with exact schema:
             Preference parsing result with exact JSON schema
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
 
             await llm_router._ensure_config_loaded()
 
@@ -392,12 +393,12 @@ You respond with natural language text only. No JSON or structured output."""
             Response generation result
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
 
             await llm_router._ensure_config_loaded()
 
@@ -12,6 +12,7 @@ import json
 from apps.bot.langgraph.nodes import LLMNode, ToolNode
 from apps.bot.conversation_state import ConversationState
 from apps.bot.services.llm_router import LLMRouter
+from apps.bot.services.tenant_runtime import TenantRuntimeService
 
 logger = logging.getLogger(__name__)
 
@@ -127,12 +128,12 @@ Return JSON with exact schema:
             Sales narrow query result with exact JSON schema
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
 
             await llm_router._ensure_config_loaded()
 
@@ -469,12 +470,12 @@ Return JSON with exact schema:
             Catalog presentation result with exact JSON schema
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
 
             await llm_router._ensure_config_loaded()
 
@@ -794,12 +795,12 @@ Return JSON with exact schema:
             Product disambiguation result with exact JSON schema
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
 
             await llm_router._ensure_config_loaded()
 
@@ -1741,11 +1742,11 @@ async def execute_sales_journey_node(state_dict: Dict[str, Any]) -> Dict[str, An
         Updated state dictionary
     """
     # Convert dict to ConversationState
-    conv_state = ConversationState.from_dict(state_dict)
+    conv_state = ConversationState.from_graph_state(state_dict)
     
     # Execute sales journey
     sales_journey = SalesJourneySubgraph()
     updated_state = await sales_journey.execute_sales_journey(conv_state)
     
     # Convert back to dict
-    return updated_state.to_dict()
\ No newline at end of file
+    return updated_state.to_graph_state()
\ No newline at end of file
@@ -11,6 +11,7 @@ import json
 from apps.bot.conversation_state import ConversationState
 from apps.bot.langgraph.nodes import LLMNode
 from apps.bot.services.llm_router import LLMRouter
+from apps.bot.services.tenant_runtime import TenantRuntimeService
 from apps.bot.tools.registry import get_tool
 
 logger = logging.getLogger(__name__)
@@ -107,12 +108,12 @@ You respond with natural language text only. No JSON or structured output."""
             Support answer result
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
 
             await llm_router._ensure_config_loaded()
 
@@ -384,12 +385,12 @@ You respond with natural language text only. No JSON or structured output."""
             Handoff message result
         """
         try:
-            # Get tenant for LLM router
-            from apps.tenants.models import Tenant
-            tenant = await Tenant.objects.aget(id=state.tenant_id)
+            # Tenant and agent config come from the runtime snapshot on the state
+            runtime = await TenantRuntimeService.for_state(state)
+            tenant = runtime.tenant
             
             # Create LLM router for tenant
-            llm_router = LLMRouter(tenant)
+            llm_router = LLMRouter(tenant, config=runtime.agent_config)
 
             await llm_router._ensure_config_loaded()
 
@@ -745,11 +746,11 @@ async def execute_support_journey_node(state_dict: Dict[str, Any]) -> Dict[str,
         Updated state dictionary
     """
     # Convert dict to ConversationState
-    conv_state = ConversationState.from_dict(state_dict)
+    conv_state = ConversationState.from_graph_state(state_dict)
     
     # Execute support journey
     support_journey = SupportJourneySubgraph()
     updated_state = await support_journey.execute_support_journey(conv_state)
     
     # Convert back to dict for orchestrator
-    return updated_state.to_dict()
\ No newline at end of file
+    return updated_state.to_graph_state()
\ No newline at end of file
@@ -6,9 +6,9 @@ through the LangGraph orchestration system.
 """
 import logging
 import json
-from typing import Dict, Any, Optional
 
 from django.http import JsonResponse
+from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework.views import APIView
@@ -22,21 +22,21 @@ logger = logging.getLogger(__name__)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class LangGraphWebhookView(APIView):
+class LangGraphWebhookView(View):
     """
     Webhook entry point for LangGraph message processing.
     
     This view receives WhatsApp messages and processes them through
     the LangGraph orchestration system.
     
+    A plain async Django view rather than a DRF APIView, which cannot
+    await its handlers: under ASGI the worker keeps serving other
+    requests while the orchestrator waits on LLM and provider calls.
+    
     Note: This is a webhook endpoint that should be public (no RBAC)
     as it receives messages from external Twilio service.
     """
     
-    # Webhook endpoints are exempt from RBAC (verified by signature)
-    authentication_classes = []
-    permission_classes = []
-    
     async def post(self, request) -> JsonResponse:
         """
         Process incoming WhatsApp message through LangGraph.
@@ -57,6 +57,10 @@ class LangGraphWebhookView(APIView):
         try:
             # Parse request payload
             payload = json.loads(request.body) if request.body else {}
+            if not isinstance(payload, dict):
+                return JsonResponse({
+                    'error': 'Invalid JSON payload'
+                }, status=400)
             
             # Extract required fields
             tenant_id = payload.get('tenant_id')
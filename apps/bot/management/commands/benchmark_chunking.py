@@ -0,0 +1,149 @@
+"""
+Management command to benchmark document chunking.
+
+Measures TokenChunker throughput on a ~1MB corpus (synthetic by default,
+or a text file) and, when langchain is installed, compares it with the
+previous splitter that re-counted tokens for every candidate piece.
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bot.services.chunking_service import TokenChunker, DEFAULT_ENCODING
+
+
+SAMPLE_SECTION = (
+    "# Delivery and Returns\n\n"
+    "Orders placed before 2pm are dispatched the same day. Deliveries within "
+    "Nairobi take one to two days; upcountry deliveries take three to five days. "
+    "Customers can track orders from the link sent by WhatsApp.\n\n"
+    "Returns are accepted within 14 days of delivery: items must be unused, in "
+    "their original packaging, and accompanied by the receipt. Refunds are paid "
+    "to M-Pesa within three working days of the return being inspected.\n"
+    "- Perishable goods cannot be returned\n"
+    "- Sale items can be exchanged but not refunded\n\n"
+)
+
+
+class Command(BaseCommand):
+    """Benchmark chunking command."""
+
+    help = 'Benchmark document chunking throughput on a ~1MB corpus'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--file',
+            type=str,
+            help='Text file to chunk (default: synthetic corpus)'
+        )
+
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=1024 * 1024,
+            help='Synthetic corpus size in characters (default: 1MB)'
+        )
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Chunk size in tokens (default: 1000)'
+        )
+
+        parser.add_argument(
+            '--chunk-overlap',
+            type=int,
+            default=200,
+            help='Chunk overlap in tokens (default: 200)'
+        )
+
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Number of timed runs (default: 3)'
+        )
+
+        parser.add_argument(
+            '--compare-legacy',
+            action='store_true',
+            help='Also time the langchain RecursiveCharacterTextSplitter'
+        )
+
+    def handle(self, *args, **options):
+        """Execute command."""
+        text = self._load_corpus(options['file'], options['size'])
+        chunker = TokenChunker(
+            chunk_size=options['chunk_size'],
+            chunk_overlap=options['chunk_overlap'],
+            encoding_name=DEFAULT_ENCODING
+        )
+
+        self.stdout.write(
+            f"Corpus: {len(text):,} chars, {chunker.count_tokens(text):,} tokens"
+        )
+
+        chunks, seconds = self._time(lambda: chunker.chunk(text), options['runs'])
+        self._report('TokenChunker', text, chunks, seconds, options['chunk_size'])
+
+        if options['compare_legacy']:
+            self._benchmark_legacy(text, chunker, options)
+
+    def _load_corpus(self, path, size):
+        """Read the corpus file or build a synthetic corpus."""
+        if path:
+            try:
+                with open(path, encoding='utf-8') as handle:
+                    return handle.read()
+            except OSError as e:
+                raise CommandError(f"Cannot read {path}: {e}")
+
+        repeats = size // len(SAMPLE_SECTION) + 1
+        return (SAMPLE_SECTION * repeats)[:size]
+
+    def _time(self, func, runs):
+        """Run func several times and return its result and best time."""
+        best = None
+        result = None
+        for _ in range(max(1, runs)):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def _report(self, name, text, chunks, seconds, chunk_size):
+        """Print throughput and chunk size statistics."""
+        counts = [chunk['token_count'] for chunk in chunks] or [0]
+        mb_per_second = len(text) / (1024 * 1024) / seconds if seconds else 0
+        self.stdout.write(
+            f"{name}: {seconds * 1000:.1f} ms ({mb_per_second:.2f} MB/s), "
+            f"{len(chunks)} chunks, tokens min/avg/max "
+            f"{min(counts)}/{sum(counts) // len(counts)}/{max(counts)}, "
+            f"over limit: {sum(1 for count in counts if count > chunk_size)}"
+        )
+
+    def _benchmark_legacy(self, text, chunker, options):
+        """Time the langchain splitter with a tiktoken length function."""
+        try:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+        except ImportError:
+            self.stdout.write(self.style.WARNING('langchain not installed; skipping legacy comparison'))
+            return
+
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=options['chunk_size'],
+            chunk_overlap=options['chunk_overlap'],
+            length_function=chunker.count_tokens,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
+
+        def split():
+            return [
+                {'token_count': chunker.count_tokens(piece)}
+                for piece in splitter.split_text(text)
+            ]
+
+        chunks, seconds = self._time(split, options['runs'])
+        self._report('Legacy splitter', text, chunks, seconds, options['chunk_size'])
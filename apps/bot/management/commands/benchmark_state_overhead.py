@@ -0,0 +1,143 @@
+"""
+Management command to benchmark per-message ConversationState overhead.
+
+Simulates the dict <-> dataclass hand-offs one message makes through the
+LangGraph orchestrator (one conversion pair per node) on a state with a
+large cart and catalog results, and compares the copy-free graph
+conversions with the previous asdict/from_dict round trips. The
+persistence boundary (one to_json per message) is reported separately.
+"""
+import time
+from dataclasses import asdict
+from django.core.management.base import BaseCommand
+
+from apps.bot.conversation_state import ConversationState
+
+
+class Command(BaseCommand):
+    """Benchmark ConversationState overhead command."""
+
+    help = 'Benchmark per-message ConversationState conversion overhead'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--cart-items',
+            type=int,
+            default=50,
+            help='Cart lines in the synthetic state (default: 50)'
+        )
+
+        parser.add_argument(
+            '--catalog-results',
+            type=int,
+            default=200,
+            help='Catalog results in the synthetic state (default: 200)'
+        )
+
+        parser.add_argument(
+            '--nodes',
+            type=int,
+            default=8,
+            help='Graph nodes a message passes through (default: 8)'
+        )
+
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=200,
+            help='Messages per timed run (default: 200)'
+        )
+
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Number of timed runs (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        """Execute command."""
+        state = self._build_state(options['cart_items'], options['catalog_results'])
+        nodes = options['nodes']
+        messages = options['messages']
+
+        self.stdout.write(
+            f"State: {len(state.cart)} cart lines, {len(state.last_catalog_results)} "
+            f"catalog results, {len(state.to_json()):,} bytes as JSON; "
+            f"{nodes} nodes per message"
+        )
+
+        def legacy():
+            graph_state = asdict(state)
+            for _ in range(nodes):
+                graph_state = asdict(ConversationState.from_dict(graph_state))
+            return ConversationState.from_dict(graph_state)
+
+        def copy_free():
+            graph_state = state.to_graph_state()
+            for _ in range(nodes):
+                graph_state = ConversationState.from_graph_state(graph_state).to_graph_state()
+            return ConversationState.from_graph_state(graph_state)
+
+        legacy_seconds = self._time(legacy, messages, options['runs'])
+        copy_free_seconds = self._time(copy_free, messages, options['runs'])
+        persist_seconds = self._time(state.to_json, messages, options['runs'])
+
+        self._report('asdict/from_dict', legacy_seconds, messages)
+        self._report('Graph state (copy-free)', copy_free_seconds, messages)
+        self._report('Persistence (to_json)', persist_seconds, messages)
+
+        if copy_free_seconds:
+            self.stdout.write(
+                f"Graph hand-off speedup: {legacy_seconds / copy_free_seconds:.1f}x"
+            )
+
+    def _build_state(self, cart_items, catalog_results):
+        """Build a state with bulky cart and catalog lists."""
+        return ConversationState(
+            tenant_id='benchmark-tenant',
+            conversation_id='benchmark-conversation',
+            request_id='benchmark-request',
+            cart=[
+                {
+                    'item_id': f'product-{index}',
+                    'qty': 1 + index % 3,
+                    'variant_selection': {'size': 'M', 'color': 'black'},
+                }
+                for index in range(cart_items)
+            ],
+            last_catalog_results=[
+                {
+                    'product_id': f'product-{index}',
+                    'name': f'Product {index}',
+                    'price': 1000 + index,
+                    'in_stock': index % 5 != 0,
+                    'description': 'Lightweight everyday item with a two-year warranty. ' * 4,
+                    'variants': [
+                        {'id': f'variant-{index}-{size}', 'name': size, 'attributes': {'size': size}}
+                        for size in ('S', 'M', 'L', 'XL')
+                    ],
+                }
+                for index in range(catalog_results)
+            ],
+            metadata={'clarifying_questions_asked': 1},
+        )
+
+    def _time(self, func, messages, runs):
+        """Return the best per-run time for processing a batch of messages."""
+        best = None
+        for _ in range(max(1, runs)):
+            started = time.perf_counter()
+            for _ in range(messages):
+                func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def _report(self, name, seconds, messages):
+        """Print per-message overhead."""
+        self.stdout.write(
+            f"{name}: {seconds * 1000 / messages:.3f} ms/message "
+            f"({seconds * 1000:.1f} ms for {messages} messages)"
+        )
@@ -0,0 +1,249 @@
+"""
+Management command to replay a message corpus through the inbound pipeline.
+
+Generates a synthetic tenant, routes LLM, embedding, vector store and
+Twilio calls to stubs with log-normal latencies (MEDIAN or MEDIAN:P95 in
+milliseconds) and replays a recorded (--corpus) or synthetic corpus
+through twilio_webhook, process_inbound_message and the orchestrator at
+each offered rate in --rates. Reports latency percentiles, per-node
+timings, queries per message, cache hit ratio and the highest rate the
+workers sustained.
+
+Worker processes are forked and need a database they can share; run it
+against PostgreSQL (or a SQLite file for small runs), never the
+production database. The synthetic tenant is hard-deleted afterwards
+unless --keep-data is given.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from apps.bot.benchmarks import (
+    PROFILES, LatencyDistribution, ReplayHarness, generate_tenant, load_corpus,
+    stub_providers, synthetic_corpus,
+)
+from apps.bot.benchmarks.replay import counting_caches
+from apps.bot.benchmarks.runner import _git_commit
+
+
+def _rates(value):
+    try:
+        rates = [float(rate) for rate in value.split(',') if rate.strip()]
+    except ValueError:
+        raise CommandError(f"Invalid --rates {value!r}; expected comma-separated numbers")
+    if not rates or any(rate < 0 for rate in rates):
+        raise CommandError('--rates needs at least one non-negative rate')
+    return rates
+
+
+class Command(BaseCommand):
+    """Replay load test command."""
+
+    help = 'Replay WhatsApp messages through the inbound pipeline and report sustainable throughput'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--profile',
+            choices=sorted(PROFILES),
+            default='small',
+            help='Synthetic tenant size (default: small)'
+        )
+
+        parser.add_argument(
+            '--corpus',
+            help='JSON lines file of recorded conversations (default: synthetic corpus)'
+        )
+
+        parser.add_argument(
+            '--conversations',
+            type=int,
+            default=50,
+            help='Conversations in the synthetic corpus (default: 50)'
+        )
+
+        parser.add_argument(
+            '--rates',
+            default='1,2,4,8',
+            help='Offered rates in messages per second, comma-separated; 0 offers a backlog (default: 1,2,4,8)'
+        )
+
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=100,
+            help='Messages offered per rate (default: 100)'
+        )
+
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Workers, like celery worker --concurrency (default: 4)'
+        )
+
+        parser.add_argument(
+            '--threads',
+            action='store_true',
+            help='Use worker threads instead of forked processes'
+        )
+
+        parser.add_argument(
+            '--uniform',
+            action='store_true',
+            help='Evenly spaced arrivals instead of Poisson'
+        )
+
+        parser.add_argument(
+            '--shared-cache',
+            action='store_true',
+            help='Use the configured Redis cache instead of a private cache per worker'
+        )
+
+        parser.add_argument(
+            '--max-queue-wait-ms',
+            type=float,
+            default=1000.0,
+            help='p95 queue wait a sustainable rate may reach (default: 1000)'
+        )
+
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed for data, corpus, arrivals and latencies (default: 0)'
+        )
+
+        parser.add_argument(
+            '--llm-latency-ms',
+            default='800:2500',
+            help='Stub LLM latency, MEDIAN or MEDIAN:P95 (default: 800:2500)'
+        )
+
+        parser.add_argument(
+            '--embedding-latency-ms',
+            default='120:400',
+            help='Stub embedding latency, MEDIAN or MEDIAN:P95 (default: 120:400)'
+        )
+
+        parser.add_argument(
+            '--vector-latency-ms',
+            default='60:200',
+            help='Stub vector store latency, MEDIAN or MEDIAN:P95 (default: 60:200)'
+        )
+
+        parser.add_argument(
+            '--twilio-latency-ms',
+            default='150:500',
+            help='Stub Twilio send latency, MEDIAN or MEDIAN:P95 (default: 150:500)'
+        )
+
+        parser.add_argument(
+            '--output',
+            help='Write the report to this JSON file'
+        )
+
+        parser.add_argument(
+            '--keep-data',
+            action='store_true',
+            help='Keep the synthetic tenant instead of deleting it'
+        )
+
+    def handle(self, *args, **options):
+        """Execute command."""
+        profile = PROFILES[options['profile']]
+        rates = _rates(options['rates'])
+        seed = options['seed']
+        latency_specs = {
+            name: options[f"{name}_latency_ms"] for name in ('llm', 'embedding', 'vector', 'twilio')
+        }
+        try:
+            latencies = {
+                f"{name}_latency": LatencyDistribution.parse(spec, seed=seed + index)
+                for index, (name, spec) in enumerate(latency_specs.items())
+            }
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['corpus']:
+            corpus = load_corpus(options['corpus'])
+        else:
+            corpus = synthetic_corpus(options['conversations'], profile.messages_per_conversation, seed=seed)
+        if not corpus:
+            raise CommandError('The corpus has no messages')
+
+        with override_settings(CACHES=counting_caches(options['shared_cache'])):
+            with stub_providers(dimensions=profile.embedding_dimensions, **latencies):
+                self.stdout.write(f"Generating '{profile.name}' tenant (seed {seed})...")
+                synthetic = generate_tenant(profile, seed=seed)
+                try:
+                    harness = ReplayHarness(
+                        synthetic, corpus,
+                        concurrency=options['concurrency'],
+                        processes=not options['threads'],
+                        shared_cache=options['shared_cache']
+                    )
+                    self.stdout.write(
+                        f"Replaying {len(corpus)} corpus messages with {options['concurrency']} "
+                        f"{'threads' if options['threads'] else 'processes'}"
+                    )
+                    with harness:
+                        result = harness.ramp(
+                            rates, options['messages'],
+                            max_queue_wait_ms=options['max_queue_wait_ms'],
+                            poisson=not options['uniform'],
+                            seed=seed,
+                            on_step=self._report_step
+                        )
+                finally:
+                    if options['keep_data']:
+                        self.stdout.write(f"Kept synthetic tenant {synthetic.tenant.slug}")
+                    else:
+                        synthetic.delete()
+
+        if result['max_sustainable_rate'] is None:
+            self.stdout.write(self.style.WARNING('No offered rate was sustainable'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Max sustainable rate: {result['max_sustainable_rate']:g} msg/s "
+                f"with {options['concurrency']} workers"
+            ))
+
+        if options['output']:
+            report = {
+                'commit': _git_commit(),
+                'metadata': {
+                    'profile': profile.name,
+                    'seed': seed,
+                    'corpus': options['corpus'] or 'synthetic',
+                    'concurrency': options['concurrency'],
+                    'workers': 'threads' if options['threads'] else 'processes',
+                    'arrivals': 'uniform' if options['uniform'] else 'poisson',
+                    'messages_per_step': options['messages'],
+                    'max_queue_wait_ms': options['max_queue_wait_ms'],
+                    'latency_ms': latency_specs,
+                },
+                **result,
+            }
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2, default=str)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def _report_step(self, step):
+        """Print one rate step."""
+        latency = step['latency_ms']
+        cache = step['cache']
+        line = (
+            f"{step['offered_rate']:g} msg/s offered, {step['achieved_rate'] or 0:.2f} achieved: "
+            f"{step['completed']}/{step['sent']} ok, {step['errors']} errors, "
+            f"e2e p50 {latency['end_to_end']['p50'] or 0:.0f} ms / p95 {latency['end_to_end']['p95'] or 0:.0f} ms, "
+            f"queue p95 {latency['queue_wait']['p95'] or 0:.0f} ms, "
+            f"{step['queries_per_message']['mean'] or 0:.1f} queries/msg, "
+            f"cache hit {(cache['hit_ratio'] or 0):.0%}"
+        )
+        self.stdout.write(self.style.SUCCESS(line) if step['sustainable'] else self.style.WARNING(line))
+        for name, node in step['nodes_ms'].items():
+            self.stdout.write(f"    {name}: p50 {node['p50']:.1f} ms, p95 {node['p95']:.1f} ms ({node['count']})")
+        for error in step['error_samples']:
+            self.stdout.write(self.style.ERROR(f"    {error}"))
@@ -0,0 +1,198 @@
+"""
+Management command to run the hot-path benchmark suite.
+
+Generates a synthetic tenant of the chosen profile, routes LLM,
+embedding, vector store and Twilio calls to stubs with the given
+latencies and times build_context, match_product, knowledge search,
+find_availability, execute_campaign and process_inbound_message.
+Caches are swapped for a private local-memory backend so every round
+starts cold without touching shared Redis. The synthetic tenant is
+hard-deleted afterwards unless --keep-data is given.
+
+Results can be written as JSON (--output) and compared with an earlier
+run (--compare); the command fails when a benchmark regresses.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from apps.bot.benchmarks import (
+    BENCHMARKS, PROFILES, compare_results, generate_tenant, load_results,
+    run_benchmark, stub_providers, write_results,
+)
+from apps.bot.benchmarks.runner import build_report
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'run-benchmarks',
+    }
+}
+
+
+class Command(BaseCommand):
+    """Run hot-path benchmarks command."""
+
+    help = 'Benchmark bot hot paths against a synthetic tenant and write JSON results'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--profile',
+            choices=sorted(PROFILES),
+            default='small',
+            help='Synthetic tenant size (default: small)'
+        )
+
+        parser.add_argument(
+            '--benchmark',
+            action='append',
+            choices=list(BENCHMARKS),
+            help='Benchmark to run; repeat for several (default: all)'
+        )
+
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=10,
+            help='Timed rounds per benchmark (default: 10)'
+        )
+
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=1,
+            help='Untimed rounds per benchmark (default: 1)'
+        )
+
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Data generator seed (default: 0)'
+        )
+
+        parser.add_argument(
+            '--llm-latency-ms',
+            type=float,
+            default=0.0,
+            help='Latency added to every stub LLM call (default: 0)'
+        )
+
+        parser.add_argument(
+            '--embedding-latency-ms',
+            type=float,
+            default=0.0,
+            help='Latency added to every stub embedding call (default: 0)'
+        )
+
+        parser.add_argument(
+            '--vector-latency-ms',
+            type=float,
+            default=0.0,
+            help='Latency added to every stub vector store call (default: 0)'
+        )
+
+        parser.add_argument(
+            '--output',
+            help='Write results to this JSON file'
+        )
+
+        parser.add_argument(
+            '--compare',
+            help='Baseline JSON file to compare against'
+        )
+
+        parser.add_argument(
+            '--max-regression',
+            type=float,
+            default=0.2,
+            help='Allowed median slowdown before failing, as a fraction (default: 0.2)'
+        )
+
+        parser.add_argument(
+            '--keep-data',
+            action='store_true',
+            help='Keep the synthetic tenant instead of deleting it'
+        )
+
+    def handle(self, *args, **options):
+        """Execute command."""
+        profile = PROFILES[options['profile']]
+        names = options['benchmark'] or list(BENCHMARKS)
+        latencies = {
+            'llm_latency': options['llm_latency_ms'] / 1000,
+            'embedding_latency': options['embedding_latency_ms'] / 1000,
+            'vector_latency': options['vector_latency_ms'] / 1000,
+        }
+
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            with stub_providers(dimensions=profile.embedding_dimensions, **latencies):
+                self.stdout.write(f"Generating '{profile.name}' tenant (seed {options['seed']})...")
+                synthetic = generate_tenant(profile, seed=options['seed'])
+                try:
+                    results = []
+                    for name in names:
+                        setup, func = BENCHMARKS[name](synthetic)
+                        result = run_benchmark(
+                            name, func, setup=setup,
+                            rounds=options['rounds'], warmup=options['warmup']
+                        )
+                        self._report(result)
+                        results.append(result)
+                finally:
+                    if options['keep_data']:
+                        self.stdout.write(f"Kept synthetic tenant {synthetic.tenant.slug}")
+                    else:
+                        synthetic.delete()
+
+        metadata = {
+            'profile': profile.name,
+            'seed': options['seed'],
+            'rounds': options['rounds'],
+            'warmup': options['warmup'],
+            'latency_ms': {
+                'llm': options['llm_latency_ms'],
+                'embedding': options['embedding_latency_ms'],
+                'vector': options['vector_latency_ms'],
+            },
+        }
+        if options['output']:
+            write_results(options['output'], results, metadata)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        failed = [result.name for result in results if result.error]
+        regressed = self._compare(options['compare'], results, metadata, options['max_regression'])
+
+        if failed:
+            raise CommandError(f"Benchmarks failed: {', '.join(failed)}")
+        if regressed:
+            raise CommandError(f"Benchmarks regressed: {', '.join(regressed)}")
+
+    def _compare(self, baseline_path, results, metadata, max_regression):
+        """Print the comparison with a baseline run; return regressed names."""
+        if not baseline_path:
+            return []
+        baseline = load_results(baseline_path)
+        if baseline.get('metadata', {}).get('profile') != metadata['profile']:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline used profile {baseline.get('metadata', {}).get('profile')!r}; "
+                f"this run used {metadata['profile']!r}"
+            ))
+        rows = compare_results(baseline, build_report(results, metadata), max_regression)
+        for row in rows:
+            line = (
+                f"{row['name']}: {row['baseline_ms']:.1f} -> {row['current_ms']:.1f} ms "
+                f"({row['change']:+.0%}), queries {row['baseline_queries']} -> {row['current_queries']}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['regressed'] else line)
+        return [row['name'] for row in rows if row['regressed']]
+
+    def _report(self, result):
+        """Print one benchmark's summary."""
+        if result.error:
+            self.stdout.write(self.style.ERROR(f"{result.name}: failed ({result.error})"))
+            return
+        self.stdout.write(
+            f"{result.name}: median {result.median_ms:.1f} ms, p95 {result.p95_ms:.1f} ms, "
+            f"{result.median_queries:g} queries"
+        )
@@ -0,0 +1,121 @@
+"""
+Management command to compare WSGI and ASGI concurrent connection capacity.
+
+Serves a webhook-shaped probe through the project's middleware stack in
+each --modes entry, with --connections clients open at once and a
+simulated provider call of --latency-ms (MEDIAN or MEDIAN:P95 in
+milliseconds) in the view. WSGI uses a pool of --workers threads; ASGI
+uses one event loop. Reports throughput, latency percentiles and the
+peak number of requests the worker held in the view at once.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bot.benchmarks import SERVING_MODES, LatencyDistribution, run_serving_benchmark
+from apps.bot.benchmarks.runner import _git_commit
+
+
+class Command(BaseCommand):
+    """Serving capacity benchmark command."""
+
+    help = 'Compare concurrent connection capacity of the WSGI and ASGI serving paths'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--modes',
+            default=','.join(SERVING_MODES),
+            help='Serving modes to run, comma-separated (default: wsgi,asgi)'
+        )
+
+        parser.add_argument(
+            '--connections',
+            type=int,
+            default=200,
+            help='Clients with a request open at once (default: 200)'
+        )
+
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Requests sent per mode (default: 1000)'
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='WSGI worker threads, like gunicorn --workers x --threads (default: 4)'
+        )
+
+        parser.add_argument(
+            '--latency-ms',
+            default='200:600',
+            help='Simulated provider latency in the view, MEDIAN or MEDIAN:P95 (default: 200:600)'
+        )
+
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed for the simulated latencies (default: 0)'
+        )
+
+        parser.add_argument(
+            '--output',
+            help='Write the report to this JSON file'
+        )
+
+    def handle(self, *args, **options):
+        """Execute command."""
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = sorted(set(modes) - set(SERVING_MODES))
+        if not modes or unknown:
+            raise CommandError(f"Invalid --modes {options['modes']!r}; expected {', '.join(SERVING_MODES)}")
+
+        results = []
+        for mode in modes:
+            try:
+                latency = LatencyDistribution.parse(options['latency_ms'], seed=options['seed'])
+                result = run_serving_benchmark(
+                    mode,
+                    connections=options['connections'],
+                    requests=options['requests'],
+                    workers=options['workers'],
+                    latency=latency
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            results.append(result)
+            self._report(result)
+
+        if options['output']:
+            report = {
+                'commit': _git_commit(),
+                'metadata': {
+                    'connections': options['connections'],
+                    'requests': options['requests'],
+                    'workers': options['workers'],
+                    'latency_ms': options['latency_ms'],
+                    'seed': options['seed'],
+                },
+                'results': results,
+            }
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2, default=str)
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def _report(self, result):
+        """Print one mode."""
+        latency = result['latency_ms']
+        line = (
+            f"{result['mode']}: {result['throughput_rps'] or 0:.1f} req/s, "
+            f"{result['completed']} ok, {result['errors']} errors, "
+            f"p50 {latency['p50'] or 0:.0f} ms / p95 {latency['p95'] or 0:.0f} ms, "
+            f"peak in flight {result['peak_in_flight']} of {result['connections']} connections"
+        )
+        self.stdout.write(self.style.WARNING(line) if result['errors'] else self.style.SUCCESS(line))
+        for error in result['error_samples']:
+            self.stdout.write(self.style.ERROR(f"    {error}"))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0004_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationsession',
+            name='state_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped on every state write; guards concurrent writers'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0005_conversationsession_state_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agentinteraction',
+            name='performance_profile',
+            field=models.JSONField(blank=True, default=dict, help_text='Sampled per-node and per-tool timings, query counts, cache lookups and tokens'),
+        ),
+    ]
@@ -148,6 +148,12 @@ class AgentInteraction(BaseModel):
         help_text="Estimated cost in USD for this interaction"
     )
     
+    performance_profile = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Sampled per-node and per-tool timings, query counts, cache lookups and tokens"
+    )
+    
     # Custom manager
     objects = AgentInteractionManager()
     
@@ -119,6 +119,11 @@ class ConversationSession(BaseModel):
         help_text="ID of the last processed request"
     )
     
+    state_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Bumped on every state write; guards concurrent writers"
+    )
+    
     # Metadata
     metadata = models.JSONField(
         default=dict,
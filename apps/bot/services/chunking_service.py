@@ -1,14 +1,210 @@
 """
 Text chunking service for document processing.
+
+TokenChunker is the single chunking engine used by both ingestion paths
+(ChunkingService and TenantDocumentIngestionService). It tokenizes a
+text once, finds structural boundaries (headings, paragraphs, lines,
+sentences, clauses, words) in one regex pass per level, and picks chunk
+ends by bisecting those boundaries on token offsets. Token counts are
+exact with respect to the document tokenization and no chunk is ever
+re-encoded, so chunking runs in time linear in the text length.
 """
 import logging
-from typing import List, Dict, Any
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, Dict, Any, Optional
 import tiktoken
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_ENCODING = 'cl100k_base'
+
+# Structural boundaries, strongest first. A boundary is the start of the
+# match, so whitespace stays with the following chunk (where it is stripped).
+BOUNDARY_PATTERNS = [
+    ('heading', re.compile(r'\n+(?=#{1,6}\s|[A-Z][A-Z0-9 ]{2,60}\n)')),
+    ('paragraph', re.compile(r'\n[ \t]*\n')),
+    ('line', re.compile(r'\n')),
+    ('sentence', re.compile(r'(?<=[.!?])["\')\]]*\s')),
+    ('clause', re.compile(r'(?<=[;:,])\s')),
+    ('word', re.compile(r'\s')),
+]
+
+# Boundary levels used to align the start of an overlapping chunk
+OVERLAP_ALIGN_LEVELS = ('sentence', 'word')
+
+
+@lru_cache(maxsize=4)
+def get_encoding(encoding_name: str = DEFAULT_ENCODING):
+    """Load (once per process) a tiktoken encoding."""
+    return tiktoken.get_encoding(encoding_name)
+
+
+class TokenChunker:
+    """
+    Token-accurate, structure-aware text chunker.
+    
+    Produces chunks of at most chunk_size tokens that end on the
+    strongest boundary found in the back half of the window, with
+    chunk_overlap tokens of overlap aligned to a sentence or word start.
+    """
+    
+    # Minimum fill before a structural boundary is accepted as a chunk end
+    MIN_FILL_RATIO = 0.5
+    
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int = 0,
+        encoding_name: str = DEFAULT_ENCODING,
+        encoding=None
+    ):
+        """
+        Initialize chunker.
+        
+        Args:
+            chunk_size: Maximum chunk size in tokens
+            chunk_overlap: Overlap between consecutive chunks in tokens
+            encoding_name: Tokenizer encoding name
+            encoding: Optional preloaded tiktoken Encoding
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be between 0 and chunk_size")
+        
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding = encoding or get_encoding(encoding_name)
+    
+    def count_tokens(self, text: str) -> int:
+        """Count tokens in text."""
+        return len(self.encoding.encode_ordinary(text))
+    
+    def chunk(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Split text into chunks.
+        
+        Args:
+            text: Text to chunk
+        
+        Returns:
+            List of dicts with 'chunk_index', 'content', 'token_count',
+            'start_char' and 'end_char' (span of content in text)
+        """
+        if not text or not text.strip():
+            return []
+        
+        offsets = self._token_offsets(text)
+        token_total = len(offsets)
+        boundaries = self._find_boundaries(text, offsets)
+        
+        chunks = []
+        start = 0
+        while start < token_total:
+            end = self._chunk_end(start, token_total, boundaries)
+            
+            char_start = offsets[start]
+            char_end = offsets[end] if end < token_total else len(text)
+            chunk = self._make_chunk(text, char_start, char_end, end - start, len(chunks))
+            if chunk:
+                chunks.append(chunk)
+            
+            if end >= token_total:
+                break
+            start = self._next_start(start, end, boundaries)
+        
+        return chunks
+    
+    def _token_offsets(self, text: str) -> List[int]:
+        """Character offset at which each token of text starts."""
+        tokens = self.encoding.encode_ordinary(text)
+        if not text.isascii():
+            _, offsets = self.encoding.decode_with_offsets(tokens)
+            return offsets
+        
+        # ASCII: byte offsets are character offsets
+        lengths = map(len, self.encoding.decode_tokens_bytes(tokens))
+        return list(accumulate(lengths, initial=0))[:-1]
+    
+    def _find_boundaries(self, text: str, offsets: List[int]) -> Dict[str, List[int]]:
+        """
+        Map structural boundaries to token indexes.
+        
+        Matches and offsets are both increasing, so each search starts
+        from the previous match's token.
+        """
+        boundaries = {}
+        token_total = len(offsets)
+        
+        for level, pattern in BOUNDARY_PATTERNS:
+            indexes = []
+            pointer = 0
+            for match in pattern.finditer(text):
+                pointer = bisect_left(offsets, match.start(), pointer)
+                if pointer >= token_total:
+                    break
+                if pointer > 0 and (not indexes or indexes[-1] != pointer):
+                    indexes.append(pointer)
+            boundaries[level] = indexes
+        
+        return boundaries
+    
+    def _chunk_end(self, start: int, token_total: int, boundaries: Dict[str, List[int]]) -> int:
+        """Pick the token index where the chunk starting at start ends."""
+        limit = start + self.chunk_size
+        if limit >= token_total:
+            return token_total
+        
+        floor = start + max(1, int(self.chunk_size * self.MIN_FILL_RATIO))
+        for level, _ in BOUNDARY_PATTERNS:
+            indexes = boundaries[level]
+            position = bisect_right(indexes, limit) - 1
+            if position >= 0 and indexes[position] >= floor:
+                return indexes[position]
+        
+        return limit
+    
+    def _next_start(self, start: int, end: int, boundaries: Dict[str, List[int]]) -> int:
+        """Start of the next chunk: end minus overlap, aligned forward to a boundary."""
+        next_start = max(end - self.chunk_overlap, start + 1)
+        if next_start >= end:
+            return end
+        
+        for level in OVERLAP_ALIGN_LEVELS:
+            indexes = boundaries[level]
+            position = bisect_left(indexes, next_start)
+            if position < len(indexes) and indexes[position] < end:
+                return indexes[position]
+        
+        return next_start
+    
+    @staticmethod
+    def _make_chunk(
+        text: str,
+        char_start: int,
+        char_end: int,
+        token_count: int,
+        chunk_index: int
+    ) -> Optional[Dict[str, Any]]:
+        """Build a chunk dict with the span trimmed of surrounding whitespace."""
+        raw = text[char_start:char_end]
+        content = raw.strip()
+        if not content:
+            return None
+        
+        leading = len(raw) - len(raw.lstrip())
+        return {
+            'chunk_index': chunk_index,
+            'content': content,
+            'token_count': token_count,
+            'start_char': char_start + leading,
+            'end_char': char_start + leading + len(content),
+        }
+
 
 class ChunkingService:
     """
@@ -19,7 +215,8 @@ class ChunkingService:
         self,
         chunk_size: int = None,
         chunk_overlap: int = None,
-        encoding_name: str = 'cl100k_base'
+        encoding_name: str = DEFAULT_ENCODING,
+        encoding=None
     ):
         """
         Initialize chunking service.
@@ -28,32 +225,21 @@ class ChunkingService:
             chunk_size: Target chunk size in tokens
             chunk_overlap: Overlap between chunks in tokens
             encoding_name: Tokenizer encoding name
+            encoding: Optional preloaded tiktoken Encoding
         """
         self.chunk_size = chunk_size or settings.RAG_CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or settings.RAG_CHUNK_OVERLAP
-        self.encoding = tiktoken.get_encoding(encoding_name)
-        
-        # Create text splitter
-        self.splitter = RecursiveCharacterTextSplitter(
+        self.chunker = TokenChunker(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
-            length_function=self._count_tokens,
-            separators=[
-                "\n\n",  # Paragraph breaks
-                "\n",    # Line breaks
-                ". ",    # Sentences
-                "! ",
-                "? ",
-                "; ",
-                ", ",
-                " ",     # Words
-                "",      # Characters
-            ]
+            encoding_name=encoding_name,
+            encoding=encoding
         )
+        self.encoding = self.chunker.encoding
     
     def _count_tokens(self, text: str) -> int:
         """Count tokens in text."""
-        return len(self.encoding.encode(text))
+        return self.chunker.count_tokens(text)
     
     def chunk_text(
         self,
@@ -68,21 +254,18 @@ class ChunkingService:
             metadata: Optional metadata to include with chunks
         
         Returns:
-            List of chunk dicts with 'content', 'token_count', and 'metadata'
+            List of chunk dicts with 'content', 'token_count', 'start_char',
+            'end_char' and 'metadata'
         """
-        if not text or not text.strip():
+        chunks = self.chunker.chunk(text)
+        if not chunks:
             return []
         
-        # Split text
-        chunks = self.splitter.split_text(text)
-        
         # Create chunk objects
         result = []
-        for i, chunk_text in enumerate(chunks):
-            token_count = self._count_tokens(chunk_text)
-            
+        for chunk in chunks:
             chunk_metadata = {
-                'chunk_index': i,
+                'chunk_index': chunk['chunk_index'],
                 'total_chunks': len(chunks),
             }
             
@@ -91,8 +274,10 @@ class ChunkingService:
                 chunk_metadata.update(metadata)
             
             result.append({
-                'content': chunk_text,
-                'token_count': token_count,
+                'content': chunk['content'],
+                'token_count': chunk['token_count'],
+                'start_char': chunk['start_char'],
+                'end_char': chunk['end_char'],
                 'metadata': chunk_metadata
             })
         
@@ -0,0 +1,496 @@
+"""
+Hot conversation state store with delta writes.
+
+Each conversation's ConversationState lives in a Redis hash with one
+JSON-encoded field per state attribute plus a version counter. A turn
+loads the hash, remembers the encoded snapshot, and on save writes only
+the attributes whose encoding changed. The conversation id is added to
+a dirty set and a periodic task flushes the latest version of each
+dirty conversation into ConversationSession, so Postgres sees one write
+per flush interval instead of one full-blob rewrite per message.
+
+Bulky transient fields (catalog results, KB snippets) are trimmed to
+references before they are persisted; the in-memory state used during
+the turn is never trimmed.
+
+Hash layout (bot:state:{conversation_id}):
+    __version__        -> integer, bumped on every write
+    cart               -> JSON-encoded field value
+    ...
+
+Without BOT_STATE_HOT_CACHE (or when Redis is unavailable) saves go
+straight to ConversationSession as a conditional update on
+state_version, merging the changed fields over the stored state when
+another writer got there first. A database write made while the hot
+cache is on discards the hot hash, so the next load reads the row.
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.bot.conversation_state import (
+    ConversationState, ConversationStateManager, PERSISTED_FIELD_NAMES,
+)
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'bot:state'
+DIRTY_KEY = f'{KEY_PREFIX}:dirty'
+VERSION_FIELD = '__version__'
+
+STATE_FIELDS = frozenset(PERSISTED_FIELD_NAMES)
+
+# Keys kept when trimming catalog results and KB snippets to references
+CATALOG_REFERENCE_KEYS = (
+    'product_id', 'id', 'name', 'title', 'price', 'currency', 'in_stock',
+)
+KB_REFERENCE_KEYS = (
+    'id', 'chunk_id', 'document_id', 'source', 'source_type', 'title', 'score',
+)
+MAX_DESCRIPTION_CHARS = 100
+MAX_VARIANTS = 3
+
+# Attempts at the conditional write before giving up
+MAX_WRITE_ATTEMPTS = 3
+
+
+class StateWriteConflict(Exception):
+    """The state could not be saved because of repeated version conflicts."""
+
+
+def _redis_client():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _state_key(conversation_id):
+    return f"{KEY_PREFIX}:{conversation_id}"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _trim_product(product):
+    if not isinstance(product, dict):
+        return product
+    trimmed = {key: product[key] for key in CATALOG_REFERENCE_KEYS if key in product}
+    if product.get('description'):
+        trimmed['description'] = str(product['description'])[:MAX_DESCRIPTION_CHARS]
+    if product.get('variants'):
+        trimmed['variants'] = [
+            {key: variant[key] for key in ('id', 'variant_id', 'name') if key in variant}
+            for variant in product['variants'][:MAX_VARIANTS]
+            if isinstance(variant, dict)
+        ]
+    return trimmed
+
+
+def _trim_snippet(snippet):
+    if not isinstance(snippet, dict):
+        return snippet
+    return {key: snippet[key] for key in KB_REFERENCE_KEYS if key in snippet}
+
+
+def trim_state_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Trim bulky transient fields of a state dict to references.
+
+    Catalog results keep ids and the display fields later turns read
+    (name, price, stock, a short description, first variants). KB
+    snippets keep their source and score; the text is re-retrieved.
+
+    Args:
+        data: ConversationState as a dict (not modified)
+
+    Returns:
+        dict: Copy with last_catalog_results and kb_snippets trimmed
+    """
+    trimmed = dict(data)
+    if trimmed.get('last_catalog_results'):
+        trimmed['last_catalog_results'] = [
+            _trim_product(product) for product in trimmed['last_catalog_results']
+        ]
+    if trimmed.get('kb_snippets'):
+        trimmed['kb_snippets'] = [
+            _trim_snippet(snippet) for snippet in trimmed['kb_snippets']
+        ]
+    return trimmed
+
+
+def encode_state(state: ConversationState) -> Dict[str, str]:
+    """Encode a state as {field: JSON} after trimming bulky fields."""
+    data = trim_state_data(state.to_dict())
+    return {
+        name: json.dumps(value, default=str, sort_keys=True)
+        for name, value in data.items()
+    }
+
+
+def _decode_fields(raw) -> Dict[str, Any]:
+    """Decode a {field: JSON} mapping, dropping unknown fields."""
+    data = {}
+    for name, value in raw.items():
+        name = _decode(name)
+        if name in STATE_FIELDS:
+            data[name] = json.loads(_decode(value))
+    return data
+
+
+def _parse_state_data(state_data) -> Dict[str, Any]:
+    """Parse ConversationSession.state_data (a JSON string or a dict)."""
+    if isinstance(state_data, dict):
+        return state_data
+    if not state_data:
+        return {}
+    return json.loads(state_data)
+
+
+@dataclass
+class LoadedState:
+    """A state loaded for one turn, with the snapshot used for diffing."""
+
+    conversation_id: str
+    state: Optional[ConversationState]
+    version: int
+    snapshot: Dict[str, str] = field(default_factory=dict)
+
+
+class ConversationStateStore:
+    """
+    Load and save ConversationState with delta writes.
+
+    Callers load once per turn, run the orchestrator, then save the
+    updated state against the loaded handle. Redis failures fall back
+    to the database.
+    """
+
+    @staticmethod
+    def hot_cache_enabled() -> bool:
+        return getattr(settings, 'BOT_STATE_HOT_CACHE', False)
+
+    @staticmethod
+    def load(conversation, request_id: str) -> LoadedState:
+        """
+        Load state for a conversation, creating its session if needed.
+
+        Args:
+            conversation: Conversation instance
+            request_id: Current request id (used for a new session)
+
+        Returns:
+            LoadedState: state is None for a session with no stored state
+        """
+        conversation_id = str(conversation.id)
+
+        if ConversationStateStore.hot_cache_enabled():
+            try:
+                raw = _redis_client().hgetall(_state_key(conversation_id))
+            except Exception as e:
+                logger.warning(f"Failed to read hot conversation state: {e}")
+                raw = None
+            if raw:
+                raw = {_decode(name): _decode(value) for name, value in raw.items()}
+                if VERSION_FIELD in raw:
+                    data = _decode_fields(raw)
+                    return LoadedState(
+                        conversation_id=conversation_id,
+                        state=ConversationState.from_dict(data),
+                        version=int(raw[VERSION_FIELD]),
+                        snapshot={name: raw[name] for name in data},
+                    )
+
+        loaded = ConversationStateStore._load_from_database(conversation, request_id)
+
+        if ConversationStateStore.hot_cache_enabled() and loaded.state is not None:
+            ConversationStateStore._warm(loaded)
+
+        return loaded
+
+    @staticmethod
+    def save(loaded: LoadedState, state: ConversationState) -> int:
+        """
+        Persist the fields of state that changed since it was loaded.
+
+        Args:
+            loaded: Handle returned by load()
+            state: Updated state
+
+        Returns:
+            int: Version after the write (unchanged if nothing changed)
+            
+        Raises:
+            StateWriteConflict: If the database write kept conflicting
+        """
+        state.validate()
+        encoded = encode_state(state)
+        changes = {
+            name: value for name, value in encoded.items()
+            if loaded.snapshot.get(name) != value
+        }
+        if not changes:
+            return loaded.version
+
+        version = None
+        if ConversationStateStore.hot_cache_enabled():
+            version = ConversationStateStore._save_hot(loaded, encoded, changes)
+        if version is None:
+            version = ConversationStateStore._save_to_database(loaded, encoded, changes)
+            if ConversationStateStore.hot_cache_enabled():
+                # The hot hash is now older than the row; drop it so
+                # load() and flush() do not serve or skip past this write
+                ConversationStateStore._discard_hot(loaded.conversation_id)
+
+        loaded.snapshot = encoded
+        loaded.version = version
+        loaded.state = state
+        return version
+
+    @staticmethod
+    def flush(limit: int = 500) -> int:
+        """
+        Write dirty hot states into ConversationSession.
+
+        Each conversation is removed from the dirty set before its hash is
+        read, so a write that lands mid-flush marks it dirty again. Rows
+        already at or past the cached version are left alone.
+
+        Args:
+            limit: Maximum conversations to flush in one call
+
+        Returns:
+            int: Number of sessions written
+        """
+        from apps.bot.models import ConversationSession
+
+        try:
+            client = _redis_client()
+            conversation_ids = [
+                _decode(conversation_id)
+                for conversation_id in list(client.smembers(DIRTY_KEY))[:limit]
+            ]
+            if not conversation_ids:
+                return 0
+            pipe = client.pipeline(transaction=False)
+            for conversation_id in conversation_ids:
+                pipe.srem(DIRTY_KEY, conversation_id)
+            for conversation_id in conversation_ids:
+                pipe.hgetall(_state_key(conversation_id))
+            hashes = pipe.execute()[len(conversation_ids):]
+        except Exception as e:
+            logger.warning(f"Failed to read hot conversation states for flush: {e}")
+            return 0
+
+        written = 0
+        failed = []
+        for conversation_id, raw in zip(conversation_ids, hashes):
+            raw = {_decode(name): _decode(value) for name, value in (raw or {}).items()}
+            if VERSION_FIELD not in raw:
+                continue
+            version = int(raw[VERSION_FIELD])
+            data = _decode_fields(raw)
+            try:
+                written += ConversationSession.objects.filter(
+                    conversation_id=conversation_id,
+                    state_version__lt=version,
+                ).update(
+                    state_data=json.dumps(data, default=str),
+                    state_version=version,
+                    last_request_id=data.get('request_id', ''),
+                    updated_at=timezone.now(),
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to flush conversation state: {e}",
+                    extra={'conversation_id': conversation_id}
+                )
+                failed.append(conversation_id)
+
+        if failed:
+            try:
+                _redis_client().sadd(DIRTY_KEY, *failed)
+            except Exception as e:
+                logger.warning(f"Failed to re-mark conversation states dirty: {e}")
+
+        return written
+
+    @staticmethod
+    def _load_from_database(conversation, request_id: str) -> LoadedState:
+        from apps.bot.models import ConversationSession
+
+        customer = conversation.customer
+        session, created = ConversationSession.objects.get_or_create(
+            tenant=conversation.tenant,
+            conversation=conversation,
+            defaults={
+                'customer': customer,
+                'is_active': True,
+                'state_data': ConversationStateManager.serialize_for_storage(
+                    ConversationState(
+                        tenant_id=str(conversation.tenant_id),
+                        conversation_id=str(conversation.id),
+                        request_id=request_id,
+                        customer_id=str(customer.id) if customer else None,
+                        phone_e164=customer.phone_e164 if customer else None
+                    )
+                ),
+                'last_request_id': request_id
+            }
+        )
+
+        if not session.state_data or session.state_data == '{}':
+            return LoadedState(
+                conversation_id=str(conversation.id),
+                state=None,
+                version=session.state_version,
+            )
+
+        state = ConversationStateManager.deserialize_from_storage(session.state_data)
+        return LoadedState(
+            conversation_id=str(conversation.id),
+            state=state,
+            version=session.state_version,
+            snapshot=encode_state(state),
+        )
+
+    @staticmethod
+    def _warm(loaded: LoadedState) -> None:
+        """Seed the hot hash from the database unless it already exists."""
+        from redis.exceptions import WatchError
+
+        key = _state_key(loaded.conversation_id)
+        try:
+            with _redis_client().pipeline() as pipe:
+                pipe.watch(key)
+                if pipe.exists(key):
+                    pipe.unwatch()
+                    return
+                pipe.multi()
+                pipe.hset(key, mapping={**loaded.snapshot, VERSION_FIELD: loaded.version})
+                pipe.expire(key, settings.BOT_STATE_CACHE_TTL)
+                pipe.execute()
+        except WatchError:
+            # Another worker seeded it first
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to warm hot conversation state: {e}")
+
+    @staticmethod
+    def _discard_hot(conversation_id: str) -> None:
+        """Delete a conversation's hot hash and its dirty mark."""
+        try:
+            pipe = _redis_client().pipeline(transaction=False)
+            pipe.delete(_state_key(conversation_id))
+            pipe.srem(DIRTY_KEY, conversation_id)
+            pipe.execute()
+        except Exception as e:
+            logger.error(
+                f"Failed to discard stale hot conversation state: {e}",
+                extra={'conversation_id': conversation_id}
+            )
+
+    @staticmethod
+    def _save_hot(loaded: LoadedState, encoded: Dict[str, str], changes: Dict[str, str]):
+        """
+        Write changed fields to the hot hash and mark it dirty.
+
+        If another turn bumped the version since load, only our changed
+        fields are written so its other changes survive. If the hash
+        expired, the full state is rewritten.
+
+        Returns:
+            int: New version, or None if Redis is unavailable
+        """
+        from redis.exceptions import WatchError
+
+        key = _state_key(loaded.conversation_id)
+        try:
+            with _redis_client().pipeline() as pipe:
+                for attempt in range(MAX_WRITE_ATTEMPTS):
+                    try:
+                        pipe.watch(key)
+                        current = pipe.hget(key, VERSION_FIELD)
+                        if current is None:
+                            mapping = encoded
+                            version = loaded.version + 1
+                        else:
+                            mapping = changes
+                            version = int(_decode(current)) + 1
+                            if version != loaded.version + 1:
+                                logger.info(
+                                    "Conversation state changed since load; writing delta only",
+                                    extra={
+                                        'conversation_id': loaded.conversation_id,
+                                        'loaded_version': loaded.version,
+                                        'current_version': version - 1,
+                                    }
+                                )
+                        pipe.multi()
+                        pipe.hset(key, mapping={**mapping, VERSION_FIELD: version})
+                        pipe.expire(key, settings.BOT_STATE_CACHE_TTL)
+                        pipe.sadd(DIRTY_KEY, loaded.conversation_id)
+                        pipe.execute()
+                        return version
+                    except WatchError:
+                        continue
+        except Exception as e:
+            logger.warning(f"Failed to write hot conversation state: {e}")
+            return None
+
+        logger.warning(
+            "Hot conversation state write kept conflicting; falling back to database",
+            extra={'conversation_id': loaded.conversation_id}
+        )
+        return None
+
+    @staticmethod
+    def _save_to_database(loaded: LoadedState, encoded: Dict[str, str], changes: Dict[str, str]) -> int:
+        """
+        Conditionally update ConversationSession on state_version.
+
+        On a version mismatch the stored state is re-read and our changed
+        fields are merged over it before retrying.
+        
+        Raises:
+            StateWriteConflict: If every attempt conflicted or the session
+                row no longer exists
+        """
+        from apps.bot.models import ConversationSession
+
+        version = loaded.version
+        data = {name: json.loads(value) for name, value in encoded.items()}
+        delta = {name: json.loads(value) for name, value in changes.items()}
+
+        for attempt in range(MAX_WRITE_ATTEMPTS):
+            updated = ConversationSession.objects.filter(
+                conversation_id=loaded.conversation_id,
+                state_version=version,
+            ).update(
+                state_data=json.dumps(data, default=str),
+                state_version=version + 1,
+                last_request_id=data.get('request_id', ''),
+                updated_at=timezone.now(),
+            )
+            if updated:
+                return version + 1
+
+            row = ConversationSession.objects.filter(
+                conversation_id=loaded.conversation_id
+            ).values('state_data', 'state_version').first()
+            if row is None:
+                break
+            version = row['state_version']
+            data = {**_parse_state_data(row['state_data']), **delta}
+
+        logger.error(
+            "Failed to save conversation state after version conflicts",
+            extra={'conversation_id': loaded.conversation_id, 'version': version}
+        )
+        raise StateWriteConflict(
+            f"Conversation state for {loaded.conversation_id} was not saved "
+            f"after {MAX_WRITE_ATTEMPTS} attempts"
+        )
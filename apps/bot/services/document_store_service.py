@@ -141,27 +141,31 @@ class DocumentStoreService:
             namespace=self.namespace
         )
         
-        # Retrieve chunks from database
+        # Retrieve chunks from database in one query
+        chunks = {
+            chunk.vector_id: chunk
+            for chunk in DocumentChunk.objects.filter(
+                vector_id__in=[vec_result.id for vec_result in vector_results]
+            ).select_related('document')
+        }
+        
         results = []
         for vec_result in vector_results:
-            try:
-                chunk = DocumentChunk.objects.select_related('document').get(
-                    vector_id=vec_result.id
-                )
-                
-                results.append({
-                    'chunk_id': str(chunk.id),
-                    'document_id': str(chunk.document.id),
-                    'document_name': chunk.document.file_name,
-                    'content': chunk.content,
-                    'page_number': chunk.page_number,
-                    'section': chunk.section,
-                    'score': vec_result.score,
-                    'metadata': vec_result.metadata
-                })
-            except DocumentChunk.DoesNotExist:
+            chunk = chunks.get(vec_result.id)
+            if chunk is None:
                 logger.warning(f"Chunk not found for vector_id: {vec_result.id}")
                 continue
+            
+            results.append({
+                'chunk_id': str(chunk.id),
+                'document_id': str(chunk.document.id),
+                'document_name': chunk.document.file_name,
+                'content': chunk.content,
+                'page_number': chunk.page_number,
+                'section': chunk.section,
+                'score': vec_result.score,
+                'metadata': vec_result.metadata
+            })
         
         logger.info(
             f"Document search: '{query[:50]}' - "
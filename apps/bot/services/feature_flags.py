@@ -87,9 +87,57 @@ class FeatureFlagService:
         if not flag_config:
             return default
         
+        is_enabled = cls._evaluate_config(flag_config, tenant)
+        cache.set(cache_key, is_enabled, cls.CACHE_TTL)
+        
+        return is_enabled
+    
+    @classmethod
+    def evaluate(
+        cls,
+        feature_name: str,
+        tenant,
+        default: bool = False
+    ) -> bool:
+        """
+        Evaluate a feature flag for a tenant without touching the cache.
+        
+        Used when building a tenant runtime snapshot, which resolves
+        every flag once and is invalidated as a whole.
+        
+        Args:
+            feature_name: Name of the feature flag
+            tenant: Tenant instance
+            default: Default value if flag not found
+            
+        Returns:
+            bool: True if feature is enabled for this tenant
+        """
+        flag_config = cls._get_flag_config(feature_name, tenant)
+        
+        if not flag_config:
+            return default
+        
+        return cls._evaluate_config(flag_config, tenant)
+    
+    @classmethod
+    def _evaluate_config(cls, flag_config: Dict[str, Any], tenant) -> bool:
+        """
+        Decide whether a flag configuration enables a tenant.
+        
+        Args:
+            flag_config: Flag configuration dict, or a plain bool as
+                stored by TenantSettings defaults
+            tenant: Tenant instance
+            
+        Returns:
+            bool: True if enabled for this tenant
+        """
+        if isinstance(flag_config, bool):
+            return flag_config
+        
         # Check if globally enabled
         if not flag_config.get('enabled', False):
-            cache.set(cache_key, False, cls.CACHE_TTL)
             return False
         
         # Check rollout percentage
@@ -97,19 +145,14 @@ class FeatureFlagService:
         
         if rollout_percentage >= 100:
             # Fully rolled out
-            cache.set(cache_key, True, cls.CACHE_TTL)
             return True
         
         if rollout_percentage <= 0:
             # Not rolled out
-            cache.set(cache_key, False, cls.CACHE_TTL)
             return False
         
         # Partial rollout - use consistent hashing
-        is_enabled = cls._is_in_rollout(tenant.id, rollout_percentage)
-        cache.set(cache_key, is_enabled, cls.CACHE_TTL)
-        
-        return is_enabled
+        return cls._is_in_rollout(tenant.id, rollout_percentage)
     
     @classmethod
     def _get_flag_config(cls, feature_name: str, tenant) -> Optional[Dict[str, Any]]:
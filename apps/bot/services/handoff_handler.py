@@ -146,22 +146,27 @@ class HandoffHandler:
             response: Response dict from handler
         """
         if response['action'] == 'send':
+            # Create the message record first so a rescheduled retry task
+            # can mark it sent or failed
+            from apps.messaging.models import Message
+            message = Message.objects.create(
+                conversation=self.conversation,
+                direction='out',
+                message_type=response.get('message_type', 'bot_response'),
+                text=response['message'],
+                payload=response.get('metadata', {})
+            )
+            
             try:
-                result = self.twilio_service.send_whatsapp(
+                # sid is None when the send was rescheduled as a retry task
+                result = self.twilio_service.retry_send_whatsapp(
                     to=self.customer.phone_e164,
-                    body=response['message']
+                    body=response['message'],
+                    message_id=str(message.id)
                 )
                 
-                # Create message record
-                from apps.messaging.models import Message
-                Message.objects.create(
-                    conversation=self.conversation,
-                    direction='out',
-                    message_type=response.get('message_type', 'bot_response'),
-                    text=response['message'],
-                    provider_msg_id=result['sid'],
-                    payload=response.get('metadata', {})
-                )
+                if result['sid']:
+                    message.mark_sent(provider_msg_id=result['sid'])
                 
                 logger.info(
                     f"Handoff handler response sent",
@@ -172,6 +177,7 @@ class HandoffHandler:
                 )
                 
             except Exception as e:
+                message.mark_failed(error_message=str(e))
                 logger.error(
                     f"Failed to send handoff handler response",
                     extra={'conversation_id': str(self.conversation.id)},
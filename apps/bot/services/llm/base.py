@@ -7,6 +7,8 @@ from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
 
+from apps.core.profiling import record_llm_usage
+
 
 @dataclass
 class ModelInfo:
@@ -35,6 +37,10 @@ class LLMResponse:
     estimated_cost: Decimal
     finish_reason: str
     metadata: Dict[str, Any]
+    
+    def __post_init__(self):
+        # Every provider builds one response per completed call
+        record_llm_usage(self.model, self.input_tokens, self.output_tokens)
 
 
 class LLMProvider(ABC):
@@ -29,15 +29,17 @@ class LLMRouter:
     - Provider failover for reliability
     """
     
-    def __init__(self, tenant: Tenant):
+    def __init__(self, tenant: Tenant, config: Optional[AgentConfiguration] = None):
         """
         Initialize LLM router for tenant.
-        
+
         Args:
             tenant: Tenant instance for configuration
+            config: Preloaded AgentConfiguration (e.g. from the tenant
+                runtime snapshot); loaded lazily when omitted
         """
         self.tenant = tenant
-        self.config = None  # Will be loaded lazily
+        self.config = config
         self._provider_cache: Dict[str, LLMProvider] = {}
         self.factory = LLMProviderFactory()
     
@@ -14,10 +14,35 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 import json
-from collections import defaultdict, deque
+from collections import defaultdict
 import threading
 
 from apps.bot.services.observability import observability_service, ConversationMetrics
+from apps.bot.services.monitoring.quantile_sketch import (
+    QuantileSketch, WindowedQuantileSketch, publish_sketch, load_sketch,
+    current_window_start, DEFAULT_WINDOW_SECONDS, REDIS_KEY_PREFIX
+)
+from apps.core.metrics import registry, tenant_label
+
+# Shared Prometheus series (see apps.core.metrics)
+JOURNEYS = registry.counter(
+    'tulia_journeys_total', 'Journey events by outcome', ['journey', 'outcome', 'tenant']
+)
+JOURNEY_DURATION = registry.histogram(
+    'tulia_journey_duration_seconds', 'Journey duration', ['journey']
+)
+PAYMENTS = registry.counter(
+    'tulia_payments_total', 'Payment events by outcome', ['method', 'outcome', 'tenant']
+)
+PAYMENT_DURATION = registry.histogram(
+    'tulia_payment_processing_seconds', 'Payment processing time', ['method']
+)
+ESCALATIONS = registry.counter(
+    'tulia_escalations_total', 'Escalations to a human', ['reason', 'trigger', 'tenant']
+)
+OPERATION_DURATION = registry.histogram(
+    'tulia_operation_duration_seconds', 'Component operation latency', ['component', 'operation', 'outcome']
+)
 
 
 class MetricCategory(Enum):
@@ -107,27 +132,26 @@ class PerformanceMetrics:
     success_rate: float = 0.0
     error_rate: float = 0.0
     
-    # Response time tracking
-    response_times: deque = field(default_factory=lambda: deque(maxlen=1000))
+    # Response time tracking (bounded, windowed quantile sketch)
+    response_times: WindowedQuantileSketch = field(default_factory=WindowedQuantileSketch)
+    
+    # Samples not yet published to the fleet-wide Redis sketch
+    unpublished: QuantileSketch = field(default_factory=QuantileSketch)
     
     def add_response_time(self, duration: float):
-        """Add response time measurement."""
-        self.response_times.append(duration)
-        self._update_percentiles()
+        """Add response time measurement (O(1); percentiles refresh on read)."""
+        self.response_times.add(duration)
+        self.unpublished.add(duration)
     
     def _update_percentiles(self):
-        """Update percentile calculations."""
-        if self.response_times:
-            sorted_times = sorted(self.response_times)
-            count = len(sorted_times)
-            
-            self.avg_response_time = sum(sorted_times) / count
-            
-            if count >= 20:  # Only calculate percentiles with sufficient data
-                p95_index = int(0.95 * count)
-                p99_index = int(0.99 * count)
-                self.p95_response_time = sorted_times[min(p95_index, count - 1)]
-                self.p99_response_time = sorted_times[min(p99_index, count - 1)]
+        """Update percentile calculations from the sketch."""
+        sketch = self.response_times.merged()
+        if sketch.count:
+            self.avg_response_time = sketch.mean
+            
+            if sketch.count >= 20:  # Only calculate percentiles with sufficient data
+                self.p95_response_time = sketch.quantile(0.95)
+                self.p99_response_time = sketch.quantile(0.99)
     
     def update_success_rate(self):
         """Update calculated success rate."""
@@ -164,6 +188,10 @@ class MetricsCollector:
         # Last aggregation time
         self.last_hourly_aggregation = datetime.now(timezone.utc)
         self.last_daily_aggregation = datetime.now(timezone.utc)
+        
+        # Fleet-wide sketch publishing (see publish_performance_sketches)
+        self.sketch_publish_interval = 15.0  # seconds
+        self.last_sketch_publish = time.time()
     
     def track_journey_start(self, journey_type: str, conversation_id: str, tenant_id: str):
         """Track journey start event."""
@@ -172,6 +200,7 @@ class MetricsCollector:
                 self.journey_metrics[journey_type] = JourneyMetrics(journey_type)
             
             self.journey_metrics[journey_type].total_started += 1
+            JOURNEYS.inc(journey=journey_type, outcome='started', tenant=tenant_label(tenant_id))
             
             self.logger.info(
                 f"Journey started: {journey_type}",
@@ -197,9 +226,13 @@ class MetricsCollector:
                 metrics.total_completed += 1
             else:
                 metrics.total_failed += 1
+            JOURNEYS.inc(
+                journey=journey_type, outcome='completed' if success else 'failed', tenant=tenant_label(tenant_id)
+            )
             
             # Update average duration
             if duration is not None:
+                JOURNEY_DURATION.observe(duration, journey=journey_type)
                 current_total = metrics.total_completed + metrics.total_failed
                 if current_total > 1:
                     metrics.avg_duration = (
@@ -233,6 +266,7 @@ class MetricsCollector:
             
             metrics = self.journey_metrics[journey_type]
             metrics.total_abandoned += 1
+            JOURNEYS.inc(journey=journey_type, outcome='abandoned', tenant=tenant_label(tenant_id))
             metrics.update_completion_rate()
             
             self.logger.info(
@@ -257,6 +291,7 @@ class MetricsCollector:
             
             metrics = self.payment_metrics[payment_method]
             metrics.total_initiated += 1
+            PAYMENTS.inc(method=payment_method, outcome='initiated', tenant=tenant_label(tenant_id))
             
             # Update average amount
             if amount is not None:
@@ -294,9 +329,13 @@ class MetricsCollector:
                 metrics.total_completed += 1
             else:
                 metrics.total_failed += 1
+            PAYMENTS.inc(
+                method=payment_method, outcome='completed' if success else 'failed', tenant=tenant_label(tenant_id)
+            )
             
             # Update average processing time
             if processing_time is not None:
+                PAYMENT_DURATION.observe(processing_time, method=payment_method)
                 completed_count = metrics.total_completed + metrics.total_failed
                 if completed_count > 1:
                     metrics.avg_processing_time = (
@@ -332,6 +371,7 @@ class MetricsCollector:
             
             metrics = self.payment_metrics[payment_method]
             metrics.total_abandoned += 1
+            PAYMENTS.inc(method=payment_method, outcome='abandoned', tenant=tenant_label(tenant_id))
             metrics.update_success_rate()
             
             self.logger.info(
@@ -356,6 +396,9 @@ class MetricsCollector:
             
             metrics = self.escalation_metrics[escalation_reason]
             metrics.total_escalations += 1
+            ESCALATIONS.inc(
+                reason=escalation_reason, trigger=escalation_trigger, tenant=tenant_label(tenant_id)
+            )
             
             # Track escalation trigger breakdown
             if escalation_trigger == "explicit_human_request":
@@ -406,6 +449,11 @@ class MetricsCollector:
             
             metrics.add_response_time(duration)
             metrics.update_success_rate()
+            OPERATION_DURATION.observe(
+                duration, component=component, operation=operation, outcome='success' if success else 'failure'
+            )
+            
+            publish_due = time.time() - self.last_sketch_publish >= self.sketch_publish_interval
             
             self.logger.info(
                 f"Performance tracked: {component_key}",
@@ -416,11 +464,13 @@ class MetricsCollector:
                     'duration': duration,
                     'success': success,
                     'conversation_id': conversation_id,
-                    'avg_response_time': metrics.avg_response_time,
                     'success_rate': metrics.success_rate,
                     'event_type': 'performance_metric'
                 }
             )
+        
+        if publish_due:
+            self.publish_performance_sketches()
     
     def get_journey_completion_rates(self) -> Dict[str, float]:
         """Get current journey completion rates."""
@@ -453,6 +503,9 @@ class MetricsCollector:
     
     def _get_performance_summary_unlocked(self) -> Dict[str, Dict[str, float]]:
         """Get performance summary without acquiring lock (internal use only)."""
+        for metrics in self.performance_metrics.values():
+            metrics._update_percentiles()
+        
         return {
             component: {
                 'avg_response_time': metrics.avg_response_time,
@@ -465,6 +518,73 @@ class MetricsCollector:
             for component, metrics in self.performance_metrics.items()
         }
     
+    def publish_performance_sketches(self):
+        """
+        Publish unpublished response-time samples to the shared Redis sketches.
+        
+        Each component's delta is added into a per-minute Redis hash with
+        HINCRBY, so all workers together build an exact fleet-wide sketch.
+        """
+        with self._lock:
+            pending = []
+            for component, metrics in self.performance_metrics.items():
+                if metrics.unpublished.count:
+                    pending.append((component, metrics.unpublished))
+                    metrics.unpublished = QuantileSketch()
+            self.last_sketch_publish = time.time()
+        
+        if not pending:
+            return
+        
+        window_start = current_window_start()
+        for component, sketch in pending:
+            publish_sketch(f"perf:{component}", sketch, window_start)
+        
+        try:
+            from django_redis import get_redis_connection
+            redis_client = get_redis_connection('default')
+            redis_client.sadd(f"{REDIS_KEY_PREFIX}:perf_components", *[c for c, _ in pending])
+        except Exception as e:
+            self.logger.warning(f"Failed to register sketch components: {e}")
+    
+    def get_fleet_performance_summary(self, minutes: int = 15) -> Dict[str, Dict[str, float]]:
+        """
+        Get response-time percentiles merged across all worker processes.
+        
+        Args:
+            minutes: Number of most recent one-minute windows to merge
+            
+        Returns:
+            dict: component -> {p50, p95, p99, avg_response_time, total_operations}
+        """
+        current = current_window_start()
+        windows = [current - i * DEFAULT_WINDOW_SECONDS for i in range(minutes)]
+        
+        try:
+            from django_redis import get_redis_connection
+            redis_client = get_redis_connection('default')
+            components = sorted(
+                c.decode() if isinstance(c, bytes) else c
+                for c in redis_client.smembers(f"{REDIS_KEY_PREFIX}:perf_components")
+            )
+        except Exception as e:
+            self.logger.warning(f"Failed to list sketch components: {e}")
+            return {}
+        
+        summary = {}
+        for component in components:
+            sketch = load_sketch(f"perf:{component}", windows)
+            if not sketch.count:
+                continue
+            summary[component] = {
+                'p50_response_time': sketch.quantile(0.50),
+                'p95_response_time': sketch.quantile(0.95),
+                'p99_response_time': sketch.quantile(0.99),
+                'avg_response_time': sketch.mean,
+                'total_operations': sketch.count
+            }
+        return summary
+    
     def get_comprehensive_metrics_summary(self) -> Dict[str, Any]:
         """Get comprehensive metrics summary for monitoring dashboards."""
         with self._lock:
@@ -5,10 +5,15 @@ Provides structured logging, metrics collection, and alerting capabilities.
 """
 from .structured_logger import StructuredLogger, get_agent_logger
 from .metrics_collector import MetricsCollector, get_metrics_collector
+from .node_metrics import NodeMetrics, instrument_node, instrument_tool, profile_message
 
 __all__ = [
     'StructuredLogger',
     'get_agent_logger',
     'MetricsCollector',
     'get_metrics_collector',
+    'NodeMetrics',
+    'instrument_node',
+    'instrument_tool',
+    'profile_message',
 ]
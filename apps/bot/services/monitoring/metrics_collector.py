@@ -11,13 +11,38 @@ Tracks and aggregates metrics including:
 """
 import time
 from typing import Dict, Any, Optional, List
-from collections import defaultdict, deque
+from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from decimal import Decimal
 from django.core.cache import cache
 from django.utils import timezone
-import statistics
+
+from .quantile_sketch import (
+    QuantileSketch, WindowedQuantileSketch, publish_sketch, load_sketch,
+    current_window_start, DEFAULT_WINDOW_SECONDS
+)
+from apps.core.metrics import registry, tenant_label
+
+# Shared Prometheus series (see apps.core.metrics)
+AGENT_INTERACTIONS = registry.counter(
+    'tulia_agent_interactions_total', 'Agent interactions', ['model', 'tenant']
+)
+AGENT_RESPONSE_TIME = registry.histogram(
+    'tulia_agent_response_seconds', 'Agent response time', ['tenant']
+)
+AGENT_TOKENS = registry.counter(
+    'tulia_agent_tokens_total', 'LLM tokens used by agent interactions', ['model', 'type']
+)
+AGENT_COST = registry.counter(
+    'tulia_agent_cost_usd_total', 'Estimated LLM cost in USD', ['model', 'tenant']
+)
+HANDOFFS = registry.counter(
+    'tulia_agent_handoffs_total', 'Handoffs to a human', ['reason', 'tenant']
+)
+KNOWLEDGE_SEARCHES = registry.counter(
+    'tulia_knowledge_searches_total', 'Knowledge base searches', ['result', 'tenant']
+)
 
 
 @dataclass
@@ -77,14 +102,14 @@ class MetricsCollector:
     
     Maintains in-memory metrics with periodic cache updates for
     distributed access. Metrics are aggregated per tenant and globally.
+    
+    Memory is bounded: response times go into a windowed quantile sketch
+    and everything else is kept as running totals.
     """
     
     # Cache TTL in seconds
     CACHE_TTL = 300  # 5 minutes
     
-    # Maximum samples to keep in memory for percentile calculations
-    MAX_SAMPLES = 1000
-    
     def __init__(self, tenant_id: Optional[str] = None):
         """
         Initialize metrics collector.
@@ -95,12 +120,19 @@ class MetricsCollector:
         self.tenant_id = tenant_id
         self.cache_key_prefix = f"agent_metrics:{tenant_id or 'global'}"
         
-        # In-memory metrics storage
-        self.response_times = deque(maxlen=self.MAX_SAMPLES)
-        self.token_usage_data = []
-        self.cost_data = []
-        self.handoff_data = []
-        self.knowledge_search_data = []
+        # In-memory metrics storage (bounded)
+        self.response_times = WindowedQuantileSketch()
+        self.unpublished_response_times = QuantileSketch()
+        
+        # Running totals
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+        self.total_cost = Decimal('0.0')
+        self.searches_with_results = 0
+        self.total_search_results = 0
+        self.similarity_score_sum = 0.0
+        self.similarity_score_count = 0
         
         # Counters
         self.interaction_count = 0
@@ -139,17 +171,16 @@ class MetricsCollector:
             **kwargs: Additional metadata
         """
         # Record response time
-        self.response_times.append(response_time_ms)
+        self.response_times.add(response_time_ms)
+        self.unpublished_response_times.add(response_time_ms)
         
         # Record token usage
-        self.token_usage_data.append(token_usage)
+        self.prompt_tokens += token_usage.get('prompt_tokens', 0)
+        self.completion_tokens += token_usage.get('completion_tokens', 0)
+        self.total_tokens += token_usage.get('total_tokens', 0)
         
         # Record cost
-        self.cost_data.append({
-            'cost': estimated_cost,
-            'model': model_used,
-            'tokens': token_usage.get('total_tokens', 0)
-        })
+        self.total_cost += estimated_cost
         
         # Track model usage
         self.model_usage[model_used] += 1
@@ -158,15 +189,20 @@ class MetricsCollector:
         # Record handoff
         if handoff_triggered:
             self.handoff_count += 1
-            self.handoff_data.append({
-                'reason': handoff_reason,
-                'confidence_score': confidence_score
-            })
             self.handoff_reasons[handoff_reason] += 1
         
         # Increment interaction count
         self.interaction_count += 1
         
+        tenant = tenant_label(self.tenant_id)
+        AGENT_INTERACTIONS.inc(model=model_used, tenant=tenant)
+        AGENT_RESPONSE_TIME.observe(response_time_ms / 1000, tenant=tenant)
+        AGENT_TOKENS.inc(token_usage.get('prompt_tokens', 0), model=model_used, type='prompt')
+        AGENT_TOKENS.inc(token_usage.get('completion_tokens', 0), model=model_used, type='completion')
+        AGENT_COST.inc(float(estimated_cost), model=model_used, tenant=tenant)
+        if handoff_triggered:
+            HANDOFFS.inc(reason=handoff_reason or 'unspecified', tenant=tenant)
+        
         # Periodically update cache
         if self.interaction_count % 10 == 0:
             self._update_cache()
@@ -188,11 +224,13 @@ class MetricsCollector:
             **kwargs: Additional metadata
         """
         self.knowledge_search_count += 1
-        self.knowledge_search_data.append({
-            'results_count': results_count,
-            'top_similarity_score': top_similarity_score,
-            'search_time_ms': search_time_ms
-        })
+        self.total_search_results += results_count
+        if results_count > 0:
+            self.searches_with_results += 1
+        if top_similarity_score is not None:
+            self.similarity_score_sum += top_similarity_score
+            self.similarity_score_count += 1
+        KNOWLEDGE_SEARCHES.inc(result='hit' if results_count > 0 else 'miss', tenant=tenant_label(self.tenant_id))
         
         # Update cache periodically
         if self.knowledge_search_count % 10 == 0:
@@ -205,25 +243,18 @@ class MetricsCollector:
         Returns:
             ResponseTimeMetrics with p50, p95, p99, mean, min, max
         """
-        if not self.response_times:
+        sketch = self.response_times.merged()
+        if not sketch.count:
             return ResponseTimeMetrics()
         
-        sorted_times = sorted(self.response_times)
-        count = len(sorted_times)
-        
-        # Calculate percentiles
-        p50_idx = int(count * 0.50)
-        p95_idx = int(count * 0.95)
-        p99_idx = int(count * 0.99)
-        
         return ResponseTimeMetrics(
-            p50=sorted_times[p50_idx] if p50_idx < count else 0.0,
-            p95=sorted_times[p95_idx] if p95_idx < count else 0.0,
-            p99=sorted_times[p99_idx] if p99_idx < count else 0.0,
-            mean=statistics.mean(sorted_times),
-            min=min(sorted_times),
-            max=max(sorted_times),
-            count=count
+            p50=sketch.quantile(0.50),
+            p95=sketch.quantile(0.95),
+            p99=sketch.quantile(0.99),
+            mean=sketch.mean,
+            min=sketch.min,
+            max=sketch.max,
+            count=sketch.count
         )
     
     def get_token_usage_metrics(self) -> TokenUsageMetrics:
@@ -233,19 +264,15 @@ class MetricsCollector:
         Returns:
             TokenUsageMetrics with totals and averages
         """
-        if not self.token_usage_data:
+        count = self.interaction_count
+        if not count:
             return TokenUsageMetrics()
         
-        total_tokens = sum(d.get('total_tokens', 0) for d in self.token_usage_data)
-        prompt_tokens = sum(d.get('prompt_tokens', 0) for d in self.token_usage_data)
-        completion_tokens = sum(d.get('completion_tokens', 0) for d in self.token_usage_data)
-        count = len(self.token_usage_data)
-        
         return TokenUsageMetrics(
-            total_tokens=total_tokens,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            avg_tokens_per_conversation=total_tokens / count if count > 0 else 0.0,
+            total_tokens=self.total_tokens,
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            avg_tokens_per_conversation=self.total_tokens / count,
             conversation_count=count
         )
     
@@ -256,24 +283,19 @@ class MetricsCollector:
         Returns:
             CostMetrics with totals, averages, and breakdown by model
         """
-        if not self.cost_data:
+        count = self.interaction_count
+        if not count:
             return CostMetrics()
         
-        total_cost = sum(d['cost'] for d in self.cost_data)
-        total_tokens = sum(d['tokens'] for d in self.cost_data)
-        count = len(self.cost_data)
-        
-        # Calculate cost by model
-        by_model = {}
-        for model, cost in self.model_costs.items():
-            by_model[model] = cost
+        total_cost = self.total_cost
+        total_tokens = self.total_tokens
         
         return CostMetrics(
             total_cost=total_cost,
-            avg_cost_per_conversation=total_cost / count if count > 0 else Decimal('0.0'),
+            avg_cost_per_conversation=total_cost / count,
             avg_cost_per_token=total_cost / total_tokens if total_tokens > 0 else Decimal('0.0'),
             conversation_count=count,
-            by_model=by_model
+            by_model=dict(self.model_costs)
         )
     
     def get_handoff_metrics(self) -> HandoffMetrics:
@@ -297,31 +319,21 @@ class MetricsCollector:
         Returns:
             KnowledgeBaseMetrics with hit rate and averages
         """
-        if not self.knowledge_search_data:
+        count = self.knowledge_search_count
+        if not count:
             return KnowledgeBaseMetrics()
         
-        searches_with_results = sum(
-            1 for d in self.knowledge_search_data
-            if d['results_count'] > 0
+        # Average similarity only over searches that reported a score
+        avg_similarity = (
+            self.similarity_score_sum / self.similarity_score_count
+            if self.similarity_score_count else 0.0
         )
         
-        total_results = sum(d['results_count'] for d in self.knowledge_search_data)
-        
-        # Calculate average similarity score (only for searches with results)
-        similarity_scores = [
-            d['top_similarity_score']
-            for d in self.knowledge_search_data
-            if d['top_similarity_score'] is not None
-        ]
-        avg_similarity = statistics.mean(similarity_scores) if similarity_scores else 0.0
-        
-        count = len(self.knowledge_search_data)
-        
         return KnowledgeBaseMetrics(
             total_searches=count,
-            searches_with_results=searches_with_results,
-            hit_rate=searches_with_results / count if count > 0 else 0.0,
-            avg_results_per_search=total_results / count if count > 0 else 0.0,
+            searches_with_results=self.searches_with_results,
+            hit_rate=self.searches_with_results / count,
+            avg_results_per_search=self.total_search_results / count,
             avg_similarity_score=avg_similarity
         )
     
@@ -400,11 +412,20 @@ class MetricsCollector:
         }
     
     def _update_cache(self):
-        """Update cached metrics for distributed access."""
+        """Update cached metrics and publish the response-time sketch delta."""
         try:
             metrics = self.get_all_metrics()
             cache_key = f"{self.cache_key_prefix}:current"
             cache.set(cache_key, metrics, self.CACHE_TTL)
+            
+            # Fleet-wide percentiles: merge this process's samples in Redis
+            delta = self.unpublished_response_times
+            self.unpublished_response_times = QuantileSketch()
+            publish_sketch(
+                f"{self.cache_key_prefix}:response_time",
+                delta,
+                current_window_start()
+            )
         except Exception as e:
             # Log error but don't fail
             import logging
@@ -414,10 +435,15 @@ class MetricsCollector:
     def reset(self):
         """Reset all metrics."""
         self.response_times.clear()
-        self.token_usage_data.clear()
-        self.cost_data.clear()
-        self.handoff_data.clear()
-        self.knowledge_search_data.clear()
+        self.unpublished_response_times.clear()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+        self.total_cost = Decimal('0.0')
+        self.searches_with_results = 0
+        self.total_search_results = 0
+        self.similarity_score_sum = 0.0
+        self.similarity_score_count = 0
         self.interaction_count = 0
         self.handoff_count = 0
         self.knowledge_search_count = 0
@@ -439,6 +465,40 @@ class MetricsCollector:
         cache_key_prefix = f"agent_metrics:{tenant_id or 'global'}"
         cache_key = f"{cache_key_prefix}:current"
         return cache.get(cache_key)
+    
+    @classmethod
+    def get_fleet_response_time_metrics(
+        cls,
+        tenant_id: Optional[str] = None,
+        minutes: int = 15
+    ) -> ResponseTimeMetrics:
+        """
+        Get response time percentiles merged across all worker processes.
+        
+        Args:
+            tenant_id: Optional tenant ID
+            minutes: Number of most recent one-minute windows to merge
+            
+        Returns:
+            ResponseTimeMetrics built from the shared Redis sketch
+        """
+        current = current_window_start()
+        sketch = load_sketch(
+            f"agent_metrics:{tenant_id or 'global'}:response_time",
+            [current - i * DEFAULT_WINDOW_SECONDS for i in range(minutes)]
+        )
+        if not sketch.count:
+            return ResponseTimeMetrics()
+        
+        return ResponseTimeMetrics(
+            p50=sketch.quantile(0.50),
+            p95=sketch.quantile(0.95),
+            p99=sketch.quantile(0.99),
+            mean=sketch.mean,
+            min=sketch.min,
+            max=sketch.max,
+            count=sketch.count
+        )
 
 
 # Global metrics collector instances
@@ -0,0 +1,254 @@
+"""
+Per-node and per-tool execution metrics for the LangGraph pipeline.
+
+With BOT_NODE_PROFILING enabled, orchestrator graph nodes
+(instrument_node) and registered tools (instrument_tool) run inside a
+profiling span (apps.core.profiling) that measures wall time, SQL
+queries and query time, CacheService hits and misses and LLM tokens.
+Node counters include the tools they call. Finished spans are folded
+into process-local aggregates (a quantile sketch of latency plus
+running totals, see NodeMetrics.snapshot) and into the shared
+``tulia_bot_step_*`` series served at /metrics. A sampled fraction of messages
+(BOT_NODE_PROFILE_SAMPLE_RATE) also stores its full per-node profile on
+an AgentInteraction.
+"""
+import logging
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from apps.core.metrics import registry
+from apps.core.profiling import ProfileSpan, profile_span
+
+from .quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+# Shared Prometheus series (see apps.core.metrics)
+STEP_DURATION = registry.histogram(
+    'tulia_bot_step_duration_seconds', 'Bot pipeline, node and tool latency', ['kind', 'name']
+)
+STEP_ERRORS = registry.counter(
+    'tulia_bot_step_errors_total', 'Failed pipeline, node and tool calls', ['kind', 'name']
+)
+STEP_QUERIES = registry.counter(
+    'tulia_bot_step_db_queries_total', 'SQL queries issued', ['kind', 'name']
+)
+STEP_QUERY_TIME = registry.counter(
+    'tulia_bot_step_db_query_seconds_total', 'Time spent in SQL queries', ['kind', 'name']
+)
+STEP_CACHE_LOOKUPS = registry.counter(
+    'tulia_bot_step_cache_lookups_total', 'CacheService lookups', ['kind', 'name', 'result']
+)
+STEP_TOKENS = registry.counter(
+    'tulia_bot_step_llm_tokens_total', 'LLM tokens', ['kind', 'name', 'type']
+)
+
+
+class _StepStats:
+    """Aggregates for one node or tool."""
+
+    __slots__ = (
+        'latency', 'errors', 'queries', 'query_seconds', 'cache_hits', 'cache_misses',
+        'prompt_tokens', 'completion_tokens',
+    )
+
+    def __init__(self):
+        self.latency = QuantileSketch()
+        self.errors = 0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, span: ProfileSpan):
+        self.latency.add(span.duration)
+        self.errors += int(span.error)
+        self.queries += span.queries
+        self.query_seconds += span.query_seconds
+        self.cache_hits += span.cache_hits
+        self.cache_misses += span.cache_misses
+        self.prompt_tokens += span.prompt_tokens
+        self.completion_tokens += span.completion_tokens
+
+
+class NodeMetrics:
+    """
+    Process-local aggregates keyed by (kind, name).
+
+    Kinds are ``message`` (the whole pipeline run), ``node`` and ``tool``.
+    """
+
+    _lock = threading.Lock()
+    _steps: Dict[Tuple[str, str], _StepStats] = {}
+
+    @classmethod
+    def record(cls, span: Optional[ProfileSpan]):
+        """Fold a finished span into the aggregates and the shared series."""
+        if span is None:
+            return
+        with cls._lock:
+            stats = cls._steps.get((span.kind, span.name))
+            if stats is None:
+                stats = cls._steps[(span.kind, span.name)] = _StepStats()
+            stats.add(span)
+        labels = {'kind': span.kind, 'name': span.name}
+        STEP_DURATION.observe(span.duration, **labels)
+        if span.error:
+            STEP_ERRORS.inc(**labels)
+        STEP_QUERIES.inc(span.queries, **labels)
+        STEP_QUERY_TIME.inc(span.query_seconds, **labels)
+        STEP_CACHE_LOOKUPS.inc(span.cache_hits, result='hit', **labels)
+        STEP_CACHE_LOOKUPS.inc(span.cache_misses, result='miss', **labels)
+        STEP_TOKENS.inc(span.prompt_tokens, type='prompt', **labels)
+        STEP_TOKENS.inc(span.completion_tokens, type='completion', **labels)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Dict[str, Any]]:
+        """Summaries keyed by ``kind:name``, times in milliseconds."""
+        with cls._lock:
+            steps = list(cls._steps.items())
+        summary = {}
+        for (kind, name), stats in sorted(steps):
+            latency = stats.latency
+            summary[f"{kind}:{name}"] = {
+                'count': latency.count,
+                'errors': stats.errors,
+                'p50_ms': latency.quantile(0.5) * 1000 if latency.count else None,
+                'p95_ms': latency.quantile(0.95) * 1000 if latency.count else None,
+                'mean_ms': latency.mean * 1000,
+                'queries_per_call': stats.queries / latency.count if latency.count else 0.0,
+                'query_ms_per_call': stats.query_seconds * 1000 / latency.count if latency.count else 0.0,
+                'cache_hits': stats.cache_hits,
+                'cache_misses': stats.cache_misses,
+                'prompt_tokens': stats.prompt_tokens,
+                'completion_tokens': stats.completion_tokens,
+            }
+        return summary
+
+    @classmethod
+    def reset(cls):
+        """Drop all aggregates."""
+        with cls._lock:
+            cls._steps.clear()
+
+
+def _enabled() -> bool:
+    return settings.BOT_NODE_PROFILING
+
+
+def instrument_node(name: str, node):
+    """Wrap an async graph node so each run is profiled as ``node:name``."""
+    @wraps(node)
+    async def run(state):
+        if not _enabled():
+            return await node(state)
+        span = None
+        try:
+            with profile_span('node', name) as span:
+                return await node(state)
+        finally:
+            NodeMetrics.record(span)
+    return run
+
+
+def instrument_tool(name: str, tool):
+    """
+    Profile a tool's execute calls as ``tool:name``.
+
+    Wraps the instance's execute in place (once) and returns the tool.
+    Responses with ``success`` False count as errors.
+    """
+    if getattr(tool, '_profiled_execute', False):
+        return tool
+    execute = tool.execute
+
+    @wraps(execute)
+    def run(**kwargs):
+        if not _enabled():
+            return execute(**kwargs)
+        span = None
+        try:
+            with profile_span('tool', name) as span:
+                response = execute(**kwargs)
+                span.error = getattr(response, 'success', True) is False
+                return response
+        finally:
+            NodeMetrics.record(span)
+
+    tool.execute = run
+    tool._profiled_execute = True
+    return tool
+
+
+@contextmanager
+def profile_message(name: str = 'process_inbound_message'):
+    """
+    Open the root span for one pipeline run.
+
+    Yields:
+        ProfileSpan, or None when profiling is disabled
+    """
+    if not _enabled():
+        yield None
+        return
+    span = None
+    try:
+        with profile_span('message', name) as span:
+            yield span
+    finally:
+        NodeMetrics.record(span)
+
+
+def should_sample() -> bool:
+    """Whether this message's profile should be stored."""
+    rate = settings.BOT_NODE_PROFILE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def build_profile(span: ProfileSpan) -> Dict[str, Any]:
+    """Root summary plus every node and tool span, in completion order."""
+    return {**span.to_dict(), 'models': dict(span.models), 'steps': list(span.children)}
+
+
+def save_interaction_profile(conversation, message_text: str, state, span: ProfileSpan):
+    """
+    Store a sampled pipeline run as an AgentInteraction with its profile.
+
+    Failures are logged and swallowed; profiling never breaks a reply.
+
+    Returns:
+        The AgentInteraction, or None if it could not be saved
+    """
+    from apps.bot.models import AgentInteraction
+
+    try:
+        confidence = min(max(float(state.intent_confidence or 0.0), 0.0), 1.0)
+        model_used = max(span.models, key=span.models.get) if span.models else 'none'
+        return AgentInteraction.objects.create(
+            conversation=conversation,
+            customer_message=message_text,
+            detected_intents=[{'name': state.intent, 'confidence': confidence}],
+            model_used=model_used[:50],
+            processing_time_ms=int(span.duration * 1000),
+            agent_response=state.response_text or '',
+            confidence_score=confidence,
+            token_usage={
+                'prompt_tokens': span.prompt_tokens,
+                'completion_tokens': span.completion_tokens,
+                'total_tokens': span.total_tokens,
+            },
+            performance_profile=build_profile(span),
+        )
+    except Exception as e:
+        logger.warning(
+            f"Failed to store sampled interaction profile: {e}",
+            extra={'conversation_id': str(conversation.id)}
+        )
+        return None
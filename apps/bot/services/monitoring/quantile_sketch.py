@@ -0,0 +1,305 @@
+"""
+Mergeable streaming quantile sketches for latency metrics.
+
+Implements a DDSketch-style log-bucketed histogram:
+- O(1) insert (one log and one dict increment per sample)
+- Bounded memory (bucket count is capped, lowest buckets collapse first)
+- Relative-error quantiles (default 1%)
+- Exact merge by adding bucket counts, so per-process sketches can be
+  combined in Redis with HINCRBY for fleet-wide percentiles
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Values at or below this are counted in the zero bucket
+MIN_INDEXABLE_VALUE = 1e-9
+
+# Redis key prefix for fleet-wide sketches
+REDIS_KEY_PREFIX = 'tulia:sketch'
+
+# Default rotation window for WindowedQuantileSketch and Redis sketches
+DEFAULT_WINDOW_SECONDS = 60
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch with relative accuracy guarantees.
+
+    A sample v lands in bucket ceil(log_gamma(v)); any quantile answer is
+    within relative_accuracy of the true sample value.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        """
+        Initialize sketch.
+
+        Args:
+            relative_accuracy: Relative error bound for quantile estimates
+            max_buckets: Maximum buckets kept before collapsing the lowest
+        """
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _bucket_value(self, index: int) -> float:
+        # Midpoint (in relative terms) of bucket (gamma^(i-1), gamma^i]
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        """Record value (count times)."""
+        if value <= MIN_INDEXABLE_VALUE:
+            self.zero_count += count
+        else:
+            index = self._index(value)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def _collapse(self):
+        """Fold the lowest buckets together until within max_buckets."""
+        indexes = sorted(self.buckets)
+        overflow = len(indexes) - self.max_buckets
+        target = indexes[overflow]
+        for index in indexes[:overflow]:
+            self.buckets[target] += self.buckets.pop(index)
+
+    def merge(self, other: 'QuantileSketch'):
+        """Merge another sketch (same relative accuracy) into this one."""
+        for index, bucket_count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + bucket_count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-quantile (0 <= q <= 1).
+
+        Returns:
+            float: Estimated value, or 0.0 if the sketch is empty
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return min(max(self._bucket_value(index), self.min), self.max)
+
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def clear(self):
+        """Remove all samples."""
+        self.buckets.clear()
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for caching or transport."""
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'buckets': {str(index): c for index, c in self.buckets.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+        """Rebuild a sketch serialized with to_dict."""
+        sketch = cls(relative_accuracy=data.get('relative_accuracy', 0.01))
+        sketch.buckets = {int(index): c for index, c in data.get('buckets', {}).items()}
+        sketch.zero_count = data.get('zero_count', 0)
+        sketch.count = data.get('count', 0)
+        sketch.sum = data.get('sum', 0.0)
+        if data.get('min') is not None:
+            sketch.min = data['min']
+        if data.get('max') is not None:
+            sketch.max = data['max']
+        return sketch
+
+
+class WindowedQuantileSketch:
+    """
+    Quantile sketch over a sliding set of fixed time windows.
+
+    Samples go into the current window; windows older than
+    window_seconds * max_windows are dropped, bounding memory and letting
+    percentiles reflect recent traffic rather than the process lifetime.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = DEFAULT_WINDOW_SECONDS,
+        max_windows: int = 15,
+        relative_accuracy: float = 0.01
+    ):
+        self.window_seconds = window_seconds
+        self.relative_accuracy = relative_accuracy
+        self.windows: deque = deque(maxlen=max_windows)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(sketch.count for _, sketch in self.windows)
+
+    def _window_start(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        return int(now // self.window_seconds) * self.window_seconds
+
+    def _current(self, now: Optional[float] = None) -> QuantileSketch:
+        start = self._window_start(now)
+        if not self.windows or self.windows[-1][0] != start:
+            self.windows.append((start, QuantileSketch(self.relative_accuracy)))
+        return self.windows[-1][1]
+
+    def _expire(self, now: Optional[float] = None):
+        cutoff = self._window_start(now) - self.window_seconds * (self.windows.maxlen - 1)
+        while self.windows and self.windows[0][0] < cutoff:
+            self.windows.popleft()
+
+    def add(self, value: float, now: Optional[float] = None):
+        """Record a sample in the current window."""
+        with self._lock:
+            self._current(now).add(value)
+
+    def merged(self, now: Optional[float] = None) -> QuantileSketch:
+        """Return one sketch covering all retained windows."""
+        with self._lock:
+            self._expire(now)
+            result = QuantileSketch(self.relative_accuracy)
+            for _, sketch in self.windows:
+                result.merge(sketch)
+            return result
+
+    def quantile(self, q: float) -> float:
+        return self.merged().quantile(q)
+
+    def clear(self):
+        with self._lock:
+            self.windows.clear()
+
+
+def _redis_client():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def current_window_start(window_seconds: int = DEFAULT_WINDOW_SECONDS) -> int:
+    """Start timestamp of the window containing now."""
+    return int(time.time() // window_seconds) * window_seconds
+
+
+def sketch_redis_key(name: str, window_start: int) -> str:
+    """Redis hash key holding the fleet-wide sketch for one window."""
+    return f"{REDIS_KEY_PREFIX}:{name}:{window_start}"
+
+
+def publish_sketch(name: str, sketch: QuantileSketch, window_start: int, ttl: int = 3600):
+    """
+    Add a sketch's counts into the shared Redis hash for a window.
+
+    Bucket counts are applied with HINCRBY, so any number of processes
+    can publish concurrently and the hash is always the exact merge.
+    Publish deltas only (e.g. a sketch cleared after each publish).
+    """
+    if sketch.count == 0:
+        return
+
+    key = sketch_redis_key(name, window_start)
+    try:
+        pipe = _redis_client().pipeline(transaction=False)
+        for index, bucket_count in sketch.buckets.items():
+            pipe.hincrby(key, f"b:{index}", bucket_count)
+        pipe.hincrby(key, 'zero', sketch.zero_count)
+        pipe.hincrby(key, 'count', sketch.count)
+        pipe.hincrbyfloat(key, 'sum', sketch.sum)
+        pipe.expire(key, ttl)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to publish sketch {name}: {e}")
+
+
+def load_sketch(name: str, window_starts: Iterable[int], relative_accuracy: float = 0.01) -> QuantileSketch:
+    """
+    Load and merge fleet-wide sketches for the given windows from Redis.
+
+    Min/max are not tracked fleet-wide, so estimates are clamped only by
+    bucket boundaries.
+    """
+    result = QuantileSketch(relative_accuracy)
+    try:
+        pipe = _redis_client().pipeline(transaction=False)
+        window_starts = list(window_starts)
+        for window_start in window_starts:
+            pipe.hgetall(sketch_redis_key(name, window_start))
+        hashes = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to load sketch {name}: {e}")
+        return result
+
+    for data in hashes:
+        for field, value in data.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            if field.startswith('b:'):
+                index = int(field[2:])
+                result.buckets[index] = result.buckets.get(index, 0) + int(value)
+            elif field == 'zero':
+                result.zero_count += int(value)
+            elif field == 'count':
+                result.count += int(value)
+            elif field == 'sum':
+                result.sum += float(value)
+
+    if result.count:
+        # Without fleet min/max, clamp to the widest bucket bounds seen
+        result.min = 0.0 if result.zero_count or not result.buckets else (
+            result.gamma ** (min(result.buckets) - 1)
+        )
+        result.max = result.gamma ** max(result.buckets) if result.buckets else 0.0
+    return result
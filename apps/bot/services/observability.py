@@ -15,8 +15,34 @@ from enum import Enum
 import json
 from datetime import datetime, timezone
 
+from apps.core.metrics import registry, tenant_label
+
 logger = logging.getLogger(__name__)
 
+# Shared Prometheus series (see apps.core.metrics); journey and escalation
+# families are shared with apps.bot.services.metrics_collector
+JOURNEYS = registry.counter(
+    'tulia_journeys_total', 'Journey events by outcome', ['journey', 'outcome', 'tenant']
+)
+ESCALATIONS = registry.counter(
+    'tulia_escalations_total', 'Escalations to a human', ['reason', 'trigger', 'tenant']
+)
+NODE_DURATION = registry.histogram(
+    'tulia_node_duration_seconds', 'Graph node execution time', ['node', 'outcome']
+)
+TOOL_DURATION = registry.histogram(
+    'tulia_tool_duration_seconds', 'Tool execution time', ['tool', 'outcome']
+)
+BUSINESS_EVENTS = registry.counter(
+    'tulia_business_events_total', 'Business events', ['event', 'tenant']
+)
+ERRORS = registry.counter(
+    'tulia_errors_total', 'Tracked errors', ['component', 'error_type']
+)
+TRACKED_CONVERSATIONS = registry.gauge(
+    'tulia_tracked_conversations', 'Conversations currently being tracked'
+)
+
 
 class MetricType(Enum):
     """Types of metrics collected by the system."""
@@ -196,6 +222,7 @@ class ObservabilityService:
         )
         
         self.conversation_metrics[conversation_id] = metrics
+        TRACKED_CONVERSATIONS.set(len(self.conversation_metrics))
         
         self.structured_logger.info(
             "Conversation tracking started",
@@ -209,8 +236,14 @@ class ObservabilityService:
         
         return metrics
     
+    def _tenant_label(self, conversation_id: str) -> str:
+        metrics = self.conversation_metrics.get(conversation_id)
+        return tenant_label(metrics.tenant_id if metrics else None)
+    
     def track_journey_start(self, conversation_id: str, journey: str):
         """Track the start of a journey."""
+        JOURNEYS.inc(journey=journey, outcome='started', tenant=self._tenant_label(conversation_id))
+        
         if conversation_id in self.conversation_metrics:
             metrics = self.conversation_metrics[conversation_id]
             metrics.journey_started = journey
@@ -227,6 +260,11 @@ class ObservabilityService:
     
     def track_journey_completion(self, conversation_id: str, journey: str, success: bool):
         """Track the completion of a journey."""
+        JOURNEYS.inc(
+            journey=journey, outcome='completed' if success else 'failed',
+            tenant=self._tenant_label(conversation_id)
+        )
+        
         if conversation_id in self.conversation_metrics:
             metrics = self.conversation_metrics[conversation_id]
             metrics.journey_completed = journey
@@ -249,6 +287,8 @@ class ObservabilityService:
     
     def track_node_execution(self, conversation_id: str, node_name: str, duration: float, success: bool):
         """Track node execution metrics."""
+        NODE_DURATION.observe(duration, node=node_name, outcome='success' if success else 'failure')
+        
         if conversation_id in self.conversation_metrics:
             metrics = self.conversation_metrics[conversation_id]
             metrics.nodes_executed.append(node_name)
@@ -272,6 +312,8 @@ class ObservabilityService:
     
     def track_tool_execution(self, conversation_id: str, tool_name: str, duration: float, success: bool):
         """Track tool execution metrics."""
+        TOOL_DURATION.observe(duration, tool=tool_name, outcome='success' if success else 'failure')
+        
         if conversation_id in self.conversation_metrics:
             metrics = self.conversation_metrics[conversation_id]
             metrics.tools_called.append(tool_name)
@@ -295,6 +337,8 @@ class ObservabilityService:
     
     def track_business_event(self, conversation_id: str, event_type: str, details: Optional[Dict[str, Any]] = None):
         """Track business events like orders, payments, etc."""
+        BUSINESS_EVENTS.inc(event=event_type, tenant=self._tenant_label(conversation_id))
+        
         if conversation_id in self.conversation_metrics:
             metrics = self.conversation_metrics[conversation_id]
             
@@ -328,6 +372,8 @@ class ObservabilityService:
     def track_error(self, conversation_id: str, error_type: str, error_message: str, 
                    component: str, retry_count: int = 0, fallback_used: bool = False):
         """Track error occurrences and recovery attempts."""
+        ERRORS.inc(component=component, error_type=error_type)
+        
         if conversation_id in self.conversation_metrics:
             metrics = self.conversation_metrics[conversation_id]
             metrics.total_errors += 1
@@ -352,6 +398,11 @@ class ObservabilityService:
     
     def track_escalation(self, conversation_id: str, escalation_reason: str, context: Dict[str, Any]):
         """Track escalation events."""
+        ESCALATIONS.inc(
+            reason=escalation_reason, trigger=context.get('escalation_trigger') or 'unknown',
+            tenant=self._tenant_label(conversation_id)
+        )
+        
         if conversation_id in self.conversation_metrics:
             metrics = self.conversation_metrics[conversation_id]
             metrics.escalations_triggered += 1
@@ -399,6 +450,7 @@ class ObservabilityService:
             
             # Remove from active tracking
             final_metrics = self.conversation_metrics.pop(conversation_id)
+            TRACKED_CONVERSATIONS.set(len(self.conversation_metrics))
             return final_metrics
         
         return None
@@ -2,17 +2,24 @@
 Tenant document ingestion service for LangGraph RAG implementation.
 
 This service handles the ingestion of PDF, DOCX, and text files with
-strict tenant isolation and vector embedding generation.
+strict tenant isolation and vector embedding generation. Ingestion runs
+as a staged, resumable background pipeline (extract/chunk -> embed/upsert).
 """
 import os
+import codecs
 import hashlib
 import logging
-from typing import List, Dict, Any, Optional, BinaryIO
-from io import BytesIO
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, BinaryIO, Iterator, Tuple
 
 from django.conf import settings
 from django.core.files.storage import default_storage
-from django.utils import timezone
+from django.db import transaction
+from django.db.models import Count, Sum
 
 # Document processing imports
 try:
@@ -23,11 +30,17 @@ except ImportError:
     DocxDocument = None
 
 from apps.bot.models_tenant_documents import TenantDocument, TenantDocumentChunk
+from apps.bot.services.chunking_service import TokenChunker
 from apps.bot.services.embedding_service import EmbeddingService
 from apps.bot.services.vector_store import PineconeVectorStore
 
 logger = logging.getLogger(__name__)
 
+# Per-process LRU of hydrated search chunks keyed by (tenant_id, vector_id).
+# Each entry is (expires_at, chunk_fields); see _hydrate_chunks.
+_chunk_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_chunk_cache_lock = threading.Lock()
+
 
 class TenantDocumentIngestionService:
     """
@@ -49,6 +62,20 @@ class TenantDocumentIngestionService:
     DEFAULT_CHUNK_OVERLAP = 200  # tokens
     MAX_CHUNK_SIZE = 2000  # tokens
     
+    # Pipeline stages and checkpoint location in document.metadata
+    STAGE_CHUNK = 'chunk'
+    STAGE_INDEX = 'index'
+    CHECKPOINT_KEY = 'ingestion_checkpoint'
+    
+    # Streaming parameters
+    HASH_BLOCK_SIZE = 1024 * 1024  # bytes
+    TEXT_BLOCK_SIZE = 64 * 1024  # bytes
+    DOCX_PARAGRAPHS_PER_SECTION = 50
+    CHUNK_WRITE_BATCH = 200  # chunks per transaction
+    
+    # Share of progress reported for the chunk stage (index stage gets the rest)
+    CHUNK_STAGE_PROGRESS = 30
+    
     def __init__(self, tenant):
         """
         Initialize document ingestion service for a tenant.
@@ -60,6 +87,10 @@ class TenantDocumentIngestionService:
         self.embedding_service = EmbeddingService.create_for_tenant(tenant)
         self.vector_store = PineconeVectorStore.create_from_settings()
         self.namespace = f"tenant_{tenant.id}"
+        self.chunker = TokenChunker(
+            chunk_size=self.DEFAULT_CHUNK_SIZE,
+            chunk_overlap=self.DEFAULT_CHUNK_OVERLAP
+        )
     
     def ingest_document(
         self,
@@ -69,11 +100,17 @@ class TenantDocumentIngestionService:
         title: str = None,
         description: str = None,
         tags: List[str] = None,
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        process_async: bool = True
     ) -> TenantDocument:
         """
         Ingest a document file with processing and vector embedding.
         
+        The file is hashed and stored without being read into memory as a
+        whole. Extraction, chunking, embedding and upserting run in the
+        ingest_tenant_document background task unless process_async is
+        False.
+        
         Args:
             file: File object to ingest
             filename: Original filename
@@ -82,13 +119,14 @@ class TenantDocumentIngestionService:
             description: Optional description
             tags: Optional tags for categorization
             metadata: Optional additional metadata
+            process_async: Queue processing instead of running it inline
         
         Returns:
             TenantDocument instance
         
         Raises:
             ValueError: If file type is not supported or file is invalid
-            Exception: If processing fails
+            Exception: If inline processing fails
         """
         # Validate file
         file_ext = self._get_file_extension(filename)
@@ -103,9 +141,7 @@ class TenantDocumentIngestionService:
             document_type = file_ext
         
         # Calculate file hash for deduplication
-        file_content = file.read()
-        file.seek(0)  # Reset file pointer
-        file_hash = hashlib.sha256(file_content).hexdigest()
+        file_hash, file_size = self._hash_file(file)
         
         # Check for existing document with same hash
         existing_doc = TenantDocument.objects.filter(
@@ -128,7 +164,7 @@ class TenantDocumentIngestionService:
             document_type=document_type,
             description=description or '',
             file_path=file_path,
-            file_size=len(file_content),
+            file_size=file_size,
             file_hash=file_hash,
             embedding_model=self.embedding_service.model,
             tags=tags or [],
@@ -138,280 +174,432 @@ class TenantDocumentIngestionService:
         
         logger.info(f"Created document record: {document.id} - {filename}")
         
-        # Process document asynchronously (or synchronously for now)
-        try:
-            self._process_document(document, file_content)
-        except Exception as e:
-            document.mark_processing_failed(str(e))
-            logger.error(f"Failed to process document {document.id}: {e}")
-            raise
+        if process_async:
+            from apps.bot.tasks import ingest_tenant_document
+            document_id = str(document.id)
+            transaction.on_commit(lambda: ingest_tenant_document.delay(document_id))
+            return document
         
+        self.process_document(document)
         return document
     
-    def _process_document(self, document: TenantDocument, file_content: bytes):
+    def process_document(self, document: TenantDocument) -> Dict[str, Any]:
         """
-        Process document by extracting text, chunking, and creating embeddings.
+        Run the staged ingestion pipeline for a stored document.
+        
+        Stages are chunk (stream pages, split and persist chunks) and
+        index (embed and upsert chunks in pipelined batches). Progress is
+        checkpointed in document.metadata after every batch, so calling
+        this again after a failure resumes where the previous run stopped.
         
         Args:
             document: TenantDocument instance
-            file_content: Raw file content bytes
+        
+        Returns:
+            Dict with chunk_count and total_tokens
         """
+        checkpoint = self._get_checkpoint(document)
+        
         document.mark_processing_started()
+        if checkpoint['pages_done'] or checkpoint['stage'] != self.STAGE_CHUNK:
+            logger.info(
+                f"Resuming document {document.id} at stage {checkpoint['stage']}: "
+                f"{checkpoint['pages_done']} pages chunked, "
+                f"{checkpoint['chunks_indexed']} chunks indexed"
+            )
         
         try:
-            # Extract text from document
-            text_content = self._extract_text(document, file_content)
-            document.update_progress(25)
+            if checkpoint['stage'] == self.STAGE_CHUNK:
+                self._chunk_stage(document, checkpoint)
             
-            # Split into chunks
-            chunks = self._create_chunks(text_content)
-            document.update_progress(50)
+            if checkpoint['stage'] == self.STAGE_INDEX:
+                self._index_stage(document, checkpoint)
             
-            # Generate embeddings and store in vector database
-            self._process_chunks(document, chunks)
-            document.update_progress(90)
+            totals = TenantDocumentChunk.objects.filter(document=document).aggregate(
+                chunk_count=Count('id'),
+                total_tokens=Sum('token_count')
+            )
+            totals['total_tokens'] = totals['total_tokens'] or 0
             
             # Mark as completed
             document.mark_processing_completed(
-                chunk_count=len(chunks),
-                total_tokens=sum(chunk['token_count'] for chunk in chunks)
+                chunk_count=totals['chunk_count'],
+                total_tokens=totals['total_tokens']
             )
             
             logger.info(
                 f"Successfully processed document {document.id}: "
-                f"{len(chunks)} chunks, {document.total_tokens} tokens"
+                f"{totals['chunk_count']} chunks, {totals['total_tokens']} tokens"
             )
             
+            return totals
+            
         except Exception as e:
             document.mark_processing_failed(str(e))
             logger.error(f"Error processing document {document.id}: {e}")
             raise
     
-    def _extract_text(self, document: TenantDocument, file_content: bytes) -> str:
+    def _get_checkpoint(self, document: TenantDocument) -> Dict[str, Any]:
+        """Load the ingestion checkpoint stored in document metadata."""
+        checkpoint = {
+            'stage': self.STAGE_CHUNK,
+            'pages_done': 0,
+            'total_pages': None,
+            'chunks_created': 0,
+            'chunks_indexed': 0,
+            'carry': None,
+        }
+        checkpoint.update((document.metadata or {}).get(self.CHECKPOINT_KEY, {}))
+        return checkpoint
+    
+    def _save_checkpoint(self, document: TenantDocument, checkpoint: Dict[str, Any]):
+        """Persist the ingestion checkpoint into document metadata."""
+        document.metadata = {**(document.metadata or {}), self.CHECKPOINT_KEY: checkpoint}
+        document.save(update_fields=['metadata', 'updated_at'])
+    
+    def _chunk_stage(self, document: TenantDocument, checkpoint: Dict[str, Any]):
+        """
+        Stream pages, chunk them and persist chunk records.
+        
+        Pages are chunked as one continuous text: the last, still-growing
+        chunk of each page is carried (with its overlap) into the next
+        page, so chunks span page boundaries and short pages are merged.
+        A chunk's page_number is the page it starts on.
+        
+        Chunks are written together with the checkpoint (including the
+        carried text) in one transaction every CHUNK_WRITE_BATCH chunks,
+        so a resumed run skips pages that are already chunked and never
+        duplicates chunk indexes.
         """
-        Extract text content from document based on file type.
+        pending = []
+        carry = checkpoint['carry'] or {'text': '', 'base': 0, 'pages': []}
+        checkpoint['carry'] = carry
+        # Text blocks split at whitespace; pages and sections start a paragraph
+        separator = '' if document.get_file_extension() == 'txt' else '\n\n'
+        
+        def add(chunks):
+            next_index = checkpoint['chunks_created'] + len(pending)
+            for position, chunk in enumerate(chunks):
+                pending.append(TenantDocumentChunk(
+                    document=document,
+                    chunk_index=next_index + position,
+                    content=chunk['content'],
+                    token_count=chunk['token_count'],
+                    page_number=chunk['page_number'],
+                    embedding_model=self.embedding_service.model,
+                    metadata={
+                        'start_char': chunk['start_char'],
+                        'end_char': chunk['end_char'],
+                    }
+                ))
+        
+        def flush():
+            with transaction.atomic():
+                TenantDocumentChunk.objects.bulk_create(pending)
+                checkpoint['chunks_created'] += len(pending)
+                self._save_checkpoint(document, checkpoint)
+            pending.clear()
+            
+            if checkpoint['total_pages']:
+                document.update_progress(
+                    int(self.CHUNK_STAGE_PROGRESS * checkpoint['pages_done'] / checkpoint['total_pages'])
+                )
+        
+        for page_index, page_number, text in self._iter_pages(document, checkpoint):
+            if carry['text']:
+                carry['text'] += separator
+            carry['pages'].append([len(carry['text']), page_number])
+            carry['text'] += text
+            
+            add(self._take_chunks(carry))
+            checkpoint['pages_done'] = page_index + 1
+            
+            if len(pending) >= self.CHUNK_WRITE_BATCH:
+                flush()
+        
+        add(self._take_chunks(carry, final=True))
+        checkpoint['carry'] = None
+        
+        if checkpoint['chunks_created'] + len(pending) == 0:
+            raise ValueError("No text content found in document")
+        
+        checkpoint['stage'] = self.STAGE_INDEX
+        flush()
+        
+        logger.info(
+            f"Created {checkpoint['chunks_created']} chunks from "
+            f"{checkpoint['pages_done']} pages for document {document.id}"
+        )
+    
+    def _index_stage(self, document: TenantDocument, checkpoint: Dict[str, Any]):
+        """
+        Embed and upsert chunks in pipelined concurrent batches.
+        
+        Embedding and upserting run in worker threads (network I/O only,
+        no database access) with up to RAG_INGEST_CONCURRENCY batches in
+        flight. Batches are completed in order, so chunks_indexed always
+        marks a contiguous prefix; batches redone after a resume are safe
+        because upserts are idempotent by vector id.
+        """
+        batch_size = min(settings.RAG_INGEST_EMBED_BATCH_SIZE, self.embedding_service.MAX_BATCH_SIZE)
+        workers = max(1, settings.RAG_INGEST_CONCURRENCY)
+        total_chunks = checkpoint['chunks_created']
+        
+        remaining = TenantDocumentChunk.objects.filter(
+            document=document,
+            chunk_index__gte=checkpoint['chunks_indexed']
+        ).order_by('chunk_index')
+        
+        def complete(batch, future):
+            future.result()
+            checkpoint['chunks_indexed'] = batch[-1].chunk_index + 1
+            self._save_checkpoint(document, checkpoint)
+            span = 100 - self.CHUNK_STAGE_PROGRESS - 5
+            document.update_progress(
+                self.CHUNK_STAGE_PROGRESS + int(span * checkpoint['chunks_indexed'] / total_chunks)
+            )
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for batch in self._iter_batches(remaining, batch_size):
+                in_flight.append((batch, pool.submit(self._embed_and_upsert, document, batch)))
+                if len(in_flight) >= workers:
+                    complete(*in_flight.popleft())
+            
+            while in_flight:
+                complete(*in_flight.popleft())
+        
+        logger.info(
+            f"Indexed {checkpoint['chunks_indexed']} chunks for document {document.id}"
+        )
+    
+    @staticmethod
+    def _iter_batches(queryset, batch_size: int) -> Iterator[List[TenantDocumentChunk]]:
+        """Yield lists of chunks from a queryset without loading it all."""
+        batch = []
+        for chunk in queryset.iterator(chunk_size=batch_size):
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def _embed_and_upsert(self, document: TenantDocument, chunks: List[TenantDocumentChunk]):
+        """
+        Generate embeddings for a batch of chunks and store them in the vector database.
         
         Args:
             document: TenantDocument instance
-            file_content: Raw file content bytes
+            chunks: Chunk records in this batch
+        """
+        embedding_results = self.embedding_service.embed_batch(
+            [chunk.content for chunk in chunks]
+        )
         
-        Returns:
-            Extracted text content
+        vector_records = [
+            {
+                'id': chunk.vector_id,
+                'values': embedding_result['embedding'],
+                'metadata': {
+                    'tenant_id': str(document.tenant_id),
+                    'document_id': str(document.id),
+                    'chunk_index': chunk.chunk_index,
+                    'document_type': document.document_type,
+                    'document_title': document.title,
+                    'content_preview': chunk.content[:200],
+                    'token_count': chunk.token_count,
+                    'page_number': chunk.page_number,
+                }
+            }
+            for chunk, embedding_result in zip(chunks, embedding_results)
+        ]
+        
+        self.vector_store.upsert(
+            vectors=vector_records,
+            namespace=self.namespace
+        )
+    
+    def _iter_pages(
+        self,
+        document: TenantDocument,
+        checkpoint: Dict[str, Any]
+    ) -> Iterator[Tuple[int, Optional[int], str]]:
+        """
+        Stream text from the stored file one page (or section) at a time.
+        
+        Pages before checkpoint['pages_done'] are skipped. Records
+        total_pages in the checkpoint when the format exposes it.
+        
+        Yields:
+            Tuples of (page_index, page_number or None, text)
         """
         file_ext = document.get_file_extension()
         
         if file_ext == 'txt':
-            return self._extract_text_from_txt(file_content)
+            pages = self._iter_text_blocks(document)
         elif file_ext == 'pdf':
-            return self._extract_text_from_pdf(file_content)
+            pages = self._iter_pdf_pages(document, checkpoint)
         elif file_ext == 'docx':
-            return self._extract_text_from_docx(file_content)
+            pages = self._iter_docx_sections(document, checkpoint)
         else:
             raise ValueError(f"Unsupported file type for text extraction: {file_ext}")
+        
+        for page_index, (page_number, text) in enumerate(pages):
+            if page_index < checkpoint['pages_done']:
+                continue
+            if text.strip():
+                yield page_index, page_number, text
     
-    def _extract_text_from_txt(self, file_content: bytes) -> str:
-        """Extract text from plain text file."""
-        try:
-            # Try UTF-8 first, then fallback to other encodings
-            for encoding in ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']:
+    def _iter_text_blocks(self, document: TenantDocument) -> Iterator[Tuple[None, str]]:
+        """Stream a text file in blocks split at whitespace."""
+        with default_storage.open(document.file_path, 'rb') as stored_file:
+            first_block = stored_file.read(self.TEXT_BLOCK_SIZE)
+            
+            # Pick the encoding from the first block, falling back to latin-1
+            encoding = 'latin-1'
+            for candidate in ['utf-8-sig', 'utf-8']:
                 try:
-                    return file_content.decode(encoding)
+                    codecs.getincrementaldecoder(candidate)().decode(first_block)
+                    encoding = candidate
+                    break
                 except UnicodeDecodeError:
                     continue
             
-            # If all encodings fail, use UTF-8 with error handling
-            return file_content.decode('utf-8', errors='replace')
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            carry = ''
+            block = first_block
+            while block:
+                text = carry + decoder.decode(block)
+                split_at = max(text.rfind('\n'), text.rfind(' '))
+                if split_at <= 0:
+                    split_at = len(text)
+                carry = text[split_at:]
+                yield None, text[:split_at]
+                block = stored_file.read(self.TEXT_BLOCK_SIZE)
             
-        except Exception as e:
-            raise ValueError(f"Failed to extract text from TXT file: {e}")
+            tail = carry + decoder.decode(b'', final=True)
+            if tail:
+                yield None, tail
     
-    def _extract_text_from_pdf(self, file_content: bytes) -> str:
-        """Extract text from PDF file."""
+    def _iter_pdf_pages(
+        self,
+        document: TenantDocument,
+        checkpoint: Dict[str, Any]
+    ) -> Iterator[Tuple[int, str]]:
+        """Stream text from a PDF one page at a time."""
         if not PyPDF2:
             raise ValueError("PyPDF2 not installed. Cannot process PDF files.")
         
-        try:
-            pdf_file = BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
+        with default_storage.open(document.file_path, 'rb') as stored_file:
+            try:
+                pdf_reader = PyPDF2.PdfReader(stored_file)
+                checkpoint['total_pages'] = len(pdf_reader.pages)
+            except Exception as e:
+                raise ValueError(f"Failed to extract text from PDF file: {e}")
             
-            text_parts = []
             for page_num, page in enumerate(pdf_reader.pages):
+                if page_num < checkpoint['pages_done']:
+                    yield page_num + 1, ''
+                    continue
                 try:
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        text_parts.append(f"[Page {page_num + 1}]\n{page_text}")
+                    yield page_num + 1, page.extract_text() or ''
                 except Exception as e:
                     logger.warning(f"Failed to extract text from page {page_num + 1}: {e}")
-                    continue
-            
-            if not text_parts:
-                raise ValueError("No text content found in PDF")
-            
-            return '\n\n'.join(text_parts)
-            
-        except Exception as e:
-            raise ValueError(f"Failed to extract text from PDF file: {e}")
+                    yield page_num + 1, ''
     
-    def _extract_text_from_docx(self, file_content: bytes) -> str:
-        """Extract text from DOCX file."""
+    def _iter_docx_sections(
+        self,
+        document: TenantDocument,
+        checkpoint: Dict[str, Any]
+    ) -> Iterator[Tuple[None, str]]:
+        """Stream text from a DOCX file in groups of paragraphs."""
         if not DocxDocument:
             raise ValueError("python-docx not installed. Cannot process DOCX files.")
         
-        try:
-            docx_file = BytesIO(file_content)
-            doc = DocxDocument(docx_file)
+        with default_storage.open(document.file_path, 'rb') as stored_file:
+            try:
+                doc = DocxDocument(stored_file)
+            except Exception as e:
+                raise ValueError(f"Failed to extract text from DOCX file: {e}")
             
-            text_parts = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_parts.append(paragraph.text)
+            paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
+            size = self.DOCX_PARAGRAPHS_PER_SECTION
+            checkpoint['total_pages'] = (len(paragraphs) + size - 1) // size
             
-            if not text_parts:
-                raise ValueError("No text content found in DOCX")
-            
-            return '\n\n'.join(text_parts)
-            
-        except Exception as e:
-            raise ValueError(f"Failed to extract text from DOCX file: {e}")
+            for start in range(0, len(paragraphs), size):
+                yield None, '\n\n'.join(paragraphs[start:start + size])
     
-    def _create_chunks(self, text: str) -> List[Dict[str, Any]]:
+    def _hash_file(self, file: BinaryIO) -> Tuple[str, int]:
+        """Compute SHA-256 and size of a file by reading it in blocks."""
+        hasher = hashlib.sha256()
+        size = 0
+        for block in iter(lambda: file.read(self.HASH_BLOCK_SIZE), b''):
+            hasher.update(block)
+            size += len(block)
+        file.seek(0)  # Reset file pointer
+        return hasher.hexdigest(), size
+    
+    def _take_chunks(self, carry: Dict[str, Any], final: bool = False) -> List[Dict[str, Any]]:
         """
-        Split text into chunks for processing.
+        Chunk the carried text and take the chunks that are complete.
+        
+        Unless final, the last chunk is held back and the carry is trimmed
+        to start where it starts, so the next page extends it exactly as
+        if the whole document were chunked at once.
         
         Args:
-            text: Full text content
+            carry: Dict with 'text', 'base' (document offset of text[0])
+                and 'pages' ([offset in text, page_number] per page)
+            final: Take every chunk and empty the carry
         
         Returns:
-            List of chunk dictionaries with content and metadata
+            Chunk dicts with page_number and document-level character span
         """
-        # Simple chunking by character count (can be enhanced with proper tokenization)
-        chunk_size_chars = self.DEFAULT_CHUNK_SIZE * 4  # Rough estimate: 1 token ≈ 4 chars
-        overlap_chars = self.DEFAULT_CHUNK_OVERLAP * 4
-        
-        chunks = []
-        start = 0
-        chunk_index = 0
-        
-        while start < len(text):
-            # Calculate end position
-            end = start + chunk_size_chars
-            
-            # If this is not the last chunk, try to break at a sentence or paragraph
-            if end < len(text):
-                # Look for sentence endings within the last 200 characters
-                search_start = max(start + chunk_size_chars - 200, start)
-                sentence_end = -1
-                
-                for i in range(end, search_start, -1):
-                    if text[i:i+1] in '.!?\n':
-                        # Check if this looks like a real sentence ending
-                        if i + 1 < len(text) and (text[i+1].isspace() or text[i+1].isupper()):
-                            sentence_end = i + 1
-                            break
-                
-                if sentence_end > 0:
-                    end = sentence_end
-            
-            # Extract chunk content
-            chunk_content = text[start:end].strip()
-            
-            if chunk_content:
-                # Estimate token count (rough approximation)
-                token_count = len(chunk_content.split())
-                
-                chunks.append({
-                    'chunk_index': chunk_index,
-                    'content': chunk_content,
-                    'token_count': token_count,
-                    'start_char': start,
-                    'end_char': end,
-                })
-                
-                chunk_index += 1
-            
-            # Move start position with overlap
-            start = max(end - overlap_chars, start + 1)
-            
-            # Prevent infinite loop
-            if start >= len(text):
-                break
-        
-        logger.info(f"Created {len(chunks)} chunks from {len(text)} characters")
-        return chunks
+        chunks = self._create_chunks(carry['text'])
+        if not final:
+            if len(chunks) < 2:
+                return []
+            cut = chunks.pop()['start_char']
+        
+        page_starts = [start for start, _ in carry['pages']]
+        taken = []
+        for chunk in chunks:
+            page = carry['pages'][bisect_right(page_starts, chunk['start_char']) - 1]
+            taken.append({
+                **chunk,
+                'page_number': page[1],
+                'start_char': carry['base'] + chunk['start_char'],
+                'end_char': carry['base'] + chunk['end_char'],
+            })
+        
+        if final:
+            carry.update(text='', pages=[])
+        else:
+            first_page = bisect_right(page_starts, cut) - 1
+            carry['pages'] = [
+                [max(start - cut, 0), number]
+                for start, number in carry['pages'][first_page:]
+            ]
+            carry['text'] = carry['text'][cut:]
+            carry['base'] += cut
+        
+        return taken
     
-    def _process_chunks(self, document: TenantDocument, chunks: List[Dict[str, Any]]):
+    def _create_chunks(self, text: str) -> List[Dict[str, Any]]:
         """
-        Process chunks by generating embeddings and storing in vector database.
+        Split text into token-bounded chunks for processing.
         
         Args:
-            document: TenantDocument instance
-            chunks: List of chunk dictionaries
-        """
-        if not chunks:
-            return
-        
-        # Prepare texts for batch embedding
-        chunk_texts = [chunk['content'] for chunk in chunks]
-        
-        # Generate embeddings in batches
-        batch_size = 20  # Process in smaller batches to avoid API limits
-        chunk_records = []
-        vector_records = []
-        
-        for i in range(0, len(chunks), batch_size):
-            batch_chunks = chunks[i:i + batch_size]
-            batch_texts = chunk_texts[i:i + batch_size]
-            
-            # Generate embeddings for batch
-            embedding_results = self.embedding_service.embed_batch(batch_texts)
-            
-            # Create chunk records and vector data
-            for j, (chunk, embedding_result) in enumerate(zip(batch_chunks, embedding_results)):
-                chunk_index = chunk['chunk_index']
-                
-                # Create chunk record
-                chunk_record = TenantDocumentChunk(
-                    document=document,
-                    chunk_index=chunk_index,
-                    content=chunk['content'],
-                    token_count=chunk['token_count'],
-                    embedding_model=self.embedding_service.model,
-                    metadata={
-                        'start_char': chunk['start_char'],
-                        'end_char': chunk['end_char'],
-                    }
-                )
-                chunk_records.append(chunk_record)
-                
-                # Prepare vector data for Pinecone
-                vector_data = {
-                    'id': chunk_record.vector_id,
-                    'values': embedding_result['embedding'],
-                    'metadata': {
-                        'tenant_id': str(document.tenant_id),
-                        'document_id': str(document.id),
-                        'chunk_index': chunk_index,
-                        'document_type': document.document_type,
-                        'document_title': document.title,
-                        'content_preview': chunk['content'][:200],
-                        'token_count': chunk['token_count'],
-                    }
-                }
-                vector_records.append(vector_data)
-        
-        # Bulk create chunk records
-        TenantDocumentChunk.objects.bulk_create(chunk_records)
-        
-        # Store vectors in Pinecone
-        if vector_records:
-            self.vector_store.upsert(
-                vectors=vector_records,
-                namespace=self.namespace
-            )
+            text: Full text content
         
-        logger.info(
-            f"Processed {len(chunk_records)} chunks for document {document.id}"
-        )
+        Returns:
+            List of chunk dictionaries with content, exact token count
+            and character span
+        """
+        chunks = self.chunker.chunk(text)
+        logger.info(f"Created {len(chunks)} chunks from {len(text)} characters")
+        return chunks
     
     def _store_file(self, file: BinaryIO, filename: str, file_hash: str) -> str:
         """
@@ -469,6 +657,7 @@ class TenantDocumentIngestionService:
                     ids=vector_ids,
                     namespace=self.namespace
                 )
+                self._evict_cached_chunks(vector_ids)
             
             # Delete file from storage
             if document.file_path and default_storage.exists(document.file_path):
@@ -518,41 +707,30 @@ class TenantDocumentIngestionService:
         if document_types:
             filter_dict['document_type'] = {'$in': document_types}
         
-        # Search vector store
+        # Search vector store; the score threshold is applied by the store
         vector_results = self.vector_store.search(
             query_vector=query_vector,
-            top_k=top_k * 2,  # Get more results to filter by score
+            top_k=top_k,
             filter_dict=filter_dict,
-            namespace=self.namespace
+            namespace=self.namespace,
+            min_score=min_score
         )
         
-        # Filter by minimum score and retrieve chunk details
+        # Hydrate chunk details in one query, keeping vector score order
+        chunks = self._hydrate_chunks([vec_result.id for vec_result in vector_results])
+        
         results = []
         for vec_result in vector_results:
-            if vec_result.score >= min_score:
-                try:
-                    chunk = TenantDocumentChunk.objects.select_related('document').get(
-                        vector_id=vec_result.id
-                    )
-                    
-                    results.append({
-                        'chunk_id': str(chunk.id),
-                        'document_id': str(chunk.document.id),
-                        'document_title': chunk.document.title,
-                        'document_type': chunk.document.document_type,
-                        'content': chunk.content,
-                        'chunk_index': chunk.chunk_index,
-                        'score': vec_result.score,
-                        'metadata': vec_result.metadata,
-                        'page_number': chunk.page_number,
-                        'section_title': chunk.section_title,
-                    })
-                except TenantDocumentChunk.DoesNotExist:
-                    logger.warning(f"Chunk not found for vector_id: {vec_result.id}")
-                    continue
-        
-        # Limit to requested top_k
-        results = results[:top_k]
+            chunk = chunks.get(vec_result.id)
+            if chunk is None:
+                logger.warning(f"Chunk not found for vector_id: {vec_result.id}")
+                continue
+            
+            results.append({
+                **chunk,
+                'score': vec_result.score,
+                'metadata': vec_result.metadata,
+            })
         
         logger.info(
             f"Document search for tenant {self.tenant.id}: "
@@ -561,6 +739,74 @@ class TenantDocumentIngestionService:
         
         return results
     
+    def _hydrate_chunks(self, vector_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load chunk fields for vector ids, from the LRU where possible.
+        
+        Missing chunks are fetched with a single vector_id__in query
+        scoped to this tenant. Cache entries expire after
+        RAG_CHUNK_CACHE_TTL seconds so renamed documents are picked up;
+        deleted chunks drop out because their vectors are deleted first.
+        
+        Args:
+            vector_ids: Vector ids returned by the vector store
+        
+        Returns:
+            Dict mapping vector_id to result fields
+        """
+        tenant_id = str(self.tenant.id)
+        now = time.monotonic()
+        found = {}
+        
+        with _chunk_cache_lock:
+            for vector_id in vector_ids:
+                entry = _chunk_cache.get((tenant_id, vector_id))
+                if entry and entry[0] > now:
+                    _chunk_cache.move_to_end((tenant_id, vector_id))
+                    found[vector_id] = entry[1]
+        
+        missing = [vector_id for vector_id in vector_ids if vector_id not in found]
+        if not missing:
+            return found
+        
+        chunks = TenantDocumentChunk.objects.filter(
+            vector_id__in=missing,
+            document__tenant=self.tenant
+        ).select_related('document')
+        
+        fetched = {}
+        for chunk in chunks:
+            fetched[chunk.vector_id] = {
+                'chunk_id': str(chunk.id),
+                'document_id': str(chunk.document.id),
+                'document_title': chunk.document.title,
+                'document_type': chunk.document.document_type,
+                'content': chunk.content,
+                'chunk_index': chunk.chunk_index,
+                'page_number': chunk.page_number,
+                'section_title': chunk.section_title,
+            }
+        
+        max_size = settings.RAG_CHUNK_CACHE_SIZE
+        if max_size > 0:
+            expires_at = now + settings.RAG_CHUNK_CACHE_TTL
+            with _chunk_cache_lock:
+                for vector_id, fields in fetched.items():
+                    _chunk_cache[(tenant_id, vector_id)] = (expires_at, fields)
+                    _chunk_cache.move_to_end((tenant_id, vector_id))
+                while len(_chunk_cache) > max_size:
+                    _chunk_cache.popitem(last=False)
+        
+        found.update(fetched)
+        return found
+    
+    def _evict_cached_chunks(self, vector_ids: List[str]):
+        """Drop chunks from the search LRU."""
+        tenant_id = str(self.tenant.id)
+        with _chunk_cache_lock:
+            for vector_id in vector_ids:
+                _chunk_cache.pop((tenant_id, vector_id), None)
+    
     @classmethod
     def create_for_tenant(cls, tenant) -> 'TenantDocumentIngestionService':
         """
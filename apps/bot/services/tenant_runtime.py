@@ -0,0 +1,366 @@
+"""
+Per-process tenant runtime snapshot for the bot path.
+
+Handling a message needs the Tenant row, its TenantSettings (encrypted
+credentials are decrypted on load), the AgentConfiguration and the
+tenant's feature flags, and nodes used to fetch each of these on their
+own. TenantRuntimeService builds one immutable TenantRuntimeSnapshot per
+tenant holding all of them. The tenant resolver attaches it to
+ConversationState.tenant_runtime so nodes read it from the state
+instead of re-fetching.
+
+With BOT_TENANT_RUNTIME_L1 enabled, snapshots are also kept in an
+in-process LRU across messages. Saving a Tenant, TenantSettings or
+AgentConfiguration bumps the tenant's version in Redis and publishes it
+on CHANNEL; a listener thread in every process evicts older snapshots.
+The L1 is only used while that listener is subscribed, so a process
+that loses Redis builds a fresh snapshot per message instead of
+serving stale ones. Queryset .update() calls bypass the signals and
+are only picked up when BOT_TENANT_RUNTIME_TTL expires.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'tenant:runtime'
+CHANNEL = f'{KEY_PREFIX}:invalidate'
+
+# AgentConfiguration fields exposed as the persona
+PERSONA_FIELDS = (
+    'agent_name', 'personality_traits', 'tone', 'use_business_name_as_identity',
+    'custom_bot_greeting', 'agent_can_do', 'agent_cannot_do',
+    'behavioral_restrictions', 'required_disclaimers',
+)
+
+
+def _redis_client():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _version_key(tenant_id):
+    return f"{KEY_PREFIX}:version:{tenant_id}"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+@dataclass(frozen=True, slots=True)
+class TenantRuntimeSnapshot:
+    """
+    Everything the bot needs about a tenant to handle a message.
+
+    The snapshot is shared between messages (and threads) in a process.
+    The model instances it holds must be treated as read-only; load a
+    fresh instance before saving.
+    """
+
+    tenant_id: str
+    version: int
+    tenant: Any
+    settings: Any  # TenantSettings or None
+    agent_config: Any  # AgentConfiguration or None
+    feature_flags: Mapping[str, bool]
+    persona: Mapping[str, Any]
+    business_hours: Mapping[str, Any]
+    built_at: float
+
+    def is_enabled(self, feature_name: str, default: bool = False) -> bool:
+        """Return the resolved value of a feature flag."""
+        return self.feature_flags.get(feature_name, default)
+
+
+class _SnapshotLRU:
+    """Thread-safe LRU of snapshots keyed by tenant id."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._seen_versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id, max_age):
+        with self._lock:
+            snapshot = self._entries.get(tenant_id)
+            if snapshot is None:
+                return None
+            if time.monotonic() - snapshot.built_at > max_age:
+                del self._entries[tenant_id]
+                return None
+            self._entries.move_to_end(tenant_id)
+            return snapshot
+
+    def put(self, snapshot, max_size):
+        with self._lock:
+            # A bump that arrived while this snapshot was being built
+            if snapshot.version < self._seen_versions.get(snapshot.tenant_id, 0):
+                return
+            self._entries[snapshot.tenant_id] = snapshot
+            self._entries.move_to_end(snapshot.tenant_id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, tenant_id, version=None):
+        """Drop a tenant's snapshot, or only snapshots older than version."""
+        with self._lock:
+            if version is not None:
+                self._seen_versions[tenant_id] = max(version, self._seen_versions.get(tenant_id, 0))
+            snapshot = self._entries.get(tenant_id)
+            if snapshot is not None and (version is None or snapshot.version < version):
+                del self._entries[tenant_id]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._seen_versions.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _InvalidationListener:
+    """
+    Subscribes to CHANNEL on a daemon thread, one per process.
+
+    Started lazily and restarted after a fork. The L1 is cleared
+    whenever the subscription drops, since bumps may have been missed.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.subscribed = threading.Event()
+        self._pid = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self.subscribed.clear()
+            self.cache.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='tenant-runtime-invalidation', daemon=True
+            )
+            self._thread.start()
+
+    def handle(self, data):
+        """Evict snapshots named by a '<tenant_id>:<version>' message."""
+        tenant_id, _, version = _decode(data).rpartition(':')
+        if tenant_id:
+            self.cache.evict(tenant_id, int(version))
+
+    def _run(self):
+        backoff = 1
+        while True:
+            pubsub = None
+            try:
+                pubsub = _redis_client().pubsub()
+                pubsub.subscribe(CHANNEL)
+                while True:
+                    # Polling with a timeout keeps the connection's socket
+                    # timeout from tearing down an idle subscription
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    if message['type'] == 'subscribe':
+                        self.subscribed.set()
+                        backoff = 1
+                    elif message['type'] == 'message':
+                        self.handle(message['data'])
+            except Exception as e:
+                logger.warning(f"Tenant runtime invalidation listener disconnected: {e}")
+            finally:
+                self.subscribed.clear()
+                self.cache.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+_l1 = _SnapshotLRU()
+_listener = _InvalidationListener(_l1)
+
+
+class TenantRuntimeService:
+    """
+    Service for building, caching and invalidating tenant runtime snapshots.
+    """
+
+    @staticmethod
+    def l1_enabled() -> bool:
+        """Return True when snapshots are cached across messages."""
+        return getattr(settings, 'BOT_TENANT_RUNTIME_L1', False)
+
+    @staticmethod
+    def get(tenant_id) -> TenantRuntimeSnapshot:
+        """
+        Get the runtime snapshot for a tenant.
+
+        Args:
+            tenant_id: Tenant UUID
+
+        Returns:
+            TenantRuntimeSnapshot
+
+        Raises:
+            Tenant.DoesNotExist: If the tenant does not exist
+        """
+        tenant_id = str(tenant_id)
+
+        if not TenantRuntimeService.l1_enabled():
+            return TenantRuntimeService.build(tenant_id)
+
+        snapshot = TenantRuntimeService._get_cached(tenant_id)
+        if snapshot is not None:
+            return snapshot
+
+        snapshot = TenantRuntimeService.build(tenant_id, TenantRuntimeService._current_version(tenant_id))
+        if _listener.subscribed.is_set():
+            _l1.put(snapshot, settings.BOT_TENANT_RUNTIME_L1_SIZE)
+        return snapshot
+
+    @staticmethod
+    async def aget(tenant_id) -> TenantRuntimeSnapshot:
+        """Async variant of get(); L1 hits do not leave the event loop."""
+        if TenantRuntimeService.l1_enabled():
+            snapshot = TenantRuntimeService._get_cached(str(tenant_id))
+            if snapshot is not None:
+                return snapshot
+        return await sync_to_async(TenantRuntimeService.get)(tenant_id)
+
+    @staticmethod
+    async def for_state(state) -> TenantRuntimeSnapshot:
+        """
+        Return the snapshot carried by a ConversationState.
+
+        Resolves and attaches it when the state has none (nodes run
+        outside the orchestrator, or a state rebuilt from storage).
+
+        Args:
+            state: ConversationState
+
+        Returns:
+            TenantRuntimeSnapshot for state.tenant_id
+        """
+        snapshot = state.tenant_runtime
+        if snapshot is None or snapshot.tenant_id != str(state.tenant_id):
+            snapshot = await TenantRuntimeService.aget(state.tenant_id)
+            state.tenant_runtime = snapshot
+        return snapshot
+
+    @staticmethod
+    def build(tenant_id, version: int = 0) -> TenantRuntimeSnapshot:
+        """
+        Load a tenant's runtime data from the database.
+
+        Args:
+            tenant_id: Tenant UUID
+            version: Invalidation version the data was read at
+
+        Returns:
+            TenantRuntimeSnapshot
+        """
+        from apps.bot.models import AgentConfiguration
+        from apps.bot.services.agent_config_service import AgentConfigurationService
+        from apps.bot.services.feature_flags import FeatureFlagService
+        from apps.tenants.models import Tenant, TenantSettings
+
+        tenant = Tenant.objects.select_related('settings').get(id=tenant_id)
+        try:
+            tenant_settings = tenant.settings
+        except TenantSettings.DoesNotExist:
+            tenant_settings = None
+        agent_config = AgentConfiguration.objects.filter(tenant=tenant).first()
+
+        flag_names = set(FeatureFlagService.DEFAULT_FLAGS)
+        if tenant_settings is not None:
+            flag_names.update(tenant_settings.feature_flags or {})
+        feature_flags = {
+            name: FeatureFlagService.evaluate(name, tenant) for name in sorted(flag_names)
+        }
+
+        if agent_config is not None:
+            persona = {name: getattr(agent_config, name) for name in PERSONA_FIELDS}
+        else:
+            defaults = AgentConfigurationService._get_default_config_dict()
+            persona = {name: defaults.get(name) for name in PERSONA_FIELDS}
+
+        business_hours = dict(getattr(tenant_settings, 'business_hours', None) or {})
+        if agent_config is not None:
+            business_hours.update({
+                'start': agent_config.business_hours_start,
+                'end': agent_config.business_hours_end,
+                'quiet_start': agent_config.quiet_hours_start,
+                'quiet_end': agent_config.quiet_hours_end,
+            })
+        business_hours.setdefault('timezone', tenant.timezone)
+
+        return TenantRuntimeSnapshot(
+            tenant_id=str(tenant.id),
+            version=version,
+            tenant=tenant,
+            settings=tenant_settings,
+            agent_config=agent_config,
+            feature_flags=MappingProxyType(feature_flags),
+            persona=MappingProxyType(persona),
+            business_hours=MappingProxyType(business_hours),
+            built_at=time.monotonic(),
+        )
+
+    @staticmethod
+    def invalidate(tenant_id) -> None:
+        """
+        Drop a tenant's snapshot in every process.
+
+        Bumps the tenant's version in Redis and publishes it; the local
+        L1 is cleared immediately. A no-op when the L1 is disabled.
+
+        Args:
+            tenant_id: Tenant UUID
+        """
+        if not TenantRuntimeService.l1_enabled():
+            return
+
+        tenant_id = str(tenant_id)
+        _l1.evict(tenant_id)
+
+        try:
+            client = _redis_client()
+            version = client.incr(_version_key(tenant_id))
+            client.publish(CHANNEL, f"{tenant_id}:{version}")
+        except Exception as e:
+            logger.warning(f"Failed to publish tenant runtime invalidation: {e}")
+
+    @staticmethod
+    def _get_cached(tenant_id) -> Optional[TenantRuntimeSnapshot]:
+        _listener.ensure_started()
+        if not _listener.subscribed.is_set():
+            return None
+        return _l1.get(tenant_id, settings.BOT_TENANT_RUNTIME_TTL)
+
+    @staticmethod
+    def _current_version(tenant_id) -> int:
+        try:
+            version = _redis_client().get(_version_key(tenant_id))
+        except Exception as e:
+            logger.warning(f"Failed to read tenant runtime version: {e}")
+            return 0
+        return int(_decode(version)) if version else 0
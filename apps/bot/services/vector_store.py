@@ -56,7 +56,8 @@ class VectorStore(ABC):
         query_vector: List[float],
         top_k: int = 5,
         filter_dict: Dict[str, Any] = None,
-        namespace: str = None
+        namespace: str = None,
+        min_score: Optional[float] = None
     ) -> List[VectorSearchResult]:
         """
         Search for similar vectors.
@@ -66,6 +67,7 @@ class VectorStore(ABC):
             top_k: Number of results to return
             filter_dict: Metadata filters
             namespace: Optional namespace for tenant isolation
+            min_score: Optional minimum similarity score
         
         Returns:
             List of VectorSearchResult objects
@@ -205,7 +207,8 @@ class PineconeVectorStore(VectorStore):
         query_vector: List[float],
         top_k: int = 5,
         filter_dict: Dict[str, Any] = None,
-        namespace: str = None
+        namespace: str = None,
+        min_score: Optional[float] = None
     ) -> List[VectorSearchResult]:
         """
         Search for similar vectors in Pinecone.
@@ -215,6 +218,7 @@ class PineconeVectorStore(VectorStore):
             top_k: Number of results to return
             filter_dict: Metadata filters
             namespace: Tenant namespace for isolation
+            min_score: Optional minimum similarity score
         
         Returns:
             List of VectorSearchResult objects
@@ -235,6 +239,7 @@ class PineconeVectorStore(VectorStore):
                     metadata=match.metadata or {}
                 )
                 for match in response.matches
+                if min_score is None or match.score >= min_score
             ]
             
             logger.debug(
@@ -0,0 +1,33 @@
+"""
+Signal handlers for bot app.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.bot.models import AgentConfiguration
+from apps.bot.services.tenant_runtime import TenantRuntimeService
+from apps.tenants.models import Tenant, TenantSettings
+
+
+def _invalidate_tenant_runtime(tenant_id):
+    """Invalidate cached runtime snapshots once the change is committed."""
+    if tenant_id is None or not TenantRuntimeService.l1_enabled():
+        return
+    transaction.on_commit(lambda: TenantRuntimeService.invalidate(tenant_id))
+
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def invalidate_runtime_for_tenant(sender, instance, **kwargs):
+    """Drop runtime snapshots when a tenant changes."""
+    _invalidate_tenant_runtime(instance.id)
+
+
+@receiver(post_save, sender=TenantSettings)
+@receiver(post_delete, sender=TenantSettings)
+@receiver(post_save, sender=AgentConfiguration)
+@receiver(post_delete, sender=AgentConfiguration)
+def invalidate_runtime_for_tenant_config(sender, instance, **kwargs):
+    """Drop runtime snapshots when tenant settings or agent configuration change."""
+    _invalidate_tenant_runtime(instance.tenant_id)
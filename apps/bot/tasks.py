@@ -10,7 +10,6 @@ from celery import shared_task
 from django.utils import timezone
 from django.db import models
 
-from apps.bot.conversation_state import ConversationState, ConversationStateManager
 
 logger = logging.getLogger(__name__)
 
@@ -32,12 +31,7 @@ def process_inbound_message(self, message_id: str):
         3. Send response via Twilio
         4. Update conversation state
     """
-    from apps.messaging.models import Message, Conversation
-    from apps.bot.langgraph.orchestrator import LangGraphOrchestrator
-    from apps.integrations.services.twilio_service import create_twilio_service_for_tenant
-    from apps.bot.conversation_state import ConversationStateManager
-    from apps.bot.models import ConversationSession
-    from django.db import transaction
+    from apps.messaging.models import Message
     
     try:
         # Load message
@@ -47,59 +41,200 @@ def process_inbound_message(self, message_id: str):
             'conversation__customer'
         ).get(id=message_id)
         
-        conversation = message.conversation
-        tenant = conversation.tenant
-        customer = conversation.customer
+        return _run_orchestrator(message, message.text)
         
-        logger.info(
-            f"Processing inbound message via LangGraph",
-            extra={
-                'message_id': str(message_id),
-                'conversation_id': str(conversation.id),
-                'tenant_id': str(tenant.id)
-            }
+    except Exception as e:
+        logger.error(
+            f"Error processing message {message_id}: {e}",
+            exc_info=True
         )
         
-        # Check if conversation is in handoff mode
-        if conversation.status == 'handoff':
-            logger.info(
-                f"Skipping bot processing - conversation in handoff mode",
-                extra={
-                    'message_id': str(message_id),
-                    'conversation_id': str(conversation.id)
-                }
-            )
-            return {
-                'status': 'skipped',
-                'reason': 'handoff_active',
-                'message_id': str(message_id)
-            }
+        # Return error response
+        return {
+            'status': 'error',
+            'system': 'langgraph_orchestrator',
+            'error': str(e),
+            'message_id': str(message_id)
+        }
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def process_message_burst(self, conversation_id: str):
+    """
+    Process a coalesced burst of inbound messages for a conversation.
+    
+    Scheduled by MessageBurstService.enqueue for the first message of a
+    burst. Defers itself while messages keep arriving, then runs the
+    orchestrator once over the combined text of all queued messages and
+    schedules a new burst for messages that arrived meanwhile. Only one
+    burst per conversation is processed at a time. Failures
+    before entries are claimed are retried too; entries left queued
+    after that are rescheduled by requeue_stale_message_bursts.
+    
+    Args:
+        conversation_id: UUID of the Conversation
+    """
+    from apps.messaging.models import Conversation
+    from apps.messaging.services.message_burst_service import MessageBurstService
+    
+    lock_token = MessageBurstService.acquire_lock(conversation_id)
+    if lock_token is None:
+        # Another worker is processing this conversation; check back
+        # after a burst window instead of polling the lock
+        MessageBurstService.defer_locked(conversation_id)
+        return {'status': 'locked', 'conversation_id': conversation_id}
+    
+    entries = []
+    try:
+        conversation = Conversation.objects.select_related(
+            'tenant', 'customer'
+        ).get(id=conversation_id)
         
-        # Get or create conversation session for state management
-        session, created = ConversationSession.objects.get_or_create(
-            tenant=tenant,
-            conversation=conversation,
-            defaults={
-                'customer': customer,
-                'is_active': True,
-                'state_data': ConversationStateManager.serialize_for_storage(
-                    ConversationState(
-                        tenant_id=str(tenant.id),
-                        conversation_id=str(conversation.id),
-                        request_id=str(message.id),
-                        customer_id=str(customer.id) if customer else None,
-                        phone_e164=customer.phone_e164 if customer else None
-                    )
-                ),
-                'last_request_id': str(message.id)
-            }
+        entries, defer_seconds = MessageBurstService.claim_burst(conversation)
+        if defer_seconds:
+            self.apply_async(args=[conversation_id], countdown=defer_seconds)
+            return {'status': 'deferred', 'conversation_id': conversation_id}
+        if not entries:
+            return {'status': 'empty', 'conversation_id': conversation_id}
+        
+        # Answer as a reply to the last message of the burst
+        message = entries[-1].message
+        message.conversation = conversation
+        result = _run_orchestrator(message, MessageBurstService.combined_text(entries))
+        
+        MessageBurstService.finish(entries)
+        MessageBurstService.schedule_remaining(conversation_id)
+        result['burst_size'] = len(entries)
+        return result
+        
+    except Exception as e:
+        logger.error(
+            f"Error processing message burst for conversation {conversation_id}: {e}",
+            exc_info=True
         )
+        exhausted = self.request.retries >= self.max_retries
+        if entries:
+            MessageBurstService.release(entries, str(e), failed=exhausted)
+        if not exhausted:
+            raise self.retry(exc=e, countdown=2 ** self.request.retries)
         
-        # Deserialize existing state or create initial state
-        if session.state_data and session.state_data != '{}':
-            existing_state = ConversationStateManager.deserialize_from_storage(session.state_data)
-        else:
-            existing_state = None
+        return {
+            'status': 'error',
+            'system': 'langgraph_orchestrator',
+            'error': str(e),
+            'conversation_id': conversation_id
+        }
+    
+    finally:
+        MessageBurstService.release_lock(conversation_id, lock_token)
+
+
+@shared_task
+def requeue_stale_message_bursts():
+    """
+    Reschedule bursts whose queued messages no task will pick up.
+    
+    enqueue only schedules process_message_burst for the first message
+    of a burst, so a lost task would otherwise leave the conversation
+    without bot replies. The burst lock and per-claim tokens make an
+    extra task harmless.
+    
+    Returns:
+        dict: Number of conversations rescheduled
+    """
+    from apps.messaging.services.message_burst_service import MessageBurstService
+    
+    conversation_ids = MessageBurstService.stale_conversation_ids()
+    for conversation_id in conversation_ids:
+        process_message_burst.delay(str(conversation_id))
+    
+    if conversation_ids:
+        logger.warning(
+            f"Rescheduled stale message bursts",
+            extra={'count': len(conversation_ids)}
+        )
+    
+    return {'rescheduled': len(conversation_ids)}
+
+
+@shared_task
+def flush_conversation_states():
+    """
+    Write hot conversation states back to ConversationSession.
+    
+    Only runs when BOT_STATE_HOT_CACHE is enabled; each dirty
+    conversation costs one conditional update per flush.
+    
+    Returns:
+        dict: Number of sessions written
+    """
+    from apps.bot.services.conversation_state_store import ConversationStateStore
+    
+    if not ConversationStateStore.hot_cache_enabled():
+        return {'flushed': 0}
+    
+    flushed = ConversationStateStore.flush()
+    if flushed:
+        logger.info(
+            f"Flushed hot conversation states",
+            extra={'count': flushed}
+        )
+    
+    return {'flushed': flushed}
+
+
+def _run_orchestrator(message, message_text: str):
+    """
+    Run the LangGraph orchestrator for an inbound message and reply.
+    
+    Args:
+        message: Inbound Message (with conversation, tenant and customer loaded)
+        message_text: Text to process (the message text, or a combined burst)
+        
+    Returns:
+        dict: Processing result
+    """
+    from apps.bot.langgraph.orchestrator import LangGraphOrchestrator
+    from apps.integrations.services.twilio_service import create_twilio_service_for_tenant
+    from apps.bot.services.conversation_state_store import ConversationStateStore
+    from apps.bot.services.monitoring.node_metrics import (
+        profile_message, save_interaction_profile, should_sample
+    )
+    
+    message_id = message.id
+    conversation = message.conversation
+    tenant = conversation.tenant
+    customer = conversation.customer
+    
+    logger.info(
+        f"Processing inbound message via LangGraph",
+        extra={
+            'message_id': str(message_id),
+            'conversation_id': str(conversation.id),
+            'tenant_id': str(tenant.id)
+        }
+    )
+    
+    # Check if conversation is in handoff mode
+    if conversation.status == 'handoff':
+        logger.info(
+            f"Skipping bot processing - conversation in handoff mode",
+            extra={
+                'message_id': str(message_id),
+                'conversation_id': str(conversation.id)
+            }
+        )
+        return {
+            'status': 'skipped',
+            'reason': 'handoff_active',
+            'message_id': str(message_id)
+        }
+    
+    # Profiles nodes and tools when BOT_NODE_PROFILING is enabled
+    with profile_message() as profile:
+        # Load conversation state (hot cache first, then ConversationSession)
+        loaded = ConversationStateStore.load(conversation, str(message.id))
+        existing_state = loaded.state
         
         # Initialize LangGraph orchestrator
         orchestrator = LangGraphOrchestrator()
@@ -109,7 +244,7 @@ def process_inbound_message(self, message_id: str):
             tenant_id=str(tenant.id),
             conversation_id=str(conversation.id),
             request_id=str(message.id),  # Use message ID as request ID
-            message_text=message.text,
+            message_text=message_text,
             phone_e164=customer.phone_e164 if customer else None,
             customer_id=str(customer.id) if customer else None,
             existing_state=existing_state
@@ -119,8 +254,8 @@ def process_inbound_message(self, message_id: str):
         if updated_state.response_text:
             twilio_service = create_twilio_service_for_tenant(tenant)
             
-            # Send the response
-            twilio_service.send_whatsapp(
+            # Send the response; failed sends are retried as delayed tasks
+            twilio_service.retry_send_whatsapp(
                 to=customer.phone_e164,
                 body=updated_state.response_text
             )
@@ -134,48 +269,35 @@ def process_inbound_message(self, message_id: str):
                 }
             )
         
-        # Update conversation session with new state
-        session.state_data = ConversationStateManager.serialize_for_storage(updated_state)
-        session.updated_at = timezone.now()
-        session.save()
-        
-        # Handle escalation if required
-        if updated_state.escalation_required:
-            conversation.handoff_active = True
-            conversation.handoff_reason = updated_state.escalation_reason
-            conversation.save()
-            
-            logger.info(
-                f"Conversation escalated to human",
-                extra={
-                    'message_id': str(message_id),
-                    'conversation_id': str(conversation.id),
-                    'escalation_reason': updated_state.escalation_reason
-                }
-            )
-        
-        return {
-            'status': 'success',
-            'system': 'langgraph_orchestrator',
-            'journey': updated_state.journey,
-            'intent': updated_state.intent,
-            'escalated': updated_state.escalation_required,
-            'message_id': str(message_id)
-        }
+        # Persist only the state fields this turn changed
+        ConversationStateStore.save(loaded, updated_state)
+    
+    if profile is not None and should_sample():
+        save_interaction_profile(conversation, message_text, updated_state, profile)
+    
+    # Handle escalation if required
+    if updated_state.escalation_required:
+        conversation.handoff_active = True
+        conversation.handoff_reason = updated_state.escalation_reason
+        conversation.save()
         
-    except Exception as e:
-        logger.error(
-            f"Error processing message {message_id}: {e}",
-            exc_info=True
+        logger.info(
+            f"Conversation escalated to human",
+            extra={
+                'message_id': str(message_id),
+                'conversation_id': str(conversation.id),
+                'escalation_reason': updated_state.escalation_reason
+            }
         )
-        
-        # Return error response
-        return {
-            'status': 'error',
-            'system': 'langgraph_orchestrator',
-            'error': str(e),
-            'message_id': str(message_id)
-        }
+    
+    return {
+        'status': 'success',
+        'system': 'langgraph_orchestrator',
+        'journey': updated_state.journey,
+        'intent': updated_state.intent,
+        'escalated': updated_state.escalation_required,
+        'message_id': str(message_id)
+    }
 
 
 @shared_task(bind=True, max_retries=2)
@@ -294,4 +416,55 @@ def process_document(self, document_id: str):
             'status': 'error',
             'document_id': str(document_id),
             'error': str(e)
-        }
\ No newline at end of file
+        }
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def ingest_tenant_document(self, document_id: str):
+    """
+    Run the staged ingestion pipeline for a TenantDocument.
+    
+    The pipeline checkpoints after every batch, so retries (and re-runs
+    after a worker crash) resume where the previous attempt stopped
+    instead of re-extracting and re-embedding the whole document.
+    
+    Args:
+        document_id: UUID of the TenantDocument to ingest
+    """
+    from apps.bot.models_tenant_documents import TenantDocument
+    from apps.bot.services.tenant_document_ingestion_service import TenantDocumentIngestionService
+    
+    try:
+        document = TenantDocument.objects.select_related('tenant').get(id=document_id)
+    except TenantDocument.DoesNotExist:
+        logger.error(f"Document not found for ingestion: {document_id}")
+        return {
+            'status': 'error',
+            'document_id': str(document_id),
+            'error': 'Document not found'
+        }
+    
+    service = TenantDocumentIngestionService.create_for_tenant(document.tenant)
+    
+    try:
+        totals = service.process_document(document)
+    except ValueError as e:
+        # Unreadable or empty files will not succeed on retry
+        return {
+            'status': 'error',
+            'document_id': str(document_id),
+            'error': str(e)
+        }
+    except Exception as e:
+        logger.warning(
+            f"Ingestion attempt {self.request.retries + 1} failed for document "
+            f"{document_id}, will resume from checkpoint: {e}"
+        )
+        raise self.retry(exc=e, countdown=30 * (2 ** self.request.retries))
+    
+    return {
+        'status': 'success',
+        'document_id': str(document_id),
+        'chunks_processed': totals['chunk_count'],
+        'total_tokens': totals['total_tokens']
+    }
@@ -0,0 +1,79 @@
+"""
+Tests for the async bot webhook views.
+"""
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from django.test import AsyncRequestFactory
+
+from apps.bot.langgraph.webhook import LangGraphWebhookView
+from apps.bot.views.catalog_return import CatalogReturnWebhookView
+
+
+def _post(path, payload):
+    body = payload if isinstance(payload, str) else json.dumps(payload)
+    return AsyncRequestFactory().post(path, body, content_type='application/json')
+
+
+class TestLangGraphWebhookView:
+    """The orchestrator is awaited by the view."""
+
+    PAYLOAD = {
+        'tenant_id': 't1',
+        'conversation_id': 'c1',
+        'request_id': 'r1',
+        'message_text': 'Do you have shoes?',
+    }
+
+    async def test_processes_message(self):
+        state = SimpleNamespace(
+            conversation_id='c1', request_id='r1', response_text='Yes we do',
+            intent='BROWSE_PRODUCTS', journey='sales', escalation_required=False,
+            to_dict=lambda: {'conversation_id': 'c1'}
+        )
+        process = AsyncMock(return_value=state)
+
+        with patch('apps.bot.langgraph.webhook.process_conversation_message', process):
+            response = await LangGraphWebhookView.as_view()(_post('/v1/bot/langgraph/webhook/', self.PAYLOAD))
+
+        assert response.status_code == 200
+        assert json.loads(response.content)['response_text'] == 'Yes we do'
+        assert process.await_args.kwargs['message_text'] == 'Do you have shoes?'
+
+    async def test_invalid_json(self):
+        response = await LangGraphWebhookView.as_view()(_post('/v1/bot/langgraph/webhook/', '{not json'))
+
+        assert response.status_code == 400
+
+    async def test_missing_fields(self):
+        response = await LangGraphWebhookView.as_view()(_post('/v1/bot/langgraph/webhook/', {'tenant_id': 't1'}))
+
+        assert response.status_code == 400
+
+    async def test_non_object_payload(self):
+        response = await LangGraphWebhookView.as_view()(_post('/v1/bot/langgraph/webhook/', [1]))
+
+        assert response.status_code == 400
+
+
+class TestCatalogReturnWebhookView:
+    """Catalog returns are validated before any lookup."""
+
+    async def test_missing_fields(self):
+        response = await CatalogReturnWebhookView.as_view()(
+            _post('/v1/bot/catalog/return/webhook', {'tenant_id': 't1'})
+        )
+
+        assert response.status_code == 400
+        assert 'selected_product_id' in json.loads(response.content)['error']
+
+    async def test_invalid_json(self):
+        response = await CatalogReturnWebhookView.as_view()(_post('/v1/bot/catalog/return/webhook', '['))
+
+        assert response.status_code == 400
+
+    async def test_non_object_payload(self):
+        response = await CatalogReturnWebhookView.as_view()(_post('/v1/bot/catalog/return/webhook', [1]))
+
+        assert response.status_code == 400
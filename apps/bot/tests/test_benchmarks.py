@@ -0,0 +1,154 @@
+"""
+Tests for the benchmark suite: generators, stubs, runner and hot paths.
+"""
+import math
+import pytest
+
+from apps.bot.benchmarks import (
+    BENCHMARKS, PROFILES, BenchmarkResult, compare_results, generate_tenant,
+    hashed_embedding, load_results, run_benchmark, stub_providers, write_results,
+)
+from apps.bot.models import KnowledgeEntry
+from apps.bot.services.knowledge_base_service import KnowledgeBaseService
+from apps.bot.services.llm.factory import LLMProviderFactory
+from apps.catalog.models import Product
+from apps.messaging.models import Message, MessageCampaign
+from apps.tenants.models import Tenant
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-tests',
+    }
+}
+
+
+@pytest.fixture
+def synthetic(db, settings):
+    settings.CACHES = LOCMEM_CACHES
+    with stub_providers(dimensions=PROFILES['tiny'].embedding_dimensions) as stubs:
+        synthetic = generate_tenant(PROFILES['tiny'], seed=7)
+        synthetic.stubs = stubs
+        yield synthetic
+
+
+def _cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class TestGenerators:
+    """Synthetic tenants match their profile and are reproducible."""
+
+    def test_tenant_matches_profile(self, synthetic):
+        profile = PROFILES['tiny']
+
+        assert Product.objects.filter(tenant=synthetic.tenant).count() == profile.products
+        assert len(synthetic.services) == profile.services
+        assert len(synthetic.customers) == profile.customers
+        assert len(synthetic.conversations) == profile.conversations
+        assert Message.objects.filter(
+            conversation=synthetic.busiest_conversation()
+        ).count() == profile.messages_per_conversation
+        assert KnowledgeEntry.objects.filter(tenant=synthetic.tenant).count() == profile.knowledge_entries
+
+    def test_same_seed_same_data(self, synthetic):
+        other = generate_tenant(PROFILES['tiny'], seed=7)
+
+        assert [product.title for product in other.products] == [product.title for product in synthetic.products]
+        assert other.product_queries() == synthetic.product_queries()
+        assert other.tenant.id != synthetic.tenant.id
+
+    def test_delete_removes_tenant(self, synthetic):
+        synthetic.delete()
+
+        assert not Tenant.objects.filter(id=synthetic.tenant.id).exists()
+        assert not Product.objects.filter(tenant_id=synthetic.tenant.id).exists()
+
+    def test_hashed_embedding_favours_shared_words(self):
+        query = hashed_embedding('what is your delivery policy', 256)
+        related = hashed_embedding('What is your delivery policy? We deliver in 24 hours', 256)
+        unrelated = hashed_embedding('braiding appointment tomorrow', 256)
+
+        assert math.isclose(_cosine(query, query), 1.0)
+        assert _cosine(query, related) > _cosine(query, unrelated)
+
+
+class TestStubs:
+    """External providers are routed to the stubs."""
+
+    def test_providers_are_stubbed(self, synthetic):
+        service = KnowledgeBaseService()
+        provider = LLMProviderFactory.create_from_tenant_settings(synthetic.tenant, 'openai')
+
+        assert service.client is synthetic.stubs.openai
+        assert provider is synthetic.stubs.llm
+        assert provider.generate(messages=[{'role': 'user', 'content': 'hi'}], model='stub').content
+
+
+class TestRunner:
+    """The runner records timings and queries and compares runs."""
+
+    def test_setup_is_untimed_and_queries_counted(self, db):
+        calls = []
+
+        result = run_benchmark(
+            'count', lambda value: list(Tenant.objects.all()),
+            setup=lambda: calls.append(1), rounds=3, warmup=2
+        )
+
+        assert len(calls) == 5
+        assert len(result.timings_ms) == 3
+        assert result.queries == [1, 1, 1]
+        assert result.error is None
+
+    def test_errors_are_recorded(self, db):
+        result = run_benchmark('broken', lambda value: 1 / 0, rounds=2)
+
+        assert result.error.startswith('ZeroDivisionError')
+        assert result.timings_ms == []
+
+    def test_results_round_trip_and_compare(self, tmp_path):
+        baseline = [BenchmarkResult('a', [10.0, 12.0], [3, 3]), BenchmarkResult('b', [5.0], [1])]
+        current = [BenchmarkResult('a', [10.5, 11.0], [3, 3]), BenchmarkResult('b', [9.0], [2])]
+        path = tmp_path / 'baseline.json'
+
+        write_results(str(path), baseline, {'profile': 'tiny'})
+        loaded = load_results(str(path))
+        rows = {row['name']: row for row in compare_results(
+            loaded, {'results': [result.to_dict() for result in current]}
+        )}
+
+        assert loaded['metadata'] == {'profile': 'tiny'}
+        assert loaded['results'][0]['median_ms'] == 11.0
+        assert rows['a']['regressed'] is False
+        assert rows['b']['regressed'] is True
+
+
+class TestHotPaths:
+    """The hot-path benchmarks run against a synthetic tenant."""
+
+    @pytest.mark.parametrize('name', ['build_context', 'match_product', 'knowledge_search', 'find_availability'])
+    def test_read_paths(self, synthetic, name):
+        setup, func = BENCHMARKS[name](synthetic)
+
+        result = run_benchmark(name, func, setup=setup, rounds=2, warmup=0)
+
+        assert result.error is None
+        assert len(result.timings_ms) == 2
+
+    def test_knowledge_search_finds_generated_entries(self, synthetic):
+        setup, func = BENCHMARKS['knowledge_search'](synthetic)
+
+        assert func(setup())
+
+    def test_execute_campaign_rolls_back(self, synthetic):
+        setup, func = BENCHMARKS['execute_campaign'](synthetic)
+
+        result = run_benchmark('execute_campaign', func, setup=setup, rounds=2, warmup=0)
+
+        assert result.error is None
+        assert result.median_queries > 0
+        assert not MessageCampaign.objects.filter(tenant=synthetic.tenant).exists()
+        assert not Message.objects.filter(conversation__tenant=synthetic.tenant, direction='out',
+                                          message_type='scheduled_promotional').exists()
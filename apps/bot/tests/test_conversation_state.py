@@ -626,4 +626,50 @@ class ConversationStateManagerTests(TestCase):
         self.assertEqual(restored_state.cart, state.cart)
         
         # Should validate successfully
-        restored_state.validate()
\ No newline at end of file
+        restored_state.validate()
+
+class ConversationGraphStateTests(TestCase):
+    """Test copy-free conversion between ConversationState and graph dicts."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.state = ConversationState(
+            tenant_id="tenant_1",
+            conversation_id="conv_1",
+            request_id="req_1",
+            cart=[{"item_id": "prod_1", "qty": 1, "variant_selection": {}}],
+            last_catalog_results=[{"product_id": "prod_1", "name": "Shoe"}]
+        )
+    
+    def test_round_trip_shares_nested_values(self):
+        """Graph dicts share lists with the dataclass instead of copying them."""
+        graph_state = self.state.to_graph_state()
+        restored = ConversationState.from_graph_state(graph_state)
+        
+        # Graph dicts also carry the transient tenant_runtime field
+        persisted = {k: v for k, v in graph_state.items() if k != "tenant_runtime"}
+        self.assertEqual(persisted, self.state.to_dict())
+        self.assertIn("tenant_runtime", graph_state)
+        self.assertIs(graph_state["cart"], self.state.cart)
+        self.assertIs(restored.last_catalog_results, self.state.last_catalog_results)
+        
+        restored.add_to_cart("prod_2")
+        self.assertEqual(len(self.state.cart), 2)
+    
+    def test_from_graph_state_ignores_routing_keys(self):
+        """Routing flags set on the graph dict are not state fields."""
+        graph_state = self.state.to_graph_state()
+        graph_state["needs_clarification"] = True
+        graph_state["some_future_flag"] = "x"
+        
+        restored = ConversationState.from_graph_state(graph_state)
+        
+        self.assertEqual(restored.conversation_id, "conv_1")
+    
+    def test_from_graph_state_requires_identity_fields(self):
+        """Missing identity fields are rejected."""
+        graph_state = self.state.to_graph_state()
+        del graph_state["request_id"]
+        
+        with self.assertRaises(ValueError):
+            ConversationState.from_graph_state(graph_state)
@@ -0,0 +1,288 @@
+"""
+Tests for the conversation state store (delta writes and hot cache).
+"""
+import json
+import pytest
+from collections import defaultdict
+from unittest.mock import patch
+from redis.exceptions import WatchError
+
+from apps.bot.models import ConversationSession
+from apps.bot.services.conversation_state_store import (
+    ConversationStateStore, DIRTY_KEY, VERSION_FIELD, StateWriteConflict, _state_key, encode_state,
+)
+from apps.messaging.models import Conversation
+from apps.tenants.models import Tenant, Customer
+
+
+class FakeRedis:
+    """In-memory stand-in for the hash, set and WATCH commands used by the store."""
+
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+        self.sets = defaultdict(set)
+        self.hset_calls = []
+        self.watch_conflicts = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self, transaction)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hset(self, key, mapping):
+        self.hset_calls.append((key, set(mapping)))
+        self.hashes[key].update({k: str(v) for k, v in mapping.items()})
+
+    def exists(self, key):
+        return int(key in self.hashes)
+
+    def delete(self, key):
+        return int(self.hashes.pop(key, None) is not None)
+
+    def expire(self, key, ttl):
+        pass
+
+    def sadd(self, key, *members):
+        self.sets[key].update(members)
+
+    def srem(self, key, member):
+        self.sets[key].discard(member)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+
+class FakePipeline:
+    """Runs commands immediately until multi(), then buffers them."""
+
+    def __init__(self, redis, transaction):
+        self.redis = redis
+        self.buffered = not transaction
+        self.calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def watch(self, key):
+        self.buffered = False
+
+    def unwatch(self):
+        pass
+
+    def multi(self):
+        self.buffered = True
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            if self.buffered:
+                self.calls.append((name, args, kwargs))
+                return None
+            return getattr(self.redis, name)(*args, **kwargs)
+        return command
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        if self.redis.watch_conflicts:
+            self.redis.watch_conflicts -= 1
+            raise WatchError('watched key changed')
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with patch('apps.bot.services.conversation_state_store._redis_client', return_value=redis):
+        yield redis
+
+
+@pytest.fixture
+def tenant(db):
+    return Tenant.objects.create(
+        name='State Shop',
+        slug='state-shop',
+        status='active',
+        whatsapp_number='+254700000371'
+    )
+
+
+@pytest.fixture
+def conversation(tenant):
+    customer = Customer.objects.create(tenant=tenant, phone_e164='+254700000372')
+    return Conversation.objects.create(tenant=tenant, customer=customer)
+
+
+def _stored_state(conversation):
+    session = ConversationSession.objects.get(conversation=conversation)
+    return session.state_version, json.loads(session.state_data)
+
+
+@pytest.mark.django_db
+class TestTrimming:
+    """Bulky transient fields are persisted as references."""
+
+    def test_catalog_results_and_snippets_trimmed(self, conversation):
+        loaded = ConversationStateStore.load(conversation, 'req-1')
+        state = loaded.state
+        state.last_catalog_results = [{
+            'product_id': 'p1', 'name': 'Shoe', 'price': 10, 'in_stock': True,
+            'description': 'x' * 500, 'images': ['a'] * 50,
+            'variants': [{'id': f'v{i}', 'name': f'V{i}', 'attrs': {}} for i in range(5)],
+        }]
+        state.kb_snippets = [{'chunk_id': 'c1', 'source': 'faq', 'score': 0.9, 'content': 'y' * 5000}]
+
+        encoded = encode_state(state)
+
+        product = json.loads(encoded['last_catalog_results'])[0]
+        assert set(product) == {'product_id', 'name', 'price', 'in_stock', 'description', 'variants'}
+        assert len(product['description']) == 100
+        assert product['variants'] == [{'id': 'v0', 'name': 'V0'}, {'id': 'v1', 'name': 'V1'}, {'id': 'v2', 'name': 'V2'}]
+        assert json.loads(encoded['kb_snippets']) == [{'chunk_id': 'c1', 'source': 'faq', 'score': 0.9}]
+        # The in-memory state used by the current turn keeps everything
+        assert len(state.kb_snippets[0]['content']) == 5000
+
+
+@pytest.mark.django_db
+class TestDatabaseStore:
+    """Without the hot cache, saves are conditional updates on state_version."""
+
+    def test_unchanged_state_is_not_written(self, conversation):
+        loaded = ConversationStateStore.load(conversation, 'req-1')
+
+        version = ConversationStateStore.save(loaded, loaded.state)
+
+        assert version == 0
+        assert _stored_state(conversation)[0] == 0
+
+    def test_changed_state_bumps_version(self, conversation):
+        loaded = ConversationStateStore.load(conversation, 'req-1')
+        loaded.state.add_to_cart('item-1', 2)
+
+        version = ConversationStateStore.save(loaded, loaded.state)
+
+        stored_version, data = _stored_state(conversation)
+        assert version == stored_version == 1
+        assert data['cart'][0]['item_id'] == 'item-1'
+        reloaded = ConversationStateStore.load(conversation, 'req-2')
+        assert reloaded.version == 1
+        assert reloaded.state.cart == loaded.state.cart
+
+    def test_concurrent_writers_merge_changed_fields(self, conversation):
+        first = ConversationStateStore.load(conversation, 'req-1')
+        second = ConversationStateStore.load(conversation, 'req-1')
+
+        first.state.add_to_cart('item-1')
+        ConversationStateStore.save(first, first.state)
+        second.state.customer_language_pref = 'sw'
+        version = ConversationStateStore.save(second, second.state)
+
+        stored_version, data = _stored_state(conversation)
+        assert version == stored_version == 2
+        assert data['cart'][0]['item_id'] == 'item-1'
+        assert data['customer_language_pref'] == 'sw'
+
+    def test_exhausted_conflicts_raise(self, conversation):
+        loaded = ConversationStateStore.load(conversation, 'req-1')
+        loaded.state.add_to_cart('item-1')
+
+        with patch('django.db.models.query.QuerySet.update', return_value=0):
+            with pytest.raises(StateWriteConflict):
+                ConversationStateStore.save(loaded, loaded.state)
+
+        assert _stored_state(conversation)[0] == 0
+
+
+@pytest.mark.django_db
+class TestHotStore:
+    """With the hot cache, saves write changed fields to Redis and flush later."""
+
+    @pytest.fixture(autouse=True)
+    def hot_cache(self, settings):
+        settings.BOT_STATE_HOT_CACHE = True
+
+    def test_save_writes_delta_and_defers_database(self, conversation, fake_redis):
+        loaded = ConversationStateStore.load(conversation, 'req-1')
+        key = _state_key(conversation.id)
+        assert fake_redis.hashes[key][VERSION_FIELD] == '0'
+        fake_redis.hset_calls.clear()
+
+        loaded.state.add_to_cart('item-1')
+        version = ConversationStateStore.save(loaded, loaded.state)
+
+        assert version == 1
+        assert fake_redis.hset_calls == [(key, {'cart', VERSION_FIELD})]
+        assert str(conversation.id) in fake_redis.sets[DIRTY_KEY]
+        assert _stored_state(conversation)[0] == 0
+
+    def test_load_prefers_hot_state(self, conversation, fake_redis):
+        loaded = ConversationStateStore.load(conversation, 'req-1')
+        loaded.state.add_to_cart('item-1')
+        ConversationStateStore.save(loaded, loaded.state)
+
+        reloaded = ConversationStateStore.load(conversation, 'req-2')
+
+        assert reloaded.version == 1
+        assert reloaded.state.cart[0]['item_id'] == 'item-1'
+
+    def test_flush_writes_latest_version(self, conversation, fake_redis):
+        loaded = ConversationStateStore.load(conversation, 'req-1')
+        for item_id in ('item-1', 'item-2'):
+            loaded.state.add_to_cart(item_id)
+            ConversationStateStore.save(loaded, loaded.state)
+
+        assert ConversationStateStore.flush() == 1
+        assert ConversationStateStore.flush() == 0
+
+        stored_version, data = _stored_state(conversation)
+        assert stored_version == 2
+        assert [line['item_id'] for line in data['cart']] == ['item-1', 'item-2']
+        assert not fake_redis.sets[DIRTY_KEY]
+
+    def test_concurrent_turn_keeps_other_fields(self, conversation, fake_redis):
+        first = ConversationStateStore.load(conversation, 'req-1')
+        second = ConversationStateStore.load(conversation, 'req-1')
+
+        first.state.add_to_cart('item-1')
+        ConversationStateStore.save(first, first.state)
+        second.state.customer_language_pref = 'sw'
+        fake_redis.watch_conflicts = 1
+        version = ConversationStateStore.save(second, second.state)
+
+        merged = ConversationStateStore.load(conversation, 'req-2')
+        assert version == merged.version == 2
+        assert merged.state.cart[0]['item_id'] == 'item-1'
+        assert merged.state.customer_language_pref == 'sw'
+
+    def test_redis_down_falls_back_to_database(self, conversation):
+        with patch(
+            'apps.bot.services.conversation_state_store._redis_client',
+            side_effect=ConnectionError('down')
+        ):
+            loaded = ConversationStateStore.load(conversation, 'req-1')
+            loaded.state.add_to_cart('item-1')
+            version = ConversationStateStore.save(loaded, loaded.state)
+
+        assert version == 1
+        assert _stored_state(conversation)[1]['cart'][0]['item_id'] == 'item-1'
+
+    def test_database_fallback_discards_hot_hash(self, conversation, fake_redis):
+        loaded = ConversationStateStore.load(conversation, 'req-1')
+        key = _state_key(conversation.id)
+        fake_redis.sets[DIRTY_KEY].add(str(conversation.id))
+        loaded.state.add_to_cart('item-1')
+        fake_redis.watch_conflicts = 3
+
+        version = ConversationStateStore.save(loaded, loaded.state)
+
+        assert version == _stored_state(conversation)[0] == 1
+        assert key not in fake_redis.hashes
+        assert not fake_redis.sets[DIRTY_KEY]
+        reloaded = ConversationStateStore.load(conversation, 'req-2')
+        assert reloaded.version == 1
+        assert reloaded.state.cart[0]['item_id'] == 'item-1'
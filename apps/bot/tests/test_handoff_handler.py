@@ -0,0 +1,64 @@
+"""
+Tests for handoff handler responses.
+"""
+import pytest
+from unittest.mock import MagicMock
+
+from apps.bot.services.handoff_handler import HandoffHandler, HandoffHandlerError
+from apps.integrations.services.twilio_service import TwilioServiceError
+from apps.messaging.models import Conversation, Message
+from apps.tenants.models import Tenant, Customer
+
+
+@pytest.fixture
+def conversation(db):
+    tenant = Tenant.objects.create(
+        name="Test Business",
+        slug="test-business",
+        whatsapp_number="+1234567890",
+        status="active"
+    )
+    customer = Customer.objects.create(tenant=tenant, phone_e164="+1234567891")
+    return Conversation.objects.create(tenant=tenant, customer=customer, status="open")
+
+
+def _handler(conversation, result=None, error=None):
+    twilio_service = MagicMock()
+    twilio_service.retry_send_whatsapp.return_value = result
+    twilio_service.retry_send_whatsapp.side_effect = error
+    return HandoffHandler(conversation.tenant, conversation, twilio_service)
+
+
+@pytest.mark.django_db
+class TestSendResponse:
+    """The stored message is the one the retry task updates."""
+
+    RESPONSE = {'action': 'send', 'message': 'A team member will help you.'}
+
+    def test_rescheduled_send_passes_message_id(self, conversation):
+        handler = _handler(conversation, result={'sid': None, 'status': 'retry_scheduled'})
+
+        handler.send_response(self.RESPONSE)
+
+        message = Message.objects.get(conversation=conversation)
+        kwargs = handler.twilio_service.retry_send_whatsapp.call_args.kwargs
+        assert kwargs['message_id'] == str(message.id)
+        assert message.provider_msg_id is None
+        assert message.sent_at is None
+
+    def test_inline_send_marks_message_sent(self, conversation):
+        handler = _handler(conversation, result={'sid': 'SM123', 'status': 'queued'})
+
+        handler.send_response(self.RESPONSE)
+
+        message = Message.objects.get(conversation=conversation)
+        assert message.provider_msg_id == 'SM123'
+        assert message.sent_at is not None
+
+    def test_failed_send_marks_message_failed(self, conversation):
+        handler = _handler(conversation, error=TwilioServiceError('boom'))
+
+        with pytest.raises(HandoffHandlerError):
+            handler.send_response(self.RESPONSE)
+
+        assert Message.objects.get(conversation=conversation).failed_at is not None
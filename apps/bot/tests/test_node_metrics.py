@@ -0,0 +1,180 @@
+"""
+Tests for per-node and per-tool profiling.
+"""
+import asyncio
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from apps.bot.models import AgentInteraction
+from apps.bot.services.llm.base import LLMResponse
+from apps.bot.services.monitoring.node_metrics import (
+    NodeMetrics, build_profile, instrument_node, instrument_tool, profile_message,
+    save_interaction_profile, should_sample,
+)
+from apps.bot.tools.base import ToolResponse
+from apps.core.cache import CacheService
+from apps.core.metrics import registry
+from apps.core.profiling import enable_query_profiling, profile_span
+from apps.tenants.models import Tenant
+
+
+@pytest.fixture(autouse=True)
+def profiling(settings):
+    settings.BOT_NODE_PROFILING = True
+    NodeMetrics.reset()
+    yield
+    NodeMetrics.reset()
+
+
+def _llm_response(model='gpt-4o-mini', prompt=120, completion=30):
+    return LLMResponse(
+        content='ok', model=model, provider='openai', input_tokens=prompt, output_tokens=completion,
+        total_tokens=prompt + completion, estimated_cost=Decimal('0'), finish_reason='stop', metadata={}
+    )
+
+
+class _Tool:
+    def __init__(self, success=True):
+        self.success = success
+        self.calls = 0
+
+    def execute(self, **kwargs):
+        self.calls += 1
+        _llm_response(prompt=10, completion=5)
+        return ToolResponse(success=self.success, data=kwargs)
+
+
+class TestSpans:
+    """Spans count queries, cache lookups and tokens and roll them up."""
+
+    def test_counters_roll_up_to_root(self, db):
+        enable_query_profiling()
+        cache = LocMemCache('node-metrics', {})
+        cache.set('present', 1)
+
+        with patch('apps.core.cache.cache', cache):
+            with profile_span('message', 'run') as root:
+                with profile_span('node', 'lookup') as child:
+                    list(Tenant.objects.all())
+                    CacheService.get('present')
+                    CacheService.get('absent')
+                    _llm_response()
+
+        assert (child.queries, child.cache_hits, child.cache_misses) == (1, 1, 1)
+        assert child.query_seconds > 0
+        assert (root.queries, root.prompt_tokens, root.completion_tokens) == (1, 120, 30)
+        assert root.models == {'gpt-4o-mini': 150}
+        assert [step['name'] for step in root.children] == ['lookup']
+
+    def test_no_span_records_nothing(self):
+        # Building a response outside a span must not fail
+        assert _llm_response().total_tokens == 150
+
+
+class TestInstrumentation:
+    """Graph nodes and tools feed the process aggregates."""
+
+    def test_node_and_tool_are_recorded(self):
+        tool = instrument_tool('catalog_search', _Tool())
+
+        async def node(state):
+            tool.execute(query='shoes')
+            return {**state, 'done': True}
+
+        with profile_message() as root:
+            state = asyncio.run(instrument_node('intent_classify', node)({}))
+
+        assert state == {'done': True}
+        assert [step['name'] for step in root.children] == ['catalog_search', 'intent_classify']
+        snapshot = NodeMetrics.snapshot()
+        assert set(snapshot) == {
+            'message:process_inbound_message', 'node:intent_classify', 'tool:catalog_search'
+        }
+        assert snapshot['node:intent_classify']['prompt_tokens'] == 10
+        assert snapshot['tool:catalog_search']['count'] == 1
+
+    def test_failed_tools_and_nodes_count_as_errors(self):
+        tool = instrument_tool('checkout', _Tool(success=False))
+
+        async def node(state):
+            raise RuntimeError('boom')
+
+        tool.execute()
+        with pytest.raises(RuntimeError):
+            asyncio.run(instrument_node('payment', node)({}))
+
+        snapshot = NodeMetrics.snapshot()
+        assert snapshot['tool:checkout']['errors'] == 1
+        assert snapshot['node:payment']['errors'] == 1
+
+    def test_tools_are_wrapped_once(self):
+        tool = _Tool()
+
+        instrument_tool('catalog_search', instrument_tool('catalog_search', tool))
+        tool.execute()
+
+        assert tool.calls == 1
+        assert NodeMetrics.snapshot()['tool:catalog_search']['count'] == 1
+
+    def test_disabled_records_nothing(self, settings):
+        settings.BOT_NODE_PROFILING = False
+        tool = instrument_tool('catalog_search', _Tool())
+
+        with profile_message() as root:
+            assert tool.execute(query='bag').success
+
+        assert root is None
+        assert NodeMetrics.snapshot() == {}
+
+    def test_shared_series(self, settings):
+        settings.METRICS_ENABLED = True
+        registry.reset()
+        tool = instrument_tool('catalog_search', _Tool())
+        tool.execute()
+
+        with patch('apps.core.metrics._redis_client', side_effect=ConnectionError('down')):
+            text = registry.render()
+        registry.reset()
+
+        assert '# TYPE tulia_bot_step_duration_seconds histogram' in text
+        assert 'tulia_bot_step_duration_seconds_count{kind="tool",name="catalog_search"} 1' in text
+        assert 'tulia_bot_step_llm_tokens_total{kind="tool",name="catalog_search",type="prompt"} 10' in text
+        assert 'tulia_bot_step_cache_lookups_total{kind="tool",name="catalog_search",result="hit"} 0' in text
+
+
+class TestSampledProfiles:
+    """Sampled runs are stored on an AgentInteraction."""
+
+    def test_sample_rate(self, settings):
+        settings.BOT_NODE_PROFILE_SAMPLE_RATE = 0.0
+        assert not should_sample()
+        settings.BOT_NODE_PROFILE_SAMPLE_RATE = 1.0
+        assert should_sample()
+
+    def test_save_interaction_profile(self, conversation):
+        class State:
+            intent = 'BROWSE_PRODUCTS'
+            intent_confidence = 0.8
+            response_text = 'Here are our shoes'
+
+        with profile_message() as root:
+            with profile_span('node', 'intent_classify'):
+                _llm_response()
+
+        interaction = save_interaction_profile(conversation, 'Do you have shoes?', State(), root)
+
+        interaction.refresh_from_db()
+        assert interaction.model_used == 'gpt-4o-mini'
+        assert interaction.token_usage['total_tokens'] == 150
+        assert interaction.performance_profile == build_profile(root)
+        assert interaction.performance_profile['steps'][0]['name'] == 'intent_classify'
+
+    def test_save_failures_are_swallowed(self, conversation):
+        with profile_message() as root:
+            pass
+
+        with patch.object(AgentInteraction.objects, 'create', side_effect=RuntimeError('db down')):
+            assert save_interaction_profile(conversation, 'Hi', object(), root) is None
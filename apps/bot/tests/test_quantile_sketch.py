@@ -0,0 +1,182 @@
+"""
+Tests for streaming quantile sketches used by the metrics collectors.
+"""
+import random
+from collections import defaultdict
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from apps.bot.services.monitoring.quantile_sketch import (
+    QuantileSketch, WindowedQuantileSketch, publish_sketch, load_sketch
+)
+from apps.bot.services.monitoring.metrics_collector import MetricsCollector
+from apps.bot.services.metrics_collector import PerformanceMetrics
+
+
+def _exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class FakeRedisPipeline:
+    """Minimal pipeline supporting the hash commands used by publish/load."""
+
+    def __init__(self, store):
+        self.store = store
+        self.results = []
+
+    def hincrby(self, key, field, amount):
+        self.store[key][field] = self.store[key].get(field, 0) + amount
+
+    def hincrbyfloat(self, key, field, amount):
+        self.store[key][field] = self.store[key].get(field, 0.0) + amount
+
+    def expire(self, key, ttl):
+        pass
+
+    def hgetall(self, key):
+        self.results.append(dict(self.store.get(key, {})))
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+class TestQuantileSketch:
+    """Accuracy, merge and memory bounds of QuantileSketch."""
+
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(42)
+        values = [rng.lognormvariate(5, 1) for _ in range(20000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = _exact_quantile(values, q)
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+        assert sketch.count == 20000
+
+    def test_merge_matches_single_sketch(self):
+        rng = random.Random(7)
+        values = [rng.uniform(1, 1000) for _ in range(5000)]
+        whole = QuantileSketch()
+        left, right = QuantileSketch(), QuantileSketch()
+        for i, value in enumerate(values):
+            whole.add(value)
+            (left if i % 2 else right).add(value)
+
+        left.merge(right)
+
+        assert left.count == whole.count
+        assert left.buckets == whole.buckets
+        assert left.quantile(0.95) == whole.quantile(0.95)
+
+    def test_bucket_count_is_bounded(self):
+        values = [step * 10 ** exponent for exponent in range(-6, 9) for step in range(1, 50)]
+        sketch = QuantileSketch(max_buckets=64)
+        for value in values:
+            sketch.add(value)
+
+        # Lowest buckets collapse first, so upper quantiles stay accurate
+        assert len(sketch.buckets) <= 64
+        assert sketch.quantile(0.99) == pytest.approx(_exact_quantile(values, 0.99), rel=0.02)
+
+    def test_zero_and_empty(self):
+        sketch = QuantileSketch()
+        assert sketch.quantile(0.5) == 0.0
+
+        sketch.add(0)
+        sketch.add(10)
+        assert sketch.quantile(0.0) == 0.0
+        assert sketch.quantile(1.0) == pytest.approx(10, rel=0.01)
+
+    def test_dict_round_trip(self):
+        sketch = QuantileSketch()
+        for value in (1, 5, 25, 125):
+            sketch.add(value)
+
+        restored = QuantileSketch.from_dict(sketch.to_dict())
+
+        assert restored.buckets == sketch.buckets
+        assert restored.quantile(0.5) == sketch.quantile(0.5)
+
+
+class TestWindowedQuantileSketch:
+    """Window rotation drops old samples."""
+
+    def test_old_windows_expire(self):
+        sketch = WindowedQuantileSketch(window_seconds=60, max_windows=3)
+        sketch.add(1000, now=0)
+        sketch.add(10, now=60)
+        sketch.add(10, now=120)
+
+        assert sketch.merged(now=120).count == 3
+        assert sketch.merged(now=240).count == 1
+        assert sketch.merged(now=240).quantile(1.0) == pytest.approx(10, rel=0.01)
+
+
+class TestRedisMerge:
+    """Sketches published by several processes merge exactly in Redis."""
+
+    def test_publish_and_load_across_processes(self):
+        store = defaultdict(dict)
+        redis_client = MagicMock()
+        redis_client.pipeline.side_effect = lambda transaction=False: FakeRedisPipeline(store)
+
+        worker_a, worker_b, combined = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for value in range(1, 101):
+            (worker_a if value % 2 else worker_b).add(value)
+            combined.add(value)
+
+        with patch(
+            'apps.bot.services.monitoring.quantile_sketch._redis_client',
+            return_value=redis_client
+        ):
+            publish_sketch('latency', worker_a, window_start=0)
+            publish_sketch('latency', worker_b, window_start=0)
+            fleet = load_sketch('latency', [0, 60])
+
+        assert fleet.count == 100
+        assert fleet.buckets == combined.buckets
+        assert fleet.quantile(0.95) == pytest.approx(combined.quantile(0.95), rel=0.02)
+
+
+class TestCollectorsUseSketches:
+    """Collectors keep bounded state."""
+
+    def test_performance_metrics_percentiles(self):
+        metrics = PerformanceMetrics('llm_node_intent_classify')
+        for i in range(1, 101):
+            metrics.add_response_time(i / 100)
+
+        metrics._update_percentiles()
+
+        assert len(metrics.response_times) == 100
+        assert metrics.p95_response_time == pytest.approx(0.95, rel=0.03)
+        assert metrics.avg_response_time == pytest.approx(0.505, rel=0.01)
+
+    @patch('apps.bot.services.monitoring.metrics_collector.cache')
+    @patch('apps.bot.services.monitoring.metrics_collector.publish_sketch')
+    def test_monitoring_collector_running_totals(self, mock_publish, mock_cache):
+        collector = MetricsCollector(tenant_id='tenant-1')
+        for i in range(20):
+            collector.record_interaction(
+                response_time_ms=100 + i,
+                token_usage={'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15},
+                estimated_cost=Decimal('0.01'),
+                model_used='gpt-4o-mini'
+            )
+
+        tokens = collector.get_token_usage_metrics()
+        cost = collector.get_cost_metrics()
+        response = collector.get_response_time_metrics()
+
+        assert tokens.total_tokens == 300
+        assert tokens.avg_tokens_per_conversation == 15
+        assert cost.total_cost == Decimal('0.20')
+        assert response.count == 20
+        assert response.min == 100
+        assert mock_publish.call_count == 2
@@ -129,6 +129,30 @@ class TestVectorStore:
             assert results[0].score == 0.95
             assert results[1].id == 'vec2'
     
+    def test_pinecone_search_min_score(self):
+        """Test that matches below min_score are dropped by the store."""
+        with patch('apps.bot.services.vector_store.Pinecone') as mock_pc:
+            mock_index = Mock()
+            mock_match1 = Mock(id='vec1', score=0.95, metadata={})
+            mock_match2 = Mock(id='vec2', score=0.55, metadata={})
+            mock_index.query.return_value = Mock(matches=[mock_match1, mock_match2])
+            mock_pc.return_value.Index.return_value = mock_index
+            mock_pc.return_value.list_indexes.return_value = [Mock(name='test-index')]
+            
+            store = PineconeVectorStore(
+                api_key='test-key',
+                index_name='test-index'
+            )
+            
+            results = store.search(
+                query_vector=[0.1, 0.2],
+                top_k=2,
+                namespace='tenant_123',
+                min_score=0.7
+            )
+            
+            assert [result.id for result in results] == ['vec1']
+    
     def test_pinecone_delete(self):
         """Test deleting vectors from Pinecone."""
         with patch('apps.bot.services.vector_store.Pinecone') as mock_pc:
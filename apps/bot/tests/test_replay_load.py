@@ -0,0 +1,172 @@
+"""
+Tests for the message replay load harness.
+"""
+import asyncio
+import json
+import statistics
+import time
+from unittest.mock import patch
+
+import pytest
+from django.test import Client
+
+from apps.bot.benchmarks import (
+    PROFILES, LatencyDistribution, ReplayHarness, arrival_offsets, generate_tenant,
+    is_sustainable, load_corpus, stub_providers, synthetic_corpus,
+)
+from apps.bot.benchmarks.replay import (
+    REPLAY_TWILIO_TOKEN, ReplayStats, _current_probe, _Probe, _timed_node, counting_caches,
+)
+from apps.messaging.models import Message
+
+
+class TestCorpus:
+    """Corpora are read or generated and interleaved turn by turn."""
+
+    def test_load_corpus_interleaves_conversations(self, tmp_path):
+        path = tmp_path / 'corpus.jsonl'
+        path.write_text('\n'.join([
+            json.dumps({'phone': '+254700000001', 'messages': ['Hi', 'Do you have shoes?', 'Thanks']}),
+            '',
+            json.dumps({'messages': [{'Body': 'Hello'}, {'body': 'Price of the bag?'}]}),
+        ]))
+
+        corpus = load_corpus(str(path))
+
+        assert [message.body for message in corpus] == [
+            'Hi', 'Hello', 'Do you have shoes?', 'Price of the bag?', 'Thanks'
+        ]
+        assert corpus[0].phone == '+254700000001'
+        assert corpus[1].phone != corpus[0].phone
+
+    def test_synthetic_corpus_is_seeded(self):
+        corpus = synthetic_corpus(conversations=3, messages_per_conversation=4, seed=5)
+
+        assert len(corpus) == 12
+        assert len({message.phone for message in corpus}) == 3
+        assert corpus == synthetic_corpus(conversations=3, messages_per_conversation=4, seed=5)
+        assert corpus != synthetic_corpus(conversations=3, messages_per_conversation=4, seed=6)
+
+
+class TestLoadModel:
+    """Latency distributions and arrival schedules are deterministic."""
+
+    def test_latency_matches_median_and_p95(self):
+        latency = LatencyDistribution.parse('800:2500', seed=1)
+        samples = sorted(latency() for _ in range(5000))
+
+        assert statistics.median(samples) == pytest.approx(0.8, rel=0.1)
+        assert samples[int(len(samples) * 0.95)] == pytest.approx(2.5, rel=0.15)
+
+    def test_latency_is_reproducible(self):
+        first, second = LatencyDistribution(100, 300, seed=3), LatencyDistribution(100, 300, seed=3)
+
+        assert [first() for _ in range(10)] == [second() for _ in range(10)]
+        assert LatencyDistribution.parse('0')() == 0.0
+
+    @pytest.mark.parametrize('spec', ['500:100', '1:2:3', 'fast'])
+    def test_invalid_latency(self, spec):
+        with pytest.raises(ValueError):
+            LatencyDistribution.parse(spec)
+
+    def test_arrivals(self):
+        assert arrival_offsets(3, 0) == [0.0, 0.0, 0.0]
+        assert arrival_offsets(3, 2, poisson=False) == [0.0, 0.5, 1.0]
+
+        poisson = arrival_offsets(2000, 10, seed=4)
+        assert poisson == arrival_offsets(2000, 10, seed=4)
+        assert poisson[-1] / len(poisson) == pytest.approx(0.1, rel=0.1)
+
+
+class TestStats:
+    """Worker stats merge and decide whether a rate was sustained."""
+
+    def _stats(self, arrival, queries):
+        stats = ReplayStats()
+        probe = _Probe()
+        probe.add(queries=queries, cache_hits=3, cache_misses=1)
+        probe.nodes.append(('intent_classify', 0.2))
+        stats.record(arrival, arrival + 0.1, arrival + 1.0, 0.05, 0.85, probe)
+        return stats
+
+    def test_merge_and_summary(self):
+        stats = self._stats(0.0, queries=10)
+        stats.merge(self._stats(1.0, queries=20))
+        stats.record_error(1.5, 2.5, RuntimeError('boom'))
+
+        summary = stats.summary(offered_rate=1.0, sent=3, concurrency=2)
+
+        assert summary['completed'] == 2
+        assert summary['errors'] == 1
+        assert summary['error_samples'] == ['RuntimeError: boom']
+        assert summary['achieved_rate'] == pytest.approx(2 / 2.5)
+        assert summary['nodes_ms']['intent_classify']['count'] == 2
+        assert summary['queries_per_message']['mean'] == 15
+        assert summary['cache']['hit_ratio'] == 0.75
+        assert summary['capacity_estimate'] == pytest.approx(2 / 0.9, rel=0.02)
+
+    def test_sustainable(self):
+        step = {
+            'offered_rate': 4.0, 'sent': 100, 'errors': 0, 'achieved_rate': 3.9,
+            'latency_ms': {'queue_wait': {'p95': 200.0}},
+        }
+
+        assert is_sustainable(step, max_queue_wait_ms=500)
+        assert not is_sustainable(step, max_queue_wait_ms=100)
+        assert not is_sustainable({**step, 'achieved_rate': 3.0}, max_queue_wait_ms=500)
+        assert not is_sustainable({**step, 'errors': 5}, max_queue_wait_ms=500)
+
+
+class TestReplay:
+    """Messages go through the signed webhook and the processing task."""
+
+    def test_node_timer_records_into_probe(self):
+        async def node(self, state):
+            return {**state, 'done': True}
+
+        probe = _Probe()
+        token = _current_probe.set(probe)
+        try:
+            state = asyncio.run(_timed_node('intent_classify', node)(None, {}))
+        finally:
+            _current_probe.reset(token)
+
+        assert state == {'done': True}
+        assert [name for name, _ in probe.nodes] == ['intent_classify']
+
+    def test_replay_one_message(self, db, settings):
+        # Worker threads cannot share the in-memory test database, so the
+        # message is replayed on the test thread with the orchestrator stubbed
+        settings.CACHES = counting_caches()
+        with stub_providers(dimensions=PROFILES['tiny'].embedding_dimensions):
+            synthetic = generate_tenant(PROFILES['tiny'], seed=3)
+            corpus = synthetic_corpus(conversations=2, messages_per_conversation=1, seed=3)
+            stats = ReplayStats()
+
+            with ReplayHarness(synthetic, corpus, concurrency=1, processes=False) as harness:
+                assert synthetic.tenant.settings.twilio_token == REPLAY_TWILIO_TOKEN
+                with patch('apps.bot.tasks._run_orchestrator', return_value={'status': 'success'}) as run:
+                    harness._replay_one(Client(), stats, time.time(), corpus[0])
+
+        summary = stats.summary(offered_rate=0, sent=1, concurrency=1)
+        assert summary['errors'] == 0, summary['error_samples']
+        assert summary['completed'] == 1
+        assert summary['queries_per_message']['mean'] > 0
+        assert run.call_args.args[1] == corpus[0].body
+        assert Message.objects.filter(
+            conversation__tenant=synthetic.tenant, direction='in', text=corpus[0].body
+        ).exists()
+        synthetic.tenant.settings.refresh_from_db()
+        assert synthetic.tenant.settings.twilio_token != REPLAY_TWILIO_TOKEN
+
+    def test_rejected_webhook_is_an_error(self, db, settings):
+        settings.CACHES = counting_caches()
+        synthetic = generate_tenant(PROFILES['tiny'], seed=4)
+        stats = ReplayStats()
+
+        with ReplayHarness(synthetic, synthetic_corpus(1, 1), concurrency=1, processes=False) as harness:
+            with patch.object(ReplayHarness, '_sign', return_value='forged'):
+                harness._replay_one(Client(), stats, time.time(), harness.corpus[0])
+
+        assert stats.completed == 0
+        assert 'Webhook returned 403' in next(iter(stats.errors))
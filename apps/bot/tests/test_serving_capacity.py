@@ -0,0 +1,41 @@
+"""
+Tests for the WSGI/ASGI serving capacity benchmark.
+"""
+import json
+
+import pytest
+from django.core.management import call_command
+
+from apps.bot.benchmarks import LatencyDistribution, run_serving_benchmark
+
+
+class TestServingBenchmark:
+    """A sync worker holds one request per thread; an ASGI loop holds all of them."""
+
+    @pytest.mark.parametrize('mode, peak', [('wsgi', 2), ('asgi', 8)])
+    def test_peak_in_flight(self, mode, peak):
+        result = run_serving_benchmark(
+            mode, connections=8, requests=16, workers=2, latency=LatencyDistribution(20)
+        )
+
+        assert result['errors'] == 0, result['error_samples']
+        assert result['completed'] == 16
+        assert result['peak_in_flight'] == peak
+        assert result['latency_ms']['p50'] >= 20
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            run_serving_benchmark('gevent')
+        with pytest.raises(ValueError):
+            run_serving_benchmark('asgi', connections=0)
+
+    def test_command_writes_report(self, tmp_path):
+        output = tmp_path / 'serving.json'
+
+        call_command(
+            'serving_capacity', connections=4, requests=8, workers=2, latency_ms='5', output=str(output)
+        )
+
+        report = json.loads(output.read_text())
+        assert [result['mode'] for result in report['results']] == ['wsgi', 'asgi']
+        assert report['metadata']['connections'] == 4
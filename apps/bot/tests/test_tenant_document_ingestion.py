@@ -5,12 +5,15 @@ import pytest
 from io import BytesIO
 from unittest.mock import Mock, patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from apps.tenants.models import Tenant
 from apps.bot.models_tenant_documents import TenantDocument, TenantDocumentChunk
-from apps.bot.services.tenant_document_ingestion_service import TenantDocumentIngestionService
+from apps.bot.services.tenant_document_ingestion_service import (
+    TenantDocumentIngestionService,
+    _chunk_cache,
+)
 
 
 @pytest.mark.django_db
@@ -58,7 +61,8 @@ class TestTenantDocumentIngestionService:
             file=test_file,
             filename="test.txt",
             title="Test Document",
-            description="A test document"
+            description="A test document",
+            process_async=False
         )
         
         # Verify document was created
@@ -75,6 +79,117 @@ class TestTenantDocumentIngestionService:
         # Verify vector store was called
         mock_vector_instance.upsert.assert_called_once()
     
+    @patch('apps.bot.tasks.ingest_tenant_document.delay')
+    @patch('apps.bot.services.tenant_document_ingestion_service.PineconeVectorStore')
+    @patch('apps.bot.services.tenant_document_ingestion_service.EmbeddingService')
+    def test_ingest_queues_background_pipeline(
+        self, mock_embedding_service, mock_vector_store, mock_delay,
+        django_capture_on_commit_callbacks
+    ):
+        """Test that ingestion returns immediately and queues processing."""
+        mock_embedding_instance = Mock()
+        mock_embedding_instance.model = 'text-embedding-3-small'
+        mock_embedding_service.create_for_tenant.return_value = mock_embedding_instance
+        
+        service = TenantDocumentIngestionService.create_for_tenant(self.tenant)
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            document = service.ingest_document(
+                file=BytesIO(b"Queued document content."),
+                filename="queued.txt"
+            )
+        
+        assert document.status == "pending"
+        mock_embedding_instance.embed_batch.assert_not_called()
+        mock_delay.assert_called_once_with(str(document.id))
+    
+    @patch('apps.bot.services.tenant_document_ingestion_service.PineconeVectorStore')
+    @patch('apps.bot.services.tenant_document_ingestion_service.EmbeddingService')
+    def test_pipeline_resumes_from_checkpoint(self, mock_embedding_service, mock_vector_store):
+        """Test that a failed index stage resumes without re-embedding finished batches."""
+        mock_embedding_instance = Mock()
+        mock_embedding_instance.model = 'text-embedding-3-small'
+        mock_embedding_instance.MAX_BATCH_SIZE = 100
+        mock_embedding_instance.embed_batch.side_effect = lambda texts: [
+            {'embedding': [0.1] * 1536, 'tokens': 10, 'cost': 0.0001} for _ in texts
+        ]
+        mock_embedding_service.create_for_tenant.return_value = mock_embedding_instance
+        
+        mock_vector_instance = Mock()
+        mock_vector_instance.upsert.side_effect = [
+            {'upserted_count': 1}, Exception("Pinecone unavailable"),
+        ] + [{'upserted_count': 1}] * 10
+        mock_vector_store.create_from_settings.return_value = mock_vector_instance
+        
+        service = TenantDocumentIngestionService.create_for_tenant(self.tenant)
+        paragraphs = [f"Section {i}. " + "Product manual text. " * 250 for i in range(6)]
+        
+        with override_settings(RAG_INGEST_EMBED_BATCH_SIZE=2, RAG_INGEST_CONCURRENCY=1):
+            with pytest.raises(Exception):
+                service.ingest_document(
+                    file=BytesIO("\n\n".join(paragraphs).encode('utf-8')),
+                    filename="manual.txt",
+                    process_async=False
+                )
+            
+            document = TenantDocument.objects.get(tenant=self.tenant, title="manual.txt")
+            checkpoint = document.metadata['ingestion_checkpoint']
+            assert checkpoint['stage'] == 'index'
+            assert checkpoint['chunks_indexed'] == 2
+            embedded_before_resume = mock_embedding_instance.embed_batch.call_count
+            
+            service.process_document(document)
+        
+        document.refresh_from_db()
+        chunk_count = TenantDocumentChunk.objects.filter(document=document).count()
+        assert document.status == "completed"
+        assert document.metadata['ingestion_checkpoint']['chunks_indexed'] == chunk_count
+        # Only batches after the checkpoint were embedded again
+        resumed_batches = mock_embedding_instance.embed_batch.call_count - embedded_before_resume
+        assert resumed_batches == (chunk_count - 2 + 1) // 2
+    
+    @patch('apps.bot.services.tenant_document_ingestion_service.PineconeVectorStore')
+    @patch('apps.bot.services.tenant_document_ingestion_service.EmbeddingService')
+    def test_chunks_span_page_boundaries(self, mock_embedding_service, mock_vector_store):
+        """Test that page-by-page chunking matches chunking the whole text."""
+        import tiktoken
+        from apps.bot.services.chunking_service import TokenChunker
+        
+        encoding = tiktoken.Encoding(
+            name='test_bytes',
+            pat_str=r"\S+|\s+",
+            mergeable_ranks={bytes([i]): i for i in range(256)},
+            special_tokens={},
+        )
+        service = TenantDocumentIngestionService.create_for_tenant(self.tenant)
+        service.chunker = TokenChunker(chunk_size=120, chunk_overlap=20, encoding=encoding)
+        
+        pages = [
+            f"Page {number}. " + " ".join(f"Rule {number}-{i} applies." for i in range(count))
+            for number, count in enumerate([30, 1, 2, 40, 3], start=1)
+        ]
+        full_text = "\n\n".join(pages)
+        page_starts = [full_text.index(page) for page in pages]
+        
+        carry = {'text': '', 'base': 0, 'pages': []}
+        chunks = []
+        for number, text in enumerate(pages, start=1):
+            if carry['text']:
+                carry['text'] += "\n\n"
+            carry['pages'].append([len(carry['text']), number])
+            carry['text'] += text
+            chunks += service._take_chunks(carry)
+        chunks += service._take_chunks(carry, final=True)
+        
+        expected = service.chunker.chunk(full_text)
+        assert [chunk['content'] for chunk in chunks] == [chunk['content'] for chunk in expected]
+        for chunk in chunks:
+            assert full_text[chunk['start_char']:chunk['end_char']] == chunk['content']
+            # page_number is the page the chunk starts on
+            assert chunk['page_number'] == sum(1 for start in page_starts if start <= chunk['start_char'])
+        # Short pages are merged into neighbouring chunks
+        assert 2 not in {chunk['page_number'] for chunk in chunks}
+    
     @patch('apps.bot.services.tenant_document_ingestion_service.PineconeVectorStore')
     @patch('apps.bot.services.tenant_document_ingestion_service.EmbeddingService')
     def test_search_documents(self, mock_embedding_service, mock_vector_store):
@@ -137,6 +252,61 @@ class TestTenantDocumentIngestionService:
         call_args = mock_vector_instance.search.call_args
         assert call_args[1]["namespace"] == f"tenant_{self.tenant.id}"
         assert call_args[1]["filter_dict"]["tenant_id"] == str(self.tenant.id)
+        assert call_args[1]["top_k"] == 5
+        assert call_args[1]["min_score"] == 0.7
+    
+    @patch('apps.bot.services.tenant_document_ingestion_service.PineconeVectorStore')
+    @patch('apps.bot.services.tenant_document_ingestion_service.EmbeddingService')
+    def test_search_hydrates_chunks_in_one_query(
+        self, mock_embedding_service, mock_vector_store, django_assert_num_queries
+    ):
+        """Test that hits are hydrated with one query, in score order, then cached."""
+        _chunk_cache.clear()
+        mock_embedding_instance = Mock()
+        mock_embedding_instance.embed_text.return_value = {'embedding': [0.1] * 1536}
+        mock_embedding_service.create_for_tenant.return_value = mock_embedding_instance
+        
+        document = TenantDocument.objects.create(
+            tenant=self.tenant,
+            title="FAQ",
+            document_type="txt",
+            file_path="faq.txt",
+            file_size=100,
+            file_hash="faqhash",
+            status="completed"
+        )
+        hits = []
+        for index in range(5):
+            TenantDocumentChunk.objects.create(
+                document=document,
+                chunk_index=index,
+                content=f"Answer {index}",
+                token_count=2,
+                vector_id=f"faq_vec_{index}"
+            )
+            hit = Mock(id=f"faq_vec_{index}", score=0.9 - index * 0.01, metadata={})
+            hits.append(hit)
+        hits.reverse()
+        hits.append(Mock(id="unknown_vec", score=0.8, metadata={}))
+        
+        mock_vector_instance = Mock()
+        mock_vector_instance.search.return_value = hits
+        mock_vector_store.create_from_settings.return_value = mock_vector_instance
+        
+        service = TenantDocumentIngestionService.create_for_tenant(self.tenant)
+        with django_assert_num_queries(1):
+            results = service.search_documents(query="answers", top_k=6)
+        
+        assert [result["content"] for result in results] == [
+            "Answer 4", "Answer 3", "Answer 2", "Answer 1", "Answer 0"
+        ]
+        
+        # Known chunks are served from the LRU; only the unknown id is queried
+        with django_assert_num_queries(1):
+            cached = service.search_documents(query="answers", top_k=6)
+        assert cached == results
+        
+        _chunk_cache.clear()
     
     def test_tenant_isolation(self):
         """Test that tenant isolation is enforced."""
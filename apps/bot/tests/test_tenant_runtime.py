@@ -0,0 +1,173 @@
+"""
+Tests for the tenant runtime snapshot and its L1 cache.
+"""
+import dataclasses
+import pytest
+from asgiref.sync import async_to_sync
+from collections import defaultdict
+from unittest.mock import patch
+
+from apps.bot.conversation_state import ConversationState
+from apps.bot.models import AgentConfiguration
+from apps.bot.services.feature_flags import FeatureFlagService
+from apps.bot.services.tenant_runtime import (
+    CHANNEL, TenantRuntimeService, _l1, _listener, _version_key,
+)
+from apps.tenants.models import Tenant
+
+
+class FakeRedis:
+    """In-memory stand-in for the version and publish commands."""
+
+    def __init__(self):
+        self.values = defaultdict(int)
+        self.published = []
+
+    def get(self, key):
+        return str(self.values[key]).encode() if key in self.values else None
+
+    def incr(self, key):
+        self.values[key] += 1
+        return self.values[key]
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        _listener.handle(message.encode())
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with patch('apps.bot.services.tenant_runtime._redis_client', return_value=redis):
+        yield redis
+
+
+@pytest.fixture
+def l1(settings):
+    """Enable the L1 with the invalidation listener treated as subscribed."""
+    settings.BOT_TENANT_RUNTIME_L1 = True
+    _l1.clear()
+    with patch.object(_listener, 'ensure_started'):
+        _listener.subscribed.set()
+        yield _l1
+    _listener.subscribed.clear()
+    _l1.clear()
+
+
+@pytest.fixture
+def tenant(db):
+    return Tenant.objects.create(
+        name='Runtime Shop',
+        slug='runtime-shop',
+        status='active',
+        whatsapp_number='+254700000431'
+    )
+
+
+def _state(tenant):
+    return ConversationState(
+        tenant_id=str(tenant.id),
+        conversation_id='conv-1',
+        request_id='req-1'
+    )
+
+
+@pytest.mark.django_db
+class TestTenantRuntimeSnapshot:
+    """Snapshots bundle tenant data and travel on the state, not in storage."""
+
+    def test_build_collects_tenant_data(self, tenant):
+        tenant.settings.feature_flags = {'beta_catalog': {'enabled': True, 'rollout_percentage': 100}}
+        tenant.settings.save()
+        AgentConfiguration.objects.create(tenant=tenant, agent_name='Amani', tone='casual')
+
+        snapshot = TenantRuntimeService.build(tenant.id)
+
+        assert snapshot.tenant == tenant
+        assert snapshot.settings.tenant_id == tenant.id
+        assert snapshot.persona['agent_name'] == 'Amani'
+        assert snapshot.is_enabled('beta_catalog')
+        assert snapshot.is_enabled('rag_retrieval') is False
+        assert snapshot.is_enabled('multi_provider_routing') == FeatureFlagService.evaluate(
+            'multi_provider_routing', tenant
+        )
+        assert str(snapshot.business_hours['start']) == '08:00:00'
+
+    def test_snapshot_is_immutable(self, tenant):
+        snapshot = TenantRuntimeService.build(tenant.id)
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            snapshot.version = 5
+        with pytest.raises(TypeError):
+            snapshot.feature_flags['rag_retrieval'] = True
+
+    def test_persona_defaults_without_agent_configuration(self, tenant):
+        snapshot = TenantRuntimeService.build(tenant.id)
+
+        assert snapshot.agent_config is None
+        assert snapshot.persona['agent_name'] == 'Assistant'
+
+    def test_state_carries_snapshot_but_does_not_persist_it(self, tenant, django_assert_num_queries):
+        state = _state(tenant)
+        snapshot = async_to_sync(TenantRuntimeService.for_state)(state)
+
+        assert state.tenant_runtime is snapshot
+        with django_assert_num_queries(0):
+            assert async_to_sync(TenantRuntimeService.for_state)(state) is snapshot
+        assert ConversationState.from_graph_state(state.to_graph_state()).tenant_runtime is snapshot
+        assert 'tenant_runtime' not in state.to_dict()
+        assert ConversationState.from_json(state.to_json()).tenant_runtime is None
+
+
+@pytest.mark.django_db
+class TestTenantRuntimeL1:
+    """The L1 serves snapshots across messages until a version bump."""
+
+    def test_disabled_builds_every_time(self, tenant, django_assert_num_queries):
+        TenantRuntimeService.get(tenant.id)
+
+        with django_assert_num_queries(2):
+            TenantRuntimeService.get(tenant.id)
+
+    def test_l1_hit_skips_database(self, tenant, fake_redis, l1, django_assert_num_queries):
+        first = TenantRuntimeService.get(tenant.id)
+
+        with django_assert_num_queries(0):
+            assert TenantRuntimeService.get(tenant.id) is first
+
+    def test_save_publishes_version_bump(
+        self, tenant, fake_redis, l1, django_capture_on_commit_callbacks
+    ):
+        first = TenantRuntimeService.get(tenant.id)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            AgentConfiguration.objects.create(tenant=tenant, agent_name='Baraka')
+
+        assert fake_redis.published == [(CHANNEL, f"{tenant.id}:1")]
+        second = TenantRuntimeService.get(tenant.id)
+        assert second is not first
+        assert second.version == 1
+        assert second.persona['agent_name'] == 'Baraka'
+
+    def test_remote_bump_evicts_older_snapshot(self, tenant, fake_redis, l1):
+        first = TenantRuntimeService.get(tenant.id)
+
+        _listener.handle(f"{tenant.id}:3".encode())
+
+        assert TenantRuntimeService.get(tenant.id) is not first
+
+    def test_snapshot_older_than_seen_bump_is_not_cached(self, tenant, fake_redis, l1):
+        _listener.handle(f"{tenant.id}:2".encode())
+        fake_redis.values[_version_key(tenant.id)] = 1
+
+        TenantRuntimeService.get(tenant.id)
+
+        assert len(l1) == 0
+
+    def test_unsubscribed_listener_bypasses_l1(self, tenant, fake_redis, l1):
+        _listener.subscribed.clear()
+
+        first = TenantRuntimeService.get(tenant.id)
+
+        assert TenantRuntimeService.get(tenant.id) is not first
+        assert len(l1) == 0
@@ -0,0 +1,115 @@
+"""
+Tests for the token-accurate chunking engine.
+"""
+import pytest
+import tiktoken
+
+from apps.bot.services.chunking_service import TokenChunker, ChunkingService
+
+
+@pytest.fixture
+def encoding():
+    """Word-level encoding that needs no downloaded BPE ranks."""
+    return tiktoken.Encoding(
+        name='test_bytes',
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+
+
+@pytest.fixture
+def document():
+    sections = []
+    for number in range(12):
+        sentences = ' '.join(
+            f"Sentence {number}-{i} explains a delivery or refund rule."
+            for i in range(6)
+        )
+        sections.append(f"# Section {number}\n\n{sentences}\n\nShort follow-up note {number}.")
+    return '\n\n'.join(sections)
+
+
+class TestTokenChunker:
+    """Chunks respect token limits, spans and structure."""
+
+    def test_token_counts_are_exact_and_bounded(self, encoding, document):
+        chunker = TokenChunker(chunk_size=120, chunk_overlap=20, encoding=encoding)
+
+        chunks = chunker.chunk(document)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk['token_count'] <= 120
+            # Content is a stripped span, so it never has more tokens
+            assert chunker.count_tokens(chunk['content']) <= chunk['token_count']
+
+    def test_spans_point_at_content(self, encoding, document):
+        chunker = TokenChunker(chunk_size=120, chunk_overlap=20, encoding=encoding)
+
+        for index, chunk in enumerate(chunker.chunk(document)):
+            assert chunk['chunk_index'] == index
+            assert document[chunk['start_char']:chunk['end_char']] == chunk['content']
+
+    def test_chunks_cover_text_with_overlap(self, encoding, document):
+        chunker = TokenChunker(chunk_size=120, chunk_overlap=20, encoding=encoding)
+
+        chunks = chunker.chunk(document)
+
+        assert chunks[0]['start_char'] == 0
+        assert chunks[-1]['end_char'] == len(document.rstrip())
+        for previous, current in zip(chunks, chunks[1:]):
+            assert current['start_char'] > previous['start_char']
+            assert current['start_char'] <= previous['end_char']
+
+    def test_prefers_structural_boundaries(self, encoding, document):
+        chunker = TokenChunker(chunk_size=120, chunk_overlap=0, encoding=encoding)
+
+        for chunk in chunker.chunk(document)[:-1]:
+            # Every chunk ends at a sentence end or paragraph break, never mid-word
+            assert chunk['content'][-1] in '.0123456789'
+
+    def test_text_without_boundaries_is_hard_split(self, encoding):
+        chunker = TokenChunker(chunk_size=10, chunk_overlap=0, encoding=encoding)
+        text = 'x' * 35
+
+        chunks = chunker.chunk(text)
+
+        assert [chunk['token_count'] for chunk in chunks] == [10, 10, 10, 5]
+        assert ''.join(chunk['content'] for chunk in chunks) == text
+
+    def test_non_ascii_spans(self, encoding):
+        chunker = TokenChunker(chunk_size=40, chunk_overlap=8, encoding=encoding)
+        text = "Karibu sana, café ouvert à 8h. Bei ni KSh 500 — asante! " * 10
+
+        chunks = chunker.chunk(text)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk['token_count'] <= 40
+            assert text[chunk['start_char']:chunk['end_char']] == chunk['content']
+
+    def test_empty_text(self, encoding):
+        chunker = TokenChunker(chunk_size=10, encoding=encoding)
+
+        assert chunker.chunk('') == []
+        assert chunker.chunk('  \n\n ') == []
+
+    def test_invalid_overlap(self, encoding):
+        with pytest.raises(ValueError):
+            TokenChunker(chunk_size=10, chunk_overlap=10, encoding=encoding)
+
+
+class TestChunkingServiceEngine:
+    """ChunkingService delegates to the shared engine."""
+
+    def test_chunk_text_includes_spans(self, encoding, document):
+        service = ChunkingService(chunk_size=120, chunk_overlap=20, encoding=encoding)
+
+        chunks = service.chunk_text(document, metadata={'page_number': 3})
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert document[chunk['start_char']:chunk['end_char']] == chunk['content']
+            assert chunk['metadata']['page_number'] == 3
+            assert chunk['metadata']['total_chunks'] == len(chunks)
@@ -170,8 +170,10 @@ class ToolRegistry:
     
     @classmethod
     def register(cls, name: str, tool: BaseTool):
-        """Register a tool with the given name."""
-        cls._tools[name] = tool
+        """Register a tool with the given name (profiled when BOT_NODE_PROFILING is on)."""
+        from apps.bot.services.monitoring.node_metrics import instrument_tool
+        
+        cls._tools[name] = instrument_tool(name, tool)
     
     @classmethod
     def get_tool(cls, name: str) -> Optional[BaseTool]:
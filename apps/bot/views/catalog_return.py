@@ -4,30 +4,37 @@ Catalog return webhook handler for deep-linking from web catalog.
 Handles when customers return from the web catalog with a selected product
 and need to resume their WhatsApp conversation.
 """
+import json
 import logging
-from typing import Dict, Any
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
-from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from django.http import HttpResponse
-from apps.bot.conversation_state import ConversationState, ConversationStateManager
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from apps.bot.conversation_state import ConversationState
 from apps.bot.models import ConversationSession
 from apps.bot.langgraph.sales_journey import SalesJourneySubgraph
+from apps.bot.services.conversation_state_store import ConversationStateStore
 from apps.tenants.models import Tenant
 
 logger = logging.getLogger(__name__)
 
 
-class CatalogReturnWebhookView(APIView):
+@method_decorator(csrf_exempt, name='dispatch')
+class CatalogReturnWebhookView(View):
     """
     Webhook endpoint for handling catalog returns with product selection.
     
     This endpoint is called when a customer selects a product from the web catalog
     and needs to return to their WhatsApp conversation with the selection.
-    """
     
-    permission_classes = [AllowAny]  # Public webhook endpoint
+    An async Django view (DRF's APIView cannot await handlers), so the
+    sales journey and the WhatsApp reply are awaited on the event loop
+    under ASGI.
+    """
     
     async def post(self, request):
         """
@@ -41,16 +48,23 @@ class CatalogReturnWebhookView(APIView):
             "return_message": "optional message from catalog"
         }
         """
+        try:
+            payload = json.loads(request.body) if request.body else {}
+        except json.JSONDecodeError:
+            payload = None
+        if not isinstance(payload, dict):
+            return JsonResponse({"error": "Invalid JSON payload"}, status=status.HTTP_400_BAD_REQUEST)
+        
         try:
             # Extract payload
-            tenant_id = request.data.get('tenant_id')
-            conversation_id = request.data.get('conversation_id')
-            selected_product_id = request.data.get('selected_product_id')
-            return_message = request.data.get('return_message')
+            tenant_id = payload.get('tenant_id')
+            conversation_id = payload.get('conversation_id')
+            selected_product_id = payload.get('selected_product_id')
+            return_message = payload.get('return_message')
             
             # Validate required fields
             if not all([tenant_id, conversation_id, selected_product_id]):
-                return Response(
+                return JsonResponse(
                     {"error": "Missing required fields: tenant_id, conversation_id, selected_product_id"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
@@ -59,26 +73,31 @@ class CatalogReturnWebhookView(APIView):
             try:
                 tenant = await Tenant.objects.aget(id=tenant_id)
             except Tenant.DoesNotExist:
-                return Response(
+                return JsonResponse(
                     {"error": "Invalid tenant_id"},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
             # Get conversation session
             try:
-                session = await ConversationSession.objects.aget(
+                session = await ConversationSession.objects.select_related(
+                    'conversation__tenant', 'conversation__customer'
+                ).aget(
                     tenant_id=tenant_id,
                     conversation_id=conversation_id,
                     is_active=True
                 )
             except ConversationSession.DoesNotExist:
-                return Response(
+                return JsonResponse(
                     {"error": "Conversation session not found or inactive"},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Deserialize conversation state
-            conv_state = ConversationStateManager.deserialize_from_storage(session.state_data)
+            # Load conversation state (hot cache first, then the session row)
+            loaded = await sync_to_async(ConversationStateStore.load)(
+                session.conversation, session.last_request_id
+            )
+            conv_state = loaded.state
             
             # Handle catalog return using sales journey
             sales_journey = SalesJourneySubgraph()
@@ -88,9 +107,8 @@ class CatalogReturnWebhookView(APIView):
                 return_message=return_message
             )
             
-            # Update session with new state
-            session.state_data = ConversationStateManager.serialize_for_storage(updated_state)
-            await session.asave()
+            # Persist only the fields the catalog return changed
+            await sync_to_async(ConversationStateStore.save)(loaded, updated_state)
             
             # Send response back to customer via WhatsApp
             await self._send_whatsapp_response(updated_state, tenant)
@@ -105,7 +123,7 @@ class CatalogReturnWebhookView(APIView):
                 }
             )
             
-            return Response(
+            return JsonResponse(
                 {
                     "success": True,
                     "message": "Catalog return processed successfully",
@@ -119,14 +137,14 @@ class CatalogReturnWebhookView(APIView):
             logger.error(
                 f"Catalog return webhook failed: {e}",
                 extra={
-                    "tenant_id": request.data.get('tenant_id'),
-                    "conversation_id": request.data.get('conversation_id'),
-                    "selected_product_id": request.data.get('selected_product_id')
+                    "tenant_id": payload.get('tenant_id'),
+                    "conversation_id": payload.get('conversation_id'),
+                    "selected_product_id": payload.get('selected_product_id')
                 },
                 exc_info=True
             )
             
-            return Response(
+            return JsonResponse(
                 {"error": "Internal server error processing catalog return"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
@@ -161,14 +179,14 @@ class CatalogReturnWebhookView(APIView):
                 logger.error(f"No phone number available for catalog return response")
                 return
             
-            # Create Twilio service
-            twilio_service = create_twilio_service_for_tenant(tenant)
+            # Create Twilio service (cached per process; may read tenant settings)
+            twilio_service = await sync_to_async(create_twilio_service_for_tenant)(tenant)
             
             # Send response message
             if state.response_text:
-                await twilio_service.send_message(
-                    to_number=state.phone_e164,
-                    message=state.response_text
+                await twilio_service.asend_whatsapp(
+                    to=state.phone_e164,
+                    body=state.response_text
                 )
                 
                 logger.info(
@@ -533,6 +533,9 @@ class PerformanceMetricsView(APIView):
             # Get performance summary
             performance_summary = metrics_collector.get_performance_summary()
             
+            # Percentiles merged across all workers (last 15 minutes)
+            fleet_performance = metrics_collector.get_fleet_performance_summary()
+            
             # Get system health metrics
             system_health = observability_service.get_system_health_summary()
             
@@ -540,6 +543,7 @@ class PerformanceMetricsView(APIView):
                 'timestamp': datetime.now(timezone.utc).isoformat(),
                 'tenant_id': str(request.tenant.id),
                 'performance_summary': performance_summary,
+                'fleet_performance': fleet_performance,
                 'system_health': system_health,
                 'recommendations': self._generate_performance_recommendations(performance_summary)
             }
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='products_tenant__3eefd6_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant', 'created_at', 'id'], name='products_tenant__4b00e2_idx'),
+        ),
+    ]
@@ -183,7 +183,7 @@ class Product(BaseModel):
             models.Index(fields=['tenant', 'is_active']),
             models.Index(fields=['tenant', 'title']),
             models.Index(fields=['tenant', 'external_source', 'external_id']),
-            models.Index(fields=['tenant', 'created_at']),
+            models.Index(fields=['tenant', 'created_at', 'id']),
             GinIndex(fields=['search_vector'], name='product_search_idx'),
         ]
     
@@ -28,7 +28,7 @@ class CatalogService:
             tenant: Tenant instance
             query: Search query string (searches title and description)
             filters: Dict of filters (e.g., {'is_active': True, 'min_price': 10})
-            limit: Maximum number of results
+            limit: Maximum number of results, or None for an unsliced queryset
             
         Returns:
             QuerySet: Filtered and ordered products
@@ -81,6 +81,8 @@ class CatalogService:
                 products = products.filter(Q(stock__isnull=True) | Q(stock__gt=0))
         
         # Limit results
+        if limit is None:
+            return products
         return products[:limit]
     
     @staticmethod
@@ -5,6 +5,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 import logging
@@ -18,6 +19,7 @@ from apps.catalog.serializers import (
     ProductVariantCreateSerializer
 )
 from apps.core.exceptions import FeatureLimitExceeded, SubscriptionInactive
+from apps.core.pagination import KeysetPagination
 from apps.core.permissions import HasTenantScopes, requires_scopes
 from apps.rbac.models import AuditLog
 
@@ -101,6 +103,26 @@ class ProductListView(APIView):
                 location=OpenApiParameter.QUERY,
                 description='Number of items per page (max 100)'
             ),
+            OpenApiParameter(
+                name='pagination',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Pagination mode: page (default) or cursor; searches always use page mode',
+                enum=['page', 'cursor']
+            ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Cursor from next_cursor (cursor mode)'
+            ),
+            OpenApiParameter(
+                name='count',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Include total count in cursor mode',
+                enum=['exact', 'approx']
+            ),
         ],
         responses={
             200: ProductListSerializer(many=True),
@@ -145,6 +167,19 @@ class ProductListView(APIView):
             if 'in_stock' in params:
                 filters['in_stock'] = params['in_stock']
             
+            # Cursor pagination (newest products first); ranked searches
+            # are ordered by relevance and stay on page numbers
+            if not params.get('query') and KeysetPagination.requested(request):
+                products = CatalogService.search_products(
+                    tenant=tenant,
+                    filters=filters,
+                    limit=None
+                )
+                paginator = KeysetPagination(ordering=('-created_at', '-id'))
+                page = paginator.paginate_queryset(products, request)
+                serializer = ProductListSerializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data)
+            
             # Search products
             products = CatalogService.search_products(
                 tenant=tenant,
@@ -163,6 +198,9 @@ class ProductListView(APIView):
             
             return paginator.get_paginated_response(serializer.data)
         
+        except NotFound:
+            # Invalid cursor
+            raise
         except Exception as e:
             logger.error(f"Error listing products: {str(e)}", exc_info=True)
             return Response(
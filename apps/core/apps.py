@@ -16,8 +16,14 @@ class CoreConfig(AppConfig):
         Perform startup validation checks when Django initializes.
         
         This ensures critical security configurations are properly set
-        before the application starts accepting requests.
+        before the application starts accepting requests. With
+        LOG_QUEUE_HANDLERS enabled, log handlers are first moved onto
+        background threads.
         """
+        if getattr(settings, 'LOG_QUEUE_HANDLERS', False):
+            from apps.core.logging import install_queue_handlers
+            install_queue_handlers()
+        
         # Only run validation once (not in every worker/thread)
         import sys
         if 'runserver' not in sys.argv and 'gunicorn' not in sys.argv[0]:
@@ -9,6 +9,8 @@ from functools import wraps
 from django.core.cache import cache
 from django.conf import settings
 
+from apps.core.profiling import record_cache_lookup
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,6 +21,10 @@ class CacheKeys:
     TENANT_CONFIG = "tenant:config:{tenant_id}"
     TENANT_SETTINGS = "tenant:settings:{tenant_id}"
     TENANT_SUBSCRIPTION = "tenant:subscription:{tenant_id}"
+    TENANT_RATE_LIMITS = "tenant:rate_limits:{tenant_id}"
+    
+    # API key validation (TTL: 1 minute)
+    API_KEY = "tenant:api_key:{key_hash}"
     
     # Product catalog (TTL: 15 minutes)
     PRODUCT_DETAIL = "product:detail:{tenant_id}:{product_id}"
@@ -33,6 +39,7 @@ class CacheKeys:
     # Customer preferences (TTL: 5 minutes)
     CUSTOMER_PREFERENCES = "customer:preferences:{tenant_id}:{customer_id}"
     CUSTOMER_CONSENT = "customer:consent:{tenant_id}:{customer_id}"
+    CONSENT_OVERRIDES = "consent:overrides:{tenant_id}:{consent_field}"
     
     # Availability windows (TTL: 1 hour)
     AVAILABILITY_WINDOWS = "availability:windows:{tenant_id}:{service_id}"
@@ -41,6 +48,9 @@ class CacheKeys:
     # RBAC scopes (TTL: 5 minutes)
     USER_SCOPES = "rbac:scopes:{tenant_id}:{user_id}"
     
+    # M-Pesa OAuth tokens per credential set (TTL: token lifetime)
+    MPESA_TOKEN = "mpesa:token:{credential_id}"
+    
     @classmethod
     def format(cls, key_template: str, **kwargs) -> str:
         """Format a cache key with provided parameters."""
@@ -51,10 +61,12 @@ class CacheTTL:
     """Cache TTL (Time To Live) constants in seconds."""
     
     TENANT_CONFIG = 3600  # 1 hour
+    API_KEY = 60  # 1 minute
     CATALOG = 900  # 15 minutes
     CUSTOMER_PREFERENCES = 300  # 5 minutes
     AVAILABILITY = 3600  # 1 hour
     RBAC_SCOPES = 300  # 5 minutes
+    RATE_LIMITS = 300  # 5 minutes
 
 
 class CacheService:
@@ -78,6 +90,7 @@ class CacheService:
                 logger.debug(f"Cache HIT: {key}")
             else:
                 logger.debug(f"Cache MISS: {key}")
+            record_cache_lookup(value is not None)
             return value
         except Exception as e:
             logger.error(f"Cache get error for key {key}: {str(e)}")
@@ -220,6 +233,7 @@ class TenantCacheInvalidator:
         CacheService.delete(CacheKeys.format(CacheKeys.TENANT_CONFIG, tenant_id=tenant_id))
         CacheService.delete(CacheKeys.format(CacheKeys.TENANT_SETTINGS, tenant_id=tenant_id))
         CacheService.delete(CacheKeys.format(CacheKeys.TENANT_SUBSCRIPTION, tenant_id=tenant_id))
+        CacheService.delete(CacheKeys.format(CacheKeys.TENANT_RATE_LIMITS, tenant_id=tenant_id))
         logger.info(f"Invalidated tenant config cache for tenant {tenant_id}")
     
     @staticmethod
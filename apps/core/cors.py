@@ -7,12 +7,13 @@ only authorized domains can make cross-origin requests.
 import logging
 import re
 from django.http import JsonResponse
-from django.utils.deprecation import MiddlewareMixin
+
+from apps.core.middleware.async_support import AsyncMiddlewareMixin
 
 logger = logging.getLogger(__name__)
 
 
-class TenantCORSMiddleware(MiddlewareMixin):
+class TenantCORSMiddleware(AsyncMiddlewareMixin):
     """
     Validate CORS requests against tenant-specific allowed origins.
     
@@ -21,12 +22,16 @@ class TenantCORSMiddleware(MiddlewareMixin):
     2. Supports wildcard patterns for development
     3. Applies strict mode for production
     4. Returns 403 for unauthorized origins
+    
+    Both hooks only read the already-resolved tenant, so under ASGI they
+    run on the event loop.
     """
     
     # Paths that bypass CORS validation
     BYPASS_PATHS = [
         '/v1/webhooks/',  # Webhooks don't use CORS
         '/v1/health',     # Health check is public
+        '/metrics',       # Scraped server-side, never from browsers
         '/admin/',        # Admin uses Django's CSRF
     ]
     
@@ -11,6 +11,147 @@ Automatically redacts sensitive information from logs including:
 """
 import re
 import logging
+from functools import lru_cache
+
+
+# Redaction rules: (pattern, replacement, triggers). Every match of a
+# pattern contains one of its trigger literals (matched with the pattern's
+# own case sensitivity), so when no trigger occurs in the text the
+# triggered rules can be skipped without changing the output. None means
+# always run.
+REDACTION_RULES = [
+    # API Keys (various formats)
+    (re.compile(r'api[_-]?key["\s:=]+([a-zA-Z0-9_\-]{20,})', re.IGNORECASE), r'api_key=[REDACTED]', ('api',)),
+    (re.compile(r'apikey["\s:=]+([a-zA-Z0-9_\-]{20,})', re.IGNORECASE), r'apikey=[REDACTED]', ('apikey',)),
+    (re.compile(r'key["\s:=]+([a-zA-Z0-9_\-]{32,})', re.IGNORECASE), r'key=[REDACTED]', ('key',)),
+    
+    # Bearer tokens
+    (re.compile(r'Bearer\s+([a-zA-Z0-9_\-\.]{20,})', re.IGNORECASE), r'Bearer [REDACTED]', ('bearer',)),
+    (re.compile(r'bearer["\s:=]+([a-zA-Z0-9_\-\.]{20,})', re.IGNORECASE), r'bearer=[REDACTED]', ('bearer',)),
+    
+    # JWT tokens (header.payload.signature format)
+    (re.compile(r'eyJ[a-zA-Z0-9_\-]+\.eyJ[a-zA-Z0-9_\-]+\.[a-zA-Z0-9_\-]+'), r'[REDACTED_JWT]', ('eyJ',)),
+    
+    # OAuth tokens
+    (re.compile(r'access[_-]?token["\s:=]+([a-zA-Z0-9_\-\.]{20,})', re.IGNORECASE), r'access_token=[REDACTED]', ('access',)),
+    (re.compile(r'refresh[_-]?token["\s:=]+([a-zA-Z0-9_\-\.]{20,})', re.IGNORECASE), r'refresh_token=[REDACTED]', ('refresh',)),
+    (re.compile(r'oauth[_-]?token["\s:=]+([a-zA-Z0-9_\-\.]{20,})', re.IGNORECASE), r'oauth_token=[REDACTED]', ('oauth',)),
+    
+    # Passwords
+    (re.compile(r'password["\s:=]+([^\s,\]}"\']+)', re.IGNORECASE), r'password=[REDACTED]', ('password',)),
+    (re.compile(r'passwd["\s:=]+([^\s,\]}"\']+)', re.IGNORECASE), r'passwd=[REDACTED]', ('passwd',)),
+    (re.compile(r'pwd["\s:=]+([^\s,\]}"\']+)', re.IGNORECASE), r'pwd=[REDACTED]', ('pwd',)),
+    
+    # Secrets
+    (re.compile(r'secret["\s:=]+([a-zA-Z0-9_\-]{20,})', re.IGNORECASE), r'secret=[REDACTED]', ('secret',)),
+    (re.compile(r'client[_-]?secret["\s:=]+([a-zA-Z0-9_\-]{20,})', re.IGNORECASE), r'client_secret=[REDACTED]', ('secret',)),
+    
+    # Twilio credentials
+    (re.compile(r'AC[a-z0-9]{32}'), r'[REDACTED_TWILIO_SID]', ('AC',)),
+    (re.compile(r'SK[a-z0-9]{32}'), r'[REDACTED_TWILIO_KEY]', ('SK',)),
+    (re.compile(r'twilio[_-]?sid["\s:=]+([a-zA-Z0-9]{34})', re.IGNORECASE), r'twilio_sid=[REDACTED]', ('twilio',)),
+    (re.compile(r'twilio[_-]?token["\s:=]+([a-zA-Z0-9]{32})', re.IGNORECASE), r'twilio_token=[REDACTED]', ('twilio',)),
+    (re.compile(r'twilio[_-]?auth["\s:=]+([a-zA-Z0-9]{32})', re.IGNORECASE), r'twilio_auth=[REDACTED]', ('twilio',)),
+    
+    # Stripe keys
+    (re.compile(r'sk_live_[a-zA-Z0-9]{24,}'), r'[REDACTED_STRIPE_SECRET]', ('sk_live_',)),
+    (re.compile(r'sk_test_[a-zA-Z0-9]{24,}'), r'[REDACTED_STRIPE_TEST]', ('sk_test_',)),
+    (re.compile(r'pk_live_[a-zA-Z0-9]{24,}'), r'[REDACTED_STRIPE_PUBLIC]', ('pk_live_',)),
+    
+    # AWS credentials
+    (re.compile(r'AKIA[0-9A-Z]{16}'), r'[REDACTED_AWS_KEY]', ('AKIA',)),
+    (re.compile(r'aws[_-]?secret["\s:=]+([a-zA-Z0-9/+=]{40})', re.IGNORECASE), r'aws_secret=[REDACTED]', ('aws',)),
+    
+    # Database URLs with passwords
+    (re.compile(r'://([^:]+):([^@]+)@'), r'://\1:[REDACTED]@', ('://',)),
+    
+    # Credit card numbers (basic pattern)
+    (re.compile(r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b'), r'[REDACTED_CARD]', None),
+    
+    # Phone numbers (E.164 format)
+    (re.compile(r'\+\d{1,3}\d{6,14}'), r'[REDACTED_PHONE]', ('+',)),
+    
+    # Generic tokens
+    (re.compile(r'token["\s:=]+([a-zA-Z0-9_\-\.]{32,})', re.IGNORECASE), r'token=[REDACTED]', ('token',)),
+    
+    # Authorization headers
+    (re.compile(r'Authorization["\s:]+([^\s,\]}"\']+)', re.IGNORECASE), r'Authorization: [REDACTED]', ('authorization',)),
+    
+    # X-API-Key headers
+    (re.compile(r'X-API-Key["\s:]+([^\s,\]}"\']+)', re.IGNORECASE), r'X-API-Key: [REDACTED]', ('x-api-key',)),
+]
+
+# Strings up to this length are memoised; repeated message templates and
+# structured extra values (tenant slugs, node names, intents) hit the cache
+REDACTION_CACHE_MAX_LENGTH = 512
+REDACTION_CACHE_SIZE = 4096
+
+
+def _trigger_pattern(rules, ignore_case):
+    """Compile one plain alternation of the trigger literals of matching rules."""
+    literals = sorted({
+        trigger.lower() if ignore_case else trigger
+        for pattern, _, triggers in rules
+        if triggers and bool(pattern.flags & re.IGNORECASE) == ignore_case
+        for trigger in triggers
+    })
+    return re.compile('|'.join(re.escape(literal) for literal in literals))
+
+
+# Triggers of IGNORECASE rules are searched in lower-cased text, since a
+# plain alternation is far cheaper than a case-insensitive one. These are
+# the only non-ASCII characters re.IGNORECASE equates with ASCII letters
+# that lower() does not map to them (the Kelvin sign already does).
+_TRIGGER_FOLD = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's'})
+_CASED_TRIGGERS = _trigger_pattern(REDACTION_RULES, ignore_case=False)
+_UNCASED_TRIGGERS = _trigger_pattern(REDACTION_RULES, ignore_case=True)
+
+
+def _has_trigger(text):
+    """Return True if any rule's trigger literal occurs in text."""
+    if _CASED_TRIGGERS.search(text):
+        return True
+    folded = text.lower() if text.isascii() else text.translate(_TRIGGER_FOLD).lower()
+    return _UNCASED_TRIGGERS.search(folded) is not None
+
+
+def _apply_rules(text):
+    """Apply REDACTION_RULES in order, skipping triggered rules when no trigger occurs."""
+    triggered = _has_trigger(text)
+    for pattern, replacement, triggers in REDACTION_RULES:
+        if triggers is not None and not triggered:
+            continue
+        redacted = pattern.sub(replacement, text)
+        if redacted != text:
+            text = redacted
+            triggered = triggered or _has_trigger(text)
+    return text
+
+
+_apply_rules_cached = lru_cache(maxsize=REDACTION_CACHE_SIZE)(_apply_rules)
+
+
+def redact(text):
+    """
+    Redact sensitive values from a string.
+    
+    Produces the same output as applying SanitizingFormatter.PATTERNS
+    one after another, but one scan for trigger literals decides whether
+    the keyword-based patterns need to run at all, so most log lines only
+    pay for that scan and the untriggered patterns. Short strings are
+    memoised.
+    
+    Args:
+        text: String to redact
+        
+    Returns:
+        Redacted string (non-strings are returned unchanged)
+    """
+    if not isinstance(text, str) or not text:
+        return text
+    if len(text) <= REDACTION_CACHE_MAX_LENGTH:
+        return _apply_rules_cached(text)
+    return _apply_rules(text)
 
 
 class SanitizingFormatter(logging.Formatter):
@@ -30,67 +171,7 @@ class SanitizingFormatter(logging.Formatter):
     """
     
     # Regex patterns for sensitive data
-    PATTERNS = [
-        # API Keys (various formats)
-        (re.compile(r'api[_-]?key["\s:=]+([a-zA-Z0-9_\-]{20,})', re.IGNORECASE), r'api_key=[REDACTED]'),
-        (re.compile(r'apikey["\s:=]+([a-zA-Z0-9_\-]{20,})', re.IGNORECASE), r'apikey=[REDACTED]'),
-        (re.compile(r'key["\s:=]+([a-zA-Z0-9_\-]{32,})', re.IGNORECASE), r'key=[REDACTED]'),
-        
-        # Bearer tokens
-        (re.compile(r'Bearer\s+([a-zA-Z0-9_\-\.]{20,})', re.IGNORECASE), r'Bearer [REDACTED]'),
-        (re.compile(r'bearer["\s:=]+([a-zA-Z0-9_\-\.]{20,})', re.IGNORECASE), r'bearer=[REDACTED]'),
-        
-        # JWT tokens (header.payload.signature format)
-        (re.compile(r'eyJ[a-zA-Z0-9_\-]+\.eyJ[a-zA-Z0-9_\-]+\.[a-zA-Z0-9_\-]+'), r'[REDACTED_JWT]'),
-        
-        # OAuth tokens
-        (re.compile(r'access[_-]?token["\s:=]+([a-zA-Z0-9_\-\.]{20,})', re.IGNORECASE), r'access_token=[REDACTED]'),
-        (re.compile(r'refresh[_-]?token["\s:=]+([a-zA-Z0-9_\-\.]{20,})', re.IGNORECASE), r'refresh_token=[REDACTED]'),
-        (re.compile(r'oauth[_-]?token["\s:=]+([a-zA-Z0-9_\-\.]{20,})', re.IGNORECASE), r'oauth_token=[REDACTED]'),
-        
-        # Passwords
-        (re.compile(r'password["\s:=]+([^\s,\]}"\']+)', re.IGNORECASE), r'password=[REDACTED]'),
-        (re.compile(r'passwd["\s:=]+([^\s,\]}"\']+)', re.IGNORECASE), r'passwd=[REDACTED]'),
-        (re.compile(r'pwd["\s:=]+([^\s,\]}"\']+)', re.IGNORECASE), r'pwd=[REDACTED]'),
-        
-        # Secrets
-        (re.compile(r'secret["\s:=]+([a-zA-Z0-9_\-]{20,})', re.IGNORECASE), r'secret=[REDACTED]'),
-        (re.compile(r'client[_-]?secret["\s:=]+([a-zA-Z0-9_\-]{20,})', re.IGNORECASE), r'client_secret=[REDACTED]'),
-        
-        # Twilio credentials
-        (re.compile(r'AC[a-z0-9]{32}'), r'[REDACTED_TWILIO_SID]'),
-        (re.compile(r'SK[a-z0-9]{32}'), r'[REDACTED_TWILIO_KEY]'),
-        (re.compile(r'twilio[_-]?sid["\s:=]+([a-zA-Z0-9]{34})', re.IGNORECASE), r'twilio_sid=[REDACTED]'),
-        (re.compile(r'twilio[_-]?token["\s:=]+([a-zA-Z0-9]{32})', re.IGNORECASE), r'twilio_token=[REDACTED]'),
-        (re.compile(r'twilio[_-]?auth["\s:=]+([a-zA-Z0-9]{32})', re.IGNORECASE), r'twilio_auth=[REDACTED]'),
-        
-        # Stripe keys
-        (re.compile(r'sk_live_[a-zA-Z0-9]{24,}'), r'[REDACTED_STRIPE_SECRET]'),
-        (re.compile(r'sk_test_[a-zA-Z0-9]{24,}'), r'[REDACTED_STRIPE_TEST]'),
-        (re.compile(r'pk_live_[a-zA-Z0-9]{24,}'), r'[REDACTED_STRIPE_PUBLIC]'),
-        
-        # AWS credentials
-        (re.compile(r'AKIA[0-9A-Z]{16}'), r'[REDACTED_AWS_KEY]'),
-        (re.compile(r'aws[_-]?secret["\s:=]+([a-zA-Z0-9/+=]{40})', re.IGNORECASE), r'aws_secret=[REDACTED]'),
-        
-        # Database URLs with passwords
-        (re.compile(r'://([^:]+):([^@]+)@'), r'://\1:[REDACTED]@'),
-        
-        # Credit card numbers (basic pattern)
-        (re.compile(r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b'), r'[REDACTED_CARD]'),
-        
-        # Phone numbers (E.164 format)
-        (re.compile(r'\+\d{1,3}\d{6,14}'), r'[REDACTED_PHONE]'),
-        
-        # Generic tokens
-        (re.compile(r'token["\s:=]+([a-zA-Z0-9_\-\.]{32,})', re.IGNORECASE), r'token=[REDACTED]'),
-        
-        # Authorization headers
-        (re.compile(r'Authorization["\s:]+([^\s,\]}"\']+)', re.IGNORECASE), r'Authorization: [REDACTED]'),
-        
-        # X-API-Key headers
-        (re.compile(r'X-API-Key["\s:]+([^\s,\]}"\']+)', re.IGNORECASE), r'X-API-Key: [REDACTED]'),
-    ]
+    PATTERNS = [(pattern, replacement) for pattern, replacement, _ in REDACTION_RULES]
     
     def format(self, record):
         """
@@ -102,15 +183,8 @@ class SanitizingFormatter(logging.Formatter):
         Returns:
             Sanitized log message
         """
-        # Format the message first
-        original_message = super().format(record)
-        
-        # Apply all sanitization patterns
-        sanitized_message = original_message
-        for pattern, replacement in self.PATTERNS:
-            sanitized_message = pattern.sub(replacement, sanitized_message)
-        
-        return sanitized_message
+        # Format the message first, then redact it
+        return redact(super().format(record))
 
 
 class SanitizingFilter(logging.Filter):
@@ -133,21 +207,11 @@ class SanitizingFilter(logging.Filter):
         """
         # Sanitize the message
         if hasattr(record, 'msg') and isinstance(record.msg, str):
-            for pattern, replacement in SanitizingFormatter.PATTERNS:
-                record.msg = pattern.sub(replacement, record.msg)
+            record.msg = redact(record.msg)
         
         # Sanitize args if present
-        if hasattr(record, 'args') and record.args:
-            sanitized_args = []
-            for arg in record.args:
-                if isinstance(arg, str):
-                    sanitized_arg = arg
-                    for pattern, replacement in SanitizingFormatter.PATTERNS:
-                        sanitized_arg = pattern.sub(replacement, sanitized_arg)
-                    sanitized_args.append(sanitized_arg)
-                else:
-                    sanitized_args.append(arg)
-            record.args = tuple(sanitized_args)
+        if hasattr(record, 'args') and record.args and isinstance(record.args, tuple):
+            record.args = tuple(redact(arg) for arg in record.args)
         
         return True
 
@@ -252,10 +316,7 @@ def sanitize_for_logging(obj):
     if isinstance(obj, dict):
         return sanitize_dict_for_logging(obj)
     elif isinstance(obj, str):
-        sanitized = obj
-        for pattern, replacement in SanitizingFormatter.PATTERNS:
-            sanitized = pattern.sub(replacement, sanitized)
-        return sanitized
+        return redact(obj)
     elif isinstance(obj, list):
         return [sanitize_for_logging(item) for item in obj]
     else:
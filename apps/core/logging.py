@@ -1,11 +1,18 @@
 """
 Custom logging formatters for structured JSON logging.
 """
+import atexit
+import copy
 import json
 import logging
+import logging.handlers
+import os
+import queue
 import re
+import threading
 import traceback
 from datetime import datetime
+from functools import lru_cache
 from django.utils import timezone
 import sentry_sdk
 
@@ -71,15 +78,41 @@ class PIIMasker:
             return text
         return cls.CREDIT_CARD_PATTERN.sub(lambda m: '*' * (len(m.group(0)) - 4) + m.group(0)[-4:], text)
     
+    # Cheap prefilters: phone and card patterns need a run of four digits,
+    # emails need "@", and key/token patterns need one of these words
+    DIGIT_RUN_PATTERN = re.compile(r'\d{4}')
+    API_KEY_TRIGGERS = ('key', 'token', 'secret', 'password', 'auth')
+    
+    # Strings up to this length are memoised by mask_text
+    CACHE_MAX_LENGTH = 512
+    
     @classmethod
     def mask_text(cls, text):
         """Apply all masking patterns to text."""
-        if not isinstance(text, str):
+        if not isinstance(text, str) or not text:
             return text
-        text = cls.mask_phone(text)
-        text = cls.mask_email(text)
-        text = cls.mask_api_keys(text)
-        text = cls.mask_credit_cards(text)
+        if len(text) <= cls.CACHE_MAX_LENGTH:
+            return _mask_text_cached(text)
+        return cls._mask_text(text)
+    
+    @classmethod
+    def _mask_text(cls, text):
+        """
+        Apply the masking patterns that can match.
+        
+        Same result as running mask_phone, mask_email, mask_api_keys and
+        mask_credit_cards in order; patterns whose prefilter fails are
+        skipped, so most structured values never reach a regex.
+        """
+        if cls.DIGIT_RUN_PATTERN.search(text):
+            text = cls.mask_phone(text)
+        if '@' in text:
+            text = cls.mask_email(text)
+        folded = text.lower() if text.isascii() else text.translate(_TRIGGER_FOLD).casefold()
+        if any(trigger in folded for trigger in cls.API_KEY_TRIGGERS):
+            text = cls.mask_api_keys(text)
+        if cls.DIGIT_RUN_PATTERN.search(text):
+            text = cls.mask_credit_cards(text)
         return text
     
     @classmethod
@@ -108,6 +141,25 @@ class PIIMasker:
         return masked
 
 
+# re.IGNORECASE matches the Turkish dotted/dotless i to ASCII "i"
+_TRIGGER_FOLD = str.maketrans({'\u0130': 'i', '\u0131': 'i'})
+
+
+@lru_cache(maxsize=4096)
+def _mask_text_cached(text):
+    return PIIMasker._mask_text(text)
+
+
+# LogRecord attributes that are not copied into JSON output as extras
+RESERVED_RECORD_ATTRS = frozenset({
+    'name', 'msg', 'args', 'created', 'filename', 'funcName',
+    'levelname', 'lineno', 'module', 'msecs', 'message',
+    'pathname', 'process', 'processName', 'relativeCreated',
+    'thread', 'threadName', 'exc_info', 'exc_text', 'stack_info',
+    'request_id', 'tenant_id', 'task_id', 'task_name',
+})
+
+
 class JSONFormatter(logging.Formatter):
     """
     Format log records as JSON for structured logging.
@@ -152,11 +204,7 @@ class JSONFormatter(logging.Formatter):
         
         # Add any extra fields
         for key, value in record.__dict__.items():
-            if key not in ['name', 'msg', 'args', 'created', 'filename', 'funcName',
-                          'levelname', 'lineno', 'module', 'msecs', 'message',
-                          'pathname', 'process', 'processName', 'relativeCreated',
-                          'thread', 'threadName', 'exc_info', 'exc_text', 'stack_info',
-                          'request_id', 'tenant_id', 'task_id', 'task_name']:
+            if key not in RESERVED_RECORD_ATTRS:
                 if not key.startswith('_'):
                     try:
                         # Mask sensitive data in extra fields
@@ -175,6 +223,105 @@ class JSONFormatter(logging.Formatter):
         return json.dumps(log_data)
 
 
+class QueueingHandler(logging.handlers.QueueHandler):
+    """
+    Hand log records to a background thread that runs the real handlers.
+    
+    The calling thread only merges the message arguments and enqueues the
+    record; formatting, redaction and stream/file I/O happen on a
+    QueueListener thread. The listener starts lazily and is restarted
+    after fork, so pre-forking servers and Celery workers each get their
+    own thread.
+    """
+    
+    def __init__(self, targets):
+        super().__init__(queue.SimpleQueue())
+        self.targets = list(targets)
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+    
+    def prepare(self, record):
+        """
+        Snapshot the record for the listener thread.
+        
+        The message is merged here so later mutation of the arguments
+        cannot change it; exc_info is kept so formatters on the listener
+        side render tracebacks as usual.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        self.queue.put_nowait(record)
+    
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # A forked child inherits the queue but not the listener thread
+            self.queue = queue.SimpleQueue()
+            self._listener = logging.handlers.QueueListener(
+                self.queue, *self.targets, respect_handler_level=True
+            )
+            self._listener.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+    
+    def stop(self):
+        """Drain the queue and stop the listener thread."""
+        listener, self._listener = self._listener, None
+        if listener is not None and self._pid == os.getpid():
+            listener.stop()
+        self._pid = None
+    
+    def close(self):
+        self.stop()
+        super().close()
+
+
+def install_queue_handlers(logger_names=None):
+    """
+    Move handler work for configured loggers onto background threads.
+    
+    Each logger's handlers are replaced by a QueueingHandler wrapping them;
+    loggers that share the same handlers share one queue and listener.
+    Safe to call more than once.
+    
+    Args:
+        logger_names: Logger names to rewire (defaults to the root logger
+            plus the loggers in settings.LOGGING)
+    
+    Returns:
+        list: QueueingHandler instances created
+    """
+    from django.conf import settings
+    
+    if logger_names is None:
+        logger_names = [''] + list(settings.LOGGING.get('loggers', {}))
+    
+    wrappers = {}
+    for name in logger_names:
+        target_logger = logging.getLogger(name or None)
+        handlers = [
+            handler for handler in target_logger.handlers
+            if not isinstance(handler, QueueingHandler)
+        ]
+        if not handlers:
+            continue
+        key = tuple(id(handler) for handler in handlers)
+        if key not in wrappers:
+            wrappers[key] = QueueingHandler(handlers)
+        for handler in handlers:
+            target_logger.removeHandler(handler)
+        target_logger.addHandler(wrappers[key])
+    
+    return list(wrappers.values())
+
 
 class SecurityLogger:
     """
@@ -0,0 +1,193 @@
+"""
+Management command to benchmark log redaction and shipping throughput.
+
+Builds synthetic records shaped like the bot's structured node logs
+(a short message plus tenant/conversation/node extras, with a few
+carrying phone numbers or tokens) and reports records/sec for:
+
+- the text formatter (SanitizingFilter + SanitizingFormatter), running
+  every pattern in sequence versus the trigger-filtered redactor;
+- JSONFormatter with sequential PII masking versus the prefiltered,
+  memoised masker;
+- emitting to a file handler directly versus through QueueingHandler,
+  measured on the calling thread.
+"""
+import logging
+import os
+import tempfile
+import time
+import uuid
+from django.core.management.base import BaseCommand
+
+from apps.core.log_sanitizer import SanitizingFilter, SanitizingFormatter
+from apps.core.logging import JSONFormatter, PIIMasker, QueueingHandler
+
+
+def _legacy_redact(text):
+    for pattern, replacement in SanitizingFormatter.PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class _LegacySanitizingFilter(logging.Filter):
+    def filter(self, record):
+        if isinstance(record.msg, str):
+            record.msg = _legacy_redact(record.msg)
+        if record.args:
+            record.args = tuple(_legacy_redact(arg) if isinstance(arg, str) else arg for arg in record.args)
+        return True
+
+
+class _LegacySanitizingFormatter(logging.Formatter):
+    def format(self, record):
+        return _legacy_redact(super().format(record))
+
+
+def _legacy_mask_text(cls, text):
+    if not isinstance(text, str):
+        return text
+    text = cls.mask_phone(text)
+    text = cls.mask_email(text)
+    text = cls.mask_api_keys(text)
+    return cls.mask_credit_cards(text)
+
+
+class Command(BaseCommand):
+    """Benchmark log redaction and shipping command."""
+
+    help = 'Benchmark log redaction and handler throughput (records/sec)'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            '--records',
+            type=int,
+            default=5000,
+            help='Records per timed run (default: 5000)'
+        )
+
+        parser.add_argument(
+            '--sensitive-ratio',
+            type=float,
+            default=0.05,
+            help='Fraction of records carrying secrets or PII (default: 0.05)'
+        )
+
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Number of timed runs (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        """Execute command."""
+        count = options['records']
+        runs = options['runs']
+        ratio = options['sensitive_ratio']
+        text_format = '{levelname} {asctime} {module} {process:d} {thread:d} {message}'
+
+        self.stdout.write(f"{count} records per run, {ratio:.0%} carrying secrets or PII")
+
+        legacy_text = self._time_format(
+            _LegacySanitizingFilter(), _LegacySanitizingFormatter(text_format, style='{'),
+            count, ratio, runs
+        )
+        new_text = self._time_format(
+            SanitizingFilter(), SanitizingFormatter(text_format, style='{'),
+            count, ratio, runs
+        )
+        self._report('Text formatter, sequential patterns', legacy_text, count)
+        self._report('Text formatter, trigger-filtered', new_text, count)
+
+        current_mask_text = PIIMasker.__dict__['mask_text']
+        PIIMasker.mask_text = classmethod(_legacy_mask_text)
+        try:
+            legacy_json = self._time_format(None, JSONFormatter(), count, ratio, runs)
+        finally:
+            PIIMasker.mask_text = current_mask_text
+        new_json = self._time_format(None, JSONFormatter(), count, ratio, runs)
+        self._report('JSON formatter, sequential masking', legacy_json, count)
+        self._report('JSON formatter, prefiltered + cached', new_json, count)
+
+        direct, queued = self._time_handlers(count, ratio, runs, text_format)
+        self._report('File handler, caller thread (direct)', direct, count)
+        self._report('File handler, caller thread (queued)', queued, count)
+
+    def _build_records(self, count, ratio):
+        """Build bot-style records; every Nth one carries a secret or phone."""
+        sensitive_every = max(1, int(1 / ratio)) if ratio > 0 else None
+        tenant_id = str(uuid.uuid4())
+        nodes = ['intent_classifier', 'catalog_search', 'cart_update', 'response_generator']
+        records = []
+        for index in range(count):
+            conversation_id = str(uuid.uuid4())
+            node = nodes[index % len(nodes)]
+            if sensitive_every and index % sensitive_every == 0:
+                msg = 'Customer %s sent token=%s'
+                args = ('+254712345678', 'x' * 40)
+            else:
+                msg = 'Node %s completed for conversation %s'
+                args = (node, conversation_id)
+            record = logging.LogRecord(
+                name='apps.bot.langgraph', level=logging.INFO, pathname=__file__,
+                lineno=index, msg=msg, args=args, exc_info=None
+            )
+            record.tenant_id = tenant_id
+            record.conversation_id = conversation_id
+            record.node = node
+            record.intent = 'BROWSE_PRODUCTS'
+            record.duration_ms = 12.5
+            record.state = {'journey': 'sales', 'tenant_slug': 'benchmark-shop', 'cart_items': 2}
+            records.append(record)
+        return records
+
+    def _time_format(self, record_filter, formatter, count, ratio, runs):
+        """Return the best time to filter and format a batch of records."""
+        best = None
+        for _ in range(max(1, runs)):
+            records = self._build_records(count, ratio)
+            started = time.perf_counter()
+            for record in records:
+                if record_filter is not None:
+                    record_filter.filter(record)
+                formatter.format(record)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def _time_handlers(self, count, ratio, runs, text_format):
+        """Return best caller-thread times for direct and queued file handlers."""
+        best_direct = best_queued = None
+        with tempfile.TemporaryDirectory() as directory:
+            for _ in range(max(1, runs)):
+                target = logging.FileHandler(os.path.join(directory, 'direct.log'))
+                target.addFilter(SanitizingFilter())
+                target.setFormatter(SanitizingFormatter(text_format, style='{'))
+                records = self._build_records(count, ratio)
+                started = time.perf_counter()
+                for record in records:
+                    target.handle(record)
+                elapsed = time.perf_counter() - started
+                target.close()
+                best_direct = elapsed if best_direct is None else min(best_direct, elapsed)
+
+                target = logging.FileHandler(os.path.join(directory, 'queued.log'))
+                target.addFilter(SanitizingFilter())
+                target.setFormatter(SanitizingFormatter(text_format, style='{'))
+                handler = QueueingHandler([target])
+                records = self._build_records(count, ratio)
+                handler.handle(records[0])
+                started = time.perf_counter()
+                for record in records[1:]:
+                    handler.handle(record)
+                elapsed = (time.perf_counter() - started) * count / max(1, count - 1)
+                handler.close()
+                target.close()
+                best_queued = elapsed if best_queued is None else min(best_queued, elapsed)
+        return best_direct, best_queued
+
+    def _report(self, name, seconds, count):
+        """Print throughput."""
+        rate = count / seconds if seconds else float('inf')
+        self.stdout.write(f"{name}: {rate:,.0f} records/sec ({seconds * 1000:.1f} ms)")
@@ -0,0 +1,490 @@
+"""
+Process-shared metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms are declared once at import time
+(``registry.counter(...)``) and updated from any thread. Each process
+keeps its own values and periodically flushes the deltas to Redis:
+counter and histogram deltas with HINCRBYFLOAT, so gunicorn and Celery
+prefork workers add into the same series, and gauges as per-worker
+values combined when read. The /metrics view renders the fleet-wide
+values, falling back to this process's own values when Redis is
+unavailable.
+
+Label cardinality is bounded. Each metric keeps at most
+METRICS_MAX_SERIES label sets and folds the rest into one ``other``
+series. tenant_label() maps tenant IDs onto METRICS_TENANT_BUCKETS
+buckets, except tenants listed in METRICS_TRACKED_TENANTS.
+
+All updates are no-ops unless METRICS_ENABLED is set.
+"""
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis key prefix for shared series, metric metadata and worker gauges
+REDIS_KEY_PREFIX = 'tulia:metrics'
+
+# Shared series expire when no worker has written them for this long
+SERIES_TTL = 7 * 24 * 3600
+
+# Label value folded series are reported under
+OVERFLOW_LABEL = 'other'
+
+MAX_LABEL_LENGTH = 100
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _enabled() -> bool:
+    return getattr(settings, 'METRICS_ENABLED', False)
+
+
+def _redis_client():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def tenant_label(tenant_id) -> str:
+    """
+    Bounded label value for a tenant.
+
+    Tenants in METRICS_TRACKED_TENANTS keep their own ID; all others
+    share one of METRICS_TENANT_BUCKETS stable hash buckets.
+    """
+    if not tenant_id or tenant_id == 'unknown':
+        return 'unknown'
+    tenant_id = str(tenant_id)
+    if tenant_id in settings.METRICS_TRACKED_TENANTS:
+        return tenant_id
+    return f"bucket-{zlib.crc32(tenant_id.encode()) % settings.METRICS_TENANT_BUCKETS:02d}"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """One metric family; values are keyed by a tuple of label values."""
+
+    type_name = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str,
+                 labelnames: Iterable[str] = (), max_series: Optional[int] = None):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._pending: Dict[Tuple[str, ...], object] = {}
+        self._overflowed = False
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        """Label values in declaration order, folded once the series limit is hit."""
+        if len(labels) != len(self.labelnames) or set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        key = tuple(str(labels[name])[:MAX_LABEL_LENGTH] for name in self.labelnames)
+        if key in self._values:
+            return key
+        limit = self.max_series or settings.METRICS_MAX_SERIES
+        if len(self._values) >= limit:
+            if not self._overflowed:
+                self._overflowed = True
+                logger.warning(
+                    f"Metric {self.name} reached {limit} series; folding new label sets into '{OVERFLOW_LABEL}'"
+                )
+            return (OVERFLOW_LABEL,) * len(self.labelnames)
+        return key
+
+    def metadata(self) -> Dict[str, object]:
+        return {'type': self.type_name, 'help': self.documentation, 'labels': list(self.labelnames)}
+
+    def _take_pending(self) -> Dict[Tuple[str, ...], object]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def _restore_pending(self, pending: Dict[Tuple[str, ...], object]):
+        for key, delta in pending.items():
+            self._add_pending(key, delta)
+
+    def _add_pending(self, key, delta):
+        raise NotImplementedError
+
+    def _reset(self):
+        self._values.clear()
+        self._pending.clear()
+        self._overflowed = False
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        """Add a non-negative amount to the series for these labels."""
+        if not _enabled():
+            return
+        if amount < 0:
+            raise ValueError(f"{self.name} can only increase")
+        with self.registry._lock:
+            key = self._key(labels)
+            self._values[key] = self._values.get(key, 0) + amount
+            self._add_pending(key, amount)
+        self.registry._maybe_flush()
+
+    def _add_pending(self, key, delta):
+        self._pending[key] = self._pending.get(key, 0) + delta
+
+    def _fields(self, pending):
+        for key, delta in pending.items():
+            yield f"{json.dumps(key)}|value", delta
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down.
+
+    Workers report their own value; ``mode`` combines them on read
+    (``sum``, ``max`` or ``min``).
+    """
+
+    type_name = 'gauge'
+
+    def __init__(self, *args, mode: str = 'sum', **kwargs):
+        if mode not in ('sum', 'max', 'min'):
+            raise ValueError(f"Unknown gauge mode {mode!r}")
+        super().__init__(*args, **kwargs)
+        self.mode = mode
+
+    def set(self, value: float, **labels):
+        """Set this worker's value for these labels."""
+        if not _enabled():
+            return
+        with self.registry._lock:
+            self._values[self._key(labels)] = value
+        self.registry._maybe_flush()
+
+    def inc(self, amount: float = 1, **labels):
+        """Add to this worker's value for these labels."""
+        if not _enabled():
+            return
+        with self.registry._lock:
+            key = self._key(labels)
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry._maybe_flush()
+
+    def dec(self, amount: float = 1, **labels):
+        """Subtract from this worker's value for these labels."""
+        self.inc(-amount, **labels)
+
+    def metadata(self) -> Dict[str, object]:
+        return {**super().metadata(), 'mode': self.mode}
+
+    def _add_pending(self, key, delta):
+        pass
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, plus sum and count."""
+
+    type_name = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        """Record one observation."""
+        if not _enabled():
+            return
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self.registry._lock:
+            key = self._key(labels)
+            for store in (self._values, self._pending):
+                counts = store.get(key)
+                if counts is None:
+                    counts = store[key] = [0] * (len(self.buckets) + 1) + [0.0]
+                counts[index] += 1
+                counts[-1] += value
+        self.registry._maybe_flush()
+
+    def metadata(self) -> Dict[str, object]:
+        return {**super().metadata(), 'buckets': list(self.buckets)}
+
+    def _add_pending(self, key, delta):
+        counts = self._pending.get(key)
+        if counts is None:
+            self._pending[key] = list(delta)
+        else:
+            for i, value in enumerate(delta):
+                counts[i] += value
+
+    def _fields(self, pending):
+        for key, counts in pending.items():
+            prefix = json.dumps(key)
+            for i, count in enumerate(counts[:-1]):
+                if count:
+                    yield f"{prefix}|{i}", count
+            yield f"{prefix}|sum", counts[-1]
+
+
+class MetricsRegistry:
+    """
+    Metric families for this process and their shared Redis storage.
+
+    Updates take one registry lock and touch only local dicts; deltas
+    are written to Redis at most every METRICS_FLUSH_INTERVAL seconds,
+    by whichever update finds the interval elapsed, and on render.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._last_flush = time.monotonic()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = (), **kwargs) -> Counter:
+        """Declare (or fetch) a counter."""
+        return self._register(Counter(self, name, documentation, labelnames, **kwargs))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (), **kwargs) -> Gauge:
+        """Declare (or fetch) a gauge."""
+        return self._register(Gauge(self, name, documentation, labelnames, **kwargs))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), **kwargs) -> Histogram:
+        """Declare (or fetch) a histogram."""
+        return self._register(Histogram(self, name, documentation, labelnames, **kwargs))
+
+    def _after_fork(self):
+        # Values inherited from the parent are the parent's to flush
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._last_flush = time.monotonic()
+        for metric in self._metrics.values():
+            metric._reset()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self) -> bool:
+        """
+        Write pending deltas and this worker's gauges to Redis.
+
+        Deltas that fail to write are kept for the next flush.
+
+        Returns:
+            bool: True if the write succeeded (or there was nothing to write)
+        """
+        if not self._flush_lock.acquire(blocking=False):
+            return True
+        try:
+            self._last_flush = time.monotonic()
+            with self._lock:
+                metrics = list(self._metrics.values())
+                pending = {metric.name: metric._take_pending() for metric in metrics}
+                gauges = {
+                    json.dumps([metric.name, list(key)]): value
+                    for metric in metrics if isinstance(metric, Gauge)
+                    for key, value in metric._values.items()
+                }
+            try:
+                self._write(metrics, pending, gauges)
+                return True
+            except Exception as e:
+                logger.warning(f"Failed to flush metrics: {e}")
+                with self._lock:
+                    for metric in metrics:
+                        metric._restore_pending(pending[metric.name])
+                return False
+        finally:
+            self._flush_lock.release()
+
+    def _write(self, metrics: List[_Metric], pending, gauges):
+        if not any(pending.values()) and not gauges:
+            return
+        pipe = _redis_client().pipeline(transaction=False)
+        pipe.hset(f"{REDIS_KEY_PREFIX}:meta", mapping={
+            metric.name: json.dumps(metric.metadata()) for metric in metrics
+        })
+        for metric in metrics:
+            if not pending[metric.name]:
+                continue
+            key = f"{REDIS_KEY_PREFIX}:series:{metric.name}"
+            for field, delta in metric._fields(pending[metric.name]):
+                pipe.hincrbyfloat(key, field, delta)
+            pipe.expire(key, SERIES_TTL)
+        if gauges:
+            key = f"{REDIS_KEY_PREFIX}:gauges:{self.worker_id}"
+            pipe.delete(key)
+            pipe.hset(key, mapping=gauges)
+            pipe.expire(key, self._worker_ttl())
+            pipe.zadd(f"{REDIS_KEY_PREFIX}:workers", {self.worker_id: time.time()})
+        pipe.execute()
+
+    def _worker_ttl(self) -> int:
+        return max(int(settings.METRICS_FLUSH_INTERVAL * 3), 60)
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition of the fleet-wide values.
+
+        Flushes this process first. Falls back to this process's own
+        values if Redis cannot be read.
+        """
+        self.flush()
+        try:
+            families = self._read_shared()
+        except Exception as e:
+            logger.warning(f"Failed to read shared metrics, rendering local values: {e}")
+            return '# Shared metrics unavailable; values are for this process only\n' + self._render(
+                self._read_local()
+            )
+        return self._render(families)
+
+    def _read_local(self) -> Dict[str, Tuple[Dict, Dict]]:
+        families = {}
+        with self._lock:
+            for metric in self._metrics.values():
+                if isinstance(metric, Histogram):
+                    series = {key: list(counts) for key, counts in metric._values.items()}
+                else:
+                    series = dict(metric._values)
+                families[metric.name] = (metric.metadata(), series)
+        return families
+
+    def _read_shared(self) -> Dict[str, Tuple[Dict, Dict]]:
+        client = _redis_client()
+        meta = {
+            (name.decode() if isinstance(name, bytes) else name): json.loads(value)
+            for name, value in client.hgetall(f"{REDIS_KEY_PREFIX}:meta").items()
+        }
+        names = sorted(meta)
+
+        workers_key = f"{REDIS_KEY_PREFIX}:workers"
+        now = time.time()
+        pipe = client.pipeline(transaction=False)
+        pipe.zremrangebyscore(workers_key, 0, now - self._worker_ttl())
+        pipe.zrange(workers_key, 0, -1)
+        for name in names:
+            pipe.hgetall(f"{REDIS_KEY_PREFIX}:series:{name}")
+        results = pipe.execute()
+        workers, series_hashes = results[1], results[2:]
+
+        pipe = client.pipeline(transaction=False)
+        for worker in workers:
+            worker = worker.decode() if isinstance(worker, bytes) else worker
+            pipe.hgetall(f"{REDIS_KEY_PREFIX}:gauges:{worker}")
+        worker_gauges = pipe.execute() if workers else []
+
+        families = {name: (meta[name], {}) for name in names}
+        for name, data in zip(names, series_hashes):
+            info, series = families[name]
+            bucket_count = len(info.get('buckets', ())) + 1
+            for field, value in data.items():
+                field = field.decode() if isinstance(field, bytes) else field
+                labels, _, part = field.rpartition('|')
+                key = tuple(json.loads(labels))
+                if info['type'] == 'histogram':
+                    counts = series.setdefault(key, [0] * bucket_count + [0.0])
+                    counts[-1 if part == 'sum' else int(part)] = float(value)
+                else:
+                    series[key] = float(value)
+
+        for data in worker_gauges:
+            for field, value in data.items():
+                name, key = json.loads(field)
+                if name not in families:
+                    continue
+                info, series = families[name]
+                key, value = tuple(key), float(value)
+                if key not in series:
+                    series[key] = value
+                elif info.get('mode') == 'max':
+                    series[key] = max(series[key], value)
+                elif info.get('mode') == 'min':
+                    series[key] = min(series[key], value)
+                else:
+                    series[key] += value
+        return families
+
+    def _render(self, families: Dict[str, Tuple[Dict, Dict]]) -> str:
+        lines = []
+        for name in sorted(families):
+            info, series = families[name]
+            if not series:
+                continue
+            labelnames = info['labels']
+            lines.append(f"# HELP {name} {_escape(info['help'])}")
+            lines.append(f"# TYPE {name} {info['type']}")
+            for key in sorted(series):
+                value = series[key]
+                if info['type'] != 'histogram':
+                    lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(info['buckets']) + [math.inf], value[:-1]):
+                    cumulative += count
+                    le = f'le="{_format_bound(bound)}"'
+                    lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {_format_value(cumulative)}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(value[-1])}")
+                lines.append(f"{name}_count{_format_labels(labelnames, key)} {_format_value(cumulative)}")
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def reset(self):
+        """Drop this process's values (tests and benchmarks)."""
+        with self._lock:
+            for metric in self._metrics.values():
+                metric._reset()
+
+
+# Global registry instance
+registry = MetricsRegistry()
@@ -0,0 +1,38 @@
+"""
+Middleware base class that runs natively under ASGI.
+
+Django's MiddlewareMixin is async-capable, but under ASGI it runs every
+process_request and process_response through sync_to_async on the
+single thread the worker shares for thread-sensitive work, so the hooks
+of each request queue behind the database calls of every other request.
+
+AsyncMiddlewareMixin keeps the same hooks and the same sync behaviour.
+Under ASGI it awaits aprocess_request and aprocess_response instead,
+whose defaults call the sync hooks inline on the event loop. That is
+only safe for hooks that do no blocking I/O: middleware that touches
+the database or Redis overrides the async hooks and awaits an async
+client, or sync_to_async, only on the paths that need it.
+"""
+from django.utils.deprecation import MiddlewareMixin
+
+
+class AsyncMiddlewareMixin(MiddlewareMixin):
+    """MiddlewareMixin whose hooks run on the event loop under ASGI."""
+
+    async def __acall__(self, request):
+        """Async counterpart of MiddlewareMixin.__call__ without thread hops."""
+        response = None
+        if hasattr(self, 'process_request'):
+            response = await self.aprocess_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, 'process_response'):
+            response = await self.aprocess_response(request, response)
+        return response
+
+    async def aprocess_request(self, request):
+        """Run process_request inline; override if it blocks."""
+        return self.process_request(request)
+
+    async def aprocess_response(self, request, response):
+        """Run process_response inline; override if it blocks."""
+        return self.process_response(request, response)
@@ -13,6 +13,8 @@ from django.http import HttpRequest, HttpResponse
 
 from apps.core.logging import PIIMasker
 
+from .async_support import AsyncMiddlewareMixin
+
 
 class RequestTrackingMiddleware(MiddlewareMixin):
     """
@@ -259,12 +261,14 @@ class RequestTrackingMiddleware(MiddlewareMixin):
         return request.META.get('REMOTE_ADDR', 'unknown')
 
 
-class ConversationContextMiddleware(MiddlewareMixin):
+class ConversationContextMiddleware(AsyncMiddlewareMixin):
     """
     Middleware to extract and track conversation context from webhook requests.
     
     Specifically designed for WhatsApp webhook requests to extract conversation
-    and customer context for logging and metrics correlation.
+    and customer context for logging and metrics correlation. The ASGI
+    handler buffers the body before middleware runs, so reading POST
+    data here does not block the event loop.
     """
     
     def __init__(self, get_response=None):
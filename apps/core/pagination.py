@@ -0,0 +1,171 @@
+"""
+Keyset (cursor) pagination for list APIs.
+
+Page-number pagination issues OFFSET queries plus a full COUNT(*), both
+of which grow with table size. Keyset pagination instead seeks past the
+last row seen using (created_at, id), which a composite index serves as
+a range scan at any depth. Counts are opt-in: exact, or approximate
+(counted up to a cap).
+
+Page-number mode stays the default for backwards compatibility. Clients
+opt in with ?pagination=cursor or by sending a cursor, and
+API_DEFAULT_PAGINATION switches the default.
+"""
+import base64
+import json
+import logging
+import uuid
+from typing import Any, List, Optional, Sequence
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+logger = logging.getLogger(__name__)
+
+
+class KeysetPagination:
+    """
+    Forward-only cursor pagination on (created_at, id).
+
+    Query parameters:
+        cursor: Opaque cursor from a previous response's next_cursor
+        page_size: Items per page (default 50, max 100)
+        count: 'exact' or 'approx' to include a total count
+    """
+
+    page_size = 50
+    max_page_size = 100
+    approx_count_limit = 10000
+
+    def __init__(self, ordering: Sequence[str] = ('-created_at', '-id')):
+        """
+        Initialize paginator.
+
+        Args:
+            ordering: Two fields, timestamp then unique id; prefix both
+                with '-' for newest first
+        """
+        self.ordering = tuple(ordering)
+        self.descending = self.ordering[0].startswith('-')
+        self.fields = tuple(field.lstrip('-') for field in self.ordering)
+
+    @staticmethod
+    def requested(request) -> bool:
+        """Whether the request should be served in cursor mode."""
+        mode = request.query_params.get('pagination')
+        if mode:
+            return mode == 'cursor'
+        if 'cursor' in request.query_params:
+            return True
+        return getattr(settings, 'API_DEFAULT_PAGINATION', 'page') == 'cursor'
+
+    def paginate_queryset(self, queryset, request) -> List[Any]:
+        """
+        Return one page of results after the request's cursor.
+
+        Args:
+            queryset: Filtered queryset (any ordering is replaced)
+            request: DRF request
+
+        Returns:
+            List of model instances for this page
+        """
+        self.request = request
+        self.page_size = self._get_page_size(request)
+        self.count = None
+        self.count_approximate = False
+
+        count_mode = request.query_params.get('count')
+        if count_mode in ('exact', 'approx'):
+            self.count, self.count_approximate = self._count(queryset, count_mode)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request.query_params.get('cursor'))
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data) -> Response:
+        """Build the paginated response body."""
+        next_cursor = None
+        next_url = None
+        if self.has_next and self.page:
+            last = self.page[-1]
+            next_cursor = self.encode_cursor(
+                getattr(last, self.fields[0]), getattr(last, self.fields[1])
+            )
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), 'cursor', next_cursor
+            )
+
+        body = {
+            'next': next_url,
+            'next_cursor': next_cursor,
+            'results': data,
+        }
+        if self.count is not None:
+            body['count'] = self.count
+            body['count_approximate'] = self.count_approximate
+
+        return Response(body)
+
+    @staticmethod
+    def encode_cursor(timestamp, row_id) -> str:
+        """Encode a (timestamp, id) position as an opaque cursor."""
+        raw = json.dumps([timestamp.isoformat(), str(row_id)])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]):
+        """
+        Decode a cursor into a (timestamp, id) position.
+
+        Raises:
+            NotFound: If the cursor is malformed or the id is not a UUID
+        """
+        if not cursor:
+            return None
+        try:
+            timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            parsed = parse_datetime(timestamp)
+            if parsed is None:
+                raise ValueError('invalid timestamp')
+            return parsed, uuid.UUID(row_id)
+        except (ValueError, TypeError, AttributeError, UnicodeError) as e:
+            logger.debug(f"Invalid pagination cursor: {e}")
+            raise NotFound('Invalid cursor')
+
+    def _after(self, position) -> Q:
+        """Filter for rows strictly after position in the ordering."""
+        timestamp, row_id = position
+        time_field, id_field = self.fields
+        lookup = 'lt' if self.descending else 'gt'
+        return (
+            Q(**{f'{time_field}__{lookup}': timestamp})
+            | Q(**{time_field: timestamp, f'{id_field}__{lookup}': row_id})
+        )
+
+    def _count(self, queryset, mode):
+        """Count rows exactly, or up to approx_count_limit."""
+        queryset = queryset.order_by()
+        if mode == 'exact':
+            return queryset.count(), False
+
+        capped = queryset[:self.approx_count_limit + 1].count()
+        if capped > self.approx_count_limit:
+            return self.approx_count_limit, True
+        return capped, False
+
+    def _get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params.get('page_size', self.page_size))
+        except (TypeError, ValueError):
+            page_size = self.page_size
+        return max(1, min(page_size, self.max_page_size))
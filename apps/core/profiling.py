@@ -0,0 +1,148 @@
+"""
+Lightweight execution profiling spans.
+
+A span measures wall time plus the SQL queries, cache lookups and LLM
+tokens attributed to it. The active span lives in a context variable,
+so work run through sync_to_async (which copies the context into its
+thread) is attributed to the span that awaited it. Counters roll up
+into the enclosing span when a child finishes, and every finished span
+is listed on the outermost (root) span.
+
+Spans are only opened by callers; the hooks below cost one context
+variable lookup when no span is active.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_active_span: ContextVar[Optional['ProfileSpan']] = ContextVar('profile_span', default=None)
+
+COUNTERS = ('queries', 'query_seconds', 'cache_hits', 'cache_misses', 'prompt_tokens', 'completion_tokens')
+
+
+class ProfileSpan:
+    """Timing and resource counters for one unit of work."""
+
+    __slots__ = (
+        'kind', 'name', 'parent', 'root', 'started', 'duration', 'error', 'models', 'children',
+    ) + COUNTERS
+
+    def __init__(self, kind: str, name: str, parent: Optional['ProfileSpan'] = None):
+        self.kind = kind
+        self.name = name
+        self.parent = parent
+        self.root = parent.root if parent else self
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.error = False
+        self.models: Dict[str, int] = {}
+        self.children: List[Dict[str, Any]] = []
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def finish(self):
+        """Stop the clock and roll counters up into the parent."""
+        self.duration = time.perf_counter() - self.started
+        parent = self.parent
+        if parent is None:
+            return
+        for counter in COUNTERS:
+            setattr(parent, counter, getattr(parent, counter) + getattr(self, counter))
+        for model, tokens in self.models.items():
+            parent.models[model] = parent.models.get(model, 0) + tokens
+        self.root.children.append(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary with times in milliseconds."""
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'duration_ms': round(self.duration * 1000, 3),
+            'queries': self.queries,
+            'query_ms': round(self.query_seconds * 1000, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'error': self.error,
+        }
+
+
+def current_span() -> Optional[ProfileSpan]:
+    """The innermost open span, if any."""
+    return _active_span.get()
+
+
+@contextmanager
+def profile_span(kind: str, name: str):
+    """
+    Open a span nested in the current one.
+
+    Yields:
+        ProfileSpan; ``duration`` and the rolled-up counters are final
+        once the block exits. Exceptions mark the span as failed and
+        propagate.
+    """
+    span = ProfileSpan(kind, name, parent=_active_span.get())
+    token = _active_span.set(span)
+    try:
+        yield span
+    except BaseException:
+        span.error = True
+        raise
+    finally:
+        _active_span.reset(token)
+        span.finish()
+
+
+def record_cache_lookup(hit: bool):
+    """Count a cache read against the current span."""
+    span = _active_span.get()
+    if span is None:
+        return
+    if hit:
+        span.cache_hits += 1
+    else:
+        span.cache_misses += 1
+
+
+def record_llm_usage(model: str, prompt_tokens: int, completion_tokens: int):
+    """Count LLM tokens against the current span."""
+    span = _active_span.get()
+    if span is None:
+        return
+    span.prompt_tokens += prompt_tokens or 0
+    span.completion_tokens += completion_tokens or 0
+    span.models[model] = span.models.get(model, 0) + (prompt_tokens or 0) + (completion_tokens or 0)
+
+
+def _count_query(execute, sql, params, many, context):
+    span = _active_span.get()
+    if span is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        span.queries += 1
+        span.query_seconds += time.perf_counter() - started
+
+
+def _watch_connection(sender, connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def enable_query_profiling():
+    """Count SQL queries against spans on every connection opened from now on."""
+    connection_created.connect(_watch_connection, dispatch_uid='core.profiling.count_queries')
+    for connection in connections.all(initialized_only=True):
+        _watch_connection(None, connection)
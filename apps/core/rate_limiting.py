@@ -1,17 +1,95 @@
 """
 Rate limiting utilities for API requests.
 
-Implements Redis-based rate limiting using sliding window algorithm
-to prevent abuse and ensure fair resource usage across tenants.
+Implements a Redis token bucket per tenant and limit type: a tenant may
+spend its hourly limit in bursts up to the full limit, and the bucket
+refills continuously at limit/hour. One Lua script refills, consumes
+and reports the header values atomically, and the bucket is a two-field
+hash that expires once it has refilled.
+
+RateLimitMiddleware does not call Redis per request. Each process
+leases small batches of tokens (LocalQuota) and spends them from
+memory; unused tokens are refunded with the next lease. Limits come
+from the tenant's subscription tier. Under ASGI leases are taken over
+redis.asyncio, so the event loop never blocks on Redis.
 """
+import asyncio
 import logging
+import os
+import threading
 import time
-from typing import Optional, Tuple
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
 from django.conf import settings
 
+from apps.core.cache import CacheKeys, CacheService, CacheTTL
+from apps.core.metrics import registry, tenant_label
+from apps.core.middleware.async_support import AsyncMiddlewareMixin
+
 logger = logging.getLogger(__name__)
 
+RATE_LIMITED = registry.counter(
+    'tulia_rate_limited_requests_total', 'Requests rejected by the rate limiter', ['type', 'tenant']
+)
+RATE_LIMIT_LEASES = registry.counter(
+    'tulia_rate_limit_leases_total', 'Token leases taken from Redis', ['type']
+)
+
+# KEYS[1]: bucket hash
+# ARGV: limit, window seconds, tokens requested, tokens refunded
+# Returns: granted, remaining, seconds until full, seconds until one token
+TOKEN_BUCKET_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local rate = limit / tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local refund = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'used', 'ts')
+local used = tonumber(state[1]) or 0
+local ts = tonumber(state[2]) or now
+used = math.max(0, used - math.max(0, now - ts) * rate - refund)
+
+local granted = math.max(0, math.min(requested, math.floor(limit - used)))
+used = used + granted
+
+if used > 0 then
+    redis.call('HSET', KEYS[1], 'used', tostring(used), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(used / rate) + 60)
+else
+    redis.call('DEL', KEYS[1])
+end
+
+local retry_after = 0
+if used + 1 > limit then
+    retry_after = math.ceil((used + 1 - limit) / rate)
+end
+return {granted, math.max(0, math.floor(limit - used)), math.ceil(used / rate), retry_after}
+"""
+
+# redis.asyncio clients are bound to the event loop that created them
+_async_clients: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+def _async_bucket_script():
+    """redis.asyncio client and token bucket script for the running event loop."""
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        import redis.asyncio as aioredis
+        options = settings.CACHES['default'].get('OPTIONS', {})
+        client = aioredis.Redis.from_url(
+            settings.CACHES['default']['LOCATION'],
+            socket_connect_timeout=options.get('SOCKET_CONNECT_TIMEOUT'),
+            socket_timeout=options.get('SOCKET_TIMEOUT'),
+        )
+        entry = _async_clients[loop] = (client, client.register_script(TOKEN_BUCKET_SCRIPT))
+    return entry
+
 
 class RateLimitExceeded(Exception):
     """Raised when rate limit is exceeded."""
@@ -28,12 +106,23 @@ class RateLimitExceeded(Exception):
         self.retry_after = retry_after
 
 
+@dataclass
+class BucketState:
+    """Result of one token bucket call."""
+    limit: int
+    granted: int
+    remaining: int
+    reset_after: int
+    retry_after: int
+
+
 class RateLimiter:
     """
-    Redis-based rate limiter using sliding window algorithm.
+    Redis token bucket per tenant and limit type.
     
-    Tracks requests per tenant per time window and enforces limits
-    based on subscription tier or custom configuration.
+    The bucket holds up to the tenant's hourly limit and refills at
+    limit/WINDOW_SIZE tokens per second. Limits come from the tenant's
+    subscription tier, falling back to DEFAULT_LIMITS.
     """
     
     # Default rate limits (requests per hour)
@@ -42,78 +131,143 @@ class RateLimiter:
         'webhook': 10000,  # Webhook calls per hour
     }
     
-    # Rate limit window (1 hour in seconds)
+    # Refill window (1 hour in seconds)
     WINDOW_SIZE = 3600
     
     # Redis key prefixes
-    API_RATE_LIMIT_PREFIX = 'rate_limit:api:tenant:'
-    WEBHOOK_RATE_LIMIT_PREFIX = 'rate_limit:webhook:tenant:'
+    API_RATE_LIMIT_PREFIX = 'rate_limit:bucket:api:tenant:'
+    WEBHOOK_RATE_LIMIT_PREFIX = 'rate_limit:bucket:webhook:tenant:'
+    
+    # Tier limits are also kept in process memory for this long (seconds)
+    LOCAL_LIMITS_TTL = 60
+    
+    _script = None
+    _limits_lock = threading.Lock()
+    _local_limits: Dict[str, Tuple[float, Dict[str, Optional[int]]]] = {}
     
     @staticmethod
-    def check_rate_limit(
+    def acquire(
         tenant_id: str,
         limit_type: str = 'api',
+        tokens: int = 1,
+        refund: int = 0,
         custom_limit: Optional[int] = None
-    ) -> Tuple[bool, int]:
+    ) -> Optional[BucketState]:
         """
-        Check if request is within rate limit.
+        Take up to ``tokens`` from the bucket in one Redis round-trip.
         
         Args:
             tenant_id: Tenant UUID
             limit_type: Type of limit ('api' or 'webhook')
+            tokens: Tokens wanted; fewer are granted when the bucket runs low
+            refund: Unused tokens from an earlier grant to put back first
             custom_limit: Optional custom limit override
-            
+        
         Returns:
-            Tuple of (is_allowed, retry_after_seconds)
-            - is_allowed: True if request is within limit
-            - retry_after_seconds: Seconds until limit resets (0 if allowed)
+            BucketState, or None if Redis is unavailable (callers fail open)
         """
-        # Get limit for this tenant
         limit = custom_limit or RateLimiter._get_limit(tenant_id, limit_type)
-        
-        # Get Redis key
         key = RateLimiter._get_key(tenant_id, limit_type)
         
-        # Get current count
-        current_count = RateLimiter._get_count(key)
+        try:
+            from django_redis import get_redis_connection
+            redis_client = get_redis_connection('default')
+            if RateLimiter._script is None:
+                RateLimiter._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+            result = RateLimiter._script(
+                keys=[key],
+                args=[limit, RateLimiter.WINDOW_SIZE, tokens, refund],
+                client=redis_client
+            )
+        except Exception as e:
+            logger.error(f"Error updating rate limit bucket: {e}")
+            return None
+        
+        return RateLimiter._bucket_state(limit, result)
+    
+    @staticmethod
+    async def aacquire(
+        tenant_id: str,
+        limit_type: str = 'api',
+        tokens: int = 1,
+        refund: int = 0,
+        custom_limit: Optional[int] = None
+    ) -> Optional[BucketState]:
+        """
+        Async variant of acquire over redis.asyncio.
+        
+        Tier limits missing from process memory are loaded with
+        sync_to_async; everything else stays on the event loop.
+        """
+        limit = custom_limit or await RateLimiter._aget_limit(tenant_id, limit_type)
+        key = RateLimiter._get_key(tenant_id, limit_type)
         
-        # Check if limit exceeded
-        if current_count >= limit:
-            # Calculate retry_after (time until oldest request expires)
-            retry_after = RateLimiter._get_retry_after(key)
-            logger.warning(
-                f"Rate limit exceeded for tenant {tenant_id} ({limit_type}): "
-                f"{current_count}/{limit} requests. Retry after {retry_after}s"
+        try:
+            redis_client, script = _async_bucket_script()
+            result = await script(
+                keys=[key],
+                args=[limit, RateLimiter.WINDOW_SIZE, tokens, refund],
+                client=redis_client
             )
-            return False, retry_after
+        except Exception as e:
+            logger.error(f"Error updating rate limit bucket: {e}")
+            return None
         
-        return True, 0
+        return RateLimiter._bucket_state(limit, result)
     
     @staticmethod
-    def increment(tenant_id: str, limit_type: str = 'api') -> None:
+    def _bucket_state(limit: int, result) -> BucketState:
+        """Build a BucketState from the script's reply."""
+        granted, remaining, reset_after, retry_after = result
+        return BucketState(
+            limit=limit,
+            granted=int(granted),
+            remaining=int(remaining),
+            reset_after=int(reset_after),
+            retry_after=int(retry_after),
+        )
+    
+    @staticmethod
+    def check_rate_limit(
+        tenant_id: str,
+        limit_type: str = 'api',
+        custom_limit: Optional[int] = None
+    ) -> Tuple[bool, int]:
         """
-        Increment rate limit counter for tenant.
+        Check if request is within rate limit without consuming a token.
         
         Args:
             tenant_id: Tenant UUID
             limit_type: Type of limit ('api' or 'webhook')
-        """
-        key = RateLimiter._get_key(tenant_id, limit_type)
-        current_time = time.time()
+            custom_limit: Optional custom limit override
         
-        # Get Redis client
-        from django_redis import get_redis_connection
-        redis_client = get_redis_connection('default')
+        Returns:
+            Tuple of (is_allowed, retry_after_seconds)
+            - is_allowed: True if request is within limit
+            - retry_after_seconds: Seconds until a token is available (0 if allowed)
+        """
+        state = RateLimiter.acquire(tenant_id, limit_type, tokens=0, custom_limit=custom_limit)
         
-        # Add current timestamp to sorted set
-        redis_client.zadd(key, {str(current_time): current_time})
+        # On error, allow request (fail open)
+        if state is None or state.remaining >= 1:
+            return True, 0
         
-        # Remove old entries outside the window
-        window_start = current_time - RateLimiter.WINDOW_SIZE
-        redis_client.zremrangebyscore(key, '-inf', window_start)
+        logger.warning(
+            f"Rate limit exceeded for tenant {tenant_id} ({limit_type}): "
+            f"limit {state.limit}/hour. Retry after {state.retry_after}s"
+        )
+        return False, max(1, state.retry_after)
+    
+    @staticmethod
+    def increment(tenant_id: str, limit_type: str = 'api') -> None:
+        """
+        Consume one token for tenant.
         
-        # Set expiry on key (window size + buffer)
-        redis_client.expire(key, RateLimiter.WINDOW_SIZE + 60)
+        Args:
+            tenant_id: Tenant UUID
+            limit_type: Type of limit ('api' or 'webhook')
+        """
+        RateLimiter.acquire(tenant_id, limit_type, tokens=1)
         
         logger.debug(
             f"Incremented rate limit for tenant {tenant_id} ({limit_type})"
@@ -127,27 +281,32 @@ class RateLimiter:
         Args:
             tenant_id: Tenant UUID
             limit_type: Type of limit ('api' or 'webhook')
-            
+        
         Returns:
             Dict with:
             - limit: Maximum requests allowed
-            - current: Current request count
+            - current: Tokens currently spent
             - remaining: Remaining requests
-            - reset_at: Unix timestamp when limit resets
+            - reset_at: Unix timestamp when the bucket is full again
         """
-        limit = RateLimiter._get_limit(tenant_id, limit_type)
-        key = RateLimiter._get_key(tenant_id, limit_type)
-        current_count = RateLimiter._get_count(key)
-        remaining = max(0, limit - current_count)
+        state = RateLimiter.acquire(tenant_id, limit_type, tokens=0)
+        now = int(time.time())
         
-        # Calculate reset time (oldest request + window size)
-        reset_at = RateLimiter._get_reset_time(key)
+        if state is None:
+            limit = RateLimiter._get_limit(tenant_id, limit_type)
+            return {
+                'limit': limit,
+                'current': 0,
+                'remaining': limit,
+                'reset_at': now + 60,
+                'window_size': RateLimiter.WINDOW_SIZE,
+            }
         
         return {
-            'limit': limit,
-            'current': current_count,
-            'remaining': remaining,
-            'reset_at': reset_at,
+            'limit': state.limit,
+            'current': state.limit - state.remaining,
+            'remaining': state.remaining,
+            'reset_at': now + state.reset_after,
             'window_size': RateLimiter.WINDOW_SIZE,
         }
     
@@ -164,150 +323,307 @@ class RateLimiter:
     @staticmethod
     def _get_limit(tenant_id: str, limit_type: str) -> int:
         """
-        Get rate limit for tenant.
+        Get rate limit for tenant from its subscription tier.
+        
+        Tiers without a limit for this type use DEFAULT_LIMITS.
+        """
+        limit = RateLimiter._get_tenant_limits(tenant_id).get(limit_type)
+        return limit or RateLimiter.DEFAULT_LIMITS.get(limit_type, 1000)
+    
+    @staticmethod
+    async def _aget_limit(tenant_id: str, limit_type: str) -> int:
+        """Async variant of _get_limit; only a process-memory miss leaves the event loop."""
+        limits = RateLimiter._local_tenant_limits(tenant_id)
+        if limits is None:
+            limits = await sync_to_async(RateLimiter._get_tenant_limits)(tenant_id)
+        return limits.get(limit_type) or RateLimiter.DEFAULT_LIMITS.get(limit_type, 1000)
+    
+    @staticmethod
+    def _local_tenant_limits(tenant_id: str) -> Optional[Dict[str, Optional[int]]]:
+        """Tier limits from process memory, or None if missing or expired."""
+        cached = RateLimiter._local_limits.get(tenant_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+    
+    @staticmethod
+    def _get_tenant_limits(tenant_id: str) -> Dict[str, Optional[int]]:
+        """
+        Tier limits for a tenant, cached in process memory and in Redis.
         
-        Can be customized based on subscription tier in the future.
-        For now, uses default limits.
+        The Redis copy is dropped when the tenant changes tier or a tier
+        is edited; the process copy expires after LOCAL_LIMITS_TTL.
         """
-        # TODO: Fetch from tenant's subscription tier
-        # For now, use default limits
-        return RateLimiter.DEFAULT_LIMITS.get(limit_type, 1000)
+        cached = RateLimiter._local_tenant_limits(tenant_id)
+        if cached is not None:
+            return cached
+        
+        limits = CacheService.get_or_set(
+            CacheKeys.format(CacheKeys.TENANT_RATE_LIMITS, tenant_id=tenant_id),
+            lambda: RateLimiter._load_tenant_limits(tenant_id),
+            ttl=CacheTTL.RATE_LIMITS
+        )
+        with RateLimiter._limits_lock:
+            RateLimiter._local_limits[tenant_id] = (time.monotonic() + RateLimiter.LOCAL_LIMITS_TTL, limits)
+        return limits
     
     @staticmethod
-    def _get_count(key: str) -> int:
-        """Get current request count from Redis."""
-        current_time = time.time()
-        window_start = current_time - RateLimiter.WINDOW_SIZE
+    def _load_tenant_limits(tenant_id: str) -> Dict[str, Optional[int]]:
+        """Read the tenant's tier limits from the database."""
+        from apps.tenants.models import Tenant
         
-        # Count entries in the current window
         try:
-            from django_redis import get_redis_connection
-            redis_client = get_redis_connection('default')
-            count = redis_client.zcount(key, window_start, current_time)
-            return count
+            row = Tenant.objects.filter(id=tenant_id).values_list(
+                'subscription_tier__api_requests_per_hour',
+                'subscription_tier__webhook_requests_per_hour'
+            ).first()
         except Exception as e:
-            logger.error(f"Error getting rate limit count: {e}")
-            # On error, allow request (fail open)
-            return 0
+            logger.warning(f"Error loading rate limits for tenant {tenant_id}: {e}")
+            row = None
+        
+        if row is None:
+            return {}
+        return {'api': row[0], 'webhook': row[1]}
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome for one request; header fields are None when unknown."""
+    allowed: bool
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: Optional[int] = None
+    retry_after: int = 0
+
+
+class _Lease:
+    """Tokens this process holds for one tenant and limit type."""
     
-    @staticmethod
-    def _get_retry_after(key: str) -> int:
-        """Calculate seconds until rate limit resets."""
-        current_time = time.time()
+    __slots__ = ('tokens', 'size', 'expires', 'limit', 'remaining', 'reset_at', 'denied_until', 'retry_at')
+    
+    def __init__(self):
+        self.tokens = 0
+        self.size = 0
+        self.expires = 0.0
+        self.limit = None
+        self.remaining = 0
+        self.reset_at = 0
+        self.denied_until = 0.0
+        self.retry_at = 0
+
+
+class LocalQuota:
+    """
+    Per-process token leases in front of the Redis bucket.
+    
+    A lease starts at one token and doubles each time it is spent
+    before RATE_LIMIT_LEASE_TTL expires, up to RATE_LIMIT_LEASE_MAX
+    (and 2% of the limit); a lease that expires unspent halves. Unused
+    tokens are refunded in the same call that takes the next lease, so
+    quiet tenants are not charged for them. Rejections are also cached
+    for up to the lease TTL.
+    
+    With N processes a tenant can be refused while up to N leases of
+    tokens sit unspent elsewhere; it can never exceed its limit.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leases: Dict[Tuple[str, str], _Lease] = {}
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.clear)
+    
+    def clear(self):
+        """Forget all leases (a forked child must not spend the parent's)."""
+        self._lock = threading.Lock()
+        self._leases = {}
+    
+    def take(self, tenant_id: str, limit_type: str = 'api') -> RateLimitDecision:
+        """Spend one token, leasing more from Redis when the local ones run out."""
+        decision, lease, size, refund = self._reserve(tenant_id, limit_type)
+        if decision is not None:
+            return decision
+        state = RateLimiter.acquire(tenant_id, limit_type, tokens=size, refund=refund)
+        return self._settle(lease, size, limit_type, state)
+    
+    async def atake(self, tenant_id: str, limit_type: str = 'api') -> RateLimitDecision:
+        """Async variant of take; leases over redis.asyncio."""
+        decision, lease, size, refund = self._reserve(tenant_id, limit_type)
+        if decision is not None:
+            return decision
+        state = await RateLimiter.aacquire(tenant_id, limit_type, tokens=size, refund=refund)
+        return self._settle(lease, size, limit_type, state)
+    
+    def _reserve(self, tenant_id: str, limit_type: str):
+        """
+        Answer from the local lease, or size the next one.
         
-        try:
-            from django_redis import get_redis_connection
-            redis_client = get_redis_connection('default')
+        Returns:
+            (decision, lease, size, refund): decision is set when no
+            Redis call is needed; otherwise lease ``size`` tokens and
+            refund ``refund`` unspent ones
+        """
+        now = time.monotonic()
+        key = (tenant_id, limit_type)
+        
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is None:
+                lease = self._leases[key] = _Lease()
             
-            # Get oldest entry in the window
-            oldest_entries = redis_client.zrange(key, 0, 0, withscores=True)
+            if now < lease.denied_until:
+                return self._denied(lease), lease, 0, 0
             
-            if oldest_entries:
-                oldest_timestamp = oldest_entries[0][1]
-                # Time until oldest entry expires
-                retry_after = int(oldest_timestamp + RateLimiter.WINDOW_SIZE - current_time)
-                return max(1, retry_after)  # At least 1 second
+            if lease.tokens > 0 and now < lease.expires:
+                lease.tokens -= 1
+                return self._allowed(lease), lease, 0, 0
             
-            return 60  # Default to 1 minute if can't determine
-        except Exception as e:
-            logger.error(f"Error calculating retry_after: {e}")
-            return 60
+            # Grow the lease if the last one ran out in time, shrink it if not
+            refund = lease.tokens
+            if lease.size == 0:
+                size = 1
+            elif refund == 0 and now < lease.expires:
+                size = lease.size * 2
+            else:
+                size = lease.size // 2
+            cap = settings.RATE_LIMIT_LEASE_MAX
+            if lease.limit:
+                cap = min(cap, lease.limit // 50)
+            size = max(1, min(size, cap))
+            lease.tokens = 0
+        
+        return None, lease, size, refund
     
-    @staticmethod
-    def _get_reset_time(key: str) -> int:
-        """Get Unix timestamp when rate limit resets."""
-        current_time = time.time()
+    def _settle(
+        self, lease: _Lease, size: int, limit_type: str, state: Optional[BucketState]
+    ) -> RateLimitDecision:
+        """Store a new lease from the bucket and spend its first token."""
+        # On error, allow request (fail open)
+        if state is None:
+            return RateLimitDecision(allowed=True)
+        RATE_LIMIT_LEASES.inc(type=limit_type)
         
-        try:
-            from django_redis import get_redis_connection
-            redis_client = get_redis_connection('default')
-            
-            # Get oldest entry in the window
-            oldest_entries = redis_client.zrange(key, 0, 0, withscores=True)
+        with self._lock:
+            now = time.monotonic()
+            lease.size = size
+            lease.limit = state.limit
+            lease.remaining = state.remaining
+            lease.reset_at = int(time.time()) + state.reset_after
+            lease.expires = now + settings.RATE_LIMIT_LEASE_TTL
+            if state.granted == 0:
+                retry_after = max(1, state.retry_after)
+                lease.retry_at = int(time.time()) + retry_after
+                lease.denied_until = now + min(retry_after, settings.RATE_LIMIT_LEASE_TTL)
+                return self._denied(lease)
             
-            if oldest_entries:
-                oldest_timestamp = oldest_entries[0][1]
-                reset_time = int(oldest_timestamp + RateLimiter.WINDOW_SIZE)
-                return reset_time
-            
-            # No entries, resets immediately
-            return int(current_time)
-        except Exception as e:
-            logger.error(f"Error calculating reset_time: {e}")
-            return int(current_time + 60)
+            lease.tokens += state.granted - 1
+            return self._allowed(lease)
+    
+    def _allowed(self, lease: _Lease) -> RateLimitDecision:
+        return RateLimitDecision(
+            allowed=True,
+            limit=lease.limit,
+            remaining=lease.remaining + lease.tokens,
+            reset_at=lease.reset_at,
+        )
+    
+    def _denied(self, lease: _Lease) -> RateLimitDecision:
+        return RateLimitDecision(
+            allowed=False,
+            limit=lease.limit,
+            remaining=0,
+            reset_at=lease.reset_at,
+            retry_after=max(1, lease.retry_at - int(time.time())),
+        )
+
 
+# Process-wide leases used by RateLimitMiddleware
+local_quota = LocalQuota()
 
-class RateLimitMiddleware:
+
+class RateLimitMiddleware(AsyncMiddlewareMixin):
     """
     Middleware to enforce rate limiting on API requests.
     
-    Applies per-tenant rate limits and returns 429 responses
-    when limits are exceeded.
+    Applies per-tenant rate limits from locally leased tokens and returns
+    429 responses when limits are exceeded. Under ASGI leases are taken
+    without leaving the event loop.
     """
     
-    def __init__(self, get_response):
-        """Initialize middleware."""
-        self.get_response = get_response
+    def process_request(self, request):
+        """Spend a token, or return a 429 response."""
+        limit_type = self._limit_type(request)
+        if limit_type is None:
+            return None
+        decision = local_quota.take(str(request.tenant.id), limit_type)
+        return self._apply(request, limit_type, decision)
+    
+    async def aprocess_request(self, request):
+        """Async variant of process_request."""
+        limit_type = self._limit_type(request)
+        if limit_type is None:
+            return None
+        decision = await local_quota.atake(str(request.tenant.id), limit_type)
+        return self._apply(request, limit_type, decision)
     
-    def __call__(self, request):
-        """Process request with rate limiting."""
+    def process_response(self, request, response):
+        """Add X-RateLimit-* headers when the bucket state is known."""
+        decision = getattr(request, 'rate_limit', None)
+        if decision is None or decision.limit is None:
+            return response
+        response['X-RateLimit-Limit'] = str(decision.limit)
+        response['X-RateLimit-Remaining'] = str(decision.remaining)
+        response['X-RateLimit-Reset'] = str(decision.reset_at)
+        return response
+    
+    def _limit_type(self, request):
+        """Limit type for the request, or None if it is not rate limited."""
         # Skip rate limiting for public paths
         if self._is_public_path(request.path):
-            return self.get_response(request)
+            return None
         
         # Skip if tenant not resolved
         if not hasattr(request, 'tenant') or request.tenant is None:
-            return self.get_response(request)
-        
-        tenant_id = str(request.tenant.id)
+            return None
         
         # Determine limit type based on path
-        limit_type = 'webhook' if self._is_webhook_path(request.path) else 'api'
+        return 'webhook' if self._is_webhook_path(request.path) else 'api'
+    
+    def _apply(self, request, limit_type, decision):
+        """Record the decision on the request; build the 429 response if refused."""
+        request.rate_limit = decision
+        if decision.allowed:
+            return None
         
-        # Check rate limit
-        is_allowed, retry_after = RateLimiter.check_rate_limit(tenant_id, limit_type)
+        # Rate limit exceeded
+        from django.http import JsonResponse
         
-        if not is_allowed:
-            # Rate limit exceeded
-            from django.http import JsonResponse
-            
-            response = JsonResponse(
-                {
-                    'error': {
-                        'code': 'RATE_LIMIT_EXCEEDED',
-                        'message': f'Rate limit exceeded. Please try again in {retry_after} seconds.',
-                        'retry_after': retry_after,
-                    }
-                },
-                status=429
-            )
-            response['Retry-After'] = str(retry_after)
-            
-            # Log rate limit event
-            logger.warning(
-                f"Rate limit exceeded for tenant {request.tenant.slug}: "
-                f"{limit_type} requests",
-                extra={
-                    'tenant_id': tenant_id,
-                    'request_id': getattr(request, 'request_id', None),
-                    'path': request.path,
-                    'method': request.method,
+        tenant_id = str(request.tenant.id)
+        retry_after = decision.retry_after
+        response = JsonResponse(
+            {
+                'error': {
+                    'code': 'RATE_LIMIT_EXCEEDED',
+                    'message': f'Rate limit exceeded. Please try again in {retry_after} seconds.',
+                    'retry_after': retry_after,
                 }
-            )
-            
-            return response
-        
-        # Increment counter
-        RateLimiter.increment(tenant_id, limit_type)
-        
-        # Add rate limit headers to response
-        response = self.get_response(request)
+            },
+            status=429
+        )
+        response['Retry-After'] = str(retry_after)
+        RATE_LIMITED.inc(type=limit_type, tenant=tenant_label(tenant_id))
         
-        # Get current status
-        status = RateLimiter.get_status(tenant_id, limit_type)
-        response['X-RateLimit-Limit'] = str(status['limit'])
-        response['X-RateLimit-Remaining'] = str(status['remaining'])
-        response['X-RateLimit-Reset'] = str(status['reset_at'])
+        # Log rate limit event
+        logger.warning(
+            f"Rate limit exceeded for tenant {request.tenant.slug}: "
+            f"{limit_type} requests",
+            extra={
+                'tenant_id': tenant_id,
+                'request_id': getattr(request, 'request_id', None),
+                'path': request.path,
+                'method': request.method,
+            }
+        )
         
         return response
     
@@ -315,6 +631,7 @@ class RateLimitMiddleware:
         """Check if path is public and doesn't require rate limiting."""
         public_paths = [
             '/v1/health',
+            '/metrics',
             '/schema',
             '/admin/',
         ]
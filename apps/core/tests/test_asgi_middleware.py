@@ -0,0 +1,92 @@
+"""
+Tests for middleware running natively under ASGI.
+"""
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.core.cors import TenantCORSMiddleware
+from apps.core.middleware.async_support import AsyncMiddlewareMixin
+from apps.tenants.middleware import TenantContextMiddleware
+
+
+async def _ok(request):
+    return HttpResponse('ok')
+
+
+class _Recording(AsyncMiddlewareMixin):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.threads = []
+
+    def process_request(self, request):
+        self.threads.append(threading.get_ident())
+
+    def process_response(self, request, response):
+        self.threads.append(threading.get_ident())
+        response['X-Seen'] = '1'
+        return response
+
+
+class TestAsyncMiddlewareMixin:
+    """Hooks run on the event loop thread, sync behaviour is unchanged."""
+
+    async def test_hooks_run_without_thread_hops(self):
+        middleware = _Recording(_ok)
+
+        response = await middleware(RequestFactory().get('/'))
+
+        assert response['X-Seen'] == '1'
+        assert middleware.threads == [threading.get_ident()] * 2
+
+    def test_sync_stack_is_unchanged(self):
+        middleware = _Recording(lambda request: HttpResponse('ok'))
+
+        response = middleware(RequestFactory().get('/'))
+
+        assert response['X-Seen'] == '1'
+        assert len(middleware.threads) == 2
+
+
+class TestTenantContextMiddleware:
+    """Public paths stay on the event loop; others authenticate in a thread."""
+
+    async def test_public_path_skips_authentication(self):
+        middleware = TenantContextMiddleware(_ok)
+
+        with patch.object(TenantContextMiddleware, '_authenticate_request') as authenticate:
+            response = await middleware(RequestFactory().post('/v1/webhooks/twilio/'))
+
+        assert response.status_code == 200
+        authenticate.assert_not_called()
+
+    async def test_missing_token_is_rejected(self):
+        middleware = TenantContextMiddleware(_ok)
+
+        response = await middleware(RequestFactory().get('/v1/products', HTTP_X_REQUEST_ID='req-1'))
+
+        assert response.status_code == 401
+        assert b'MISSING_TOKEN' in response.content
+
+
+class TestTenantCORSMiddleware:
+    """Origin checks run on the event loop."""
+
+    def _request(self, origin):
+        request = RequestFactory().get('/v1/products', HTTP_ORIGIN=origin)
+        request.tenant = SimpleNamespace(id='t1', slug='acme', allowed_origins=['https://example.com'])
+        return request
+
+    async def test_allowed_origin_gets_headers(self):
+        response = await TenantCORSMiddleware(_ok)(self._request('https://example.com'))
+
+        assert response.status_code == 200
+        assert response['Access-Control-Allow-Origin'] == 'https://example.com'
+
+    async def test_disallowed_origin_is_blocked(self):
+        response = await TenantCORSMiddleware(_ok)(self._request('https://malicious.com'))
+
+        assert response.status_code == 403
@@ -0,0 +1,212 @@
+"""
+Tests for the shared metrics registry and the /metrics endpoint.
+"""
+from unittest.mock import patch
+
+import pytest
+from django.test import Client
+
+from apps.core.metrics import MetricsRegistry, OVERFLOW_LABEL, tenant_label
+
+
+class FakeRedis:
+    """The hash, sorted set and pipeline commands the registry uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    def hgetall(self, key):
+        return {k.encode(): str(v).encode() for k, v in self.data.get(key, {}).items()}
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def hincrbyfloat(self, key, field, amount):
+        values = self.data.setdefault(key, {})
+        values[field] = float(values.get(field, 0)) + amount
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def expire(self, key, ttl):
+        pass
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zrange(self, key, start, end):
+        return [member.encode() for member in self.data.get(key, {})]
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.data.get(key, {})
+        for member in [m for m, score in members.items() if low <= score <= high]:
+            del members[member]
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return queue
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+@pytest.fixture
+def metrics(settings):
+    settings.METRICS_ENABLED = True
+    settings.METRICS_AUTH_TOKEN = None
+    settings.METRICS_FLUSH_INTERVAL = 3600
+    settings.METRICS_MAX_SERIES = 1000
+    return MetricsRegistry()
+
+
+@pytest.fixture
+def redis():
+    client = FakeRedis()
+    with patch('apps.core.metrics._redis_client', return_value=client):
+        yield client
+
+
+def _worker(registry, worker_id):
+    """Simulate a second worker process sharing the registry's metric declarations."""
+    registry._after_fork()
+    registry.worker_id = worker_id
+
+
+class TestRegistry:
+    """Counters, gauges and histograms render in the exposition format."""
+
+    def test_local_render_without_redis(self, metrics):
+        requests = metrics.counter('requests_total', 'Requests', ['path'])
+        latency = metrics.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        requests.inc(path='/a')
+        requests.inc(2, path='/a')
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+
+        with patch('apps.core.metrics._redis_client', side_effect=ConnectionError('down')):
+            text = metrics.render()
+
+        assert text.startswith('# Shared metrics unavailable')
+        assert '# TYPE requests_total counter' in text
+        assert 'requests_total{path="/a"} 3' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1.0"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert 'latency_seconds_sum 5.55' in text
+        assert 'latency_seconds_count 3' in text
+
+    def test_workers_merge_in_redis(self, metrics, redis):
+        requests = metrics.counter('requests_total', 'Requests', ['path'])
+        latency = metrics.histogram('latency_seconds', 'Latency', buckets=(1.0,))
+        busy = metrics.gauge('busy_workers', 'Busy workers')
+        peak = metrics.gauge('peak_queue', 'Queue depth', mode='max')
+
+        requests.inc(path='/a')
+        latency.observe(0.5)
+        busy.set(1)
+        peak.set(7)
+        assert metrics.flush()
+
+        _worker(metrics, 'other:2')
+        requests.inc(4, path='/a')
+        latency.observe(2)
+        busy.set(1)
+        peak.set(3)
+        text = metrics.render()
+
+        assert 'requests_total{path="/a"} 5' in text
+        assert 'latency_seconds_bucket{le="1.0"} 1' in text
+        assert 'latency_seconds_count 2' in text
+        assert 'busy_workers 2' in text
+        assert 'peak_queue 7' in text
+
+    def test_failed_flush_keeps_deltas(self, metrics, redis):
+        requests = metrics.counter('requests_total', 'Requests')
+        requests.inc()
+
+        with patch('apps.core.metrics._redis_client', side_effect=ConnectionError('down')):
+            assert not metrics.flush()
+        requests.inc()
+
+        assert 'requests_total 2' in metrics.render()
+
+    def test_fork_drops_inherited_values(self, metrics, redis):
+        requests = metrics.counter('requests_total', 'Requests')
+        requests.inc()
+
+        _worker(metrics, 'child:3')
+
+        assert metrics.render() == ''
+
+    def test_series_limit_folds_into_other(self, metrics, settings):
+        settings.METRICS_MAX_SERIES = 2
+        requests = metrics.counter('requests_total', 'Requests', ['path'])
+        for path in ('/a', '/b', '/c', '/d'):
+            requests.inc(path=path)
+
+        assert requests._values == {('/a',): 1, ('/b',): 1, (OVERFLOW_LABEL,): 2}
+
+    def test_label_mismatch(self, metrics):
+        requests = metrics.counter('requests_total', 'Requests', ['path'])
+
+        with pytest.raises(ValueError):
+            requests.inc(route='/a')
+        with pytest.raises(ValueError):
+            metrics.histogram('requests_total', 'Requests', ['path'])
+        assert metrics.counter('requests_total', 'Requests', ['path']) is requests
+
+    def test_disabled_is_a_no_op(self, metrics, settings):
+        settings.METRICS_ENABLED = False
+        requests = metrics.counter('requests_total', 'Requests')
+
+        requests.inc()
+
+        assert requests._values == {}
+
+
+class TestTenantLabel:
+    """Tenant IDs map onto a bounded set of label values."""
+
+    def test_bucketing(self, settings):
+        settings.METRICS_TENANT_BUCKETS = 4
+        settings.METRICS_TRACKED_TENANTS = ['vip-tenant']
+        labels = {tenant_label(f"tenant-{i}") for i in range(100)}
+
+        assert labels <= {'bucket-00', 'bucket-01', 'bucket-02', 'bucket-03'}
+        assert tenant_label('tenant-1') == tenant_label('tenant-1')
+        assert tenant_label('vip-tenant') == 'vip-tenant'
+        assert tenant_label(None) == tenant_label('unknown') == 'unknown'
+
+
+class TestMetricsView:
+    """GET /metrics serves the registry."""
+
+    def test_disabled(self, settings):
+        settings.METRICS_ENABLED = False
+
+        assert Client().get('/metrics', secure=True).status_code == 404
+
+    def test_scrape(self, settings, redis):
+        settings.METRICS_ENABLED = True
+        settings.METRICS_AUTH_TOKEN = 'scrape-token'
+        from apps.bot.services.observability import observability_service
+        observability_service.track_error('conv-1', 'TimeoutError', 'slow', 'llm')
+
+        client = Client()
+        assert client.get('/metrics', secure=True).status_code == 401
+        response = client.get('/metrics', secure=True, HTTP_AUTHORIZATION='Bearer scrape-token')
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        assert 'tulia_errors_total{component="llm",error_type="TimeoutError"}' in response.content.decode()
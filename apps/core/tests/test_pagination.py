@@ -0,0 +1,276 @@
+"""
+Tests for keyset (cursor) pagination.
+"""
+import base64
+import json
+import pytest
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.catalog.models import Product
+from apps.catalog.views import ProductListView
+from apps.core.pagination import KeysetPagination
+from apps.messaging.models import Conversation, Message
+from apps.messaging.views_conversation import ConversationListView, ConversationMessagesView
+from apps.orders.models import Order
+from apps.orders.views import OrderListView
+from apps.rbac.models import User
+from apps.tenants.models import Tenant, Customer
+
+
+@pytest.fixture
+def factory():
+    return APIRequestFactory()
+
+
+@pytest.fixture
+def tenant(db):
+    return Tenant.objects.create(
+        name='Keyset Shop',
+        slug='keyset-shop',
+        status='active',
+        whatsapp_number='+254700000361'
+    )
+
+
+@pytest.fixture
+def customer(tenant):
+    return Customer.objects.create(tenant=tenant, phone_e164='+254700000362')
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create(email='keyset@example.com', is_active=True)
+
+
+@pytest.fixture
+def conversations(tenant):
+    """Seven conversations; three share one created_at to force id ties."""
+    base = timezone.now() - timedelta(days=1)
+    created = []
+    for index in range(7):
+        customer = Customer.objects.create(
+            tenant=tenant, phone_e164=f'+2547000004{index:02d}'
+        )
+        conversation = Conversation.objects.create(tenant=tenant, customer=customer)
+        timestamp = base if index < 3 else base + timedelta(minutes=index)
+        Conversation.objects.filter(id=conversation.id).update(created_at=timestamp)
+        created.append(conversation)
+    return created
+
+
+def _request(factory, path, params, tenant=None, user=None, scopes=()):
+    django_request = factory.get(path, params)
+    django_request.tenant = tenant
+    django_request.scopes = set(scopes)
+    if user is not None:
+        django_request.user = user
+    return django_request
+
+
+def _walk(paginator_factory, queryset, factory, params):
+    """Follow next_cursor until the last page; return ids in order."""
+    seen = []
+    cursor = None
+    while True:
+        query = dict(params)
+        if cursor:
+            query['cursor'] = cursor
+        request = Request(factory.get('/items', query))
+        paginator = paginator_factory()
+        page = paginator.paginate_queryset(queryset, request)
+        response = paginator.get_paginated_response([str(row.id) for row in page])
+        seen.extend(response.data['results'])
+        cursor = response.data['next_cursor']
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Cursor walks, ties, ordering and counts."""
+
+    def test_descending_walk_matches_ordering(self, tenant, conversations, factory):
+        queryset = Conversation.objects.filter(tenant=tenant)
+        expected = [str(pk) for pk in queryset.order_by('-created_at', '-id').values_list('id', flat=True)]
+
+        seen = _walk(KeysetPagination, queryset, factory, {'page_size': 2})
+
+        assert seen == expected
+
+    def test_ascending_walk_matches_ordering(self, tenant, conversations, factory):
+        queryset = Conversation.objects.filter(tenant=tenant)
+        expected = [str(pk) for pk in queryset.order_by('created_at', 'id').values_list('id', flat=True)]
+
+        seen = _walk(
+            lambda: KeysetPagination(ordering=('created_at', 'id')),
+            queryset, factory, {'page_size': 2}
+        )
+
+        assert seen == expected
+
+    def test_ties_on_created_at_are_not_skipped_or_repeated(self, tenant, conversations, factory):
+        queryset = Conversation.objects.filter(tenant=tenant)
+
+        # Page size 1 puts a cursor between each of the tied rows
+        seen = _walk(KeysetPagination, queryset, factory, {'page_size': 1})
+
+        assert len(seen) == len(set(seen)) == 7
+
+    def test_cursor_round_trip(self):
+        timestamp = timezone.now()
+        row_id = uuid.uuid4()
+
+        cursor = KeysetPagination.encode_cursor(timestamp, row_id)
+
+        assert KeysetPagination.decode_cursor(cursor) == (timestamp, row_id)
+
+    @pytest.mark.parametrize('row_id', ['abc', "1' OR '1'='1", 42, None])
+    def test_tampered_cursor_id(self, row_id):
+        cursor = KeysetPagination.encode_cursor(timezone.now(), 'placeholder')
+        timestamp = json.loads(base64.urlsafe_b64decode(cursor))[0]
+        tampered = base64.urlsafe_b64encode(json.dumps([timestamp, row_id]).encode()).decode()
+
+        with pytest.raises(NotFound):
+            KeysetPagination.decode_cursor(tampered)
+
+    @pytest.mark.parametrize('cursor', ['not-a-cursor', 'WyJ4Il0=', 'WyJub3QgYSBkYXRlIiwgIjEiXQ=='])
+    def test_malformed_cursor(self, cursor):
+        with pytest.raises(NotFound):
+            KeysetPagination.decode_cursor(cursor)
+
+    def test_count_exact_and_approx_cap(self, tenant, conversations, factory, monkeypatch):
+        queryset = Conversation.objects.filter(tenant=tenant)
+        monkeypatch.setattr(KeysetPagination, 'approx_count_limit', 5)
+
+        for mode, count, approximate in (('exact', 7, False), ('approx', 5, True)):
+            paginator = KeysetPagination()
+            paginator.paginate_queryset(queryset, Request(factory.get('/items', {'count': mode})))
+            body = paginator.get_paginated_response([]).data
+            assert (body['count'], body['count_approximate']) == (count, approximate)
+
+    def test_mode_selection(self, factory, settings):
+        def requested(params):
+            return KeysetPagination.requested(Request(factory.get('/items', params)))
+
+        settings.API_DEFAULT_PAGINATION = 'page'
+        assert not requested({})
+        assert requested({'pagination': 'cursor'})
+        assert requested({'cursor': 'x'})
+
+        settings.API_DEFAULT_PAGINATION = 'cursor'
+        assert requested({})
+        assert not requested({'pagination': 'page'})
+
+
+@pytest.mark.django_db
+class TestKeysetPaginationViews:
+    """The four list views serve both modes."""
+
+    def test_conversation_list(self, factory, tenant, conversations):
+        view = ConversationListView.as_view()
+        scopes = {'conversations:view'}
+
+        cursor_body = view(_request(
+            factory, '/v1/messages/conversations', {'pagination': 'cursor', 'page_size': 5},
+            tenant=tenant, scopes=scopes
+        )).data
+        page_body = view(_request(
+            factory, '/v1/messages/conversations', {'pagination': 'page', 'page_size': 5},
+            tenant=tenant, scopes=scopes
+        )).data
+
+        assert len(cursor_body['results']) == 5
+        assert cursor_body['next_cursor']
+        assert page_body['count'] == 7
+        assert 'next_cursor' not in page_body
+
+    def test_conversation_list_invalid_cursor(self, factory, tenant, conversations):
+        response = ConversationListView.as_view()(_request(
+            factory, '/v1/messages/conversations', {'cursor': 'garbage'},
+            tenant=tenant, scopes={'conversations:view'}
+        ))
+
+        assert response.status_code == 404
+
+    def test_conversation_messages(self, factory, tenant, customer):
+        conversation = Conversation.objects.create(tenant=tenant, customer=customer)
+        texts = [f'message {index}' for index in range(4)]
+        for text in texts:
+            Message.objects.create(
+                conversation=conversation, direction='in',
+                message_type='customer_inbound', text=text
+            )
+        view = ConversationMessagesView.as_view()
+        path = f'/v1/messages/conversations/{conversation.id}/messages'
+
+        first = view(_request(
+            factory, path, {'pagination': 'cursor', 'page_size': 3},
+            tenant=tenant, scopes={'conversations:view'}
+        ), id=conversation.id).data
+        second = view(_request(
+            factory, path, {'cursor': first['next_cursor'], 'page_size': 3},
+            tenant=tenant, scopes={'conversations:view'}
+        ), id=conversation.id).data
+        page_body = view(_request(
+            factory, path, {'pagination': 'page'},
+            tenant=tenant, scopes={'conversations:view'}
+        ), id=conversation.id).data
+
+        assert [row['text'] for row in first['results'] + second['results']] == texts
+        assert second['next_cursor'] is None
+        assert page_body['count'] == 4
+
+    def test_order_list(self, factory, tenant, customer, user):
+        for index in range(3):
+            Order.objects.create(
+                tenant=tenant, customer=customer, currency='KES',
+                subtotal=Decimal('100.00'), total=Decimal('100.00'), status='placed'
+            )
+        view = OrderListView.as_view()
+
+        cursor_body = view(_request(
+            factory, '/v1/orders/', {'pagination': 'cursor', 'page_size': 2, 'count': 'exact'},
+            tenant=tenant, user=user, scopes={'orders:view'}
+        )).data
+        page_body = view(_request(
+            factory, '/v1/orders/', {'pagination': 'page'},
+            tenant=tenant, user=user, scopes={'orders:view'}
+        )).data
+
+        assert len(cursor_body['results']) == 2
+        assert cursor_body['count'] == 3
+        assert page_body['count'] == 3
+        assert 'next_cursor' not in page_body
+
+    def test_product_list(self, factory, tenant, user):
+        for index in range(3):
+            Product.objects.create(
+                tenant=tenant, title=f'Shoe {index}', price=Decimal('10.00'),
+                currency='KES', is_active=True
+            )
+        view = ProductListView.as_view()
+
+        cursor_body = view(_request(
+            factory, '/v1/products/', {'pagination': 'cursor', 'page_size': 2},
+            tenant=tenant, user=user, scopes={'catalog:view'}
+        )).data
+        page_body = view(_request(
+            factory, '/v1/products/', {'pagination': 'page'},
+            tenant=tenant, user=user, scopes={'catalog:view'}
+        )).data
+        search_body = view(_request(
+            factory, '/v1/products/', {'pagination': 'cursor', 'query': 'Shoe'},
+            tenant=tenant, user=user, scopes={'catalog:view'}
+        )).data
+
+        assert len(cursor_body['results']) == 2
+        assert cursor_body['next_cursor']
+        assert page_body['count'] == 3
+        # Ranked search stays on page numbers
+        assert 'next_cursor' not in search_body
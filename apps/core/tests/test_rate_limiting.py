@@ -2,9 +2,19 @@
 Tests for rate limiting functionality.
 """
 import time
-from django.test import TestCase, override_settings
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
 from django.core.cache import cache
-from apps.core.rate_limiting import RateLimiter, RateLimitExceeded
+from apps.core.rate_limiting import (
+    BucketState, LocalQuota, RateLimiter, RateLimitExceeded, RateLimitMiddleware, local_quota,
+)
+from apps.tenants.models import SubscriptionTier
 
 
 class RateLimiterTestCase(TestCase):
@@ -112,3 +122,180 @@ class RateLimiterTestCase(TestCase):
         
         self.assertEqual(status1['current'], 5)
         self.assertEqual(status2['current'], 3)
+
+
+class FakeBucket:
+    """In-process stand-in for the Redis token bucket script."""
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.calls = []
+    
+    def acquire(self, tenant_id, limit_type='api', tokens=1, refund=0, custom_limit=None):
+        self.calls.append((tokens, refund))
+        self.used = max(0, self.used - refund)
+        granted = max(0, min(tokens, self.limit - self.used))
+        self.used += granted
+        return BucketState(
+            limit=self.limit,
+            granted=granted,
+            remaining=self.limit - self.used,
+            reset_after=self.used * 36,
+            retry_after=36 if self.used >= self.limit else 0,
+        )
+
+
+@pytest.fixture
+def bucket(settings):
+    settings.RATE_LIMIT_LEASE_MAX = 8
+    settings.RATE_LIMIT_LEASE_TTL = 60
+    fake = FakeBucket(limit=100)
+    local_quota.clear()
+    with patch.object(RateLimiter, 'acquire', side_effect=fake.acquire):
+        yield fake
+    local_quota.clear()
+
+
+class TestLocalQuota:
+    """Leases are spent locally and grow while they keep running out."""
+    
+    def test_leases_grow_and_are_spent_locally(self, bucket):
+        quota = LocalQuota()
+        decisions = [quota.take('t1') for _ in range(7)]
+        
+        assert all(decision.allowed for decision in decisions)
+        assert [tokens for tokens, _ in bucket.calls] == [1, 2, 2, 2]
+        assert bucket.used == 7
+        assert decisions[-1].remaining == bucket.limit - 7
+        assert decisions[-1].limit == 100
+    
+    def test_lease_is_capped(self, bucket):
+        quota = LocalQuota()
+        for _ in range(30):
+            quota.take('t1')
+        
+        # 2% of the limit
+        assert max(tokens for tokens, _ in bucket.calls) == 2
+    
+    def test_expired_lease_is_refunded_and_shrinks(self, bucket):
+        bucket.limit = 1000
+        quota = LocalQuota()
+        for _ in range(4):
+            quota.take('t1')
+        assert bucket.calls[-1] == (4, 0)
+        
+        quota._leases[('t1', 'api')].expires = 0
+        quota.take('t1')
+        
+        assert bucket.calls[-1] == (2, 3)
+        assert bucket.used == 1 + 2 + 4 - 3 + 2
+    
+    def test_denial_is_cached(self, bucket):
+        bucket.limit = 2
+        quota = LocalQuota()
+        
+        assert quota.take('t1').allowed
+        assert quota.take('t1').allowed
+        denied = quota.take('t1')
+        calls = len(bucket.calls)
+        
+        assert not denied.allowed
+        assert denied.remaining == 0
+        assert denied.retry_after == 36
+        assert not quota.take('t1').allowed
+        assert len(bucket.calls) == calls
+    
+    def test_redis_failure_fails_open(self, settings):
+        quota = LocalQuota()
+        with patch.object(RateLimiter, 'acquire', return_value=None):
+            decision = quota.take('t1')
+        
+        assert decision.allowed
+        assert decision.limit is None
+
+
+class TestTierLimits:
+    """Limits come from the tenant's subscription tier."""
+    
+    @pytest.fixture(autouse=True)
+    def isolated_cache(self):
+        RateLimiter._local_limits.clear()
+        with patch('apps.core.cache.cache', LocMemCache('rate-limits', {})):
+            yield
+        RateLimiter._local_limits.clear()
+    
+    def test_tier_limits_and_defaults(self, tenant):
+        assert RateLimiter._get_limit(str(tenant.id), 'api') == RateLimiter.DEFAULT_LIMITS['api']
+        
+        RateLimiter._local_limits.clear()
+        tenant.subscription_tier = SubscriptionTier.objects.create(
+            name='Growth', monthly_price=Decimal('99'), yearly_price=Decimal('990'),
+            api_requests_per_hour=5000,
+        )
+        tenant.save(update_fields=['subscription_tier'])
+        
+        assert RateLimiter._get_limit(str(tenant.id), 'api') == 5000
+        assert RateLimiter._get_limit(str(tenant.id), 'webhook') == RateLimiter.DEFAULT_LIMITS['webhook']
+    
+    def test_limits_are_cached(self, tenant):
+        RateLimiter._get_limit(str(tenant.id), 'api')
+        RateLimiter._local_limits.clear()
+        
+        with patch.object(RateLimiter, '_load_tenant_limits') as load:
+            RateLimiter._get_limit(str(tenant.id), 'api')
+        
+        load.assert_not_called()
+    
+    def test_unknown_tenant_uses_defaults(self, db):
+        assert RateLimiter._get_limit('not-a-uuid', 'webhook') == RateLimiter.DEFAULT_LIMITS['webhook']
+
+
+class TestRateLimitMiddleware:
+    """Headers come from the lease; exhausted tenants get 429."""
+    
+    def _request(self, tenant_id, path='/v1/products'):
+        request = RequestFactory().get(path)
+        request.tenant = SimpleNamespace(id=tenant_id, slug='acme')
+        return request
+    
+    def test_headers_and_429(self, bucket):
+        bucket.limit = 1
+        middleware = RateLimitMiddleware(lambda request: HttpResponse('ok'))
+        
+        response = middleware(self._request('t1'))
+        assert response.status_code == 200
+        assert response['X-RateLimit-Limit'] == '1'
+        assert response['X-RateLimit-Remaining'] == '0'
+        
+        response = middleware(self._request('t1'))
+        assert response.status_code == 429
+        assert response['Retry-After'] == '36'
+    
+    def test_no_headers_when_redis_is_down(self):
+        local_quota.clear()
+        middleware = RateLimitMiddleware(lambda request: HttpResponse('ok'))
+        with patch.object(RateLimiter, 'acquire', return_value=None):
+            response = middleware(self._request('t1'))
+        
+        assert response.status_code == 200
+        assert not response.has_header('X-RateLimit-Limit')
+    
+    async def test_async_path_uses_async_bucket(self, bucket):
+        async_bucket = FakeBucket(limit=1)
+        
+        async def get_response(request):
+            return HttpResponse('ok')
+        
+        middleware = RateLimitMiddleware(get_response)
+        with patch.object(RateLimiter, 'aacquire', AsyncMock(side_effect=async_bucket.acquire)):
+            response = await middleware(self._request('t1'))
+            assert response.status_code == 200
+            assert response['X-RateLimit-Remaining'] == '0'
+            
+            response = await middleware(self._request('t1'))
+        
+        assert response.status_code == 429
+        assert async_bucket.calls
+        # The sync Redis client is never used under ASGI
+        assert bucket.calls == []
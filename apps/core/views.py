@@ -7,10 +7,14 @@ from rest_framework import status
 from django.db import connection
 from django.core.cache import cache
 from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views import View
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
+import hmac
 import logging
 
+from apps.core.metrics import CONTENT_TYPE, registry
 from apps.core.permissions import HasTenantScopes
 
 logger = logging.getLogger(__name__)
@@ -109,6 +113,32 @@ class HealthCheckView(APIView):
         return Response(health_status, status=status.HTTP_200_OK)
 
 
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint.
+    
+    GET /metrics
+    
+    Serves the shared metrics registry in the text exposition format.
+    A plain Django view, so a scrape skips DRF negotiation and rendering.
+    Returns 404 unless METRICS_ENABLED, and 401 without
+    ``Authorization: Bearer <METRICS_AUTH_TOKEN>`` when a token is set.
+    """
+    
+    def get(self, request):
+        """Render all metrics."""
+        if not settings.METRICS_ENABLED:
+            raise Http404
+        
+        token = settings.METRICS_AUTH_TOKEN
+        if token:
+            supplied = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+                return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+        
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
+
+
 
 class TestSendWhatsAppView(APIView):
     """
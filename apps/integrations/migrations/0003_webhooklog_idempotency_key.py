@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhooklog',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Provider event ID (e.g. twilio:<MessageSid>) used to drop redelivered webhooks', max_length=100, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='webhooklog',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('success', 'Success'), ('error', 'Error'), ('unauthorized', 'Unauthorized'), ('subscription_inactive', 'Subscription Inactive')], db_index=True, help_text='Processing status', max_length=30),
+        ),
+    ]
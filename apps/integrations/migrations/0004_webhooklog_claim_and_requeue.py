@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0003_webhooklog_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhooklog',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a consumer claimed this queued webhook for processing', null=True),
+        ),
+        migrations.AddField(
+            model_name='webhooklog',
+            name='requeue_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of times the stale sweeper re-enqueued this webhook'),
+        ),
+        migrations.AddField(
+            model_name='webhooklog',
+            name='requeued_at',
+            field=models.DateTimeField(blank=True, help_text='When this webhook was last re-enqueued by the stale sweeper', null=True),
+        ),
+        migrations.AlterField(
+            model_name='webhooklog',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('processing', 'Processing'), ('success', 'Success'), ('error', 'Error'), ('unauthorized', 'Unauthorized'), ('subscription_inactive', 'Subscription Inactive')], db_index=True, help_text='Processing status', max_length=30),
+        ),
+    ]
@@ -52,6 +52,8 @@ class WebhookLog(BaseModel):
     """
     
     STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
         ('success', 'Success'),
         ('error', 'Error'),
         ('unauthorized', 'Unauthorized'),
@@ -151,6 +153,27 @@ class WebhookLog(BaseModel):
         db_index=True,
         help_text="Request ID for tracing"
     )
+    idempotency_key = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        unique=True,
+        help_text="Provider event ID (e.g. twilio:<MessageSid>) used to drop redelivered webhooks"
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When a consumer claimed this queued webhook for processing"
+    )
+    requeued_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When this webhook was last re-enqueued by the stale sweeper"
+    )
+    requeue_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of times the stale sweeper re-enqueued this webhook"
+    )
     
     # Custom manager
     objects = WebhookLogManager()
@@ -1,13 +1,20 @@
 """
 Integration services for external APIs.
 """
-from .twilio_service import TwilioService, create_twilio_service_for_tenant
+from .twilio_service import (
+    TwilioService, create_twilio_service_for_tenant, clear_twilio_service_cache,
+    resolve_twilio_route, aresolve_twilio_route, clear_twilio_route_cache
+)
 from .woo_service import WooService, create_woo_service_for_tenant
 from .shopify_service import ShopifyService, create_shopify_service_for_tenant
 
 __all__ = [
     'TwilioService',
     'create_twilio_service_for_tenant',
+    'clear_twilio_service_cache',
+    'resolve_twilio_route',
+    'aresolve_twilio_route',
+    'clear_twilio_route_cache',
     'WooService',
     'create_woo_service_for_tenant',
     'ShopifyService',
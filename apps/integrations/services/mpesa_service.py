@@ -7,68 +7,271 @@ Supports:
 - B2C (Business to Customer) - For tenant withdrawals to M-Pesa
 - Account balance queries
 
+Requests go through an MpesaClient per credential set, which keeps a
+pooled HTTP session and an OAuth token that is renewed in the
+background before it expires, so a token expiry never blocks in-flight
+payment requests. Calls use the platform credentials from settings
+unless MpesaCredentials are passed explicitly.
+
 Documentation: https://developer.safaricom.co.ke/APIs
 """
+import hashlib
 import logging
 import base64
+import os
+import threading
+import time
 import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Tuple
 from django.conf import settings
-from django.core.cache import cache
+from requests.adapters import HTTPAdapter
 
+from apps.core.cache import CacheKeys, CacheService
 from apps.core.exceptions import TuliaException
 
 logger = logging.getLogger(__name__)
 
+# Daraja answers an STK query for a transaction still awaiting the
+# customer's PIN with HTTP 500 and this error code
+STK_QUERY_PENDING_ERROR = '500.001.1001'
+
 
 class MpesaError(TuliaException):
     """Raised when M-Pesa API operation fails."""
     pass
 
 
-class MpesaService:
-    """Service for M-Pesa mobile money integration."""
+@dataclass(frozen=True)
+class MpesaCredentials:
+    """Daraja credentials for one shortcode."""
+    
+    api_url: str
+    consumer_key: str
+    consumer_secret: str = field(repr=False)
+    shortcode: Optional[str] = None
+    passkey: Optional[str] = field(default=None, repr=False)
+    initiator_name: Optional[str] = None
+    security_credential: Optional[str] = field(default=None, repr=False)
+    b2c_shortcode: Optional[str] = None
+    
+    @classmethod
+    def from_settings(cls) -> 'MpesaCredentials':
+        """Platform credentials from Django settings."""
+        return cls(
+            api_url=settings.MPESA_API_URL,
+            consumer_key=settings.MPESA_CONSUMER_KEY,
+            consumer_secret=settings.MPESA_CONSUMER_SECRET,
+            shortcode=settings.MPESA_SHORTCODE,
+            passkey=settings.MPESA_PASSKEY,
+            initiator_name=settings.MPESA_INITIATOR_NAME,
+            security_credential=settings.MPESA_B2C_SECURITY_CREDENTIAL,
+            b2c_shortcode=settings.MPESA_B2C_SHORTCODE,
+        )
+    
+    @property
+    def credential_id(self) -> str:
+        """Stable identifier for cache keys (never contains the secret)."""
+        return hashlib.sha256(f"{self.api_url}|{self.consumer_key}".encode('utf-8')).hexdigest()[:16]
+
+
+class MpesaClient:
+    """
+    Daraja HTTP client for one set of credentials.
+    
+    Holds a pooled requests.Session and the OAuth token. Concurrent
+    callers that find no valid token wait for a single fetch; once the
+    token is within MPESA_TOKEN_REFRESH_MARGIN of expiry it is renewed
+    on a background thread while callers keep using the current one.
+    Tokens are shared between processes through the cache.
+    
+    Clients are kept per process in an LRU capped at
+    MPESA_CLIENT_CACHE_SIZE credential sets.
+    """
+    
+    _clients: "OrderedDict[Tuple[int, MpesaCredentials], MpesaClient]" = OrderedDict()
+    _clients_lock = threading.Lock()
+    
+    def __init__(self, credentials: MpesaCredentials):
+        self.credentials = credentials
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.MPESA_HTTP_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._token = None
+        self._expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
     
     @classmethod
-    def _get_access_token(cls) -> str:
+    def for_credentials(cls, credentials: Optional[MpesaCredentials] = None) -> 'MpesaClient':
+        """
+        Get the shared client for a credential set in this process.
+        
+        Args:
+            credentials: Credentials to use (defaults to platform settings)
+            
+        Returns:
+            MpesaClient
+        """
+        credentials = credentials or MpesaCredentials.from_settings()
+        # Keyed by pid so forked workers never share pooled sockets
+        key = (os.getpid(), credentials)
+        with cls._clients_lock:
+            client = cls._clients.get(key)
+            if client is None:
+                client = cls(credentials)
+                cls._clients[key] = client
+            cls._clients.move_to_end(key)
+            max_size = getattr(settings, 'MPESA_CLIENT_CACHE_SIZE', 64)
+            while len(cls._clients) > max_size:
+                cls._clients.popitem(last=False)
+        return client
+    
+    @property
+    def _cache_key(self) -> str:
+        return CacheKeys.format(CacheKeys.MPESA_TOKEN, credential_id=self.credentials.credential_id)
+    
+    def get_token(self) -> str:
         """
-        Get M-Pesa OAuth access token (cached for 1 hour).
+        Get a valid OAuth access token.
         
         Returns:
             str: Access token
+            
+        Raises:
+            MpesaError: If no valid token exists and fetching one fails
         """
-        # Check cache first
-        cache_key = 'mpesa_access_token'
-        token = cache.get(cache_key)
-        
-        if token:
+        token, expires_at = self._token, self._expires_at
+        now = time.time()
+        if token and now < expires_at:
+            if now >= expires_at - settings.MPESA_TOKEN_REFRESH_MARGIN:
+                self._refresh_in_background()
             return token
         
-        # Generate new token
+        with self._token_lock:
+            if self._token and time.time() < self._expires_at:
+                return self._token
+            if not self._adopt_shared_token():
+                self._fetch_token()
+            return self._token
+    
+    def invalidate_token(self, token: str) -> None:
+        """Drop a token the API rejected, unless it was already replaced."""
+        with self._token_lock:
+            if self._token == token:
+                self._token = None
+                self._expires_at = 0.0
+                CacheService.delete(self._cache_key)
+    
+    def request(self, path: str, payload: Dict) -> requests.Response:
+        """
+        POST a JSON payload to a Daraja endpoint.
+        
+        A 401 (token revoked or expired early) drops the token and the
+        request is retried once with a fresh one.
+        
+        Args:
+            path: API path (e.g. /mpesa/stkpush/v1/processrequest)
+            payload: JSON body
+            
+        Returns:
+            requests.Response
+        """
+        url = f"{self.credentials.api_url}{path}"
+        token = self.get_token()
+        response = self.session.post(
+            url, json=payload, headers=self._headers(token), timeout=settings.MPESA_HTTP_TIMEOUT
+        )
+        if response.status_code == 401:
+            self.invalidate_token(token)
+            response = self.session.post(
+                url, json=payload, headers=self._headers(self.get_token()),
+                timeout=settings.MPESA_HTTP_TIMEOUT
+            )
+        return response
+    
+    def post(self, path: str, payload: Dict) -> Dict:
+        """POST to a Daraja endpoint and return the JSON body, raising on HTTP errors."""
+        response = self.request(path, payload)
+        response.raise_for_status()
+        return response.json()
+    
+    def _headers(self, token: str) -> Dict[str, str]:
+        return {
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json'
+        }
+    
+    def _adopt_shared_token(self) -> bool:
+        """Use a newer token another process fetched, if it is not due for renewal."""
+        shared = CacheService.get(self._cache_key)
+        if (
+            shared
+            and shared['access_token'] != self._token
+            and time.time() < shared['expires_at'] - settings.MPESA_TOKEN_REFRESH_MARGIN
+        ):
+            self._token = shared['access_token']
+            self._expires_at = shared['expires_at']
+            return True
+        return False
+    
+    def _refresh_in_background(self) -> None:
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name='mpesa-token-refresh', daemon=True).start()
+    
+    def _background_refresh(self) -> None:
+        try:
+            with self._token_lock:
+                if time.time() < self._expires_at - settings.MPESA_TOKEN_REFRESH_MARGIN:
+                    return
+                if not self._adopt_shared_token():
+                    self._fetch_token()
+        except MpesaError as e:
+            # The current token stays in use until it expires
+            logger.warning(f"Background M-Pesa token refresh failed: {str(e)}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing = False
+    
+    def _fetch_token(self) -> None:
+        """Fetch a new token; the caller holds _token_lock."""
         try:
-            api_url = f"{settings.MPESA_API_URL}/oauth/v1/generate?grant_type=client_credentials"
+            api_url = f"{self.credentials.api_url}/oauth/v1/generate?grant_type=client_credentials"
             
-            auth_string = f"{settings.MPESA_CONSUMER_KEY}:{settings.MPESA_CONSUMER_SECRET}"
+            auth_string = f"{self.credentials.consumer_key}:{self.credentials.consumer_secret}"
             auth_bytes = base64.b64encode(auth_string.encode('utf-8'))
             
             headers = {
                 'Authorization': f'Basic {auth_bytes.decode("utf-8")}'
             }
             
-            response = requests.get(api_url, headers=headers, timeout=30)
+            response = self.session.get(api_url, headers=headers, timeout=settings.MPESA_HTTP_TIMEOUT)
             response.raise_for_status()
             
             data = response.json()
-            token = data['access_token']
-            
-            # Cache for 55 minutes (tokens expire after 1 hour)
-            cache.set(cache_key, token, 3300)
-            
-            logger.info("M-Pesa access token generated")
+            expires_in = int(data.get('expires_in') or 3599)
+            
+            self._token = data['access_token']
+            self._expires_at = time.time() + expires_in
+            CacheService.set(
+                self._cache_key,
+                {'access_token': self._token, 'expires_at': self._expires_at},
+                expires_in
+            )
             
-            return token
+            logger.info(
+                "M-Pesa access token generated",
+                extra={'credential_id': self.credentials.credential_id}
+            )
             
         except requests.exceptions.RequestException as e:
             logger.error(
@@ -76,32 +279,50 @@ class MpesaService:
                 exc_info=True
             )
             raise MpesaError(f"Failed to authenticate with M-Pesa: {str(e)}") from e
+
+
+class MpesaService:
+    """Service for M-Pesa mobile money integration."""
     
     @classmethod
-    def _get_headers(cls) -> Dict[str, str]:
+    def _get_access_token(cls, credentials: Optional[MpesaCredentials] = None) -> str:
+        """
+        Get M-Pesa OAuth access token for a credential set.
+        
+        Returns:
+            str: Access token
+        """
+        return MpesaClient.for_credentials(credentials).get_token()
+    
+    @classmethod
+    def _get_headers(cls, credentials: Optional[MpesaCredentials] = None) -> Dict[str, str]:
         """Get API headers with authorization."""
         return {
-            'Authorization': f'Bearer {cls._get_access_token()}',
+            'Authorization': f'Bearer {cls._get_access_token(credentials)}',
             'Content-Type': 'application/json'
         }
     
     @classmethod
-    def _generate_password(cls) -> tuple:
+    def _generate_password(cls, credentials: MpesaCredentials) -> tuple:
         """
         Generate STK Push password and timestamp.
         
+        Args:
+            credentials: Credentials holding the shortcode and passkey
+            
         Returns:
             tuple: (password, timestamp)
         """
         timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        data_to_encode = f"{settings.MPESA_SHORTCODE}{settings.MPESA_PASSKEY}{timestamp}"
+        data_to_encode = f"{credentials.shortcode}{credentials.passkey}{timestamp}"
         password = base64.b64encode(data_to_encode.encode('utf-8')).decode('utf-8')
         return password, timestamp
     
     @classmethod
     def stk_push(cls, phone_number: str, amount: Decimal, 
                  account_reference: str, transaction_desc: str,
-                 callback_url: str) -> Dict:
+                 callback_url: str,
+                 credentials: Optional[MpesaCredentials] = None) -> Dict:
         """
         Initiate STK Push (Lipa Na M-Pesa Online) for customer payment.
         
@@ -111,6 +332,7 @@ class MpesaService:
             account_reference: Reference for the transaction (max 12 chars)
             transaction_desc: Description (max 13 chars)
             callback_url: URL to receive payment result
+            credentials: Daraja credentials (defaults to platform settings)
             
         Returns:
             dict: {
@@ -121,6 +343,8 @@ class MpesaService:
                 'customer_message': str
             }
         """
+        credentials = credentials or MpesaCredentials.from_settings()
+        
         try:
             # Clean phone number
             phone_number = phone_number.replace('+', '').replace(' ', '')
@@ -128,34 +352,26 @@ class MpesaService:
                 phone_number = '254' + phone_number[1:]
             
             # Generate password and timestamp
-            password, timestamp = cls._generate_password()
+            password, timestamp = cls._generate_password(credentials)
             
             # Prepare payload
             payload = {
-                'BusinessShortCode': settings.MPESA_SHORTCODE,
+                'BusinessShortCode': credentials.shortcode,
                 'Password': password,
                 'Timestamp': timestamp,
                 'TransactionType': 'CustomerPayBillOnline',
                 'Amount': int(amount),  # M-Pesa expects integer
                 'PartyA': phone_number,
-                'PartyB': settings.MPESA_SHORTCODE,
+                'PartyB': credentials.shortcode,
                 'PhoneNumber': phone_number,
                 'CallBackURL': callback_url,
                 'AccountReference': account_reference[:12],  # Max 12 chars
                 'TransactionDesc': transaction_desc[:13]  # Max 13 chars
             }
             
-            api_url = f"{settings.MPESA_API_URL}/mpesa/stkpush/v1/processrequest"
-            
-            response = requests.post(
-                api_url,
-                json=payload,
-                headers=cls._get_headers(),
-                timeout=30
+            data = MpesaClient.for_credentials(credentials).post(
+                '/mpesa/stkpush/v1/processrequest', payload
             )
-            response.raise_for_status()
-            
-            data = response.json()
             
             # Check response code
             if data.get('ResponseCode') != '0':
@@ -189,37 +405,33 @@ class MpesaService:
             raise MpesaError(f"Failed to initiate STK Push: {str(e)}") from e
     
     @classmethod
-    def query_stk_status(cls, checkout_request_id: str) -> Dict:
+    def query_stk_status(cls, checkout_request_id: str,
+                         credentials: Optional[MpesaCredentials] = None) -> Dict:
         """
         Query the status of an STK Push transaction.
         
         Args:
             checkout_request_id: CheckoutRequestID from stk_push
+            credentials: Daraja credentials (defaults to platform settings)
             
         Returns:
             dict: Transaction status details
         """
+        credentials = credentials or MpesaCredentials.from_settings()
+        
         try:
-            password, timestamp = cls._generate_password()
+            password, timestamp = cls._generate_password(credentials)
             
             payload = {
-                'BusinessShortCode': settings.MPESA_SHORTCODE,
+                'BusinessShortCode': credentials.shortcode,
                 'Password': password,
                 'Timestamp': timestamp,
                 'CheckoutRequestID': checkout_request_id
             }
             
-            api_url = f"{settings.MPESA_API_URL}/mpesa/stkpushquery/v1/query"
-            
-            response = requests.post(
-                api_url,
-                json=payload,
-                headers=cls._get_headers(),
-                timeout=30
+            data = MpesaClient.for_credentials(credentials).post(
+                '/mpesa/stkpushquery/v1/query', payload
             )
-            response.raise_for_status()
-            
-            data = response.json()
             
             logger.info(
                 "M-Pesa STK status queried",
@@ -237,10 +449,115 @@ class MpesaService:
                 exc_info=True
             )
             raise MpesaError(f"Failed to query STK status: {str(e)}") from e
-    
+
+    @classmethod
+    def poll_stk_statuses(cls, checkout_request_ids: Iterable[str],
+                          credentials: Optional[MpesaCredentials] = None,
+                          max_rounds: int = 5, initial_delay: float = 2.0,
+                          max_delay: float = 30.0) -> Dict[str, Dict]:
+        """
+        Query the status of many STK Push transactions with backoff.
+
+        Each round queries every unresolved transaction concurrently over
+        the client's pooled session. Transactions still awaiting the
+        customer's PIN, throttled (429) or hit by a transient error are
+        retried in the next round, after a delay that doubles each time.
+
+        Args:
+            checkout_request_ids: CheckoutRequestIDs from stk_push
+            credentials: Daraja credentials (defaults to platform settings)
+            max_rounds: Maximum query rounds
+            initial_delay: Seconds to wait before the second round
+            max_delay: Cap on the delay between rounds
+
+        Returns:
+            dict: {checkout_request_id: status}. Resolved transactions map
+            to the STK query response (with ResultCode); the rest map to
+            their last outcome, {'pending': True} or {'error': str}.
+        """
+        credentials = credentials or MpesaCredentials.from_settings()
+        client = MpesaClient.for_credentials(credentials)
+        pending = list(dict.fromkeys(checkout_request_ids))
+        results = {}
+        if not pending:
+            return results
+
+        delay = initial_delay
+        workers = min(len(pending), settings.MPESA_HTTP_POOL_SIZE)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mpesa-stk-poll') as executor:
+            for round_number in range(max_rounds):
+                outcomes = list(executor.map(
+                    lambda checkout_request_id: cls._query_stk_once(client, credentials, checkout_request_id),
+                    pending
+                ))
+                unresolved = []
+                for checkout_request_id, (status, resolved) in zip(pending, outcomes):
+                    results[checkout_request_id] = status
+                    if not resolved:
+                        unresolved.append(checkout_request_id)
+                pending = unresolved
+
+                if not pending or round_number == max_rounds - 1:
+                    break
+                time.sleep(delay)
+                delay = min(delay * 2, max_delay)
+
+        logger.info(
+            "M-Pesa STK statuses polled",
+            extra={
+                'queried': len(results),
+                'unresolved': len(pending),
+                'rounds': round_number + 1
+            }
+        )
+
+        return results
+
+    @classmethod
+    def _query_stk_once(cls, client: MpesaClient, credentials: MpesaCredentials,
+                        checkout_request_id: str) -> Tuple[Dict, bool]:
+        """
+        Make one STK status query for the poller.
+
+        Returns:
+            tuple: (status dict, resolved)
+        """
+        password, timestamp = cls._generate_password(credentials)
+        payload = {
+            'BusinessShortCode': credentials.shortcode,
+            'Password': password,
+            'Timestamp': timestamp,
+            'CheckoutRequestID': checkout_request_id
+        }
+
+        try:
+            response = client.request('/mpesa/stkpushquery/v1/query', payload)
+        except (requests.exceptions.RequestException, MpesaError) as e:
+            return {'CheckoutRequestID': checkout_request_id, 'error': str(e)}, False
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+
+        if data.get('errorCode') == STK_QUERY_PENDING_ERROR:
+            return {'CheckoutRequestID': checkout_request_id, 'pending': True}, False
+        if response.status_code == 429 or response.status_code >= 500:
+            return {
+                'CheckoutRequestID': checkout_request_id,
+                'error': data.get('errorMessage') or f"HTTP {response.status_code}"
+            }, False
+        if response.status_code >= 400:
+            return {
+                'CheckoutRequestID': checkout_request_id,
+                'error': data.get('errorMessage') or f"HTTP {response.status_code}"
+            }, True
+        return data, True
+
     @classmethod
     def b2c_payment(cls, phone_number: str, amount: Decimal,
-                   occasion: str, remarks: str, command_id: str = 'BusinessPayment') -> Dict:
+                   occasion: str, remarks: str, command_id: str = 'BusinessPayment',
+                   credentials: Optional[MpesaCredentials] = None) -> Dict:
         """
         Initiate B2C payment (Business to Customer) for tenant withdrawals.
         
@@ -250,10 +567,13 @@ class MpesaService:
             occasion: Occasion/reason for payment
             remarks: Additional remarks
             command_id: 'BusinessPayment', 'SalaryPayment', or 'PromotionPayment'
+            credentials: Daraja credentials (defaults to platform settings)
             
         Returns:
             dict: Transaction details
         """
+        credentials = credentials or MpesaCredentials.from_settings()
+        
         try:
             # Clean phone number
             phone_number = phone_number.replace('+', '').replace(' ', '')
@@ -261,11 +581,11 @@ class MpesaService:
                 phone_number = '254' + phone_number[1:]
             
             payload = {
-                'InitiatorName': settings.MPESA_INITIATOR_NAME,
-                'SecurityCredential': settings.MPESA_B2C_SECURITY_CREDENTIAL,
+                'InitiatorName': credentials.initiator_name,
+                'SecurityCredential': credentials.security_credential,
                 'CommandID': command_id,
                 'Amount': int(amount),
-                'PartyA': settings.MPESA_B2C_SHORTCODE,
+                'PartyA': credentials.b2c_shortcode,
                 'PartyB': phone_number,
                 'Remarks': remarks,
                 'QueueTimeOutURL': f"{settings.FRONTEND_URL}/api/v1/webhooks/mpesa/timeout",
@@ -273,17 +593,9 @@ class MpesaService:
                 'Occasion': occasion
             }
             
-            api_url = f"{settings.MPESA_API_URL}/mpesa/b2c/v1/paymentrequest"
-            
-            response = requests.post(
-                api_url,
-                json=payload,
-                headers=cls._get_headers(),
-                timeout=30
+            data = MpesaClient.for_credentials(credentials).post(
+                '/mpesa/b2c/v1/paymentrequest', payload
             )
-            response.raise_for_status()
-            
-            data = response.json()
             
             # Check response code
             if data.get('ResponseCode') != '0':
@@ -318,7 +630,8 @@ class MpesaService:
     @classmethod
     def b2b_payment(cls, receiver_shortcode: str, amount: Decimal,
                    account_reference: str, remarks: str,
-                   command_id: str = 'BusinessPayBill') -> Dict:
+                   command_id: str = 'BusinessPayBill',
+                   credentials: Optional[MpesaCredentials] = None) -> Dict:
         """
         Initiate B2B payment (Business to Business) for till payments.
         
@@ -328,19 +641,22 @@ class MpesaService:
             account_reference: Account reference
             remarks: Payment remarks
             command_id: 'BusinessPayBill' or 'BusinessBuyGoods'
+            credentials: Daraja credentials (defaults to platform settings)
             
         Returns:
             dict: Transaction details
         """
+        credentials = credentials or MpesaCredentials.from_settings()
+        
         try:
             payload = {
-                'Initiator': settings.MPESA_INITIATOR_NAME,
-                'SecurityCredential': settings.MPESA_B2C_SECURITY_CREDENTIAL,
+                'Initiator': credentials.initiator_name,
+                'SecurityCredential': credentials.security_credential,
                 'CommandID': command_id,
                 'SenderIdentifierType': '4',  # 4 = Organization shortcode
                 'RecieverIdentifierType': '4' if command_id == 'BusinessPayBill' else '2',  # 2 = Till number
                 'Amount': int(amount),
-                'PartyA': settings.MPESA_SHORTCODE,
+                'PartyA': credentials.shortcode,
                 'PartyB': receiver_shortcode,
                 'AccountReference': account_reference,
                 'Remarks': remarks,
@@ -348,17 +664,9 @@ class MpesaService:
                 'ResultURL': f"{settings.FRONTEND_URL}/api/v1/webhooks/mpesa/result"
             }
             
-            api_url = f"{settings.MPESA_API_URL}/mpesa/b2b/v1/paymentrequest"
-            
-            response = requests.post(
-                api_url,
-                json=payload,
-                headers=cls._get_headers(),
-                timeout=30
+            data = MpesaClient.for_credentials(credentials).post(
+                '/mpesa/b2b/v1/paymentrequest', payload
             )
-            response.raise_for_status()
-            
-            data = response.json()
             
             if data.get('ResponseCode') != '0':
                 raise MpesaError(
@@ -390,36 +698,32 @@ class MpesaService:
             raise MpesaError(f"Failed to initiate B2B payment: {str(e)}") from e
     
     @classmethod
-    def c2b_register_urls(cls, confirmation_url: str, validation_url: str) -> Dict:
+    def c2b_register_urls(cls, confirmation_url: str, validation_url: str,
+                          credentials: Optional[MpesaCredentials] = None) -> Dict:
         """
         Register C2B validation and confirmation URLs.
         
         Args:
             confirmation_url: URL to receive payment confirmations
             validation_url: URL to validate payments before processing
+            credentials: Daraja credentials (defaults to platform settings)
             
         Returns:
             dict: Registration response
         """
+        credentials = credentials or MpesaCredentials.from_settings()
+        
         try:
             payload = {
-                'ShortCode': settings.MPESA_SHORTCODE,
+                'ShortCode': credentials.shortcode,
                 'ResponseType': 'Completed',  # or 'Cancelled'
                 'ConfirmationURL': confirmation_url,
                 'ValidationURL': validation_url
             }
             
-            api_url = f"{settings.MPESA_API_URL}/mpesa/c2b/v1/registerurl"
-            
-            response = requests.post(
-                api_url,
-                json=payload,
-                headers=cls._get_headers(),
-                timeout=30
+            data = MpesaClient.for_credentials(credentials).post(
+                '/mpesa/c2b/v1/registerurl', payload
             )
-            response.raise_for_status()
-            
-            data = response.json()
             
             logger.info("M-Pesa C2B URLs registered successfully")
             
@@ -433,36 +737,33 @@ class MpesaService:
             raise MpesaError(f"Failed to register C2B URLs: {str(e)}") from e
     
     @classmethod
-    def account_balance(cls) -> Dict:
+    def account_balance(cls, credentials: Optional[MpesaCredentials] = None) -> Dict:
         """
         Query M-Pesa account balance.
         
+        Args:
+            credentials: Daraja credentials (defaults to platform settings)
+            
         Returns:
             dict: Balance details
         """
+        credentials = credentials or MpesaCredentials.from_settings()
+        
         try:
             payload = {
-                'Initiator': settings.MPESA_INITIATOR_NAME,
-                'SecurityCredential': settings.MPESA_B2C_SECURITY_CREDENTIAL,
+                'Initiator': credentials.initiator_name,
+                'SecurityCredential': credentials.security_credential,
                 'CommandID': 'AccountBalance',
-                'PartyA': settings.MPESA_SHORTCODE,
+                'PartyA': credentials.shortcode,
                 'IdentifierType': '4',  # 4 = Organization shortcode
                 'Remarks': 'Balance query',
                 'QueueTimeOutURL': f"{settings.FRONTEND_URL}/api/v1/webhooks/mpesa/timeout",
                 'ResultURL': f"{settings.FRONTEND_URL}/api/v1/webhooks/mpesa/result"
             }
             
-            api_url = f"{settings.MPESA_API_URL}/mpesa/accountbalance/v1/query"
-            
-            response = requests.post(
-                api_url,
-                json=payload,
-                headers=cls._get_headers(),
-                timeout=30
+            data = MpesaClient.for_credentials(credentials).post(
+                '/mpesa/accountbalance/v1/query', payload
             )
-            response.raise_for_status()
-            
-            data = response.json()
             
             logger.info("M-Pesa account balance queried")
             
@@ -5,26 +5,53 @@ Handles sending and receiving WhatsApp messages via Twilio API,
 including signature verification for webhook security and support
 for WhatsApp interactive messages (buttons, lists, media).
 """
+import asyncio
 import hashlib
 import hmac
 import base64
 import logging
 import json
-from typing import Optional, Dict, Any, List
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, NamedTuple
 from urllib.parse import urlencode
 
+from asgiref.sync import sync_to_async
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+from twilio.http.async_http_client import AsyncTwilioHttpClient
 from twilio.base.exceptions import TwilioRestException
 from django.conf import settings
+from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
+# Per-process cache of TwilioService instances keyed by tenant id.
+# Each entry is (credential_version, service); see create_twilio_service_for_tenant.
+_service_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_service_cache_lock = threading.Lock()
+
+# Per-process webhook routing table keyed by WhatsApp number.
+# Each entry is (expires_at, TwilioRoute or None); see resolve_twilio_route.
+_route_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_route_cache_lock = threading.Lock()
+
+SEND_SLOT_KEY_PREFIX = 'twilio:send_slots:'
+
 
 class TwilioServiceError(Exception):
     """Base exception for Twilio service errors."""
     pass
 
 
+class TwilioRoute(NamedTuple):
+    """Tenant and auth token used to verify webhooks for a WhatsApp number."""
+    tenant_id: str
+    auth_token: str
+
+
 class TwilioService:
     """
     Service for interacting with Twilio WhatsApp API.
@@ -36,7 +63,14 @@ class TwilioService:
     - Handling delivery status callbacks
     """
     
-    def __init__(self, account_sid: str, auth_token: str, from_number: str):
+    def __init__(
+        self,
+        account_sid: str,
+        auth_token: str,
+        from_number: str,
+        http_client: Optional[TwilioHttpClient] = None,
+        tenant_id: Optional[str] = None
+    ):
         """
         Initialize Twilio service with credentials.
         
@@ -44,11 +78,16 @@ class TwilioService:
             account_sid: Twilio Account SID
             auth_token: Twilio Auth Token
             from_number: WhatsApp sender number (e.g., whatsapp:+14155238886)
+            http_client: Optional HTTP client (pooled session) to reuse
+            tenant_id: Tenant this service sends for; enables delayed-task retries
         """
         self.account_sid = account_sid
         self.auth_token = auth_token
         self.from_number = from_number if from_number.startswith('whatsapp:') else f'whatsapp:{from_number}'
-        self.client = Client(account_sid, auth_token)
+        self.tenant_id = tenant_id
+        self.client = Client(account_sid, auth_token, http_client=http_client)
+        # Async clients per event loop (aiohttp sessions are bound to their loop)
+        self._async_clients = weakref.WeakKeyDictionary()
     
     def send_whatsapp(
         self,
@@ -78,44 +117,59 @@ class TwilioService:
             >>> print(result['sid'])
         """
         try:
-            # Format recipient number
-            to_number = to if to.startswith('whatsapp:') else f'whatsapp:{to}'
-            
-            # Prepare message parameters
-            message_params = {
-                'from_': self.from_number,
-                'to': to_number,
-                'body': body
-            }
-            
-            if media_url:
-                message_params['media_url'] = [media_url]
-            
-            if status_callback:
-                message_params['status_callback'] = status_callback
-            
             # Send message
-            message = self.client.messages.create(**message_params)
+            message = self.client.messages.create(
+                **self._message_params(to, body, media_url, status_callback)
+            )
+            return self._sent_message(message, to, body)
             
-            logger.info(
-                f"WhatsApp message sent successfully",
+        except TwilioRestException as e:
+            logger.error(
+                f"Twilio API error sending WhatsApp message",
                 extra={
-                    'message_sid': message.sid,
-                    'to': to,
-                    'status': message.status
-                }
+                    'error_code': e.code,
+                    'error_message': str(e),
+                    'to': to
+                },
+                exc_info=True
             )
-            
-            return {
-                'sid': message.sid,
-                'status': message.status,
-                'to': to,
-                'from': self.from_number,
-                'body': body,
-                'date_created': message.date_created.isoformat() if message.date_created else None,
-                'error_code': message.error_code,
-                'error_message': message.error_message
-            }
+            raise TwilioServiceError(f"Failed to send WhatsApp message: {e.msg}") from e
+        
+        except Exception as e:
+            logger.error(
+                f"Unexpected error sending WhatsApp message",
+                extra={'to': to},
+                exc_info=True
+            )
+            raise TwilioServiceError(f"Unexpected error: {str(e)}") from e
+    
+    async def asend_whatsapp(
+        self,
+        to: str,
+        body: str,
+        media_url: Optional[str] = None,
+        status_callback: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of send_whatsapp that awaits the Twilio API.
+        
+        Under ASGI (ASGI_MODE) the HTTP session is pooled per event
+        loop, which lives as long as the worker. Async views served by
+        WSGI run on a new loop per request, so there each send opens
+        and closes its own session.
+        
+        Raises:
+            TwilioServiceError: If message sending fails
+        """
+        params = self._message_params(to, body, media_url, status_callback)
+        try:
+            if settings.ASGI_MODE:
+                message = await self._async_client().messages.create_async(**params)
+            else:
+                async with AsyncTwilioHttpClient(timeout=settings.TWILIO_HTTP_TIMEOUT) as http_client:
+                    client = Client(self.account_sid, self.auth_token, http_client=http_client)
+                    message = await client.messages.create_async(**params)
+            return self._sent_message(message, to, body)
             
         except TwilioRestException as e:
             logger.error(
@@ -137,6 +191,66 @@ class TwilioService:
             )
             raise TwilioServiceError(f"Unexpected error: {str(e)}") from e
     
+    def _async_client(self) -> Client:
+        """Twilio client with a pooled aiohttp session for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = Client(
+                self.account_sid,
+                self.auth_token,
+                http_client=AsyncTwilioHttpClient(timeout=settings.TWILIO_HTTP_TIMEOUT)
+            )
+        return client
+    
+    def _message_params(
+        self,
+        to: str,
+        body: str,
+        media_url: Optional[str] = None,
+        status_callback: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build messages.create parameters for a WhatsApp message."""
+        # Format recipient number
+        to_number = to if to.startswith('whatsapp:') else f'whatsapp:{to}'
+        
+        # Prepare message parameters
+        message_params = {
+            'from_': self.from_number,
+            'to': to_number,
+            'body': body
+        }
+        
+        if media_url:
+            message_params['media_url'] = [media_url]
+        
+        if status_callback:
+            message_params['status_callback'] = status_callback
+        
+        return message_params
+    
+    def _sent_message(self, message, to: str, body: str) -> Dict[str, Any]:
+        """Log a sent message and summarise it."""
+        logger.info(
+            f"WhatsApp message sent successfully",
+            extra={
+                'message_sid': message.sid,
+                'to': to,
+                'status': message.status
+            }
+        )
+        
+        return {
+            'sid': message.sid,
+            'status': message.status,
+            'to': to,
+            'from': self.from_number,
+            'body': body,
+            'date_created': message.date_created.isoformat() if message.date_created else None,
+            'error_code': message.error_code,
+            'error_message': message.error_message
+        }
+    
     def send_typing_indicator(
         self,
         to: str
@@ -669,60 +783,230 @@ class TwilioService:
         to: str,
         body: str,
         max_retries: int = 3,
-        media_url: Optional[str] = None
+        media_url: Optional[str] = None,
+        message_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Send WhatsApp message with automatic retry logic.
+        Send WhatsApp message, rescheduling failures as a delayed task.
         
-        Retries failed sends up to max_retries times with exponential backoff.
+        The first attempt is made inline. If it fails and the service is
+        bound to a tenant, the remaining attempts are handed to the
+        send_whatsapp_message Celery task with exponential backoff
+        (1s, 2s, 4s, ...) instead of sleeping in the calling worker.
         
         Args:
             to: Recipient phone number
             body: Message text
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of attempts (including the first)
             media_url: Optional media URL
+            message_id: Optional outbound Message the retry task marks
+                sent or failed
             
         Returns:
-            dict: Message details from successful send
+            dict: Message details from a successful send, or
+            {'sid': None, 'status': 'retry_scheduled', 'to', 'task_id'}
             
         Raises:
-            TwilioServiceError: If all retry attempts fail
+            TwilioServiceError: If the send fails and cannot be rescheduled
         """
-        import time
+        try:
+            return self.send_whatsapp(to, body, media_url)
+        except TwilioServiceError:
+            if max_retries <= 1 or not self.tenant_id:
+                logger.error(
+                    f"WhatsApp send failed after 1 attempt",
+                    extra={'to': to}
+                )
+                raise
         
-        last_error = None
+        from apps.integrations.tasks import send_whatsapp_message
         
-        for attempt in range(max_retries):
-            try:
-                return self.send_whatsapp(to, body, media_url)
-            
-            except TwilioServiceError as e:
-                last_error = e
-                
-                if attempt < max_retries - 1:
-                    # Exponential backoff: 1s, 5s, 15s
-                    wait_time = (2 ** attempt) * 1
-                    logger.warning(
-                        f"WhatsApp send failed, retrying in {wait_time}s",
-                        extra={
-                            'attempt': attempt + 1,
-                            'max_retries': max_retries,
-                            'to': to
-                        }
-                    )
-                    time.sleep(wait_time)
-                else:
-                    logger.error(
-                        f"WhatsApp send failed after {max_retries} attempts",
-                        extra={'to': to}
-                    )
-        
-        raise last_error
+        result = send_whatsapp_message.apply_async(
+            args=[str(self.tenant_id), to, body],
+            kwargs={
+                'media_url': media_url,
+                'max_attempts': max_retries - 1,
+                'message_id': message_id
+            },
+            countdown=1
+        )
+        
+        logger.warning(
+            f"WhatsApp send failed, retry scheduled",
+            extra={
+                'max_retries': max_retries,
+                'to': to,
+                'task_id': result.id
+            }
+        )
+        
+        return {
+            'sid': None,
+            'status': 'retry_scheduled',
+            'to': to,
+            'task_id': result.id
+        }
+
+
+def _twilio_credential_version(tenant) -> Optional[str]:
+    """
+    Cheap fingerprint of a tenant's Twilio configuration.
+    
+    Uses TenantSettings.updated_at (bumped whenever credentials are saved)
+    and the sender number. Reads only updated_at when settings are not
+    already loaded, so a cache hit never decrypts credentials.
+    """
+    from apps.tenants.models import TenantSettings
+    
+    loaded_settings = tenant._state.fields_cache.get('settings')
+    if loaded_settings is not None:
+        updated_at = loaded_settings.updated_at
+    else:
+        updated_at = TenantSettings.objects.filter(
+            tenant_id=tenant.id
+        ).values_list('updated_at', flat=True).first()
+    
+    if updated_at is None:
+        return None
+    return f"{updated_at.isoformat()}:{tenant.whatsapp_number}"
+
+
+def clear_twilio_service_cache(tenant_id: Optional[str] = None) -> None:
+    """Drop cached Twilio services for one tenant, or all tenants."""
+    with _service_cache_lock:
+        if tenant_id is None:
+            _service_cache.clear()
+        else:
+            _service_cache.pop(str(tenant_id), None)
+
+
+def resolve_twilio_route(whatsapp_number: str, refresh: bool = False) -> Optional[TwilioRoute]:
+    """
+    Look up the tenant and auth token for an inbound WhatsApp number.
+    
+    Routes (including misses) are cached per process for
+    TWILIO_ROUTE_CACHE_TTL seconds so webhook ingress can verify
+    signatures without querying or decrypting tenant settings. Pass
+    refresh=True to bypass the cache, e.g. after a signature mismatch
+    that may be caused by rotated credentials.
+    
+    Args:
+        whatsapp_number: Business number in E.164 format (no whatsapp: prefix)
+        refresh: Reload the route from the database
+        
+    Returns:
+        TwilioRoute, or None if no tenant with Twilio credentials owns the number
+    """
+    now = time.monotonic()
+    
+    if not refresh:
+        hit, route = _cached_twilio_route(whatsapp_number)
+        if hit:
+            return route
+    
+    from apps.tenants.models import Tenant
+    
+    route = None
+    tenant = Tenant.objects.select_related('settings').filter(
+        whatsapp_number=whatsapp_number
+    ).first()
+    if tenant:
+        try:
+            settings_obj = tenant.settings
+            if settings_obj.has_twilio_configured():
+                route = TwilioRoute(str(tenant.id), settings_obj.twilio_token)
+        except AttributeError:
+            pass
+    
+    with _route_cache_lock:
+        _route_cache[whatsapp_number] = (now + settings.TWILIO_ROUTE_CACHE_TTL, route)
+        _route_cache.move_to_end(whatsapp_number)
+        while len(_route_cache) > settings.TWILIO_CLIENT_CACHE_SIZE:
+            _route_cache.popitem(last=False)
+    
+    return route
+
+
+async def aresolve_twilio_route(whatsapp_number: str, refresh: bool = False) -> Optional[TwilioRoute]:
+    """
+    Async variant of resolve_twilio_route.
+    
+    Cached routes are returned on the event loop; only a miss or a
+    refresh queries the database, through sync_to_async.
+    """
+    if not refresh:
+        hit, route = _cached_twilio_route(whatsapp_number)
+        if hit:
+            return route
+    return await sync_to_async(resolve_twilio_route)(whatsapp_number, refresh=True)
+
+
+def _cached_twilio_route(whatsapp_number: str):
+    """
+    Look up a number in the routing table without touching the database.
+    
+    Returns:
+        (hit, route): hit is False when the number is missing or expired
+    """
+    with _route_cache_lock:
+        cached = _route_cache.get(whatsapp_number)
+        if cached and cached[0] > time.monotonic():
+            _route_cache.move_to_end(whatsapp_number)
+            return True, cached[1]
+    return False, None
+
+
+def clear_twilio_route_cache(whatsapp_number: Optional[str] = None) -> None:
+    """Drop cached webhook routes for one number, or all numbers."""
+    with _route_cache_lock:
+        if whatsapp_number is None:
+            _route_cache.clear()
+        else:
+            _route_cache.pop(whatsapp_number, None)
+
+
+def acquire_send_slot(tenant_id: str) -> bool:
+    """
+    Reserve one of the tenant's concurrent outbound send slots.
+    
+    Limit is TWILIO_MAX_CONCURRENT_SENDS_PER_TENANT. Fails open if the
+    cache is unavailable so sends are never blocked by Redis outages.
+    
+    Returns:
+        bool: True if a slot was acquired (call release_send_slot after)
+    """
+    limit = getattr(settings, 'TWILIO_MAX_CONCURRENT_SENDS_PER_TENANT', 10)
+    key = f"{SEND_SLOT_KEY_PREFIX}{tenant_id}"
+    
+    try:
+        # Timeout bounds leaked slots if a worker dies mid-send
+        cache.add(key, 0, timeout=60)
+        in_flight = cache.incr(key)
+        if in_flight > limit:
+            cache.decr(key)
+            return False
+        return True
+    except Exception as e:
+        logger.warning(f"Send slot tracking unavailable: {str(e)}")
+        return True
+
+
+def release_send_slot(tenant_id: str) -> None:
+    """Release a slot reserved with acquire_send_slot."""
+    try:
+        cache.decr(f"{SEND_SLOT_KEY_PREFIX}{tenant_id}")
+    except Exception as e:
+        logger.warning(f"Failed to release send slot: {str(e)}")
 
 
 def create_twilio_service_for_tenant(tenant) -> TwilioService:
     """
-    Factory function to create TwilioService instance for a tenant.
+    Factory function to get a TwilioService instance for a tenant.
+    
+    Services are cached per process and keyed by credential version, so
+    repeated sends reuse the same Twilio client and pooled HTTP session
+    without decrypting credentials again. Saving new credentials bumps
+    TenantSettings.updated_at, which invalidates the cached entry.
     
     Args:
         tenant: Tenant model instance
@@ -736,15 +1020,39 @@ def create_twilio_service_for_tenant(tenant) -> TwilioService:
         >>> service = create_twilio_service_for_tenant(tenant)
         >>> service.send_whatsapp('+1234567890', 'Hello!')
     """
+    cache_key = str(tenant.id)
+    version = _twilio_credential_version(tenant)
+    
+    if version is not None:
+        with _service_cache_lock:
+            cached = _service_cache.get(cache_key)
+            if cached and cached[0] == version:
+                _service_cache.move_to_end(cache_key)
+                return cached[1]
+    
     # Try to get credentials from TenantSettings first
     try:
-        settings = tenant.settings
-        if settings.has_twilio_configured():
-            return TwilioService(
-                account_sid=settings.twilio_sid,
-                auth_token=settings.twilio_token,
-                from_number=tenant.whatsapp_number
+        settings_obj = tenant.settings
+        if settings_obj.has_twilio_configured():
+            service = TwilioService(
+                account_sid=settings_obj.twilio_sid,
+                auth_token=settings_obj.twilio_token,
+                from_number=tenant.whatsapp_number,
+                http_client=TwilioHttpClient(
+                    pool_connections=True,
+                    timeout=getattr(settings, 'TWILIO_HTTP_TIMEOUT', 10)
+                ),
+                tenant_id=cache_key
             )
+            
+            with _service_cache_lock:
+                _service_cache[cache_key] = (version, service)
+                _service_cache.move_to_end(cache_key)
+                max_size = getattr(settings, 'TWILIO_CLIENT_CACHE_SIZE', 256)
+                while len(_service_cache) > max_size:
+                    _service_cache.popitem(last=False)
+            
+            return service
     except AttributeError:
         pass
     
@@ -2,9 +2,11 @@
 Celery tasks for integration services.
 
 Handles scheduled product synchronization from external sources
-(WooCommerce, Shopify) with error handling and retry logic.
+(WooCommerce, Shopify) and outbound WhatsApp sends, with error handling
+and retry logic.
 """
 import logging
+import traceback
 from celery import shared_task
 from django.db import transaction
 from django.utils import timezone
@@ -353,3 +355,256 @@ def sync_all_shopify_stores():
         'status': 'success',
         'scheduled_count': scheduled_count
     }
+
+
+@shared_task(bind=True, max_retries=3)
+def send_whatsapp_message(
+    self,
+    tenant_id: str,
+    to: str,
+    body: str,
+    media_url: str = None,
+    status_callback: str = None,
+    max_attempts: int = None,
+    message_id: str = None,
+    attempt: int = 0
+):
+    """
+    Send a WhatsApp message for a tenant with non-blocking retries.
+    
+    Failed sends are retried as delayed tasks with exponential backoff
+    (1s, 2s, 4s, ...) so the worker slot is released between attempts.
+    Sends are capped per tenant by TWILIO_MAX_CONCURRENT_SENDS_PER_TENANT;
+    when the tenant is at its limit the task is re-queued shortly instead
+    of waiting. Failed attempts are carried across re-queues in attempt,
+    so throttling never resets the retry budget.
+    
+    Args:
+        tenant_id: UUID of the tenant sending the message
+        to: Recipient phone number in E.164 format
+        body: Message text
+        media_url: Optional media URL
+        status_callback: Optional delivery status callback URL
+        max_attempts: Total attempts this task may make (defaults to
+            max_retries + 1)
+        message_id: Optional outbound Message to mark sent or failed
+        attempt: Failed attempts made before this task was (re-)queued
+        
+    Returns:
+        dict: Message details from TwilioService.send_whatsapp
+    """
+    from apps.tenants.models import Tenant
+    from apps.messaging.models import Message
+    from apps.integrations.services.twilio_service import (
+        TwilioServiceError,
+        acquire_send_slot,
+        release_send_slot,
+        create_twilio_service_for_tenant,
+    )
+    
+    try:
+        tenant = Tenant.objects.get(id=tenant_id)
+    except Tenant.DoesNotExist:
+        logger.error(
+            f"Tenant not found for WhatsApp send",
+            extra={'tenant_id': tenant_id}
+        )
+        return {'status': 'error', 'error': 'Tenant not found', 'tenant_id': tenant_id}
+    
+    # self.retry() keeps kwargs and bumps request.retries; apply_async()
+    # starts again at 0, so failures so far are attempt + request.retries
+    failures = attempt + self.request.retries
+    
+    if not acquire_send_slot(tenant_id):
+        # Tenant is at its concurrency limit - requeue without burning a retry
+        self.apply_async(
+            args=[tenant_id, to, body],
+            kwargs={
+                'media_url': media_url,
+                'status_callback': status_callback,
+                'max_attempts': max_attempts,
+                'message_id': message_id,
+                'attempt': failures,
+            },
+            countdown=1
+        )
+        return {'status': 'throttled', 'tenant_id': tenant_id}
+    
+    try:
+        twilio_service = create_twilio_service_for_tenant(tenant)
+        result = twilio_service.send_whatsapp(
+            to=to,
+            body=body,
+            media_url=media_url,
+            status_callback=status_callback
+        )
+    except TwilioServiceError as e:
+        retries = max_attempts - 1 if max_attempts is not None else self.max_retries
+        if failures >= retries:
+            logger.error(
+                f"WhatsApp send failed after {failures + 1} attempts",
+                extra={'tenant_id': tenant_id, 'message_id': message_id}
+            )
+            if message_id:
+                message = Message.objects.filter(id=message_id).first()
+                if message:
+                    message.mark_failed(error_message=str(e))
+            raise
+        
+        logger.warning(
+            f"WhatsApp send failed, scheduling retry",
+            extra={
+                'tenant_id': tenant_id,
+                'attempt': failures + 1,
+                'max_retries': retries
+            }
+        )
+        raise self.retry(
+            exc=e,
+            countdown=2 ** failures,
+            max_retries=retries - attempt
+        )
+    finally:
+        release_send_slot(tenant_id)
+    
+    if message_id:
+        Message.objects.filter(id=message_id).update(
+            sent_at=timezone.now(),
+            provider_msg_id=result['sid'],
+            provider_status=result['status']
+        )
+    
+    return result
+
+
+@shared_task(bind=True, max_retries=5, acks_late=True)
+def process_twilio_webhook(self, webhook_log_id: str):
+    """
+    Consume a queued Twilio webhook written by the fast-ack ingress.
+    
+    Checks the tenant subscription, stores the inbound message and
+    dispatches it to the bot, then marks the WebhookLog as processed.
+    The row is claimed first with a conditional queued -> processing
+    update, so a requeued task running alongside the original (or a
+    redelivered one) is skipped instead of storing the message twice.
+    
+    Args:
+        webhook_log_id: UUID of the queued WebhookLog
+        
+    Returns:
+        dict: Processing status
+    """
+    from apps.integrations.models import WebhookLog
+    from apps.integrations.services.twilio_service import create_twilio_service_for_tenant
+    from apps.integrations.views import store_and_dispatch_inbound_message
+    from apps.messaging.models import Message
+    
+    claimed = WebhookLog.objects.filter(
+        id=webhook_log_id,
+        status='queued'
+    ).update(status='processing', claimed_at=timezone.now())
+    if not claimed:
+        return {'status': 'skipped', 'webhook_log_id': webhook_log_id}
+    
+    webhook_log = WebhookLog.objects.select_related('tenant').get(id=webhook_log_id)
+    
+    tenant = webhook_log.tenant
+    payload = webhook_log.payload
+    message_sid = payload.get('MessageSid', '')
+    
+    try:
+        if not tenant.is_active():
+            webhook_log.mark_subscription_inactive()
+            try:
+                create_twilio_service_for_tenant(tenant).send_whatsapp(
+                    to=payload.get('From', '').replace('whatsapp:', ''),
+                    body="This business is temporarily unavailable. Please try again later."
+                )
+            except Exception:
+                logger.error(
+                    f"Failed to send subscription inactive message",
+                    extra={'tenant_id': str(tenant.id)},
+                    exc_info=True
+                )
+            return {'status': 'subscription_inactive', 'webhook_log_id': webhook_log_id}
+        
+        already_stored = message_sid and Message.objects.filter(
+            conversation__tenant=tenant,
+            provider_msg_id=message_sid
+        ).exists()
+        if not already_stored:
+            store_and_dispatch_inbound_message(tenant, payload)
+        
+        processing_time = int((timezone.now() - webhook_log.received_at).total_seconds() * 1000)
+        webhook_log.mark_success(processing_time)
+        
+        return {'status': 'success', 'webhook_log_id': webhook_log_id}
+    
+    except Exception as exc:
+        logger.error(
+            f"Error processing queued Twilio webhook",
+            extra={'webhook_log_id': webhook_log_id, 'error': str(exc)},
+            exc_info=True
+        )
+        if self.request.retries >= self.max_retries:
+            webhook_log.mark_error(str(exc), traceback.format_exc())
+            raise
+        # Release the claim so the retry can take it again
+        WebhookLog.objects.filter(id=webhook_log_id, status='processing').update(status='queued')
+        raise self.retry(exc=exc, countdown=2 ** self.request.retries)
+
+
+@shared_task
+def requeue_stale_twilio_webhooks():
+    """
+    Re-enqueue queued Twilio webhooks that no consumer has processed.
+    
+    Covers broker outages at ingress, lost tasks and consumers that died
+    after claiming a row. A row is re-enqueued at most once every
+    TWILIO_WEBHOOK_REQUEUE_AFTER seconds (tracked in requeued_at), so a
+    backlog longer than that is not flooded with duplicate tasks, and is
+    marked as an error after TWILIO_WEBHOOK_MAX_REQUEUES attempts.
+    
+    Returns:
+        dict: Number of webhooks re-enqueued and given up on
+    """
+    from django.conf import settings
+    from datetime import timedelta
+    from django.db.models import F, Q
+    from apps.integrations.models import WebhookLog
+    
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.TWILIO_WEBHOOK_REQUEUE_AFTER)
+    twilio_logs = WebhookLog.objects.filter(provider='twilio')
+    
+    # Claims abandoned by a crashed consumer go back to the queue
+    twilio_logs.filter(status='processing', claimed_at__lt=cutoff).update(status='queued')
+    
+    stale = twilio_logs.filter(
+        Q(requeued_at__isnull=True) | Q(requeued_at__lt=cutoff),
+        status='queued',
+        received_at__lt=cutoff
+    )
+    
+    abandoned = stale.filter(requeue_count__gte=settings.TWILIO_WEBHOOK_MAX_REQUEUES).update(
+        status='error',
+        error_message='Webhook was not processed after repeated requeues',
+        processed_at=now
+    )
+    
+    webhook_log_ids = list(stale.values_list('id', flat=True)[:500])
+    WebhookLog.objects.filter(id__in=webhook_log_ids).update(
+        requeued_at=now,
+        requeue_count=F('requeue_count') + 1
+    )
+    
+    for webhook_log_id in webhook_log_ids:
+        process_twilio_webhook.delay(str(webhook_log_id))
+    
+    if webhook_log_ids or abandoned:
+        logger.warning(
+            f"Re-enqueued stale Twilio webhooks",
+            extra={'count': len(webhook_log_ids), 'abandoned': abandoned}
+        )
+    
+    return {'requeued': len(webhook_log_ids), 'abandoned': abandoned}
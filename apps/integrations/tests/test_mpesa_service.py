@@ -0,0 +1,273 @@
+"""
+Tests for the pooled M-Pesa client, token refresh and STK status polling.
+"""
+import os
+import threading
+import time
+import pytest
+import requests
+from decimal import Decimal
+from unittest.mock import patch
+
+from apps.integrations.services.mpesa_service import (
+    MpesaClient, MpesaCredentials, MpesaError, MpesaService, STK_QUERY_PENDING_ERROR,
+)
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mpesa-service-tests',
+    }
+}
+
+
+class FakeResponse:
+    """Minimal requests.Response stand-in."""
+
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """Records requests; tokens are numbered, POST answers come from a handler."""
+
+    def __init__(self, token_delay=0.0):
+        self.token_delay = token_delay
+        self.token_requests = 0
+        self.token_failures = False
+        self.posts = []
+        self.handler = lambda url, payload, token: FakeResponse(200, {'ResponseCode': '0'})
+        self._lock = threading.Lock()
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def get(self, url, headers=None, timeout=None):
+        if self.token_delay:
+            time.sleep(self.token_delay)
+        with self._lock:
+            self.token_requests += 1
+            number = self.token_requests
+        if self.token_failures:
+            raise requests.exceptions.ConnectionError('down')
+        return FakeResponse(200, {'access_token': f'token-{number}', 'expires_in': '3599'})
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        token = headers['Authorization'].split(' ', 1)[1]
+        with self._lock:
+            self.posts.append((url, json, token))
+        return self.handler(url, json, token)
+
+
+@pytest.fixture
+def credentials():
+    return MpesaCredentials(
+        api_url='https://sandbox.example.test',
+        consumer_key='key-a',
+        consumer_secret='secret-a',
+        shortcode='174379',
+        passkey='passkey',
+    )
+
+
+@pytest.fixture
+def session(settings):
+    settings.CACHES = LOCMEM_CACHES
+    settings.MPESA_TOKEN_REFRESH_MARGIN = 300
+    from django.core.cache import cache
+    cache.clear()
+    MpesaClient._clients.clear()
+    fake = FakeSession()
+    with patch('apps.integrations.services.mpesa_service.requests.Session', return_value=fake):
+        yield fake
+    MpesaClient._clients.clear()
+    cache.clear()
+
+
+def _wait_for_refresh(client):
+    for _ in range(200):
+        if not client._refreshing:
+            return
+        time.sleep(0.01)
+
+
+class TestMpesaClient:
+    """Clients pool connections and keep tokens fresh per credential set."""
+
+    def test_token_reused_and_client_shared(self, session, credentials):
+        for _ in range(3):
+            MpesaService.query_stk_status('ws_CO_1', credentials=credentials)
+
+        assert MpesaClient.for_credentials(credentials) is MpesaClient.for_credentials(credentials)
+        assert session.token_requests == 1
+        assert len(session.posts) == 3
+
+    def test_credentials_get_separate_tokens(self, session, credentials):
+        other = MpesaCredentials(
+            api_url=credentials.api_url, consumer_key='key-b', consumer_secret='secret-b'
+        )
+
+        first = MpesaClient.for_credentials(credentials).get_token()
+        second = MpesaClient.for_credentials(other).get_token()
+
+        assert first != second
+        assert credentials.credential_id != other.credential_id
+        assert session.token_requests == 2
+
+    def test_client_cache_evicts_least_recently_used(self, session, settings, credentials):
+        settings.MPESA_CLIENT_CACHE_SIZE = 2
+        others = [
+            MpesaCredentials(api_url=credentials.api_url, consumer_key=f'key-{i}', consumer_secret='secret')
+            for i in range(2)
+        ]
+
+        first = MpesaClient.for_credentials(credentials)
+        MpesaClient.for_credentials(others[0])
+        assert MpesaClient.for_credentials(credentials) is first
+        MpesaClient.for_credentials(others[1])
+
+        assert len(MpesaClient._clients) == 2
+        assert MpesaClient.for_credentials(credentials) is first
+        assert (os.getpid(), others[0]) not in MpesaClient._clients
+
+    def test_credentials_repr_hides_secrets(self):
+        credentials = MpesaCredentials(
+            api_url='https://sandbox.safaricom.co.ke', consumer_key='key',
+            consumer_secret='s3cret', passkey='p4ss', security_credential='cr3d'
+        )
+
+        text = repr(credentials)
+
+        assert 'key' in text
+        assert not any(secret in text for secret in ('s3cret', 'p4ss', 'cr3d'))
+
+    def test_concurrent_misses_fetch_once(self, session, credentials):
+        session.token_delay = 0.05
+        client = MpesaClient.for_credentials(credentials)
+        tokens = []
+
+        threads = [threading.Thread(target=lambda: tokens.append(client.get_token())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert session.token_requests == 1
+        assert set(tokens) == {'token-1'}
+
+    def test_token_renewed_in_background_before_expiry(self, session, credentials):
+        client = MpesaClient.for_credentials(credentials)
+        assert client.get_token() == 'token-1'
+        client._expires_at = time.time() + 60
+
+        assert client.get_token() == 'token-1'
+        _wait_for_refresh(client)
+
+        assert client.get_token() == 'token-2'
+        assert session.token_requests == 2
+
+    def test_failed_background_refresh_keeps_current_token(self, session, credentials):
+        client = MpesaClient.for_credentials(credentials)
+        client.get_token()
+        client._expires_at = time.time() + 60
+        session.token_failures = True
+
+        assert client.get_token() == 'token-1'
+        _wait_for_refresh(client)
+
+        assert client.get_token() == 'token-1'
+
+    def test_expired_token_without_refresh_raises(self, session, credentials):
+        session.token_failures = True
+
+        with pytest.raises(MpesaError):
+            MpesaClient.for_credentials(credentials).get_token()
+
+    def test_token_shared_through_cache(self, session, credentials):
+        MpesaClient.for_credentials(credentials).get_token()
+        MpesaClient._clients.clear()
+
+        assert MpesaClient.for_credentials(credentials).get_token() == 'token-1'
+        assert session.token_requests == 1
+
+    def test_rejected_token_is_replaced_and_request_retried(self, session, credentials):
+        session.handler = lambda url, payload, token: (
+            FakeResponse(401) if token == 'token-1' else FakeResponse(200, {'ResponseCode': '0'})
+        )
+
+        MpesaService.query_stk_status('ws_CO_1', credentials=credentials)
+
+        assert [token for _, _, token in session.posts] == ['token-1', 'token-2']
+
+    def test_stk_push_uses_credentials(self, session, credentials):
+        session.handler = lambda url, payload, token: FakeResponse(200, {
+            'ResponseCode': '0',
+            'MerchantRequestID': 'm-1',
+            'CheckoutRequestID': 'ws_CO_1',
+            'ResponseDescription': 'Success',
+            'CustomerMessage': 'Success'
+        })
+
+        result = MpesaService.stk_push(
+            '0712345678', Decimal('150'), 'ORD1', 'Order 1',
+            'https://example.test/callback', credentials=credentials
+        )
+
+        url, payload, _ = session.posts[0]
+        assert url == 'https://sandbox.example.test/mpesa/stkpush/v1/processrequest'
+        assert payload['BusinessShortCode'] == '174379'
+        assert payload['PhoneNumber'] == '254712345678'
+        assert result['checkout_request_id'] == 'ws_CO_1'
+
+
+class TestStkStatusPolling:
+    """Pending STK queries are retried in batches with backoff."""
+
+    def test_pending_transactions_retried_with_backoff(self, session, credentials):
+        attempts = {}
+
+        def handler(url, payload, token):
+            checkout_request_id = payload['CheckoutRequestID']
+            attempts[checkout_request_id] = attempts.get(checkout_request_id, 0) + 1
+            if checkout_request_id == 'ws_CO_slow' and attempts[checkout_request_id] < 3:
+                return FakeResponse(500, {'errorCode': STK_QUERY_PENDING_ERROR})
+            return FakeResponse(200, {'CheckoutRequestID': checkout_request_id, 'ResultCode': '0'})
+
+        session.handler = handler
+        with patch('apps.integrations.services.mpesa_service.time.sleep') as sleep:
+            results = MpesaService.poll_stk_statuses(
+                ['ws_CO_fast', 'ws_CO_slow', 'ws_CO_fast'], credentials=credentials, initial_delay=2
+            )
+
+        assert results['ws_CO_fast']['ResultCode'] == '0'
+        assert results['ws_CO_slow']['ResultCode'] == '0'
+        assert attempts == {'ws_CO_fast': 1, 'ws_CO_slow': 3}
+        assert [call.args[0] for call in sleep.call_args_list] == [2, 4]
+        assert session.token_requests == 1
+
+    def test_unresolved_after_max_rounds(self, session, credentials):
+        session.handler = lambda url, payload, token: FakeResponse(500, {'errorCode': STK_QUERY_PENDING_ERROR})
+
+        with patch('apps.integrations.services.mpesa_service.time.sleep'):
+            results = MpesaService.poll_stk_statuses(['ws_CO_1'], credentials=credentials, max_rounds=2)
+
+        assert results == {'ws_CO_1': {'CheckoutRequestID': 'ws_CO_1', 'pending': True}}
+        assert len(session.posts) == 2
+
+    def test_client_errors_are_not_retried(self, session, credentials):
+        session.handler = lambda url, payload, token: FakeResponse(400, {'errorMessage': 'Invalid CheckoutRequestID'})
+
+        with patch('apps.integrations.services.mpesa_service.time.sleep') as sleep:
+            results = MpesaService.poll_stk_statuses(['bad'], credentials=credentials)
+
+        assert results['bad']['error'] == 'Invalid CheckoutRequestID'
+        sleep.assert_not_called()
@@ -0,0 +1,252 @@
+"""
+Tests for TwilioService client caching, retry scheduling and send slots.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from apps.tenants.models import Tenant, TenantSettings
+from apps.integrations.services.twilio_service import (
+    TwilioService,
+    TwilioServiceError,
+    acquire_send_slot,
+    clear_twilio_service_cache,
+    create_twilio_service_for_tenant,
+)
+
+
+@pytest.fixture
+def twilio_tenant(db):
+    tenant = Tenant.objects.create(
+        name='Campaign Shop',
+        slug='campaign-shop',
+        status='active',
+        whatsapp_number='+14155238886'
+    )
+    settings_obj, _ = TenantSettings.objects.get_or_create(tenant=tenant)
+    settings_obj.twilio_sid = 'ACtest123'
+    settings_obj.twilio_token = 'test_token_123'
+    settings_obj.save()
+    clear_twilio_service_cache()
+    yield Tenant.objects.get(id=tenant.id)
+    clear_twilio_service_cache()
+
+
+@pytest.mark.django_db
+class TestTwilioServiceCache:
+    """create_twilio_service_for_tenant reuses clients per credential version."""
+
+    def test_service_reused_across_calls(self, twilio_tenant):
+        first = create_twilio_service_for_tenant(twilio_tenant)
+        second = create_twilio_service_for_tenant(Tenant.objects.get(id=twilio_tenant.id))
+
+        assert first is second
+        assert first.tenant_id == str(twilio_tenant.id)
+
+    def test_credential_update_invalidates_cache(self, twilio_tenant):
+        first = create_twilio_service_for_tenant(twilio_tenant)
+
+        settings_obj = TenantSettings.objects.get(tenant=twilio_tenant)
+        settings_obj.twilio_token = 'rotated_token'
+        settings_obj.save(update_fields=['twilio_token', 'updated_at'])
+
+        second = create_twilio_service_for_tenant(Tenant.objects.get(id=twilio_tenant.id))
+
+        assert second is not first
+        assert second.auth_token == 'rotated_token'
+
+    def test_missing_credentials_raises(self, db):
+        tenant = Tenant.objects.create(
+            name='No Twilio',
+            slug='no-twilio',
+            whatsapp_number='+14155230000'
+        )
+
+        with pytest.raises(ValueError):
+            create_twilio_service_for_tenant(tenant)
+
+
+class TestRetrySendWhatsapp:
+    """retry_send_whatsapp never sleeps in-process."""
+
+    def _service(self, tenant_id=None):
+        service = TwilioService('ACtest123', 'token', '+14155238886', tenant_id=tenant_id)
+        service.send_whatsapp = MagicMock(side_effect=TwilioServiceError('boom'))
+        return service
+
+    @patch('apps.integrations.tasks.send_whatsapp_message.apply_async')
+    def test_failure_schedules_delayed_task(self, mock_apply_async):
+        mock_apply_async.return_value = MagicMock(id='task-1')
+        service = self._service(tenant_id='tenant-1')
+
+        result = service.retry_send_whatsapp('+1234567890', 'Hello', max_retries=3)
+
+        assert result['status'] == 'retry_scheduled'
+        assert result['task_id'] == 'task-1'
+        _, kwargs = mock_apply_async.call_args
+        assert kwargs['args'] == ['tenant-1', '+1234567890', 'Hello']
+        assert kwargs['kwargs']['max_attempts'] == 2
+        assert kwargs['countdown'] == 1
+
+    @patch('apps.integrations.tasks.send_whatsapp_message.apply_async')
+    def test_failure_passes_message_id_to_task(self, mock_apply_async):
+        mock_apply_async.return_value = MagicMock(id='task-1')
+        service = self._service(tenant_id='tenant-1')
+
+        service.retry_send_whatsapp('+1234567890', 'Hello', message_id='msg-1')
+
+        assert mock_apply_async.call_args[1]['kwargs']['message_id'] == 'msg-1'
+
+    def test_failure_without_tenant_raises(self):
+        service = self._service()
+
+        with pytest.raises(TwilioServiceError):
+            service.retry_send_whatsapp('+1234567890', 'Hello')
+
+
+class TestSendSlots:
+    """Per-tenant send concurrency limits."""
+
+    @patch('apps.integrations.services.twilio_service.cache')
+    def test_slot_rejected_over_limit(self, mock_cache, settings):
+        settings.TWILIO_MAX_CONCURRENT_SENDS_PER_TENANT = 2
+        mock_cache.incr.return_value = 3
+
+        assert acquire_send_slot('tenant-1') is False
+        mock_cache.decr.assert_called_once()
+
+    @patch('apps.integrations.services.twilio_service.cache')
+    def test_slot_fails_open_without_cache(self, mock_cache):
+        mock_cache.add.side_effect = ConnectionError('redis down')
+
+        assert acquire_send_slot('tenant-1') is True
+
+
+@pytest.mark.django_db
+class TestSendWhatsappMessageTask:
+    """Throttling keeps the retry budget; outcomes land on the Message."""
+
+    @pytest.fixture
+    def message(self, twilio_tenant):
+        from apps.messaging.models import Conversation, Message
+        from apps.tenants.models import Customer
+
+        customer = Customer.objects.create(tenant=twilio_tenant, phone_e164='+254700000271')
+        conversation = Conversation.objects.create(tenant=twilio_tenant, customer=customer)
+        return Message.objects.create(
+            conversation=conversation,
+            direction='out',
+            message_type='scheduled_promotional',
+            text='Sale today'
+        )
+
+    def test_throttled_requeue_carries_failed_attempts(self, twilio_tenant):
+        from apps.integrations.tasks import send_whatsapp_message
+
+        with patch('apps.integrations.services.twilio_service.acquire_send_slot', return_value=False), \
+                patch.object(send_whatsapp_message, 'apply_async') as mock_requeue:
+            result = send_whatsapp_message.apply(
+                args=[str(twilio_tenant.id), '+254700000271', 'Hi'],
+                kwargs={'attempt': 2}
+            ).get()
+
+        assert result['status'] == 'throttled'
+        assert mock_requeue.call_args[1]['kwargs']['attempt'] == 2
+
+    def test_exhausted_attempts_mark_message_failed(self, twilio_tenant, message):
+        from apps.integrations.tasks import send_whatsapp_message
+
+        with patch('apps.integrations.services.twilio_service.acquire_send_slot', return_value=True), \
+                patch('apps.integrations.services.twilio_service.release_send_slot'), \
+                patch.object(TwilioService, 'send_whatsapp', side_effect=TwilioServiceError('boom')), \
+                patch.object(send_whatsapp_message, 'retry') as mock_retry:
+            outcome = send_whatsapp_message.apply(
+                args=[str(twilio_tenant.id), '+254700000271', 'Sale today'],
+                kwargs={'message_id': str(message.id), 'attempt': 3}
+            )
+
+        assert isinstance(outcome.result, TwilioServiceError)
+        mock_retry.assert_not_called()
+        message.refresh_from_db()
+        assert message.failed_at is not None
+
+    def test_success_marks_message_sent(self, twilio_tenant, message):
+        from apps.integrations.tasks import send_whatsapp_message
+
+        with patch('apps.integrations.services.twilio_service.acquire_send_slot', return_value=True), \
+                patch('apps.integrations.services.twilio_service.release_send_slot'), \
+                patch.object(TwilioService, 'send_whatsapp', return_value={'sid': 'SM1', 'status': 'queued'}):
+            send_whatsapp_message.apply(
+                args=[str(twilio_tenant.id), '+254700000271', 'Sale today'],
+                kwargs={'message_id': str(message.id)}
+            ).get()
+
+        message.refresh_from_db()
+        assert message.provider_msg_id == 'SM1'
+        assert message.sent_at is not None
+
+
+@pytest.mark.django_db
+class TestQueuedDelivery:
+    """MessagingService hands queued sends to the send task."""
+
+    def test_queue_delivery_enqueues_task(self, twilio_tenant, django_capture_on_commit_callbacks):
+        from apps.messaging.services import MessagingService
+        from apps.tenants.models import Customer
+
+        customer = Customer.objects.create(tenant=twilio_tenant, phone_e164='+254700000272')
+
+        with patch('apps.integrations.tasks.send_whatsapp_message.delay') as mock_delay, \
+                patch.object(TwilioService, 'send_whatsapp') as mock_send:
+            with django_capture_on_commit_callbacks(execute=True):
+                message = MessagingService.send_message(
+                    twilio_tenant, customer, 'Sale today',
+                    skip_consent_check=True,
+                    skip_rate_limit_check=True,
+                    queue_delivery=True
+                )
+
+        mock_send.assert_not_called()
+        mock_delay.assert_called_once_with(
+            str(twilio_tenant.id), '+254700000272', 'Sale today',
+            media_url=None, message_id=str(message.id)
+        )
+        assert message.sent_at is None
+
+
+class TestAsyncSend:
+    """asend_whatsapp awaits the Twilio API; ASGI workers pool the session."""
+
+    def _message(self):
+        return MagicMock(
+            sid='SM9', status='queued', date_created=None, error_code=None, error_message=None
+        )
+
+    async def test_asgi_mode_uses_pooled_client(self, settings):
+        settings.ASGI_MODE = True
+        service = TwilioService('ACtest123', 'test_token_123', 'whatsapp:+14155238886')
+        client = MagicMock()
+        client.messages.create_async = AsyncMock(return_value=self._message())
+
+        with patch.object(TwilioService, '_async_client', return_value=client):
+            result = await service.asend_whatsapp('+254700000001', 'Hello', media_url='https://x/1.jpg')
+
+        assert result['sid'] == 'SM9'
+        client.messages.create_async.assert_awaited_once_with(
+            from_='whatsapp:+14155238886', to='whatsapp:+254700000001', body='Hello',
+            media_url=['https://x/1.jpg']
+        )
+
+    async def test_client_is_pooled_per_loop(self, settings):
+        service = TwilioService('ACtest123', 'test_token_123', 'whatsapp:+14155238886')
+
+        assert service._async_client() is service._async_client()
+
+    async def test_errors_are_wrapped(self, settings):
+        settings.ASGI_MODE = True
+        service = TwilioService('ACtest123', 'test_token_123', 'whatsapp:+14155238886')
+        client = MagicMock()
+        client.messages.create_async = AsyncMock(side_effect=RuntimeError('boom'))
+
+        with patch.object(TwilioService, '_async_client', return_value=client):
+            with pytest.raises(TwilioServiceError):
+                await service.asend_whatsapp('+254700000001', 'Hello')
@@ -248,4 +248,227 @@ class TestTwilioStatusCallback:
         
         # Should update message status
         message.refresh_from_db()
-        assert message.status == 'delivered'
\ No newline at end of file
+        assert message.status == 'delivered'
+
+def _sign(url, payload, auth_token):
+    """Compute the X-Twilio-Signature header for a payload."""
+    import hmac
+    import hashlib
+    import base64
+    
+    data = url + ''.join(f'{k}{v}' for k, v in sorted(payload.items()))
+    digest = hmac.new(auth_token.encode('utf-8'), data.encode('utf-8'), hashlib.sha1).digest()
+    return base64.b64encode(digest).decode('utf-8')
+
+
+@pytest.mark.django_db
+class TestTwilioWebhookFastAck:
+    """Test fast-ack ingress and the queued webhook consumer."""
+    
+    @pytest.fixture(autouse=True)
+    def fast_ack(self, settings):
+        """Enable fast-ack mode with an empty routing table."""
+        from apps.integrations.services import clear_twilio_route_cache
+        
+        settings.TWILIO_WEBHOOK_FAST_ACK = True
+        clear_twilio_route_cache()
+        yield
+        clear_twilio_route_cache()
+    
+    @pytest.fixture
+    def tenant(self):
+        """Create a tenant with Twilio credentials."""
+        tenant = Tenant.objects.create(
+            name='Fast Ack Business',
+            slug='fast-ack-business',
+            status='active',
+            whatsapp_number='+14155230001'
+        )
+        tenant_settings = TenantSettings.objects.get(tenant=tenant)
+        tenant_settings.twilio_sid = 'ACfast123'
+        tenant_settings.twilio_token = 'fast_token_123'
+        tenant_settings.save()
+        return tenant
+    
+    def _payload(self, message_sid='SMfast0001'):
+        return {
+            'MessageSid': message_sid,
+            'AccountSid': 'ACfast123',
+            'From': 'whatsapp:+1234567001',
+            'To': 'whatsapp:+14155230001',
+            'Body': 'Do you deliver today?',
+            'NumMedia': '0',
+        }
+    
+    def _post(self, payload, token='fast_token_123'):
+        url = 'https://testserver' + reverse('integrations:twilio-webhook')
+        return Client().post(
+            reverse('integrations:twilio-webhook'),
+            data=payload,
+            secure=True,
+            HTTP_X_TWILIO_SIGNATURE=_sign(url, payload, token)
+        )
+    
+    def test_valid_webhook_is_queued_without_persistence(
+        self, tenant, django_capture_on_commit_callbacks
+    ):
+        """Test that ingress stores the raw payload and enqueues it."""
+        with patch('apps.integrations.tasks.process_twilio_webhook.delay') as mock_delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                response = self._post(self._payload())
+        
+        assert response.status_code == 200
+        webhook_log = WebhookLog.objects.get()
+        assert webhook_log.status == 'queued'
+        assert webhook_log.tenant_id == tenant.id
+        assert webhook_log.idempotency_key == 'twilio:SMfast0001'
+        assert Message.objects.count() == 0
+        mock_delay.assert_called_once_with(str(webhook_log.id))
+    
+    def test_duplicate_message_sid_is_acknowledged_once(
+        self, tenant, django_capture_on_commit_callbacks
+    ):
+        """Test that Twilio redeliveries are dropped by MessageSid."""
+        with patch('apps.integrations.tasks.process_twilio_webhook.delay') as mock_delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                first = self._post(self._payload())
+                second = self._post(self._payload())
+        
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert WebhookLog.objects.count() == 1
+        assert mock_delay.call_count == 1
+    
+    def test_routing_table_is_cached(self, tenant):
+        """Test that repeat webhooks do not look up tenant settings."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with patch('apps.integrations.tasks.process_twilio_webhook.delay'):
+            self._post(self._payload('SMfast0001'))
+            with CaptureQueriesContext(connection) as queries:
+                response = self._post(self._payload('SMfast0002'))
+        
+        assert response.status_code == 200
+        assert not any(
+            query['sql'].lstrip().upper().startswith('SELECT')
+            for query in queries.captured_queries
+        )
+    
+    def test_rotated_token_refreshes_route(self, tenant):
+        """Test that a signature mismatch reloads the cached route once."""
+        with patch('apps.integrations.tasks.process_twilio_webhook.delay'):
+            self._post(self._payload('SMfast0001'))
+            
+            tenant_settings = TenantSettings.objects.get(tenant=tenant)
+            tenant_settings.twilio_token = 'rotated_token_456'
+            tenant_settings.save()
+            
+            response = self._post(self._payload('SMfast0002'), token='rotated_token_456')
+        
+        assert response.status_code == 200
+    
+    def test_invalid_signature_rejected(self, tenant):
+        """Test that ingress rejects bad signatures."""
+        with patch('apps.integrations.tasks.process_twilio_webhook.delay') as mock_delay:
+            response = self._post(self._payload(), token='wrong_token')
+        
+        assert response.status_code == 403
+        assert WebhookLog.objects.get().status == 'unauthorized'
+        mock_delay.assert_not_called()
+    
+    def test_consumer_persists_and_dispatches_once(self, tenant):
+        """Test that the consumer stores the message and is idempotent."""
+        from apps.integrations.tasks import process_twilio_webhook
+        
+        webhook_log = WebhookLog.objects.create(
+            tenant=tenant,
+            provider='twilio',
+            event='message.received',
+            payload=self._payload(),
+            status='queued',
+            idempotency_key='twilio:SMfast0001'
+        )
+        
+        with patch('apps.bot.tasks.process_inbound_message.delay') as mock_dispatch:
+            result = process_twilio_webhook.apply(args=[str(webhook_log.id)]).get()
+            repeat = process_twilio_webhook.apply(args=[str(webhook_log.id)]).get()
+        
+        assert result['status'] == 'success'
+        assert repeat['status'] == 'skipped'
+        message = Message.objects.get()
+        assert message.provider_msg_id == 'SMfast0001'
+        assert message.conversation.tenant == tenant
+        mock_dispatch.assert_called_once_with(str(message.id))
+        webhook_log.refresh_from_db()
+        assert webhook_log.status == 'success'
+    
+    def _queued_log(self, tenant, message_sid='SMfast0001', **fields):
+        return WebhookLog.objects.create(
+            tenant=tenant,
+            provider='twilio',
+            event='message.received',
+            payload=self._payload(message_sid),
+            status='queued',
+            idempotency_key=f'twilio:{message_sid}',
+            **fields
+        )
+    
+    def test_consumer_skips_row_claimed_by_another_worker(self, tenant):
+        """Test that a concurrent duplicate task cannot store the message twice."""
+        from apps.integrations.tasks import process_twilio_webhook
+        
+        webhook_log = self._queued_log(tenant)
+        # The original task has claimed the row and is still running
+        WebhookLog.objects.filter(id=webhook_log.id).update(status='processing')
+        
+        with patch('apps.integrations.views.store_and_dispatch_inbound_message') as mock_store:
+            result = process_twilio_webhook.apply(args=[str(webhook_log.id)]).get()
+        
+        assert result['status'] == 'skipped'
+        mock_store.assert_not_called()
+    
+    def test_requeue_skips_recently_requeued_rows(self, tenant, settings):
+        """Test that the sweeper re-enqueues each stale row once per window."""
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.integrations.tasks import requeue_stale_twilio_webhooks
+        
+        settings.TWILIO_WEBHOOK_REQUEUE_AFTER = 300
+        webhook_log = self._queued_log(tenant)
+        WebhookLog.objects.filter(id=webhook_log.id).update(
+            received_at=timezone.now() - timedelta(minutes=10)
+        )
+        
+        with patch('apps.integrations.tasks.process_twilio_webhook.delay') as mock_delay:
+            first = requeue_stale_twilio_webhooks()
+            second = requeue_stale_twilio_webhooks()
+        
+        assert first['requeued'] == 1
+        assert second['requeued'] == 0
+        mock_delay.assert_called_once_with(str(webhook_log.id))
+        webhook_log.refresh_from_db()
+        assert webhook_log.requeue_count == 1
+    
+    def test_requeue_recovers_abandoned_claims_and_gives_up(self, tenant, settings):
+        """Test that dead claims are retried and hopeless rows marked failed."""
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.integrations.tasks import requeue_stale_twilio_webhooks
+        
+        settings.TWILIO_WEBHOOK_MAX_REQUEUES = 3
+        long_ago = timezone.now() - timedelta(hours=1)
+        abandoned = self._queued_log(tenant, 'SMfast0001')
+        hopeless = self._queued_log(tenant, 'SMfast0002', requeue_count=3)
+        WebhookLog.objects.filter(id=abandoned.id).update(
+            status='processing', claimed_at=long_ago, received_at=long_ago
+        )
+        WebhookLog.objects.filter(id=hopeless.id).update(received_at=long_ago)
+        
+        with patch('apps.integrations.tasks.process_twilio_webhook.delay') as mock_delay:
+            result = requeue_stale_twilio_webhooks()
+        
+        assert result == {'requeued': 1, 'abandoned': 1}
+        mock_delay.assert_called_once_with(str(abandoned.id))
+        hopeless.refresh_from_db()
+        assert hopeless.status == 'error'
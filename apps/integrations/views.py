@@ -9,16 +9,21 @@ import hashlib
 import hmac
 import base64
 from typing import Optional, Dict, Any
+from asgiref.sync import sync_to_async
 from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from django.db import transaction
+from django.db import transaction, IntegrityError
+from django.conf import settings as django_settings
 
 from apps.tenants.models import Tenant, Customer
 from apps.messaging.models import Conversation, Message
+from apps.messaging.services.message_burst_service import MessageBurstService
 from apps.integrations.models import WebhookLog
-from apps.integrations.services import TwilioService
+from apps.integrations.services import TwilioService, aresolve_twilio_route
 from apps.core.logging import SecurityLogger
 
 logger = logging.getLogger(__name__)
@@ -449,11 +454,213 @@ def handle_browse_button(tenant, conversation: Conversation, button_payload: str
     logger.info(f"Browse button clicked: {button_payload}")
 
 
-@csrf_exempt
-@require_http_methods(["POST"])
-def twilio_webhook(request):
+def store_and_dispatch_inbound_message(tenant: Tenant, payload: Dict[str, Any]) -> Message:
     """
-    Handle incoming Twilio WhatsApp webhook.
+    Persist an inbound WhatsApp message and hand it to the bot.
+    
+    Gets or creates the customer and conversation, stores the message,
+    handles button clicks and enqueues intent processing. Shared by the
+    synchronous webhook and the process_twilio_webhook consumer.
+    
+    Args:
+        tenant: Tenant instance
+        payload: Twilio webhook payload
+        
+    Returns:
+        The stored inbound Message
+    """
+    from_number = payload.get('From', '').replace('whatsapp:', '')
+    message_sid = payload.get('MessageSid', '')
+    button_payload = payload.get('ButtonPayload', '')
+    button_text = payload.get('ButtonText', '')
+    
+    with transaction.atomic():
+        customer = get_or_create_customer(tenant, from_number)
+        conversation = get_or_create_conversation(tenant, customer)
+        
+        message = Message.objects.create(
+            conversation=conversation,
+            direction='in',
+            message_type='customer_inbound',
+            text=payload.get('Body', ''),
+            payload=payload,
+            provider_msg_id=message_sid
+        )
+        
+        logger.info(
+            f"Inbound message stored",
+            extra={
+                'tenant_id': str(tenant.id),
+                'customer_id': str(customer.id),
+                'conversation_id': str(conversation.id),
+                'message_id': str(message.id)
+            }
+        )
+    
+    # Handle button clicks (feedback, actions, etc.)
+    if button_payload:
+        handle_button_click(
+            tenant=tenant,
+            conversation=conversation,
+            customer=customer,
+            button_payload=button_payload,
+            button_text=button_text,
+            message=message
+        )
+    
+    # Trigger intent processing (coalesced with rapid follow-ups when enabled)
+    MessageBurstService.dispatch(message)
+    
+    logger.info(
+        f"Intent processing task enqueued",
+        extra={'message_id': str(message.id)}
+    )
+    
+    return message
+
+
+def enqueue_twilio_webhook(webhook_log_id: str):
+    """
+    Hand a queued webhook to process_twilio_webhook.
+    
+    Broker errors are logged, not raised: the row stays queued and
+    requeue_stale_twilio_webhooks picks it up later.
+    """
+    from apps.integrations.tasks import process_twilio_webhook
+    
+    try:
+        process_twilio_webhook.delay(webhook_log_id)
+    except Exception:
+        logger.error(
+            f"Failed to enqueue Twilio webhook, left for requeue",
+            extra={'webhook_log_id': webhook_log_id},
+            exc_info=True
+        )
+
+
+def queue_twilio_webhook(
+    tenant_id: str,
+    payload: Dict[str, Any],
+    headers: Dict[str, str],
+    ip_address: Optional[str],
+    user_agent: Optional[str]
+) -> Optional[str]:
+    """
+    Store a verified webhook as a queued WebhookLog (the outbox).
+    
+    The row is keyed by MessageSid so Twilio redeliveries are dropped,
+    and process_twilio_webhook is enqueued once it commits.
+    
+    Returns:
+        The WebhookLog id, or None for a duplicate MessageSid
+    """
+    message_sid = payload.get('MessageSid', '')
+    
+    try:
+        with transaction.atomic():
+            webhook_log = WebhookLog.objects.create(
+                tenant_id=tenant_id,
+                provider='twilio',
+                event='message.received',
+                payload=payload,
+                headers=headers,
+                status='queued',
+                idempotency_key=f'twilio:{message_sid}' if message_sid else None,
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+    except IntegrityError:
+        logger.info(
+            f"Duplicate Twilio webhook ignored",
+            extra={'message_sid': message_sid}
+        )
+        return None
+    
+    webhook_log_id = str(webhook_log.id)
+    transaction.on_commit(lambda: enqueue_twilio_webhook(webhook_log_id))
+    
+    return webhook_log_id
+
+
+async def twilio_webhook_fast_ack(request, payload: Dict[str, Any]) -> HttpResponse:
+    """
+    Verify, durably enqueue and acknowledge a Twilio webhook.
+    
+    Used when TWILIO_WEBHOOK_FAST_ACK is enabled. The signature is
+    checked against the cached routing table and the raw payload is
+    stored as a queued WebhookLog (see queue_twilio_webhook); the
+    response returns without touching customers, conversations or
+    messages. A cached route is verified on the event loop, so the
+    only blocking work is the outbox insert.
+    
+    Returns:
+        HttpResponse with 200 once queued (or for a duplicate MessageSid)
+        HttpResponse with 404 if no tenant owns the number
+        HttpResponse with 403 if signature verification fails
+    """
+    to_number = payload.get('To', '').replace('whatsapp:', '')
+    signature = request.META.get('HTTP_X_TWILIO_SIGNATURE', '')
+    full_url = request.build_absolute_uri()
+    headers = {
+        'X-Twilio-Signature': signature,
+        'User-Agent': request.META.get('HTTP_USER_AGENT', ''),
+    }
+    
+    route = await aresolve_twilio_route(to_number)
+    if route is None:
+        logger.warning(
+            f"Failed to resolve tenant from Twilio webhook",
+            extra={'to_number': to_number}
+        )
+        return HttpResponse('Tenant not found', status=404)
+    
+    is_valid = verify_twilio_signature(full_url, payload, signature, route.auth_token)
+    if not is_valid:
+        # Credentials may have been rotated since the route was cached
+        route = await aresolve_twilio_route(to_number, refresh=True)
+        is_valid = route is not None and verify_twilio_signature(
+            full_url, payload, signature, route.auth_token
+        )
+    
+    if not is_valid:
+        tenant_id = route.tenant_id if route else None
+        await WebhookLog.objects.acreate(
+            tenant_id=tenant_id,
+            provider='twilio',
+            event='message.received',
+            payload=payload,
+            headers=headers,
+            status='unauthorized',
+            error_message='Twilio signature verification failed',
+            processed_at=timezone.now(),
+            ip_address=request.META.get('REMOTE_ADDR'),
+            user_agent=request.META.get('HTTP_USER_AGENT')
+        )
+        SecurityLogger.log_invalid_webhook_signature(
+            provider='twilio',
+            tenant_id=tenant_id,
+            ip_address=request.META.get('REMOTE_ADDR'),
+            url=full_url,
+            user_agent=request.META.get('HTTP_USER_AGENT')
+        )
+        return HttpResponse('Unauthorized', status=403)
+    
+    await sync_to_async(queue_twilio_webhook)(
+        route.tenant_id,
+        payload,
+        headers,
+        request.META.get('REMOTE_ADDR'),
+        request.META.get('HTTP_USER_AGENT')
+    )
+    
+    return HttpResponse('OK', status=200)
+
+
+def twilio_webhook_inline(request, payload: Dict[str, Any]) -> HttpResponse:
+    """
+    Process an incoming Twilio WhatsApp webhook inline (blocking).
+    
+    Used when TWILIO_WEBHOOK_FAST_ACK is disabled.
     
     Process flow:
     1. Create webhook log entry
@@ -474,19 +681,11 @@ def twilio_webhook(request):
     webhook_log = None
     
     try:
-        # Parse webhook payload
-        payload = dict(request.POST.items())
-        
         # Extract key fields
         from_number = payload.get('From', '').replace('whatsapp:', '')
         to_number = payload.get('To', '').replace('whatsapp:', '')
-        message_body = payload.get('Body', '')
         message_sid = payload.get('MessageSid', '')
         
-        # Check if this is a button response
-        button_payload = payload.get('ButtonPayload', '')
-        button_text = payload.get('ButtonText', '')
-        
         logger.info(
             f"Twilio webhook received",
             extra={
@@ -582,50 +781,8 @@ def twilio_webhook(request):
             
             return HttpResponse('Subscription inactive', status=503)
         
-        # Step 5: Get or create customer and conversation
-        with transaction.atomic():
-            customer = get_or_create_customer(tenant, from_number)
-            conversation = get_or_create_conversation(tenant, customer)
-            
-            # Step 6: Store inbound message
-            message = Message.objects.create(
-                conversation=conversation,
-                direction='in',
-                message_type='customer_inbound',
-                text=message_body,
-                payload=payload,
-                provider_msg_id=message_sid
-            )
-            
-            logger.info(
-                f"Inbound message stored",
-                extra={
-                    'tenant_id': str(tenant.id),
-                    'customer_id': str(customer.id),
-                    'conversation_id': str(conversation.id),
-                    'message_id': str(message.id)
-                }
-            )
-        
-        # Handle button clicks (feedback, actions, etc.)
-        if button_payload:
-            handle_button_click(
-                tenant=tenant,
-                conversation=conversation,
-                customer=customer,
-                button_payload=button_payload,
-                button_text=button_text,
-                message=message
-            )
-        
-        # Step 7: Trigger intent processing
-        from apps.bot.tasks import process_inbound_message
-        process_inbound_message.delay(str(message.id))
-        
-        logger.info(
-            f"Intent processing task enqueued",
-            extra={'message_id': str(message.id)}
-        )
+        # Steps 5-7: Store message, handle buttons and trigger intent processing
+        store_and_dispatch_inbound_message(tenant, payload)
         
         # Mark webhook as successfully processed
         processing_time = int((timezone.now() - start_time).total_seconds() * 1000)
@@ -653,6 +810,30 @@ def twilio_webhook(request):
         return HttpResponse('Internal error', status=200)
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class TwilioWebhookView(View):
+    """
+    Handle incoming Twilio WhatsApp webhook.
+    
+    With TWILIO_WEBHOOK_FAST_ACK enabled the request is only verified
+    and queued on the event loop (see twilio_webhook_fast_ack), which is
+    the recommended mode under ASGI. Otherwise it is processed inline
+    (twilio_webhook_inline) in one sync_to_async call.
+    """
+    
+    http_method_names = ['post']
+    
+    async def post(self, request):
+        """Acknowledge or process a Twilio webhook."""
+        payload = dict(request.POST.items())
+        if django_settings.TWILIO_WEBHOOK_FAST_ACK:
+            return await twilio_webhook_fast_ack(request, payload)
+        return await sync_to_async(twilio_webhook_inline)(request, payload)
+
+
+twilio_webhook = TwilioWebhookView.as_view()
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def twilio_status_callback(request):
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagequeue',
+            name='claim_token',
+            field=models.CharField(blank=True, help_text='Token of the burst claim that moved this entry to processing', max_length=32, null=True),
+        ),
+    ]
@@ -143,6 +143,7 @@ class Conversation(BaseModel):
             models.Index(fields=['tenant', 'status', 'updated_at']),
             models.Index(fields=['tenant', 'updated_at']),
             models.Index(fields=['status', 'updated_at']),
+            models.Index(fields=['tenant', 'created_at', 'id']),
         ]
     
     def __str__(self):
@@ -342,7 +343,7 @@ class Message(BaseModel):
         db_table = 'messages'
         ordering = ['created_at']
         indexes = [
-            models.Index(fields=['conversation', 'created_at']),
+            models.Index(fields=['conversation', 'created_at', 'id']),
             models.Index(fields=['conversation', 'direction', 'created_at']),
             models.Index(fields=['provider_msg_id']),
             models.Index(fields=['message_type', 'created_at']),
@@ -1157,77 +1158,51 @@ class MessageCampaign(BaseModel):
             return True
         return False
     
-    def increment_delivery(self):
+    def _increment_counter(self, field):
         """
-        Increment delivery count atomically.
+        Increment a delivery/engagement counter.
         
-        Uses F() expression to prevent race conditions in concurrent campaign sends.
+        Uses an F() expression to prevent race conditions between concurrent
+        workers. With CAMPAIGN_COUNTER_BUFFERING the increment is buffered in
+        Redis after commit and flushed to the row periodically; the in-memory
+        value is bumped so callers still see their own increment.
         """
+        from django.db import transaction
         from django.db.models import F
-        MessageCampaign.objects.filter(id=self.id).update(
-            delivery_count=F('delivery_count') + 1
-        )
-        self.refresh_from_db(fields=['delivery_count'])
+        from apps.messaging.services.campaign_counters import CampaignCounters
+        
+        if CampaignCounters.buffering_enabled():
+            campaign_id = self.id
+            transaction.on_commit(lambda: CampaignCounters.increment(campaign_id, field))
+            setattr(self, field, getattr(self, field) + 1)
+            return
+        
+        MessageCampaign.objects.filter(id=self.id).update(**{field: F(field) + 1})
+        self.refresh_from_db(fields=[field])
+    
+    def increment_delivery(self):
+        """Increment delivery count atomically."""
+        self._increment_counter('delivery_count')
     
     def increment_delivered(self):
-        """
-        Increment delivered count atomically.
-        
-        Uses F() expression to prevent race conditions in concurrent deliveries.
-        """
-        from django.db.models import F
-        MessageCampaign.objects.filter(id=self.id).update(
-            delivered_count=F('delivered_count') + 1
-        )
-        self.refresh_from_db(fields=['delivered_count'])
+        """Increment delivered count atomically."""
+        self._increment_counter('delivered_count')
     
     def increment_failed(self):
-        """
-        Increment failed count atomically.
-        
-        Uses F() expression to prevent race conditions in concurrent failures.
-        """
-        from django.db.models import F
-        MessageCampaign.objects.filter(id=self.id).update(
-            failed_count=F('failed_count') + 1
-        )
-        self.refresh_from_db(fields=['failed_count'])
+        """Increment failed count atomically."""
+        self._increment_counter('failed_count')
     
     def increment_read(self):
-        """
-        Increment read count atomically.
-        
-        Uses F() expression to prevent race conditions in concurrent read receipts.
-        """
-        from django.db.models import F
-        MessageCampaign.objects.filter(id=self.id).update(
-            read_count=F('read_count') + 1
-        )
-        self.refresh_from_db(fields=['read_count'])
+        """Increment read count atomically."""
+        self._increment_counter('read_count')
     
     def increment_response(self):
-        """
-        Increment response count atomically.
-        
-        Uses F() expression to prevent race conditions in concurrent responses.
-        """
-        from django.db.models import F
-        MessageCampaign.objects.filter(id=self.id).update(
-            response_count=F('response_count') + 1
-        )
-        self.refresh_from_db(fields=['response_count'])
+        """Increment response count atomically."""
+        self._increment_counter('response_count')
     
     def increment_conversion(self):
-        """
-        Increment conversion count atomically.
-        
-        Uses F() expression to prevent race conditions in concurrent conversions.
-        """
-        from django.db.models import F
-        MessageCampaign.objects.filter(id=self.id).update(
-            conversion_count=F('conversion_count') + 1
-        )
-        self.refresh_from_db(fields=['conversion_count'])
+        """Increment conversion count atomically."""
+        self._increment_counter('conversion_count')
     
     def validate_buttons(self):
         """
@@ -1537,6 +1512,12 @@ class MessageQueue(BaseModel):
         blank=True,
         help_text="Timestamp when message was processed"
     )
+    claim_token = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True,
+        help_text="Token of the burst claim that moved this entry to processing"
+    )
     
     # Error tracking
     error_message = models.TextField(
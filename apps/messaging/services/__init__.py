@@ -4,6 +4,8 @@ Messaging services for consent management, message delivery, and campaigns.
 from .consent_service import ConsentService
 from .messaging_service import MessagingService, MessagingServiceError, RateLimitExceeded, ConsentRequired
 from .campaign_service import CampaignService
+from .campaign_counters import CampaignCounters
+from .message_burst_service import MessageBurstService
 
 __all__ = [
     'ConsentService',
@@ -12,4 +14,6 @@ __all__ = [
     'RateLimitExceeded',
     'ConsentRequired',
     'CampaignService',
+    'CampaignCounters',
+    'MessageBurstService',
 ]
@@ -0,0 +1,195 @@
+"""
+Buffered MessageCampaign delivery and engagement counters.
+
+Status callbacks for a large send arrive in bursts, and an UPDATE per
+event serialises every worker on the campaign row. With
+CAMPAIGN_COUNTER_BUFFERING enabled, increments go to a Redis hash per
+campaign instead and a periodic task folds them into the row with one
+F()-based UPDATE. Reports add the unflushed delta at read time.
+
+Hash layout (campaign:counters:{campaign_id}):
+    delivery_count   -> pending increment
+    read_count       -> pending increment
+    ...
+"""
+import logging
+from django.conf import settings
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'campaign:counters'
+DIRTY_KEY = f'{KEY_PREFIX}:dirty'
+
+COUNTER_FIELDS = [
+    'delivery_count', 'delivered_count', 'failed_count',
+    'read_count', 'response_count', 'conversion_count',
+]
+
+
+def _redis_client():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _counter_key(campaign_id):
+    return f"{KEY_PREFIX}:{campaign_id}"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _parse_deltas(raw):
+    """Convert a raw counter hash into {field: int}, dropping unknown/zero fields."""
+    deltas = {}
+    for field, value in (raw or {}).items():
+        field = _decode(field)
+        if field not in COUNTER_FIELDS:
+            continue
+        amount = int(_decode(value))
+        if amount:
+            deltas[field] = amount
+    return deltas
+
+
+class CampaignCounters:
+    """
+    Service for buffering campaign counter increments in Redis.
+
+    Increments fall back to a direct F() update when Redis is
+    unavailable, so counts are never dropped; reads of the pending
+    delta return nothing in that case.
+    """
+
+    @staticmethod
+    def buffering_enabled():
+        """Return True when increments should be buffered in Redis."""
+        return getattr(settings, 'CAMPAIGN_COUNTER_BUFFERING', False)
+
+    @staticmethod
+    def increment(campaign_id, field, amount=1):
+        """
+        Add to a campaign counter.
+
+        Args:
+            campaign_id: MessageCampaign UUID
+            field: Counter name from COUNTER_FIELDS
+            amount: Increment
+        """
+        key = _counter_key(campaign_id)
+
+        try:
+            pipe = _redis_client().pipeline(transaction=False)
+            pipe.hincrby(key, field, int(amount))
+            pipe.expire(key, settings.CAMPAIGN_COUNTER_TTL)
+            # Added after the increment so a concurrent flush that
+            # snapshots the hash first still leaves the campaign dirty
+            pipe.sadd(DIRTY_KEY, str(campaign_id))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to buffer campaign counter {field}, writing directly: {e}")
+            CampaignCounters._apply(campaign_id, {field: int(amount)})
+
+    @staticmethod
+    def pending(campaign_id):
+        """
+        Read the unflushed increments for a campaign.
+
+        Args:
+            campaign_id: MessageCampaign UUID
+
+        Returns:
+            dict: {field: delta} for fields with pending increments
+        """
+        if not CampaignCounters.buffering_enabled():
+            return {}
+
+        try:
+            raw = _redis_client().hgetall(_counter_key(campaign_id))
+        except Exception as e:
+            logger.warning(f"Failed to read pending campaign counters: {e}")
+            return {}
+
+        return _parse_deltas(raw)
+
+    @staticmethod
+    def refresh(campaign):
+        """
+        Load current counter values onto a campaign instance.
+
+        Re-reads the counter columns and adds the unflushed increments,
+        so instances that bumped their own counters in memory are not
+        counted twice. The instance must not be saved afterwards with
+        these fields, otherwise the delta would be written twice. A
+        no-op when buffering is disabled.
+
+        Args:
+            campaign: MessageCampaign instance
+
+        Returns:
+            MessageCampaign: The same instance
+        """
+        if not CampaignCounters.buffering_enabled():
+            return campaign
+
+        campaign.refresh_from_db(fields=COUNTER_FIELDS)
+        for field, delta in CampaignCounters.pending(campaign.id).items():
+            setattr(campaign, field, getattr(campaign, field) + delta)
+        return campaign
+
+    @staticmethod
+    def flush():
+        """
+        Fold buffered increments into MessageCampaign rows.
+
+        Each dirty hash is read and deleted in one MULTI so increments
+        arriving during the flush land in a fresh hash; each campaign
+        then gets a single F()-based UPDATE. Deltas whose UPDATE fails
+        are pushed back into Redis for the next run.
+
+        Returns:
+            int: Number of campaign rows written
+        """
+        try:
+            client = _redis_client()
+            campaign_ids = [_decode(member) for member in client.smembers(DIRTY_KEY)]
+            if not campaign_ids:
+                return 0
+            pipe = client.pipeline(transaction=True)
+            for campaign_id in campaign_ids:
+                pipe.hgetall(_counter_key(campaign_id))
+                pipe.delete(_counter_key(campaign_id))
+            pipe.srem(DIRTY_KEY, *campaign_ids)
+            results = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to read campaign counters for flush: {e}")
+            return 0
+
+        written = 0
+        for campaign_id, raw in zip(campaign_ids, results[0::2]):
+            deltas = _parse_deltas(raw)
+            if not deltas:
+                continue
+            try:
+                CampaignCounters._apply(campaign_id, deltas)
+                written += 1
+            except Exception as e:
+                logger.error(
+                    f"Failed to flush campaign counters, re-buffering",
+                    extra={'campaign_id': campaign_id, 'deltas': deltas},
+                    exc_info=True
+                )
+                for field, amount in deltas.items():
+                    CampaignCounters.increment(campaign_id, field, amount)
+
+        return written
+
+    @staticmethod
+    def _apply(campaign_id, deltas):
+        """Write deltas to the campaign row with a single F() update."""
+        from apps.messaging.models import MessageCampaign
+
+        MessageCampaign.objects.filter(id=campaign_id).update(
+            **{field: F(field) + amount for field, amount in deltas.items()}
+        )
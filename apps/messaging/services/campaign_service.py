@@ -11,6 +11,7 @@ from django.utils import timezone
 from apps.messaging.models import MessageCampaign, Message, Conversation
 from apps.messaging.services.messaging_service import MessagingService
 from apps.messaging.services.consent_service import ConsentService
+from apps.messaging.services.campaign_counters import CampaignCounters
 from apps.tenants.models import Customer
 
 logger = logging.getLogger(__name__)
@@ -208,11 +209,9 @@ class CampaignService:
         total_matching = queryset.count()
         
         # Count customers with promotional consent
-        with_consent = 0
-        for customer in queryset:
-            prefs = self.consent_service.get_preferences(tenant, customer)
-            if prefs and prefs.promotional_messages:
-                with_consent += 1
+        with_consent = self.consent_service.annotate_consent(
+            queryset, 'scheduled_promotional'
+        ).filter(has_consent=True).count()
         
         logger.info(
             f"Campaign reach for tenant {tenant.slug}: {total_matching} total, {with_consent} with consent",
@@ -273,14 +272,22 @@ class CampaignService:
         # Apply target criteria filtering
         queryset = self._apply_target_criteria(queryset, campaign.target_criteria)
         
+        # Load targets with promotional consent resolved in the same query
+        customers = list(self.consent_service.annotate_consent(
+            queryset, 'scheduled_promotional'
+        ))
+        self.consent_service.ensure_preferences_many(
+            campaign.tenant, [customer.id for customer in customers]
+        )
+        
         # Prepare A/B test variants if applicable
         if campaign.is_ab_test and campaign.variants:
             customer_assignments = self._assign_ab_variants(
-                list(queryset),
+                customers,
                 campaign.variants
             )
         else:
-            customer_assignments = {customer.id: None for customer in queryset}
+            customer_assignments = {customer.id: None for customer in customers}
         
         # Execute campaign
         results = {
@@ -291,13 +298,12 @@ class CampaignService:
             'errors': []
         }
         
-        for customer in queryset:
+        for customer in customers:
             results['targeted'] += 1
             campaign.increment_delivery()
             
             # Check consent
-            prefs = self.consent_service.get_preferences(campaign.tenant, customer)
-            if not prefs or not prefs.promotional_messages:
+            if not customer.has_consent:
                 results['skipped_no_consent'] += 1
                 continue
             
@@ -339,7 +345,9 @@ class CampaignService:
                     message_type='scheduled_promotional',
                     template_id=campaign.template.id if campaign.template else None,
                     conversation=conversation,
-                    media_url=campaign.media_url
+                    media_url=campaign.media_url,
+                    skip_consent_check=True,  # Resolved by annotate_consent above
+                    queue_delivery=True
                 )
                 
                 # Store rich media payload in message
@@ -728,6 +736,9 @@ class CampaignService:
                 }
             }
         """
+        # Include increments still buffered in Redis
+        CampaignCounters.refresh(campaign)
+        
         # Calculate duration
         duration_seconds = None
         if campaign.started_at and campaign.completed_at:
@@ -6,9 +6,12 @@ Handles:
 - Updating consent with audit logging
 - Checking consent before sending messages
 - Automatic preference creation on first interaction
+- Batched consent checks for campaigns, reminders and re-engagement
 """
 import logging
 from django.db import transaction
+from django.db.models import BooleanField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from apps.messaging.models import CustomerPreferences, ConsentEvent
 from apps.core.cache import (
@@ -17,6 +20,24 @@ from apps.core.cache import (
 
 logger = logging.getLogger(__name__)
 
+# Message types mapped to the preference field that governs them
+CONSENT_FIELD_MAP = {
+    'transactional': 'transactional_messages',
+    'reminder': 'reminder_messages',
+    'promotional': 'promotional_messages',
+    'automated_transactional': 'transactional_messages',
+    'automated_reminder': 'reminder_messages',
+    'automated_reengagement': 'promotional_messages',
+    'scheduled_promotional': 'promotional_messages',
+}
+
+# Values used for customers who have no preferences record yet
+DEFAULT_CONSENT = {
+    'transactional_messages': True,
+    'reminder_messages': True,
+    'promotional_messages': False,
+}
+
 
 class ConsentService:
     """
@@ -80,6 +101,13 @@ class ConsentService:
         Args:
             preferences: CustomerPreferences instance
         """
+        ConsentEvent.objects.bulk_create(
+            ConsentService._initial_consent_events(preferences)
+        )
+    
+    @staticmethod
+    def _initial_consent_events(preferences):
+        """Build the initial ConsentEvent rows for a new preferences record."""
         consent_types = [
             ('transactional_messages', preferences.transactional_messages),
             ('reminder_messages', preferences.reminder_messages),
@@ -89,8 +117,8 @@ class ConsentService:
         events = []
         for consent_type, value in consent_types:
             events.append(ConsentEvent(
-                tenant=preferences.tenant,
-                customer=preferences.customer,
+                tenant_id=preferences.tenant_id,
+                customer_id=preferences.customer_id,
                 preferences=preferences,
                 consent_type=consent_type,
                 previous_value=False,  # No previous value for initial creation
@@ -99,7 +127,107 @@ class ConsentService:
                 reason='Initial preference creation with default values'
             ))
         
-        ConsentEvent.objects.bulk_create(events)
+        return events
+    
+    @staticmethod
+    def ensure_preferences_many(tenant, customer_ids):
+        """
+        Create default preferences for customers that have none.
+        
+        Uses one query to find existing records and bulk inserts for the
+        rest, logging the same initial consent events as get_preferences.
+        
+        Args:
+            tenant: Tenant instance
+            customer_ids: Iterable of customer IDs
+            
+        Returns:
+            int: Number of preference records created
+        """
+        customer_ids = {str(customer_id) for customer_id in customer_ids}
+        if not customer_ids:
+            return 0
+        
+        existing = {
+            str(customer_id) for customer_id in CustomerPreferences.objects.filter(
+                tenant=tenant,
+                customer_id__in=customer_ids
+            ).values_list('customer_id', flat=True)
+        }
+        missing = customer_ids - existing
+        if not missing:
+            return 0
+        
+        candidates = [
+            CustomerPreferences(tenant=tenant, customer_id=customer_id, **DEFAULT_CONSENT)
+            for customer_id in missing
+        ]
+        with transaction.atomic():
+            CustomerPreferences.objects.bulk_create(candidates, ignore_conflicts=True)
+            # Primary keys are generated client-side, so rows carrying our ids
+            # are the ones this call inserted (not a concurrent creator's)
+            created = list(CustomerPreferences.objects.filter(
+                id__in=[candidate.id for candidate in candidates]
+            ))
+            ConsentEvent.objects.bulk_create([
+                event
+                for preferences in created
+                for event in ConsentService._initial_consent_events(preferences)
+            ])
+        
+        if created:
+            logger.info(
+                f"Created default preferences for {len(created)} customers "
+                f"in tenant {tenant.slug}"
+            )
+        
+        return len(created)
+    
+    @staticmethod
+    def _consent_overrides(tenant, consent_field):
+        """
+        Get IDs of customers whose consent differs from the default.
+        
+        For fields that default to True this is the opted-out set; for
+        promotional messages it is the opted-in set. Cached per tenant and
+        invalidated by update_consent.
+        
+        Args:
+            tenant: Tenant instance
+            consent_field: CustomerPreferences boolean field name
+            
+        Returns:
+            frozenset: Customer ID strings
+        """
+        cache_key = CacheKeys.format(
+            CacheKeys.CONSENT_OVERRIDES,
+            tenant_id=str(tenant.id),
+            consent_field=consent_field
+        )
+        
+        overrides = CacheService.get(cache_key)
+        if overrides is not None:
+            return overrides
+        
+        overrides = frozenset(
+            str(customer_id) for customer_id in CustomerPreferences.objects.filter(
+                tenant=tenant,
+                **{consent_field: not DEFAULT_CONSENT[consent_field]}
+            ).values_list('customer_id', flat=True)
+        )
+        CacheService.set(cache_key, overrides, CacheTTL.CUSTOMER_PREFERENCES)
+        
+        return overrides
+    
+    @staticmethod
+    def _invalidate_consent_overrides(tenant):
+        """Drop the tenant's cached consent override sets."""
+        for consent_field in DEFAULT_CONSENT:
+            CacheService.delete(CacheKeys.format(
+                CacheKeys.CONSENT_OVERRIDES,
+                tenant_id=str(tenant.id),
+                consent_field=consent_field
+            ))
     
     @staticmethod
     @transaction.atomic
@@ -153,6 +281,12 @@ class ConsentService:
             str(tenant.id),
             str(customer.id)
         )
+        # Override sets are cached outside the transaction; drop them only
+        # once the change is visible, or a concurrent read can re-cache the
+        # old set
+        transaction.on_commit(
+            lambda: ConsentService._invalidate_consent_overrides(tenant)
+        )
         
         # Create audit event
         event = ConsentEvent.objects.create(
@@ -190,6 +324,76 @@ class ConsentService:
         prefs = ConsentService.get_preferences(tenant, customer)
         return prefs.has_consent_for(message_type)
     
+    @staticmethod
+    def check_consent_many(tenant, customer_ids, message_type, create_missing=True):
+        """
+        Check consent for many customers of one tenant at once.
+        
+        Answers come from the tenant's cached consent override set (one
+        query on a cache miss) instead of a preferences lookup per customer.
+        Customers without preferences get the defaults, as check_consent
+        would give them.
+        
+        Args:
+            tenant: Tenant instance
+            customer_ids: Iterable of customer IDs
+            message_type: Message type to check (e.g., 'promotional', 'reminder')
+            create_missing: Bulk-create default preferences for customers
+                that have none (as check_consent does one at a time)
+            
+        Returns:
+            dict: {customer_id: bool} keyed by the IDs as passed in
+        """
+        customer_ids = list(dict.fromkeys(customer_ids))
+        consent_field = CONSENT_FIELD_MAP.get(message_type)
+        if not consent_field:
+            logger.warning(f"Unknown message type: {message_type}, denying consent")
+            return {customer_id: False for customer_id in customer_ids}
+        
+        default = DEFAULT_CONSENT[consent_field]
+        overrides = ConsentService._consent_overrides(tenant, consent_field)
+        
+        if create_missing:
+            ConsentService.ensure_preferences_many(tenant, customer_ids)
+        
+        return {
+            customer_id: default != (str(customer_id) in overrides)
+            for customer_id in customer_ids
+        }
+    
+    @staticmethod
+    def annotate_consent(queryset, message_type, name='has_consent'):
+        """
+        Annotate a Customer queryset with consent for a message type.
+        
+        Customers without preferences get the default for the type, so
+        the annotation matches check_consent without creating records.
+        
+        Args:
+            queryset: Customer queryset
+            message_type: Message type to check
+            name: Annotation name
+            
+        Returns:
+            QuerySet: Customers annotated with a boolean named `name`
+        """
+        consent_field = CONSENT_FIELD_MAP.get(message_type)
+        if not consent_field:
+            logger.warning(f"Unknown message type: {message_type}, annotating no consent")
+            return queryset.annotate(**{name: Value(False, output_field=BooleanField())})
+        
+        preference = CustomerPreferences.objects.filter(
+            tenant_id=OuterRef('tenant_id'),
+            customer_id=OuterRef('pk')
+        ).order_by().values(consent_field)[:1]
+        
+        return queryset.annotate(**{
+            name: Coalesce(
+                Subquery(preference, output_field=BooleanField()),
+                Value(DEFAULT_CONSENT[consent_field], output_field=BooleanField())
+            )
+        })
+    
     @staticmethod
     @transaction.atomic
     def opt_out_all(tenant, customer, source='customer_initiated', reason=''):
@@ -303,18 +507,7 @@ class ConsentService:
         """
         from apps.tenants.models import Customer
         
-        # Map message types to consent fields
-        consent_field_map = {
-            'transactional': 'transactional_messages',
-            'reminder': 'reminder_messages',
-            'promotional': 'promotional_messages',
-            'automated_transactional': 'transactional_messages',
-            'automated_reminder': 'reminder_messages',
-            'automated_reengagement': 'promotional_messages',
-            'scheduled_promotional': 'promotional_messages',
-        }
-        
-        consent_field = consent_field_map.get(message_type)
+        consent_field = CONSENT_FIELD_MAP.get(message_type)
         if not consent_field:
             logger.warning(f"Unknown message type: {message_type}, returning empty queryset")
             return Customer.objects.none()
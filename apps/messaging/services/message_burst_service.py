@@ -0,0 +1,294 @@
+"""
+Message Burst Service for coalescing rapid inbound messages.
+
+WhatsApp users often split one request across several messages. When
+BOT_BURST_COALESCING is enabled, inbound messages are added to the
+conversation's MessageQueue and a single delayed process_message_burst
+task runs the orchestrator once over the combined text after the burst
+goes quiet (BOT_BURST_WINDOW_SECONDS), or after BOT_BURST_MAX_WAIT_SECONDS
+at most.
+
+Bursts for the same conversation are serialized with a cache lock, and
+queue entries are claimed with a conditional status update tagged with a
+per-claim token, so an entry is never processed twice even if the lock
+is unavailable. Messages that arrive while a burst is being processed
+are scheduled once it finishes; bursts whose task was lost are picked
+up again by requeue_stale_message_bursts.
+"""
+import logging
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from apps.messaging.models import Conversation, MessageQueue
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY_PREFIX = 'messaging:burst_lock:'
+DEFER_KEY_PREFIX = 'messaging:burst_deferred:'
+
+
+class MessageBurstService:
+    """
+    Service for queueing and claiming bursts of inbound messages.
+    """
+
+    @staticmethod
+    def dispatch(message):
+        """
+        Hand an inbound message to the bot.
+
+        Queues the message for coalesced processing when
+        BOT_BURST_COALESCING is enabled, otherwise enqueues
+        process_inbound_message directly.
+
+        Args:
+            message: Stored inbound Message
+        """
+        from apps.bot.tasks import process_inbound_message
+
+        if not settings.BOT_BURST_COALESCING:
+            process_inbound_message.delay(str(message.id))
+            return
+
+        MessageBurstService.enqueue(message)
+
+    @staticmethod
+    def enqueue(message):
+        """
+        Add a message to its conversation's burst queue.
+
+        The first message of a burst schedules process_message_burst
+        after BOT_BURST_WINDOW_SECONDS; later messages only join the
+        queue. The conversation row is locked while the queue position
+        is assigned.
+
+        Args:
+            message: Stored inbound Message
+
+        Returns:
+            MessageQueue: The created queue entry
+        """
+        from apps.bot.tasks import process_message_burst
+
+        conversation_id = message.conversation_id
+
+        with transaction.atomic():
+            Conversation.objects.select_for_update().filter(id=conversation_id).first()
+
+            queue = MessageQueue.objects.filter(conversation_id=conversation_id)
+            burst_pending = queue.filter(status='queued').exists()
+            last_position = queue.aggregate(last=Max('queue_position'))['last']
+
+            entry = MessageQueue.objects.create(
+                conversation_id=conversation_id,
+                message=message,
+                queue_position=(last_position or 0) + 1
+            )
+
+            if not burst_pending:
+                transaction.on_commit(
+                    lambda: process_message_burst.apply_async(
+                        args=[str(conversation_id)],
+                        countdown=settings.BOT_BURST_WINDOW_SECONDS
+                    )
+                )
+
+        logger.debug(
+            f"Message queued for burst processing",
+            extra={
+                'conversation_id': str(conversation_id),
+                'message_id': str(message.id),
+                'queue_position': entry.queue_position,
+                'scheduled': not burst_pending
+            }
+        )
+
+        return entry
+
+    @staticmethod
+    def claim_burst(conversation):
+        """
+        Claim the conversation's queued messages once the burst is quiet.
+
+        Args:
+            conversation: Conversation instance
+
+        Returns:
+            tuple: (entries, defer_seconds). entries are the claimed
+                MessageQueue rows (now 'processing') in queue order; when
+                the burst is still active entries is empty and
+                defer_seconds says when to check again.
+        """
+        pending = list(
+            MessageQueue.objects.pending(conversation).select_related('message')
+        )
+        if not pending:
+            return [], 0
+
+        now = timezone.now()
+        quiet_for = (now - pending[-1].queued_at).total_seconds()
+        waited = (now - pending[0].queued_at).total_seconds()
+        window = settings.BOT_BURST_WINDOW_SECONDS
+
+        if quiet_for < window and waited < settings.BOT_BURST_MAX_WAIT_SECONDS:
+            return [], max(1, int(window - quiet_for + 0.999))
+
+        claim_token = uuid.uuid4().hex
+        claimed = MessageQueue.objects.filter(
+            id__in=[entry.id for entry in pending],
+            status='queued'
+        ).update(status='processing', claim_token=claim_token)
+        if claimed != len(pending):
+            # Another worker claimed some entries; keep only ours
+            pending = list(
+                MessageQueue.objects.filter(
+                    claim_token=claim_token,
+                    status='processing'
+                ).select_related('message').order_by('queue_position')
+            )
+
+        return pending, 0
+
+    @staticmethod
+    def combined_text(entries):
+        """Join the text of queued messages in arrival order."""
+        return '\n'.join(
+            entry.message.text for entry in entries
+            if entry.message.text
+        )
+
+    @staticmethod
+    def finish(entries):
+        """Mark claimed entries as processed."""
+        MessageQueue.objects.filter(
+            id__in=[entry.id for entry in entries]
+        ).update(status='processed', processed_at=timezone.now())
+
+    @staticmethod
+    def release(entries, error_message=None, failed=False):
+        """
+        Return claimed entries to the queue, or mark them failed.
+
+        Args:
+            entries: Claimed MessageQueue rows
+            error_message: Error to record on failure
+            failed: Mark as failed instead of re-queueing
+        """
+        ids = [entry.id for entry in entries]
+        if failed:
+            MessageQueue.objects.filter(id__in=ids).update(
+                status='failed',
+                processed_at=timezone.now(),
+                error_message=error_message
+            )
+        else:
+            MessageQueue.objects.filter(id__in=ids).update(status='queued')
+
+    @staticmethod
+    def schedule_remaining(conversation_id):
+        """
+        Schedule a burst for messages queued while the last one ran.
+
+        enqueue does not schedule a message that joins a burst whose
+        entries are still queued, so one that arrives after the task
+        read the queue but before it claimed would otherwise wait for
+        requeue_stale_message_bursts.
+
+        Returns:
+            bool: True if a burst was scheduled
+        """
+        from apps.bot.tasks import process_message_burst
+
+        if not MessageQueue.objects.filter(conversation_id=conversation_id, status='queued').exists():
+            return False
+
+        process_message_burst.apply_async(
+            args=[str(conversation_id)],
+            countdown=settings.BOT_BURST_WINDOW_SECONDS
+        )
+        return True
+
+    @staticmethod
+    def defer_locked(conversation_id):
+        """
+        Check back on a conversation whose lock another worker holds.
+
+        At most one deferred task per conversation is scheduled per
+        burst window; the lock holder schedules anything still queued
+        when it finishes (schedule_remaining). Fails open if the cache
+        is unavailable.
+
+        Returns:
+            bool: True if a deferred task was scheduled
+        """
+        from apps.bot.tasks import process_message_burst
+
+        window = settings.BOT_BURST_WINDOW_SECONDS
+        try:
+            if not cache.add(f"{DEFER_KEY_PREFIX}{conversation_id}", 1, timeout=window):
+                return False
+        except Exception as e:
+            logger.warning(f"Burst defer marker unavailable: {str(e)}")
+
+        process_message_burst.apply_async(args=[str(conversation_id)], countdown=window)
+        return True
+
+    @staticmethod
+    def stale_conversation_ids(limit=500):
+        """
+        Conversations whose queued entries have outlived any burst task.
+        
+        An entry still queued BOT_BURST_REQUEUE_AFTER seconds after the
+        longest burst wait means its task was lost (broker error, failed
+        on_commit dispatch or an exhausted retry).
+        
+        Returns:
+            list: Conversation IDs to schedule process_message_burst for
+        """
+        cutoff = timezone.now() - timedelta(
+            seconds=settings.BOT_BURST_MAX_WAIT_SECONDS + settings.BOT_BURST_REQUEUE_AFTER
+        )
+        return list(
+            MessageQueue.objects.filter(status='queued', queued_at__lt=cutoff)
+            .order_by()
+            .values_list('conversation_id', flat=True)
+            .distinct()[:limit]
+        )
+    
+    @staticmethod
+    def acquire_lock(conversation_id):
+        """
+        Take the per-conversation processing lock.
+
+        Fails open (returns a token) if the cache is unavailable; entry
+        claiming still prevents duplicate processing.
+
+        Returns:
+            str: Lock token, or None if another worker holds the lock
+        """
+        token = uuid.uuid4().hex
+        try:
+            if cache.add(
+                f"{LOCK_KEY_PREFIX}{conversation_id}",
+                token,
+                timeout=settings.BOT_BURST_LOCK_TIMEOUT
+            ):
+                return token
+            return None
+        except Exception as e:
+            logger.warning(f"Burst lock unavailable: {str(e)}")
+            return token
+
+    @staticmethod
+    def release_lock(conversation_id, token):
+        """Release a lock taken with acquire_lock if it is still ours."""
+        key = f"{LOCK_KEY_PREFIX}{conversation_id}"
+        try:
+            if cache.get(key) == token:
+                cache.delete(key)
+        except Exception as e:
+            logger.warning(f"Failed to release burst lock: {str(e)}")
@@ -78,11 +78,17 @@ class MessagingService:
         conversation: Optional[Conversation] = None,
         media_url: Optional[str] = None,
         skip_consent_check: bool = False,
-        skip_rate_limit_check: bool = False
+        skip_rate_limit_check: bool = False,
+        queue_delivery: bool = False
     ) -> Message:
         """
         Send an outbound message with consent and rate limit validation.
         
+        With queue_delivery the Twilio call is handed to the
+        send_whatsapp_message task (delayed retries, per-tenant concurrency
+        limit) after the surrounding transaction commits; the returned
+        message is marked sent or failed by the task.
+        
         Args:
             tenant: Tenant sending the message
             customer: Customer receiving the message
@@ -94,6 +100,7 @@ class MessagingService:
             media_url: Optional media URL to attach
             skip_consent_check: Skip consent validation (for transactional messages)
             skip_rate_limit_check: Skip rate limit check (for critical messages)
+            queue_delivery: Deliver through the send_whatsapp_message task
             
         Returns:
             Message: Created message record
@@ -151,6 +158,11 @@ class MessagingService:
             template_id=template_id
         )
         
+        if queue_delivery:
+            return MessagingService._queue_delivery(
+                tenant, customer, message, media_url, skip_rate_limit_check
+            )
+        
         try:
             # Send via Twilio
             twilio_service = create_twilio_service_for_tenant(tenant)
@@ -201,6 +213,48 @@ class MessagingService:
             )
             raise MessagingServiceError(f"Failed to send message: {str(e)}") from e
     
+    @staticmethod
+    def _queue_delivery(
+        tenant: Tenant,
+        customer: Customer,
+        message: Message,
+        media_url: Optional[str],
+        skip_rate_limit_check: bool
+    ) -> Message:
+        """
+        Enqueue delivery of a stored outbound message.
+        
+        The message counts against the rate limit when queued, since the
+        send task may run after later rate limit checks.
+        """
+        from apps.integrations.tasks import send_whatsapp_message
+        
+        transaction.on_commit(
+            lambda: send_whatsapp_message.delay(
+                str(tenant.id),
+                customer.phone_e164,
+                message.text,
+                media_url=media_url,
+                message_id=str(message.id)
+            )
+        )
+        
+        if not skip_rate_limit_check:
+            MessagingService._increment_rate_limit(tenant)
+            MessagingService._check_rate_limit_warning(tenant)
+        
+        logger.info(
+            f"Message queued for delivery",
+            extra={
+                'tenant': tenant.slug,
+                'customer': customer.id,
+                'message_id': message.id,
+                'message_type': message.message_type
+            }
+        )
+        
+        return message
+    
     @staticmethod
     def check_rate_limit(tenant: Tenant) -> bool:
         """
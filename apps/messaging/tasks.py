@@ -21,13 +21,15 @@ def process_scheduled_messages(self):
         dict: Summary of processing results
     """
     from apps.messaging.models import ScheduledMessage
-    from apps.messaging.services import MessagingService
+    from apps.messaging.services import MessagingService, ConsentRequired
     
     logger.info("Starting scheduled message processing")
     
     # Get all messages due for sending
-    due_messages = ScheduledMessage.objects.due_for_sending()
-    total_count = due_messages.count()
+    due_messages = list(
+        ScheduledMessage.objects.due_for_sending().select_related('tenant', 'customer')
+    )
+    total_count = len(due_messages)
     
     if total_count == 0:
         logger.info("No scheduled messages due for sending")
@@ -43,16 +45,31 @@ def process_scheduled_messages(self):
     sent_count = 0
     failed_count = 0
     
+    # Resolve consent for the whole batch up front
+    consent = _batch_consent(
+        [scheduled_msg for scheduled_msg in due_messages if scheduled_msg.customer_id]
+    )
+    
     # Process each message
     for scheduled_msg in due_messages:
         try:
+            allowed = consent.get((
+                scheduled_msg.tenant_id, scheduled_msg.customer_id, scheduled_msg.message_type
+            ))
+            if allowed is False:
+                raise ConsentRequired(
+                    f"Customer has not consented to {scheduled_msg.message_type} messages"
+                )
+            
             with transaction.atomic():
                 # Send the message
                 message = MessagingService.send_message(
                     tenant=scheduled_msg.tenant,
                     customer=scheduled_msg.customer,
                     content=scheduled_msg.content,
-                    message_type=scheduled_msg.message_type
+                    message_type=scheduled_msg.message_type,
+                    skip_consent_check=allowed is True,
+                    queue_delivery=True
                 )
                 
                 # Mark as sent
@@ -85,6 +102,38 @@ def process_scheduled_messages(self):
     return result
 
 
+def _batch_consent(records, message_type=None):
+    """
+    Resolve consent for a batch of records with tenant and customer.
+    
+    Makes one ConsentService.check_consent_many call per tenant and
+    message type instead of a preferences lookup per record.
+    
+    Args:
+        records: Objects with tenant, tenant_id and customer_id
+        message_type: Message type to check (default: each record's
+            own message_type)
+        
+    Returns:
+        dict: {(tenant_id, customer_id, message_type): bool}
+    """
+    from apps.messaging.services import ConsentService
+    
+    groups = {}
+    for record in records:
+        record_type = message_type or record.message_type
+        group = groups.setdefault((record.tenant_id, record_type), (record.tenant, []))
+        group[1].append(record.customer_id)
+    
+    consent = {}
+    for (tenant_id, record_type), (tenant, customer_ids) in groups.items():
+        results = ConsentService.check_consent_many(tenant, customer_ids, record_type)
+        for customer_id, allowed in results.items():
+            consent[(tenant_id, customer_id, record_type)] = allowed
+    
+    return consent
+
+
 @shared_task(bind=True, max_retries=3)
 def send_appointment_reminder(self, appointment_id: str, hours_before: int):
     """
@@ -495,7 +544,7 @@ def send_24h_appointment_reminders(self):
         dict: Summary of reminders sent
     """
     from apps.services.models import Appointment
-    from apps.messaging.services import MessagingService, ConsentService
+    from apps.messaging.services import MessagingService
     from datetime import timedelta
     
     logger.info("Starting 24-hour appointment reminder batch")
@@ -511,21 +560,21 @@ def send_24h_appointment_reminders(self):
         start_dt__lt=end_window
     ).select_related('tenant', 'customer', 'service', 'variant')
     
-    total_count = appointments.count()
+    appointments = list(appointments)
+    total_count = len(appointments)
     sent_count = 0
     skipped_count = 0
     failed_count = 0
     
     logger.info(f"Found {total_count} appointments for 24h reminders")
     
+    # Resolve reminder consent for the whole batch up front
+    consent = _batch_consent(appointments, 'automated_reminder')
+    
     for appointment in appointments:
         try:
             # Check consent for reminder messages
-            if not ConsentService.check_consent(
-                appointment.tenant,
-                appointment.customer,
-                'automated_reminder'
-            ):
+            if not consent[(appointment.tenant_id, appointment.customer_id, 'automated_reminder')]:
                 logger.info(
                     f"Skipping 24h reminder for appointment {appointment.id} - "
                     f"customer has not consented to reminders"
@@ -552,7 +601,9 @@ def send_24h_appointment_reminders(self):
                 customer=appointment.customer,
                 content=content,
                 message_type='automated_reminder',
-                skip_rate_limit_check=True  # Reminders don't count against rate limit
+                skip_consent_check=True,  # Checked in bulk above
+                skip_rate_limit_check=True,  # Reminders don't count against rate limit
+                queue_delivery=True
             )
             
             sent_count += 1
@@ -598,7 +649,7 @@ def send_2h_appointment_reminders(self):
         dict: Summary of reminders sent
     """
     from apps.services.models import Appointment
-    from apps.messaging.services import MessagingService, ConsentService
+    from apps.messaging.services import MessagingService
     from datetime import timedelta
     
     logger.info("Starting 2-hour appointment reminder batch")
@@ -614,21 +665,21 @@ def send_2h_appointment_reminders(self):
         start_dt__lt=end_window
     ).select_related('tenant', 'customer', 'service', 'variant')
     
-    total_count = appointments.count()
+    appointments = list(appointments)
+    total_count = len(appointments)
     sent_count = 0
     skipped_count = 0
     failed_count = 0
     
     logger.info(f"Found {total_count} appointments for 2h reminders")
     
+    # Resolve reminder consent for the whole batch up front
+    consent = _batch_consent(appointments, 'automated_reminder')
+    
     for appointment in appointments:
         try:
             # Check consent for reminder messages
-            if not ConsentService.check_consent(
-                appointment.tenant,
-                appointment.customer,
-                'automated_reminder'
-            ):
+            if not consent[(appointment.tenant_id, appointment.customer_id, 'automated_reminder')]:
                 logger.info(
                     f"Skipping 2h reminder for appointment {appointment.id} - "
                     f"customer has not consented to reminders"
@@ -654,7 +705,9 @@ def send_2h_appointment_reminders(self):
                 customer=appointment.customer,
                 content=content,
                 message_type='automated_reminder',
-                skip_rate_limit_check=True  # Reminders don't count against rate limit
+                skip_consent_check=True,  # Checked in bulk above
+                skip_rate_limit_check=True,  # Reminders don't count against rate limit
+                queue_delivery=True
             )
             
             sent_count += 1
@@ -705,7 +758,7 @@ def send_reengagement_messages(self):
         dict: Summary of re-engagement messages sent
     """
     from apps.messaging.models import Conversation
-    from apps.messaging.services import MessagingService, ConsentService
+    from apps.messaging.services import MessagingService
     from datetime import timedelta
     
     logger.info("Starting re-engagement message batch")
@@ -726,21 +779,21 @@ def send_reengagement_messages(self):
         updated_at__gte=dormant_cutoff
     ).select_related('tenant', 'customer')
     
-    total_count = inactive_conversations.count()
+    inactive_conversations = list(inactive_conversations)
+    total_count = len(inactive_conversations)
     sent_count = 0
     skipped_count = 0
     failed_count = 0
     
     logger.info(f"Found {total_count} inactive conversations for re-engagement")
     
+    # Resolve promotional consent for the whole batch up front
+    consent = _batch_consent(inactive_conversations, 'automated_reengagement')
+    
     for conversation in inactive_conversations:
         try:
             # Check consent for promotional messages
-            if not ConsentService.check_consent(
-                conversation.tenant,
-                conversation.customer,
-                'automated_reengagement'
-            ):
+            if not consent[(conversation.tenant_id, conversation.customer_id, 'automated_reengagement')]:
                 logger.info(
                     f"Skipping re-engagement for conversation {conversation.id} - "
                     f"customer has not consented to promotional messages"
@@ -773,7 +826,9 @@ def send_reengagement_messages(self):
                 customer=conversation.customer,
                 content=content,
                 message_type='automated_reengagement',
-                conversation=conversation
+                conversation=conversation,
+                skip_consent_check=True,  # Checked in bulk above
+                queue_delivery=True
             )
             
             sent_count += 1
@@ -817,3 +872,30 @@ def send_reengagement_messages(self):
     
     logger.info(f"Re-engagement batch completed: {result}")
     return result
+
+
+# ============================================================================
+# Campaign Counter Tasks
+# ============================================================================
+
+@shared_task
+def flush_campaign_counters():
+    """
+    Fold buffered campaign counter increments into MessageCampaign rows.
+    
+    Runs regardless of CAMPAIGN_COUNTER_BUFFERING so increments buffered
+    before the setting was turned off are still written.
+    
+    Returns:
+        dict: Number of campaign rows written
+    """
+    from apps.messaging.services.campaign_counters import CampaignCounters
+    
+    flushed = CampaignCounters.flush()
+    if flushed:
+        logger.info(
+            f"Flushed buffered campaign counters",
+            extra={'count': flushed}
+        )
+    
+    return {'flushed': flushed}
@@ -0,0 +1,172 @@
+"""
+Tests for buffered MessageCampaign counters.
+"""
+import pytest
+from collections import defaultdict
+from unittest.mock import patch
+
+from apps.messaging.models import MessageCampaign
+from apps.messaging.services import CampaignService
+from apps.messaging.services.campaign_counters import CampaignCounters, DIRTY_KEY, _counter_key
+from apps.tenants.models import Tenant
+
+
+class FakeRedis:
+    """In-memory stand-in for the hash and set commands used by the counters."""
+
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+        self.sets = defaultdict(set)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hincrby(self, key, field, amount):
+        self.hashes[key][field] = int(self.hashes[key].get(field, 0)) + amount
+        return self.hashes[key][field]
+
+    def hgetall(self, key):
+        return {k: str(v).encode() for k, v in self.hashes.get(key, {}).items()}
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def expire(self, key, ttl):
+        pass
+
+    def sadd(self, key, *members):
+        self.sets[key].update(members)
+
+    def srem(self, key, *members):
+        self.sets[key].difference_update(members)
+
+    def smembers(self, key):
+        return {member.encode() for member in self.sets.get(key, set())}
+
+
+class FakePipeline:
+    """Buffers commands and runs them on execute()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def command(*args):
+            self.calls.append((name, args))
+        return command
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args) for name, args in self.calls]
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with patch('apps.messaging.services.campaign_counters._redis_client', return_value=redis):
+        yield redis
+
+
+@pytest.fixture
+def buffering(settings, django_capture_on_commit_callbacks):
+    settings.CAMPAIGN_COUNTER_BUFFERING = True
+    return django_capture_on_commit_callbacks
+
+
+@pytest.fixture
+def campaign(db):
+    tenant = Tenant.objects.create(
+        name='Counter Shop',
+        slug='counter-shop',
+        status='active',
+        whatsapp_number='+254700000401'
+    )
+    return MessageCampaign.objects.create(
+        tenant=tenant,
+        name='Flash Sale',
+        message_content='Everything 10% off'
+    )
+
+
+def _stored(campaign, field):
+    return MessageCampaign.objects.values_list(field, flat=True).get(id=campaign.id)
+
+
+@pytest.mark.django_db
+class TestCampaignCounters:
+    """Increments are buffered, merged at read time and flushed in one update."""
+
+    def test_rolled_back_increment_is_not_buffered(self, campaign, fake_redis, buffering):
+        with buffering(execute=False):
+            campaign.increment_delivery()
+
+        assert CampaignCounters.pending(campaign.id) == {}
+
+    def test_unbuffered_increment_writes_row(self, campaign):
+        campaign.increment_delivery()
+
+        assert campaign.delivery_count == 1
+        assert _stored(campaign, 'delivery_count') == 1
+
+    def test_buffered_increment_defers_row_write(self, campaign, fake_redis, buffering, django_assert_num_queries):
+        with django_assert_num_queries(0), buffering(execute=True):
+            for _ in range(3):
+                campaign.increment_delivered()
+            campaign.increment_read()
+
+        assert campaign.delivered_count == 3
+        assert _stored(campaign, 'delivered_count') == 0
+        assert fake_redis.hashes[_counter_key(campaign.id)] == {'delivered_count': 3, 'read_count': 1}
+        assert str(campaign.id) in fake_redis.sets[DIRTY_KEY]
+
+    def test_report_merges_pending_delta(self, campaign, fake_redis, buffering):
+        with buffering(execute=True):
+            for _ in range(4):
+                campaign.increment_delivery()
+            campaign.increment_delivered()
+        CampaignCounters.flush()
+        with buffering(execute=True):
+            campaign.increment_delivered()
+
+        fresh = MessageCampaign.objects.get(id=campaign.id)
+        report = CampaignService().generate_report(fresh)
+
+        assert report['delivery']['delivery_count'] == 4
+        assert report['delivery']['delivered_count'] == 2
+        # The instance that bumped itself in memory is not double counted
+        assert CampaignService().generate_report(campaign)['delivery']['delivered_count'] == 2
+
+    def test_flush_issues_single_update(self, campaign, fake_redis, buffering, django_assert_num_queries):
+        with buffering(execute=True):
+            for _ in range(5):
+                campaign.increment_failed()
+            campaign.increment_conversion()
+
+        with django_assert_num_queries(1):
+            assert CampaignCounters.flush() == 1
+
+        assert _stored(campaign, 'failed_count') == 5
+        assert _stored(campaign, 'conversion_count') == 1
+        assert not fake_redis.hashes
+        assert not fake_redis.sets[DIRTY_KEY]
+        assert CampaignCounters.flush() == 0
+
+    def test_failed_update_is_rebuffered(self, campaign, fake_redis, buffering):
+        with buffering(execute=True):
+            campaign.increment_response()
+
+        with patch.object(CampaignCounters, '_apply', side_effect=RuntimeError('db down')):
+            assert CampaignCounters.flush() == 0
+
+        assert CampaignCounters.pending(campaign.id) == {'response_count': 1}
+        assert CampaignCounters.flush() == 1
+        assert _stored(campaign, 'response_count') == 1
+
+    def test_redis_down_writes_row(self, campaign, buffering):
+        with patch(
+            'apps.messaging.services.campaign_counters._redis_client',
+            side_effect=ConnectionError('down')
+        ), buffering(execute=True):
+            campaign.increment_read()
+
+        assert _stored(campaign, 'read_count') == 1
@@ -0,0 +1,150 @@
+"""
+Tests for batched consent resolution in ConsentService.
+"""
+import pytest
+
+from apps.core.cache import CacheKeys, CacheService
+from apps.messaging.models import ConsentEvent, CustomerPreferences
+from apps.messaging.services import ConsentService
+from apps.tenants.models import Tenant, Customer
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'consent-batch-tests',
+    }
+}
+
+
+@pytest.fixture
+def shop(db):
+    return Tenant.objects.create(
+        name='Consent Shop',
+        slug='consent-shop',
+        status='active',
+        whatsapp_number='+254700000391'
+    )
+
+
+@pytest.fixture
+def customers(shop):
+    return [
+        Customer.objects.create(tenant=shop, phone_e164=f'+2547000005{index:02d}')
+        for index in range(4)
+    ]
+
+
+@pytest.fixture
+def local_cache(settings):
+    from django.core.cache import cache
+    settings.CACHES = LOCMEM_CACHES
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _set_preferences(shop, customer, **values):
+    prefs, _ = CustomerPreferences.objects.get_or_create_for_customer(shop, customer)
+    for field, value in values.items():
+        setattr(prefs, field, value)
+    prefs.save()
+    return prefs
+
+
+@pytest.mark.django_db
+class TestCheckConsentMany:
+    """Bulk checks match check_consent without a lookup per customer."""
+
+    def test_matches_single_checks(self, shop, customers):
+        _set_preferences(shop, customers[0], promotional_messages=True)
+        _set_preferences(shop, customers[1], reminder_messages=False)
+        ids = [customer.id for customer in customers]
+
+        for message_type in ('promotional', 'automated_reminder', 'transactional', 'unknown_type'):
+            bulk = ConsentService.check_consent_many(shop, ids, message_type, create_missing=False)
+            single = {
+                customer.id: ConsentService.check_consent(shop, customer, message_type)
+                for customer in customers
+            }
+            assert bulk == single, message_type
+
+    def test_creates_missing_preferences_with_events(self, shop, customers):
+        _set_preferences(shop, customers[0], promotional_messages=True)
+        ids = [customer.id for customer in customers]
+
+        ConsentService.check_consent_many(shop, ids, 'promotional')
+        ConsentService.check_consent_many(shop, ids, 'promotional')
+
+        assert CustomerPreferences.objects.filter(tenant=shop).count() == 4
+        for customer in customers[1:]:
+            assert ConsentEvent.objects.filter(
+                customer=customer, source='system_default'
+            ).count() == 3
+
+    def test_query_count_does_not_grow_with_batch(self, shop, customers, django_assert_max_num_queries):
+        for index in range(20):
+            Customer.objects.create(tenant=shop, phone_e164=f'+2547000006{index:02d}')
+        ids = list(Customer.objects.filter(tenant=shop).values_list('id', flat=True))
+
+        with django_assert_max_num_queries(2):
+            ConsentService.check_consent_many(shop, ids, 'automated_reminder', create_missing=False)
+
+    def test_cached_overrides_invalidated_on_update(
+        self, shop, customers, local_cache, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        ids = [customer.id for customer in customers]
+        assert all(ConsentService.check_consent_many(shop, ids, 'automated_reminder').values())
+
+        with django_assert_num_queries(1):
+            # Override set comes from cache; only the existing-rows lookup runs
+            ConsentService.check_consent_many(shop, ids, 'automated_reminder')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ConsentService.update_consent(shop, customers[2], 'reminder_messages', False)
+        result = ConsentService.check_consent_many(shop, ids, 'automated_reminder')
+
+        assert result[customers[2].id] is False
+        assert sum(result.values()) == 3
+
+    def test_overrides_invalidated_after_commit(
+        self, shop, customers, local_cache, django_capture_on_commit_callbacks
+    ):
+        ids = [customer.id for customer in customers]
+        ConsentService.check_consent_many(shop, ids, 'automated_reminder')
+        cache_key = CacheKeys.format(
+            CacheKeys.CONSENT_OVERRIDES,
+            tenant_id=str(shop.id),
+            consent_field='reminder_messages'
+        )
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            ConsentService.update_consent(shop, customers[2], 'reminder_messages', False)
+            assert CacheService.get(cache_key) is not None
+
+        for callback in callbacks:
+            callback()
+        assert CacheService.get(cache_key) is None
+
+
+@pytest.mark.django_db
+class TestAnnotateConsent:
+    """The queryset helper agrees with check_consent without creating records."""
+
+    def test_annotation_matches_check_consent(self, shop, customers):
+        _set_preferences(shop, customers[0], promotional_messages=True)
+        _set_preferences(shop, customers[1], reminder_messages=False)
+
+        for message_type in ('scheduled_promotional', 'reminder'):
+            annotated = {
+                customer.id: customer.has_consent
+                for customer in ConsentService.annotate_consent(
+                    Customer.objects.filter(tenant=shop), message_type
+                )
+            }
+            expected = ConsentService.check_consent_many(
+                shop, [customer.id for customer in customers], message_type, create_missing=False
+            )
+            assert annotated == expected, message_type
+
+        assert CustomerPreferences.objects.filter(tenant=shop).count() == 2
@@ -0,0 +1,228 @@
+"""
+Tests for inbound burst coalescing with MessageQueue.
+"""
+import pytest
+from datetime import timedelta
+from unittest.mock import Mock, patch
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+from apps.messaging.models import Conversation, Message, MessageQueue
+from apps.messaging.services.message_burst_service import MessageBurstService
+from apps.tenants.models import Tenant, Customer
+
+
+@pytest.fixture
+def burst_settings(settings):
+    settings.BOT_BURST_COALESCING = True
+    settings.BOT_BURST_WINDOW_SECONDS = 5
+    settings.BOT_BURST_MAX_WAIT_SECONDS = 15
+    return settings
+
+
+@pytest.fixture
+def conversation(db):
+    tenant = Tenant.objects.create(
+        name='Burst Shop',
+        slug='burst-shop',
+        status='active',
+        whatsapp_number='+254700000351'
+    )
+    customer = Customer.objects.create(tenant=tenant, phone_e164='+254700000352')
+    return Conversation.objects.create(tenant=tenant, customer=customer, status='bot')
+
+
+def _inbound(conversation, text):
+    return Message.objects.create(
+        conversation=conversation,
+        direction='in',
+        message_type='customer_inbound',
+        text=text
+    )
+
+
+def _age_queue(conversation, seconds):
+    MessageQueue.objects.filter(conversation=conversation).update(
+        queued_at=timezone.now() - timedelta(seconds=seconds)
+    )
+
+
+@pytest.mark.django_db
+class TestMessageBurstService:
+    """Queueing and claiming bursts."""
+
+    def test_dispatch_without_coalescing(self, conversation, settings):
+        settings.BOT_BURST_COALESCING = False
+        message = _inbound(conversation, 'hi')
+
+        with patch('apps.bot.tasks.process_inbound_message.delay') as mock_delay:
+            MessageBurstService.dispatch(message)
+
+        mock_delay.assert_called_once_with(str(message.id))
+        assert MessageQueue.objects.count() == 0
+
+    def test_first_message_schedules_single_task(
+        self, conversation, burst_settings, django_capture_on_commit_callbacks
+    ):
+        with patch('apps.bot.tasks.process_message_burst.apply_async') as mock_schedule:
+            with django_capture_on_commit_callbacks(execute=True):
+                for text in ('hi', 'do you have', 'red shoes?'):
+                    MessageBurstService.dispatch(_inbound(conversation, text))
+
+        mock_schedule.assert_called_once_with(args=[str(conversation.id)], countdown=5)
+        positions = list(
+            MessageQueue.objects.for_conversation(conversation).values_list('queue_position', flat=True)
+        )
+        assert positions == [1, 2, 3]
+
+    def test_claim_defers_while_burst_active(self, conversation, burst_settings):
+        MessageBurstService.enqueue(_inbound(conversation, 'hi'))
+
+        entries, defer_seconds = MessageBurstService.claim_burst(conversation)
+
+        assert entries == []
+        assert 1 <= defer_seconds <= 5
+        assert MessageQueue.objects.pending(conversation).count() == 1
+
+    def test_claim_after_quiet_window(self, conversation, burst_settings):
+        for text in ('hi', 'red shoes?'):
+            MessageBurstService.enqueue(_inbound(conversation, text))
+        _age_queue(conversation, 6)
+
+        entries, defer_seconds = MessageBurstService.claim_burst(conversation)
+
+        assert defer_seconds == 0
+        assert MessageBurstService.combined_text(entries) == 'hi\nred shoes?'
+        assert MessageQueue.objects.processing(conversation).count() == 2
+
+        # A second claim finds nothing left to process
+        assert MessageBurstService.claim_burst(conversation) == ([], 0)
+
+
+@pytest.mark.django_db
+class TestProcessMessageBurst:
+    """The burst task runs the orchestrator once per burst."""
+
+    def test_runs_orchestrator_once_over_combined_text(self, conversation, burst_settings):
+        from apps.bot.tasks import process_message_burst
+
+        messages = [_inbound(conversation, text) for text in ('hi', 'do you have', 'red shoes?')]
+        for message in messages:
+            MessageBurstService.enqueue(message)
+        _age_queue(conversation, 6)
+
+        with patch('apps.bot.tasks._run_orchestrator', return_value={'status': 'success'}) as mock_run:
+            result = process_message_burst.apply(args=[str(conversation.id)]).get()
+
+        assert result['burst_size'] == 3
+        mock_run.assert_called_once()
+        message, text = mock_run.call_args[0]
+        assert message.id == messages[-1].id
+        assert text == 'hi\ndo you have\nred shoes?'
+        assert MessageQueue.objects.filter(status='processed').count() == 3
+
+    def test_locked_conversation_is_rescheduled(self, conversation, burst_settings):
+        from apps.bot.tasks import process_message_burst
+
+        MessageBurstService.enqueue(_inbound(conversation, 'hi'))
+        _age_queue(conversation, 6)
+
+        with patch.object(MessageBurstService, 'acquire_lock', return_value=None), \
+                patch('apps.messaging.services.message_burst_service.cache', LocMemCache('burst', {})), \
+                patch('apps.bot.tasks._run_orchestrator') as mock_run, \
+                patch.object(process_message_burst, 'apply_async') as mock_schedule:
+            result = process_message_burst.apply(args=[str(conversation.id)]).get()
+            # A second locked run within the window does not schedule again
+            process_message_burst.apply(args=[str(conversation.id)]).get()
+
+        assert result['status'] == 'locked'
+        mock_run.assert_not_called()
+        mock_schedule.assert_called_once_with(args=[str(conversation.id)], countdown=5)
+        assert MessageQueue.objects.pending(conversation).count() == 1
+
+    def test_message_queued_during_burst_is_scheduled(self, conversation, burst_settings):
+        from apps.bot.tasks import process_message_burst
+
+        MessageBurstService.enqueue(_inbound(conversation, 'hi'))
+        _age_queue(conversation, 6)
+        late = []
+
+        def run_orchestrator(message, text):
+            # Arrives after the claim; enqueue sees no queued burst to join
+            late.append(MessageBurstService.enqueue(_inbound(conversation, 'one more thing')))
+            return {'status': 'success'}
+
+        with patch('apps.bot.tasks._run_orchestrator', side_effect=run_orchestrator), \
+                patch.object(process_message_burst, 'apply_async') as mock_schedule:
+            result = process_message_burst.apply(args=[str(conversation.id)]).get()
+
+        assert result['burst_size'] == 1
+        mock_schedule.assert_called_once_with(args=[str(conversation.id)], countdown=5)
+        assert MessageQueue.objects.pending(conversation).get() == late[0]
+
+    def test_nothing_left_schedules_nothing(self, conversation, burst_settings):
+        from apps.bot.tasks import process_message_burst
+
+        MessageBurstService.enqueue(_inbound(conversation, 'hi'))
+        _age_queue(conversation, 6)
+
+        with patch('apps.bot.tasks._run_orchestrator', return_value={'status': 'success'}), \
+                patch.object(process_message_burst, 'apply_async') as mock_schedule:
+            process_message_burst.apply(args=[str(conversation.id)]).get()
+
+        mock_schedule.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestBurstRecovery:
+    """Claims are exclusive and lost bursts are rescheduled."""
+
+    def test_claim_returns_only_rows_it_claimed(self, conversation, burst_settings):
+        messages = [_inbound(conversation, text) for text in ('hi', 'red', 'shoes')]
+        for message in messages:
+            MessageBurstService.enqueue(message)
+        _age_queue(conversation, 6)
+
+        original_pending = MessageQueue.objects.pending
+
+        def racing_pending(conv):
+            rows = list(original_pending(conv).select_related('message'))
+            # Another worker claims the first entry between our read and update
+            MessageQueue.objects.filter(id=rows[0].id).update(
+                status='processing', claim_token='other-worker'
+            )
+            selectable = Mock()
+            selectable.select_related.return_value = rows
+            return selectable
+
+        with patch.object(MessageQueue.objects, 'pending', side_effect=racing_pending):
+            entries, _ = MessageBurstService.claim_burst(conversation)
+
+        assert [entry.message_id for entry in entries] == [messages[1].id, messages[2].id]
+
+    def test_failure_before_claim_is_retried(self, conversation, burst_settings):
+        from apps.bot.tasks import process_message_burst
+
+        MessageBurstService.enqueue(_inbound(conversation, 'hi'))
+
+        with patch.object(MessageBurstService, 'claim_burst', side_effect=RuntimeError('db down')), \
+                patch.object(process_message_burst, 'retry', side_effect=RuntimeError('retry')) as mock_retry:
+            process_message_burst.apply(args=[str(conversation.id)])
+
+        mock_retry.assert_called_once()
+        assert MessageQueue.objects.pending(conversation).count() == 1
+
+    def test_sweeper_reschedules_lost_bursts(self, conversation, burst_settings):
+        from apps.bot.tasks import requeue_stale_message_bursts
+
+        burst_settings.BOT_BURST_REQUEUE_AFTER = 60
+        MessageBurstService.enqueue(_inbound(conversation, 'hi'))
+        MessageBurstService.enqueue(_inbound(conversation, 'anyone there?'))
+
+        with patch('apps.bot.tasks.process_message_burst.delay') as mock_delay:
+            assert requeue_stale_message_bursts() == {'rescheduled': 0}
+
+            _age_queue(conversation, 15 + 61)
+            assert requeue_stale_message_bursts() == {'rescheduled': 1}
+
+        mock_delay.assert_called_once_with(str(conversation.id))
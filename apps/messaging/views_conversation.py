@@ -18,6 +18,7 @@ from apps.messaging.serializers_conversation import (
     MessageSerializer,
     ConversationHandoffSerializer,
 )
+from apps.core.pagination import KeysetPagination
 from apps.core.permissions import HasTenantScopes
 
 User = get_user_model()
@@ -74,6 +75,27 @@ class ConversationListView(APIView):
                 description='Items per page (default: 50, max: 100)',
                 required=False
             ),
+            OpenApiParameter(
+                name='pagination',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Pagination mode: page (default) or cursor',
+                required=False
+            ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Cursor from next_cursor (cursor mode)',
+                required=False
+            ),
+            OpenApiParameter(
+                name='count',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Include total count in cursor mode: exact or approx',
+                required=False
+            ),
         ],
         responses={
             200: {
@@ -117,6 +139,13 @@ class ConversationListView(APIView):
         if channel:
             queryset = queryset.filter(channel=channel)
         
+        # Cursor pagination (newest conversations first)
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination(ordering=('-created_at', '-id'))
+            page = paginator.paginate_queryset(queryset, request)
+            serializer = ConversationListSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        
         # Pagination
         page = int(request.query_params.get('page', 1))
         page_size = min(int(request.query_params.get('page_size', 50)), 100)
@@ -227,6 +256,27 @@ class ConversationMessagesView(APIView):
                 description='Items per page (default: 50, max: 100)',
                 required=False
             ),
+            OpenApiParameter(
+                name='pagination',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Pagination mode: page (default) or cursor',
+                required=False
+            ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Cursor from next_cursor (cursor mode)',
+                required=False
+            ),
+            OpenApiParameter(
+                name='count',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Include total count in cursor mode: exact or approx',
+                required=False
+            ),
         ],
         responses={
             200: {
@@ -271,6 +321,13 @@ class ConversationMessagesView(APIView):
         # Get messages for conversation
         queryset = Message.objects.for_conversation(conversation)
         
+        # Cursor pagination (oldest messages first)
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination(ordering=('created_at', 'id'))
+            page = paginator.paginate_queryset(queryset, request)
+            serializer = MessageSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        
         # Pagination
         page = int(request.query_params.get('page', 1))
         page_size = min(int(request.query_params.get('page_size', 50)), 100)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['tenant', 'created_at', 'id'], name='orders_tenant__ae237e_idx'),
+        ),
+    ]
@@ -211,6 +211,7 @@ class Order(BaseModel):
         indexes = [
             models.Index(fields=['tenant', 'customer', 'status']),
             models.Index(fields=['tenant', 'status', 'created_at']),
+            models.Index(fields=['tenant', 'created_at', 'id']),
             models.Index(fields=['payment_ref']),
         ]
     
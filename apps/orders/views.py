@@ -15,6 +15,7 @@ from apps.orders.serializers import (
     OrderListSerializer, OrderDetailSerializer,
     OrderCreateSerializer, OrderUpdateSerializer
 )
+from apps.core.pagination import KeysetPagination
 from apps.core.permissions import HasTenantScopes, requires_scopes
 from apps.rbac.models import AuditLog
 
@@ -86,6 +87,26 @@ class OrderListView(APIView):
                 location=OpenApiParameter.QUERY,
                 description='Number of results per page (max 100)'
             ),
+            OpenApiParameter(
+                name='pagination',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Pagination mode: page (default) or cursor',
+                enum=['page', 'cursor']
+            ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Cursor from next_cursor (cursor mode)'
+            ),
+            OpenApiParameter(
+                name='count',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Include total count in cursor mode',
+                enum=['exact', 'approx']
+            ),
         ],
         responses={
             200: OrderListSerializer(many=True),
@@ -116,6 +137,13 @@ class OrderListView(APIView):
         if to_date:
             queryset = queryset.filter(created_at__date__lte=to_date)
         
+        # Cursor pagination (newest orders first)
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination(ordering=('-created_at', '-id'))
+            page = paginator.paginate_queryset(queryset, request)
+            serializer = OrderListSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        
         # Paginate
         paginator = StandardResultsSetPagination()
         page = paginator.paginate_queryset(queryset, request)
@@ -33,6 +33,8 @@ class Command(BaseCommand):
                 'priority_support': False,
                 'custom_branding': False,
                 'api_access': 'read',
+                'api_requests_per_hour': 1000,
+                'webhook_requests_per_hour': 10000,
             },
             {
                 'name': 'Growth',
@@ -51,6 +53,8 @@ class Command(BaseCommand):
                 'priority_support': False,
                 'custom_branding': False,
                 'api_access': 'full',
+                'api_requests_per_hour': 5000,
+                'webhook_requests_per_hour': 50000,
             },
             {
                 'name': 'Enterprise',
@@ -69,6 +73,8 @@ class Command(BaseCommand):
                 'priority_support': True,
                 'custom_branding': True,
                 'api_access': 'full',
+                'api_requests_per_hour': 20000,
+                'webhook_requests_per_hour': 200000,
             },
         ]
         
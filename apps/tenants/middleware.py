@@ -7,16 +7,17 @@ ensuring all requests are properly scoped to a tenant.
 import hashlib
 import logging
 import uuid
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
-from django.utils.deprecation import MiddlewareMixin
 from django.utils import timezone
 from .models import Tenant
+from apps.core.middleware.async_support import AsyncMiddlewareMixin
 from apps.rbac.services import AuthService
 
 logger = logging.getLogger(__name__)
 
 
-class TenantContextMiddleware(MiddlewareMixin):
+class TenantContextMiddleware(AsyncMiddlewareMixin):
     """
     Extract and validate tenant context from request headers.
     
@@ -27,12 +28,15 @@ class TenantContextMiddleware(MiddlewareMixin):
     4. Handles authentication errors with proper responses
     
     Public endpoints (webhooks, health checks) bypass authentication.
+    Under ASGI they are handled on the event loop; JWT, tenant and RBAC
+    lookups for other paths run in a single sync_to_async call.
     """
     
     # Paths that don't require tenant authentication
     PUBLIC_PATHS = [
         '/v1/webhooks/',  # External webhook callbacks (verified by signature)
         '/v1/health',     # Health check endpoint for monitoring
+        '/metrics',       # Prometheus scrape endpoint (optional bearer token)
         '/v1/auth/register',  # Registration endpoint
         '/v1/auth/login',     # Login endpoint
         '/v1/auth/verify-email',  # Email verification
@@ -68,6 +72,23 @@ class TenantContextMiddleware(MiddlewareMixin):
         Note: API keys are deprecated for user operations. Use JWT tokens exclusively.
         Webhooks are public and verified by signature (not by this middleware).
         """
+        if self._handle_public_path(request):
+            return None
+        return self._authenticate_request(request)
+    
+    async def aprocess_request(self, request):
+        """Async variant of process_request; only authenticated paths leave the event loop."""
+        if self._handle_public_path(request):
+            return None
+        return await sync_to_async(self._authenticate_request)(request)
+    
+    def _handle_public_path(self, request):
+        """
+        Assign the request ID and clear the context of public paths.
+        
+        Returns:
+            True if the path is public and needs no authentication
+        """
         # Generate or extract request ID for tracing
         request_id = request.headers.get('X-Request-ID', str(uuid.uuid4()))
         request.request_id = request_id
@@ -84,7 +105,12 @@ class TenantContextMiddleware(MiddlewareMixin):
             # Don't set request.user for admin paths - let Django's session auth handle it
             if not request.path.startswith('/admin'):
                 request.user = None
-            return None
+            return True
+        return False
+    
+    def _authenticate_request(self, request):
+        """Authenticate the JWT and attach tenant and RBAC context (blocking)."""
+        request_id = request.request_id
         
         # Check if this is a JWT-only path (tenant management endpoints)
         is_jwt_only_path = self._is_jwt_only_path(request.path)
@@ -328,7 +354,7 @@ class TenantContextMiddleware(MiddlewareMixin):
         return JsonResponse(error_data, status=status)
 
 
-class WebhookSubscriptionMiddleware(MiddlewareMixin):
+class WebhookSubscriptionMiddleware(AsyncMiddlewareMixin):
     """
     Check subscription status for webhook requests.
     
@@ -385,12 +411,18 @@ class WebhookSubscriptionMiddleware(MiddlewareMixin):
         request.subscription_inactive = False
         return None
     
+    async def aprocess_request(self, request):
+        """Async variant of process_request; only checks the database when it applies."""
+        if not self._is_webhook_path(request.path) or getattr(request, 'tenant', None) is None:
+            return None
+        return await sync_to_async(self.process_request)(request)
+    
     def _is_webhook_path(self, path):
         """Check if path is a webhook endpoint."""
         return any(path.startswith(webhook_path) for webhook_path in self.WEBHOOK_PATHS)
 
 
-class RequestIDMiddleware(MiddlewareMixin):
+class RequestIDMiddleware(AsyncMiddlewareMixin):
     """
     Inject unique request ID for tracing.
     
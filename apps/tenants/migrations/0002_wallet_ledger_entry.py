@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletLedgerEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, help_text='Timestamp when the record was created')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, help_text='Timestamp when the record was last updated')),
+                ('deleted_at', models.DateTimeField(blank=True, db_index=True, help_text='Timestamp when the record was soft deleted', null=True)),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Balance change (positive for credit, negative for debit)', max_digits=12)),
+                ('materialized_at', models.DateTimeField(blank=True, help_text='When this entry was applied to the wallet balance', null=True)),
+                ('transaction', models.ForeignKey(help_text='Transaction that produced this entry', on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='tenants.transaction')),
+                ('wallet', models.ForeignKey(help_text='Wallet this entry belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='tenants.tenantwallet')),
+            ],
+            options={
+                'db_table': 'wallet_ledger_entries',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['wallet', 'materialized_at', 'created_at'], name='wallet_ledg_wallet__8e7292_idx')],
+            },
+        ),
+    ]
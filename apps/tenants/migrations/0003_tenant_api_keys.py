@@ -0,0 +1,54 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+from django.utils.dateparse import parse_datetime
+
+
+def backfill_api_key_records(apps, schema_editor):
+    """Create a TenantAPIKey row for every hash stored in Tenant.api_keys."""
+    Tenant = apps.get_model('tenants', 'Tenant')
+    TenantAPIKey = apps.get_model('tenants', 'TenantAPIKey')
+    
+    records = []
+    for tenant_id, api_keys in Tenant.objects.values_list('id', 'api_keys').iterator():
+        for entry in api_keys or []:
+            if not isinstance(entry, dict) or not entry.get('key_hash'):
+                continue
+            records.append(TenantAPIKey(
+                tenant_id=tenant_id,
+                key_hash=entry['key_hash'],
+                name=(entry.get('name') or '')[:255],
+                last_used_at=parse_datetime(entry.get('last_used_at') or ''),
+            ))
+    
+    TenantAPIKey.objects.bulk_create(records, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_wallet_ledger_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantAPIKey',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='Unique identifier', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, help_text='Timestamp when the record was created')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, help_text='Timestamp when the record was last updated')),
+                ('deleted_at', models.DateTimeField(blank=True, db_index=True, help_text='Timestamp when the record was soft deleted', null=True)),
+                ('key_hash', models.CharField(help_text='SHA-256 hash of the API key', max_length=64, unique=True)),
+                ('name', models.CharField(blank=True, help_text='Descriptive name of the key', max_length=255)),
+                ('last_used_at', models.DateTimeField(blank=True, help_text='When the key last authenticated a request (flushed periodically)', null=True)),
+                ('tenant', models.ForeignKey(help_text='Tenant that owns this key', on_delete=django.db.models.deletion.CASCADE, related_name='api_key_records', to='tenants.tenant')),
+            ],
+            options={
+                'db_table': 'tenant_api_keys',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RunPython(backfill_api_key_records, migrations.RunPython.noop),
+    ]
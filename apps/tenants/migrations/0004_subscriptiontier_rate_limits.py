@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0003_tenant_api_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriptiontier',
+            name='api_requests_per_hour',
+            field=models.IntegerField(blank=True, help_text='API requests allowed per hour (null = platform default)', null=True),
+        ),
+        migrations.AddField(
+            model_name='subscriptiontier',
+            name='webhook_requests_per_hour',
+            field=models.IntegerField(blank=True, help_text='Webhook calls allowed per hour (null = platform default)', null=True),
+        ),
+    ]
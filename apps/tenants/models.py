@@ -4,6 +4,7 @@ Tenant models for multi-tenant isolation.
 Implements strict tenant isolation with subscription management,
 Twilio configuration, and API key authentication.
 """
+from decimal import Decimal
 from django.db import models
 from apps.core.models import BaseModel
 from apps.core.fields import EncryptedCharField, EncryptedTextField
@@ -29,7 +30,7 @@ class TenantManager(models.Manager):
         """Validate tenant API key."""
         return self.filter(
             id=tenant_id,
-            api_keys__contains=[{'key_hash': api_key_hash}]
+            api_key_records__key_hash=api_key_hash
         ).first()
 
 
@@ -280,6 +281,103 @@ class Tenant(BaseModel):
         return {**default_rules, **self.escalation_rules}
 
 
+class TenantAPIKeyManager(models.Manager):
+    """Manager for the API key lookup table."""
+    
+    def sync_for_tenant(self, tenant):
+        """
+        Mirror tenant.api_keys into indexed rows.
+        
+        Rows are created for new entries and removed for revoked ones.
+        The manager uses a plain QuerySet, so removal is a hard delete;
+        rows are a derived index and have nothing to keep.
+        
+        Args:
+            tenant: Tenant instance
+            
+        Returns:
+            set: Key hashes that were added or removed
+        """
+        from django.utils.dateparse import parse_datetime
+        
+        entries = {
+            entry['key_hash']: entry
+            for entry in (tenant.api_keys or [])
+            if isinstance(entry, dict) and entry.get('key_hash')
+        }
+        existing = set(
+            self.filter(tenant=tenant).values_list('key_hash', flat=True)
+        )
+        removed = existing - set(entries)
+        added = set(entries) - existing
+        
+        if removed:
+            self.filter(tenant=tenant, key_hash__in=removed).delete()
+        if added:
+            self.bulk_create(
+                [
+                    self.model(
+                        tenant=tenant,
+                        key_hash=key_hash,
+                        name=(entries[key_hash].get('name') or '')[:255],
+                        last_used_at=parse_datetime(entries[key_hash].get('last_used_at') or ''),
+                    )
+                    for key_hash in added
+                ],
+                ignore_conflicts=True,
+            )
+        
+        return added | removed
+    
+    def last_used_map(self, tenant):
+        """Return {key_hash: last_used_at} for the tenant's keys that have been used."""
+        return dict(
+            self.filter(tenant=tenant, last_used_at__isnull=False).values_list('key_hash', 'last_used_at')
+        )
+
+
+class TenantAPIKey(BaseModel):
+    """
+    Indexed lookup row for a tenant API key.
+    
+    Tenant.api_keys stays the record of key metadata written by the
+    management flows; this table mirrors its hashes (kept in sync by a
+    post_save signal) so validation is a unique-index lookup, and holds
+    last_used_at so recording usage never rewrites the tenant row.
+    """
+    
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name='api_key_records',
+        help_text="Tenant that owns this key"
+    )
+    key_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="SHA-256 hash of the API key"
+    )
+    name = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Descriptive name of the key"
+    )
+    last_used_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the key last authenticated a request (flushed periodically)"
+    )
+    
+    objects = TenantAPIKeyManager()
+    
+    class Meta:
+        db_table = 'tenant_api_keys'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.name or 'API key'} ({self.key_hash[:8]}...)"
+
+
 class SubscriptionTier(BaseModel):
     """
     Subscription tier defining feature limits and pricing.
@@ -349,6 +447,18 @@ class SubscriptionTier(BaseModel):
         help_text="Maximum daily outbound messages (null = unlimited)"
     )
     
+    # API rate limits (null = platform default)
+    api_requests_per_hour = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="API requests allowed per hour (null = platform default)"
+    )
+    webhook_requests_per_hour = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Webhook calls allowed per hour (null = platform default)"
+    )
+    
     # Features
     payment_facilitation = models.BooleanField(
         default=False,
@@ -1071,6 +1181,7 @@ class Transaction(BaseModel):
     
     STATUS_CHOICES = [
         ('pending', 'Pending'),
+        ('processing', 'Processing'),  # Withdrawal debited, payout in flight
         ('completed', 'Completed'),
         ('failed', 'Failed'),
         ('canceled', 'Canceled'),
@@ -1273,6 +1384,73 @@ class WalletAudit(BaseModel):
         return self.amount < 0
 
 
+class WalletLedgerEntryManager(models.Manager):
+    """Manager for wallet ledger entry queries."""
+
+    def pending(self):
+        """Get entries not yet materialized into a wallet balance."""
+        return self.filter(materialized_at__isnull=True)
+
+    def pending_for_wallet(self, wallet):
+        """Get unmaterialized entries for a specific wallet, oldest first."""
+        return self.pending().filter(wallet=wallet).order_by('created_at')
+
+    def pending_total(self, wallet):
+        """Sum of unmaterialized entry amounts for a wallet."""
+        total = self.pending().filter(wallet=wallet).aggregate(
+            total=models.Sum('amount')
+        )['total']
+        return total or Decimal('0')
+
+
+class WalletLedgerEntry(BaseModel):
+    """
+    Append-only ledger entry for wallet balance changes.
+
+    Used when WALLET_LEDGER_MODE is enabled: payment credits insert a
+    ledger entry instead of updating the wallet row, and a periodic task
+    folds pending entries into TenantWallet.balance (writing WalletAudit
+    records) under a single row lock per batch.
+    """
+
+    wallet = models.ForeignKey(
+        TenantWallet,
+        on_delete=models.CASCADE,
+        related_name='ledger_entries',
+        help_text="Wallet this entry belongs to"
+    )
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.CASCADE,
+        related_name='ledger_entries',
+        help_text="Transaction that produced this entry"
+    )
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        help_text="Balance change (positive for credit, negative for debit)"
+    )
+    materialized_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When this entry was applied to the wallet balance"
+    )
+
+    # Custom manager
+    objects = WalletLedgerEntryManager()
+
+    class Meta:
+        db_table = 'wallet_ledger_entries'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['wallet', 'materialized_at', 'created_at']),
+        ]
+
+    def __str__(self):
+        state = 'materialized' if self.materialized_at else 'pending'
+        return f"{self.wallet_id} - {self.amount} ({state})"
+
+
 
 class TenantSettings(BaseModel):
     """
@@ -6,6 +6,7 @@ from .wallet_service import WalletService, InsufficientBalance, InvalidWithdrawa
 from .tenant_service import TenantService
 from .onboarding_service import OnboardingService
 from .settings_service import SettingsService, SettingsServiceError, CredentialValidationError
+from .api_key_usage import APIKeyUsage
 
 __all__ = [
     'SubscriptionService',
@@ -17,4 +18,5 @@ __all__ = [
     'SettingsService',
     'SettingsServiceError',
     'CredentialValidationError',
+    'APIKeyUsage',
 ]
@@ -0,0 +1,92 @@
+"""
+Coalesced last-used tracking for tenant API keys.
+
+Validating a key records its use in one Redis hash (key hash -> epoch
+seconds) instead of writing the database; a periodic task folds the
+hash into TenantAPIKey.last_used_at with one bulk update. Repeated use
+of the same key between flushes collapses to a single field.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LAST_USED_KEY = 'tenant:api_keys:last_used'
+
+
+def _redis_client():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class APIKeyUsage:
+    """
+    Service for recording and flushing API key usage.
+
+    Recording falls back to a direct update of the key's own row when
+    Redis is unavailable, so the tenant row is never touched.
+    """
+
+    @staticmethod
+    def record(key_hash, at=None):
+        """
+        Record that a key authenticated a request.
+
+        Args:
+            key_hash: SHA-256 hash of the API key
+            at: Usage datetime (defaults to now)
+        """
+        at = at or timezone.now()
+
+        try:
+            _redis_client().hset(LAST_USED_KEY, key_hash, at.timestamp())
+        except Exception as e:
+            logger.warning(f"Failed to buffer API key usage, writing directly: {e}")
+            from apps.tenants.models import TenantAPIKey
+            TenantAPIKey.objects.filter(key_hash=key_hash).update(last_used_at=at)
+
+    @staticmethod
+    def flush():
+        """
+        Write buffered last-used times to TenantAPIKey.
+
+        The hash is read and deleted in one MULTI; rows are updated with a
+        single bulk_update and never moved backwards in time.
+
+        Returns:
+            int: Number of key rows updated
+        """
+        from apps.tenants.models import TenantAPIKey
+
+        try:
+            pipe = _redis_client().pipeline(transaction=True)
+            pipe.hgetall(LAST_USED_KEY)
+            pipe.delete(LAST_USED_KEY)
+            raw, _ = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to read API key usage for flush: {e}")
+            return 0
+
+        used_at = {
+            _decode(key_hash): datetime.fromtimestamp(float(_decode(value)), tz=dt_timezone.utc)
+            for key_hash, value in (raw or {}).items()
+        }
+        if not used_at:
+            return 0
+
+        records = []
+        for record in TenantAPIKey.objects.filter(key_hash__in=used_at).only('id', 'key_hash', 'last_used_at'):
+            at = used_at[record.key_hash]
+            if record.last_used_at is None or record.last_used_at < at:
+                record.last_used_at = at
+                records.append(record)
+
+        if records:
+            TenantAPIKey.objects.bulk_update(records, ['last_used_at'], batch_size=500)
+
+        return len(records)
@@ -10,7 +10,7 @@ from decimal import Decimal
 import logging
 from django.db import transaction as db_transaction
 
-from apps.tenants.models import Tenant, TenantWallet
+from apps.tenants.models import Tenant, TenantWallet, WalletLedgerEntry
 from apps.core.exceptions import TuliaException
 
 logger = logging.getLogger(__name__)
@@ -142,13 +142,16 @@ class PaymentFacilitationService:
             try:
                 wallet = TenantWallet.objects.get(tenant=tenant)
                 
-                if wallet.balance > 0:
+                # Ledger credits not yet folded into the balance still belong to the tenant
+                balance = wallet.balance + WalletLedgerEntry.objects.pending_total(wallet)
+                
+                if balance > 0:
                     raise WalletBalanceNotZero(
-                        f"Cannot downgrade tier while wallet has a balance of {wallet.currency} {wallet.balance}. "
+                        f"Cannot downgrade tier while wallet has a balance of {wallet.currency} {balance}. "
                         f"Please withdraw all funds before downgrading.",
                         details={
                             'tenant_id': str(tenant.id),
-                            'wallet_balance': float(wallet.balance),
+                            'wallet_balance': float(balance),
                             'currency': wallet.currency,
                             'old_tier': old_tier.name,
                             'new_tier': new_tier.name
@@ -20,7 +20,9 @@ from django.utils import timezone
 from django.conf import settings as django_settings
 from django.core.exceptions import ValidationError
 
-from apps.tenants.models import Tenant, TenantSettings
+from apps.core.cache import CacheKeys, CacheService, CacheTTL
+from apps.tenants.models import Tenant, TenantAPIKey, TenantSettings
+from apps.tenants.services.api_key_usage import APIKeyUsage
 from apps.rbac.models import User, AuditLog
 
 logger = logging.getLogger(__name__)
@@ -1180,11 +1182,15 @@ class SettingsService:
             list: List of API key metadata with masked hashes
         """
         api_keys = tenant.api_keys or []
+        last_used = TenantAPIKey.objects.last_used_map(tenant)
         
         # Return keys with masked hashes
         masked_keys = []
         for key in api_keys:
             masked_key = key.copy()
+            # Usage is tracked on the indexed row rather than in the JSON entry
+            if key['key_hash'] in last_used:
+                masked_key['last_used_at'] = last_used[key['key_hash']].isoformat()
             # Show only first 8 characters of hash
             masked_key['key_hash_preview'] = key['key_hash'][:8] + '...'
             # Remove full hash from response
@@ -1198,6 +1204,11 @@ class SettingsService:
         """
         Validate an API key against stored hashes.
         
+        The owning tenant is looked up by the key's hash in the indexed
+        TenantAPIKey table and cached briefly (including misses); usage
+        is recorded through APIKeyUsage and flushed in batches, so a
+        successful validation does not write the tenant row.
+        
         Args:
             tenant: Tenant instance
             plain_key: Plain text API key to validate
@@ -1208,18 +1219,20 @@ class SettingsService:
         # Compute hash of provided key
         key_hash = hashlib.sha256(plain_key.encode()).hexdigest()
         
-        # Check against stored hashes
-        api_keys = tenant.api_keys or []
-        for key in api_keys:
-            if key['key_hash'] == key_hash:
-                # Update last_used_at
-                key['last_used_at'] = timezone.now().isoformat()
-                tenant.save(update_fields=['api_keys', 'updated_at'])
-                return True
+        cache_key = CacheKeys.format(CacheKeys.API_KEY, key_hash=key_hash)
+        owner_id = CacheService.get(cache_key)
+        if owner_id is None:
+            owner = TenantAPIKey.objects.filter(key_hash=key_hash).values_list('tenant_id', flat=True).first()
+            # Unknown keys are cached as '' so repeated bad keys skip the query too
+            owner_id = str(owner) if owner else ''
+            CacheService.set(cache_key, owner_id, CacheTTL.API_KEY)
+        
+        if owner_id != str(tenant.id):
+            return False
         
-        return False
+        APIKeyUsage.record(key_hash)
+        return True
 
-    
     # ========== PAYMENT PROVIDER MANAGEMENT ==========
     
     @classmethod
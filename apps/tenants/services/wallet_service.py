@@ -4,14 +4,19 @@ Wallet service for managing tenant wallets and transactions.
 Handles wallet credits, debits, fee calculations, payment processing,
 and withdrawal management.
 """
+import logging
 from decimal import Decimal
+from django.conf import settings
 from django.db import transaction as db_transaction
+from django.db.models import F
 from django.utils import timezone
 from apps.tenants.models import (
-    Tenant, TenantWallet, Transaction, WalletAudit
+    Tenant, TenantWallet, Transaction, WalletAudit, WalletLedgerEntry
 )
 from apps.core.exceptions import TuliaException
 
+logger = logging.getLogger(__name__)
+
 
 class InsufficientBalance(TuliaException):
     """Raised when wallet has insufficient balance for operation."""
@@ -64,13 +69,11 @@ class WalletService:
             notes: Internal notes
             
         Returns:
-            tuple: (Transaction, WalletAudit)
+            tuple: (Transaction, WalletAudit). The audit is None in ledger
+            mode; it is written when the ledger entry is materialized.
         """
         wallet = WalletService.get_or_create_wallet(tenant)
         
-        # Record previous balance
-        previous_balance = wallet.balance
-        
         # Create transaction record
         txn = Transaction.objects.create(
             tenant=tenant,
@@ -86,18 +89,7 @@ class WalletService:
             notes=notes
         )
         
-        # Update wallet balance
-        wallet.balance += amount
-        wallet.save(update_fields=['balance', 'updated_at'])
-        
-        # Create audit record
-        audit = WalletAudit.objects.create(
-            wallet=wallet,
-            transaction=txn,
-            previous_balance=previous_balance,
-            amount=amount,
-            new_balance=wallet.balance
-        )
+        audit = WalletService._post_credit(wallet, txn, amount)
         
         return txn, audit
     
@@ -125,8 +117,15 @@ class WalletService:
         """
         wallet = WalletService.get_or_create_wallet(tenant)
         
-        # Validate sufficient balance
-        if wallet.balance < amount:
+        # Debits check the balance, so fold in any pending ledger credits first
+        if WalletService.ledger_mode_enabled():
+            WalletService.materialize_ledger(wallet)
+        
+        # Atomic conditional debit - no read-modify-write race on the balance
+        previous_balance = WalletService._apply_balance_delta(
+            wallet, -amount, require_sufficient=True
+        )
+        if previous_balance is None:
             raise InsufficientBalance(
                 f"Insufficient wallet balance. Available: {wallet.currency} {wallet.balance}, "
                 f"Required: {wallet.currency} {amount}",
@@ -138,9 +137,6 @@ class WalletService:
                 }
             )
         
-        # Record previous balance
-        previous_balance = wallet.balance
-        
         # Create transaction record
         txn = Transaction.objects.create(
             tenant=tenant,
@@ -156,10 +152,6 @@ class WalletService:
             notes=notes
         )
         
-        # Update wallet balance
-        wallet.balance -= amount
-        wallet.save(update_fields=['balance', 'updated_at'])
-        
         # Create audit record (negative amount for debit)
         audit = WalletAudit.objects.create(
             wallet=wallet,
@@ -171,6 +163,280 @@ class WalletService:
         
         return txn, audit
     
+    @staticmethod
+    def debit_withdrawal(txn):
+        """
+        Debit a withdrawal's gross amount from its wallet.
+        
+        Conditional on the balance covering it; pending ledger credits
+        are folded in first. Call inside a transaction.
+        
+        Args:
+            txn: Withdrawal Transaction
+            
+        Returns:
+            WalletAudit: Audit record, or None if the balance is too low
+            (wallet left unchanged)
+        """
+        wallet = txn.wallet
+        if WalletService.ledger_mode_enabled():
+            WalletService.materialize_ledger(wallet)
+        
+        previous_balance = WalletService._apply_balance_delta(
+            wallet, -txn.amount, require_sufficient=True
+        )
+        if previous_balance is None:
+            return None
+        
+        return WalletAudit.objects.create(
+            wallet=wallet,
+            transaction=txn,
+            previous_balance=previous_balance,
+            amount=-txn.amount,  # Negative for debit
+            new_balance=wallet.balance
+        )
+    
+    @staticmethod
+    def refund_withdrawal(txn):
+        """
+        Credit a debited withdrawal's gross amount back to its wallet.
+        
+        The compensating entry for debit_withdrawal when the payout fails.
+        
+        Args:
+            txn: Withdrawal Transaction
+            
+        Returns:
+            WalletAudit: Audit record for the credit
+        """
+        wallet = txn.wallet
+        previous_balance = WalletService._apply_balance_delta(wallet, txn.amount)
+        
+        return WalletAudit.objects.create(
+            wallet=wallet,
+            transaction=txn,
+            previous_balance=previous_balance,
+            amount=txn.amount,  # Positive for credit
+            new_balance=wallet.balance
+        )
+    
+    @staticmethod
+    def ledger_mode_enabled():
+        """Whether payment credits go to the append-only ledger."""
+        return getattr(settings, 'WALLET_LEDGER_MODE', False)
+    
+    @staticmethod
+    def _apply_balance_delta(wallet, delta, require_sufficient=False):
+        """
+        Atomically add delta to the wallet balance with an F() update.
+        
+        The UPDATE takes the row lock for the remainder of the surrounding
+        transaction, so the balance read back afterwards is exact.
+        
+        Args:
+            wallet: TenantWallet instance (balance is refreshed in place)
+            delta: Signed amount to apply (Decimal)
+            require_sufficient: Only apply if the resulting balance is >= 0
+            
+        Returns:
+            Decimal: Balance before the change, or None if require_sufficient
+            was set and the balance was too low (wallet left unchanged)
+        """
+        queryset = TenantWallet.objects.filter(pk=wallet.pk)
+        if require_sufficient:
+            queryset = queryset.filter(balance__gte=-delta)
+        
+        updated = queryset.update(
+            balance=F('balance') + delta,
+            updated_at=timezone.now()
+        )
+        wallet.refresh_from_db(fields=['balance', 'updated_at'])
+        
+        if not updated:
+            return None
+        return wallet.balance - delta
+    
+    @staticmethod
+    def _post_credit(wallet, txn, amount):
+        """
+        Apply a credit for txn either directly or via the ledger.
+        
+        Returns:
+            WalletAudit: Audit record, or None in ledger mode
+        """
+        if WalletService.ledger_mode_enabled():
+            WalletLedgerEntry.objects.create(
+                wallet=wallet,
+                transaction=txn,
+                amount=amount
+            )
+            return None
+        
+        previous_balance = WalletService._apply_balance_delta(wallet, amount)
+        return WalletAudit.objects.create(
+            wallet=wallet,
+            transaction=txn,
+            previous_balance=previous_balance,
+            amount=amount,
+            new_balance=wallet.balance
+        )
+    
+    @staticmethod
+    @db_transaction.atomic
+    def settle_payments(tenant, payments):
+        """
+        Credit a batch of customer payments in one database transaction.
+        
+        Transactions, fee transactions and audit (or ledger) rows are bulk
+        inserted and the wallet row is updated once for the whole batch.
+        
+        Args:
+            tenant: Tenant instance
+            payments: Iterable of dicts with 'amount' and optional
+                'reference_type', 'reference_id', 'metadata'
+                
+        Returns:
+            dict: {
+                'payment_transactions': list[Transaction],
+                'fee_transactions': list[Transaction],
+                'wallet_audits': list[WalletAudit] (empty in ledger mode),
+                'gross_amount': Decimal,
+                'fee_amount': Decimal,
+                'net_amount': Decimal
+            }
+        """
+        wallet = WalletService.get_or_create_wallet(tenant)
+        tier = tenant.subscription_tier
+        
+        payment_txns = []
+        fee_txns = []
+        for payment in payments:
+            payment_amount = payment['amount']
+            reference_type = payment.get('reference_type')
+            reference_id = payment.get('reference_id')
+            fee_amount = WalletService.calculate_transaction_fee(tenant, payment_amount)
+            
+            payment_txn = Transaction(
+                tenant=tenant,
+                wallet=wallet,
+                transaction_type='customer_payment',
+                amount=payment_amount,
+                fee=fee_amount,
+                net_amount=payment_amount - fee_amount,
+                status='completed',
+                reference_type=reference_type,
+                reference_id=reference_id,
+                metadata=payment.get('metadata') or {},
+                notes=f"Customer payment for {reference_type} {reference_id}"
+            )
+            payment_txns.append(payment_txn)
+            
+            if fee_amount > 0:
+                fee_txns.append(Transaction(
+                    tenant=tenant,
+                    wallet=wallet,
+                    transaction_type='platform_fee',
+                    amount=fee_amount,
+                    fee=Decimal('0'),
+                    net_amount=fee_amount,
+                    status='completed',
+                    reference_type=reference_type,
+                    reference_id=reference_id,
+                    metadata={
+                        'payment_transaction_id': str(payment_txn.id),
+                        'fee_percentage': float(tier.transaction_fee_percentage)
+                    },
+                    notes=f"Platform fee for {reference_type} {reference_id}"
+                ))
+        
+        gross_amount = sum((txn.amount for txn in payment_txns), Decimal('0'))
+        fee_total = sum((txn.amount for txn in fee_txns), Decimal('0'))
+        net_total = gross_amount - fee_total
+        
+        Transaction.objects.bulk_create(payment_txns + fee_txns)
+        
+        audits = []
+        if WalletService.ledger_mode_enabled():
+            WalletLedgerEntry.objects.bulk_create([
+                WalletLedgerEntry(wallet=wallet, transaction=txn, amount=txn.net_amount)
+                for txn in payment_txns
+            ])
+        elif payment_txns:
+            running_balance = WalletService._apply_balance_delta(wallet, net_total)
+            for txn in payment_txns:
+                audits.append(WalletAudit(
+                    wallet=wallet,
+                    transaction=txn,
+                    previous_balance=running_balance,
+                    amount=txn.net_amount,
+                    new_balance=running_balance + txn.net_amount
+                ))
+                running_balance += txn.net_amount
+            WalletAudit.objects.bulk_create(audits)
+        
+        return {
+            'payment_transactions': payment_txns,
+            'fee_transactions': fee_txns,
+            'wallet_audits': audits,
+            'gross_amount': gross_amount,
+            'fee_amount': fee_total,
+            'net_amount': net_total
+        }
+    
+    @staticmethod
+    @db_transaction.atomic
+    def materialize_ledger(wallet, batch_size=None):
+        """
+        Fold pending ledger entries into the wallet balance.
+        
+        Locks the wallet row once, writes one WalletAudit per entry with
+        running balances, applies the summed amount and marks the entries
+        materialized.
+        
+        Args:
+            wallet: TenantWallet instance (balance is refreshed in place)
+            batch_size: Max entries to apply (default WALLET_LEDGER_BATCH_SIZE)
+            
+        Returns:
+            int: Number of entries materialized
+        """
+        batch_size = batch_size or getattr(settings, 'WALLET_LEDGER_BATCH_SIZE', 500)
+        
+        locked = TenantWallet.objects.select_for_update().get(pk=wallet.pk)
+        entries = list(
+            WalletLedgerEntry.objects.pending_for_wallet(locked)[:batch_size]
+        )
+        if not entries:
+            wallet.balance = locked.balance
+            return 0
+        
+        running_balance = locked.balance
+        audits = []
+        for entry in entries:
+            audits.append(WalletAudit(
+                wallet=locked,
+                transaction_id=entry.transaction_id,
+                previous_balance=running_balance,
+                amount=entry.amount,
+                new_balance=running_balance + entry.amount
+            ))
+            running_balance += entry.amount
+        WalletAudit.objects.bulk_create(audits)
+        
+        WalletService._apply_balance_delta(locked, running_balance - locked.balance)
+        WalletLedgerEntry.objects.filter(
+            id__in=[entry.id for entry in entries]
+        ).update(materialized_at=timezone.now())
+        
+        wallet.balance = locked.balance
+        
+        logger.info(
+            f"Materialized {len(entries)} ledger entries for wallet {wallet.pk}",
+            extra={'wallet_id': str(wallet.pk), 'entries': len(entries)}
+        )
+        
+        return len(entries)
+    
     @staticmethod
     def calculate_transaction_fee(tenant, payment_amount):
         """
@@ -203,6 +469,9 @@ class WalletService:
         """
         Process customer payment: calculate fee, credit wallet, record platform fee.
         
+        In ledger mode the net amount is appended to the wallet ledger and
+        'wallet_audit' is None until the entry is materialized.
+        
         Args:
             tenant: Tenant instance
             payment_amount: Total payment amount from customer (Decimal)
@@ -226,9 +495,6 @@ class WalletService:
         fee_amount = WalletService.calculate_transaction_fee(tenant, payment_amount)
         net_amount = payment_amount - fee_amount
         
-        # Record previous balance
-        previous_balance = wallet.balance
-        
         # Create customer payment transaction
         payment_txn = Transaction.objects.create(
             tenant=tenant,
@@ -265,17 +531,7 @@ class WalletService:
             )
         
         # Credit wallet with net amount
-        wallet.balance += net_amount
-        wallet.save(update_fields=['balance', 'updated_at'])
-        
-        # Create audit record
-        audit = WalletAudit.objects.create(
-            wallet=wallet,
-            transaction=payment_txn,
-            previous_balance=previous_balance,
-            amount=net_amount,
-            new_balance=wallet.balance
-        )
+        audit = WalletService._post_credit(wallet, payment_txn, net_amount)
         
         return {
             'payment_transaction': payment_txn,
@@ -321,8 +577,14 @@ class WalletService:
                 }
             )
         
-        # Validate sufficient balance
-        if wallet.balance < amount:
+        if WalletService.ledger_mode_enabled():
+            WalletService.materialize_ledger(wallet)
+        
+        # Immediately debit from wallet (prevents double-spending)
+        previous_balance = WalletService._apply_balance_delta(
+            wallet, -amount, require_sufficient=True
+        )
+        if previous_balance is None:
             raise InsufficientBalance(
                 f"Insufficient wallet balance. Available: {wallet.currency} {wallet.balance}, "
                 f"Requested: {wallet.currency} {amount}",
@@ -334,9 +596,6 @@ class WalletService:
                 }
             )
         
-        # Record previous balance
-        previous_balance = wallet.balance
-        
         # Create pending withdrawal transaction
         txn = Transaction.objects.create(
             tenant=tenant,
@@ -351,10 +610,6 @@ class WalletService:
             notes='Withdrawal requested by tenant'
         )
         
-        # Immediately debit from wallet (prevents double-spending)
-        wallet.balance -= amount
-        wallet.save(update_fields=['balance', 'updated_at'])
-        
         # Create audit record
         WalletAudit.objects.create(
             wallet=wallet,
@@ -483,21 +738,8 @@ class WalletService:
                 details={'transaction_id': str(transaction_id), 'status': txn.status}
             )
         
-        wallet = txn.wallet
-        previous_balance = wallet.balance
-        
         # Credit amount back to wallet
-        wallet.balance += txn.amount
-        wallet.save(update_fields=['balance', 'updated_at'])
-        
-        # Create audit record for credit-back
-        WalletAudit.objects.create(
-            wallet=wallet,
-            transaction=txn,
-            previous_balance=previous_balance,
-            amount=txn.amount,  # Positive for credit
-            new_balance=wallet.balance
-        )
+        WalletService.refund_withdrawal(txn)
         
         # Update transaction status
         txn.status = 'failed'
@@ -575,6 +817,8 @@ class WalletService:
         """
         Get current wallet balance for tenant.
         
+        In ledger mode this includes credits not yet materialized.
+        
         Args:
             tenant: Tenant instance
             
@@ -582,8 +826,11 @@ class WalletService:
             dict: {'balance': Decimal, 'currency': str}
         """
         wallet = WalletService.get_or_create_wallet(tenant)
+        balance = wallet.balance
+        if WalletService.ledger_mode_enabled():
+            balance += WalletLedgerEntry.objects.pending_total(wallet)
         return {
-            'balance': wallet.balance,
+            'balance': balance,
             'currency': wallet.currency
         }
     
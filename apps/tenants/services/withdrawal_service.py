@@ -19,6 +19,7 @@ from apps.tenants.models import Tenant, TenantWallet, Transaction
 from apps.rbac.models import User
 from apps.core.exceptions import TuliaException
 from apps.tenants.services.settings_service import SettingsService
+from apps.tenants.services.wallet_service import WalletService
 
 logger = logging.getLogger(__name__)
 
@@ -104,7 +105,10 @@ class WithdrawalService:
                 f"Withdrawal amount must be greater than fee ({fee})"
             )
         
-        # Check wallet balance (need gross amount)
+        # Check wallet balance (need gross amount), including pending ledger credits
+        if WalletService.ledger_mode_enabled():
+            WalletService.materialize_ledger(wallet)
+        
         if not wallet.has_sufficient_balance(amount):
             raise InsufficientBalance(
                 f"Insufficient balance. Available: {wallet.balance}, Required: {amount}",
@@ -153,7 +157,6 @@ class WithdrawalService:
         return transaction_obj
     
     @classmethod
-    @transaction.atomic
     def approve_withdrawal(
         cls,
         transaction_obj: Transaction,
@@ -162,6 +165,12 @@ class WithdrawalService:
         """
         Approve and process a withdrawal (four-eyes approval).
         
+        The wallet is debited and the withdrawal marked processing in
+        one short transaction; the provider is called after it commits,
+        so a slow payout does not hold the wallet row lock. A failed
+        payout is compensated with a credit back to the wallet. Do not
+        call inside an outer transaction.
+        
         Args:
             transaction_obj: Pending withdrawal transaction
             approved_by: User approving the withdrawal
@@ -170,6 +179,7 @@ class WithdrawalService:
             dict: Processing result with provider response
             
         Raises:
+            InsufficientBalance: If wallet balance no longer covers the withdrawal
             WithdrawalError: If approval fails or same user tries to approve
         """
         # Validate transaction
@@ -191,11 +201,13 @@ class WithdrawalService:
                 }
             )
         
+        transaction_obj = cls._start_processing(transaction_obj, approved_by)
+        
         # Get method details
         method_type = transaction_obj.metadata.get('method_type')
         method_details = transaction_obj.metadata.get('method_details', {})
         
-        # Process withdrawal through appropriate provider
+        # Process withdrawal through appropriate provider (outside the transaction)
         try:
             result = cls._process_withdrawal(
                 tenant=transaction_obj.tenant,
@@ -203,56 +215,94 @@ class WithdrawalService:
                 method_type=method_type,
                 method_details=method_details
             )
+        except Exception as e:
+            cls._compensate_failed_payout(transaction_obj, e)
             
-            # Update transaction
-            transaction_obj.status = 'completed'
-            transaction_obj.approved_by = approved_by
-            transaction_obj.metadata['approved_at'] = timezone.now().isoformat()
-            transaction_obj.metadata['provider_response'] = result
-            transaction_obj.save(update_fields=['status', 'approved_by', 'metadata', 'updated_at'])
-            
-            # Debit wallet
-            wallet = transaction_obj.wallet
-            wallet.balance -= transaction_obj.amount  # Deduct gross amount (including fee)
-            wallet.save(update_fields=['balance', 'updated_at'])
-            
-            logger.info(
-                f"Withdrawal approved and processed",
+            logger.error(
+                f"Withdrawal processing failed: {str(e)}",
+                exc_info=True,
                 extra={
                     'tenant_id': str(transaction_obj.tenant_id),
-                    'transaction_id': str(transaction_obj.id),
-                    'amount': float(transaction_obj.amount),
-                    'net_amount': float(transaction_obj.net_amount),
-                    'approved_by': str(approved_by.id)
+                    'transaction_id': str(transaction_obj.id)
                 }
             )
             
-            return {
-                'success': True,
+            raise WithdrawalError(f"Withdrawal processing failed: {str(e)}") from e
+        
+        # Update transaction
+        transaction_obj.status = 'completed'
+        transaction_obj.metadata['provider_response'] = result
+        transaction_obj.save(update_fields=['status', 'metadata', 'updated_at'])
+        
+        logger.info(
+            f"Withdrawal approved and processed",
+            extra={
+                'tenant_id': str(transaction_obj.tenant_id),
                 'transaction_id': str(transaction_obj.id),
                 'amount': float(transaction_obj.amount),
                 'net_amount': float(transaction_obj.net_amount),
-                'fee': float(transaction_obj.fee),
-                'provider_response': result
+                'approved_by': str(approved_by.id)
             }
+        )
+        
+        return {
+            'success': True,
+            'transaction_id': str(transaction_obj.id),
+            'amount': float(transaction_obj.amount),
+            'net_amount': float(transaction_obj.net_amount),
+            'fee': float(transaction_obj.fee),
+            'provider_response': result
+        }
+    
+    @staticmethod
+    @transaction.atomic
+    def _start_processing(transaction_obj: Transaction, approved_by: User) -> Transaction:
+        """
+        Debit the wallet and mark a pending withdrawal as processing.
+        
+        Returns:
+            Transaction: The locked, updated withdrawal
             
-        except Exception as e:
-            # Mark transaction as failed
-            transaction_obj.status = 'failed'
-            transaction_obj.metadata['error'] = str(e)
-            transaction_obj.metadata['failed_at'] = timezone.now().isoformat()
-            transaction_obj.save(update_fields=['status', 'metadata', 'updated_at'])
-            
-            logger.error(
-                f"Withdrawal processing failed: {str(e)}",
-                exc_info=True,
-                extra={
-                    'tenant_id': str(transaction_obj.tenant_id),
-                    'transaction_id': str(transaction_obj.id)
+        Raises:
+            InsufficientBalance: If wallet balance no longer covers the withdrawal
+            WithdrawalError: If another approval got there first
+        """
+        txn = Transaction.objects.select_for_update().select_related('wallet', 'tenant').get(
+            pk=transaction_obj.pk
+        )
+        if txn.status != 'pending':
+            raise WithdrawalError(
+                f"Transaction is not pending (status: {txn.status})"
+            )
+        
+        # Atomic conditional debit of the gross amount (including fee)
+        if WalletService.debit_withdrawal(txn) is None:
+            wallet = txn.wallet
+            raise InsufficientBalance(
+                f"Insufficient balance. Available: {wallet.balance}, Required: {txn.amount}",
+                details={
+                    'available': float(wallet.balance),
+                    'required': float(txn.amount),
+                    'currency': wallet.currency
                 }
             )
-            
-            raise WithdrawalError(f"Withdrawal processing failed: {str(e)}") from e
+        
+        txn.status = 'processing'
+        txn.approved_by = approved_by
+        txn.metadata['approved_at'] = timezone.now().isoformat()
+        txn.save(update_fields=['status', 'approved_by', 'metadata', 'updated_at'])
+        return txn
+    
+    @staticmethod
+    @transaction.atomic
+    def _compensate_failed_payout(transaction_obj: Transaction, error: Exception):
+        """Credit a failed payout back to the wallet and mark it failed."""
+        WalletService.refund_withdrawal(transaction_obj)
+        
+        transaction_obj.status = 'failed'
+        transaction_obj.metadata['error'] = str(error)
+        transaction_obj.metadata['failed_at'] = timezone.now().isoformat()
+        transaction_obj.save(update_fields=['status', 'metadata', 'updated_at'])
     
     @classmethod
     def _process_withdrawal(
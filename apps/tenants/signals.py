@@ -5,7 +5,8 @@ import logging
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
-from apps.tenants.models import Tenant, TenantSettings
+from apps.core.cache import CacheKeys, CacheService
+from apps.tenants.models import SubscriptionTier, Tenant, TenantAPIKey, TenantSettings
 from apps.tenants.utils import create_api_key_entry
 
 logger = logging.getLogger(__name__)
@@ -110,3 +111,39 @@ def create_tenant_settings(sender, instance, created, **kwargs):
                 'tenant_slug': instance.slug
             }
         )
+
+
+@receiver(post_save, sender=Tenant)
+def sync_api_key_records(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keep the TenantAPIKey lookup table in step with Tenant.api_keys.
+    
+    Runs only when api_keys may have changed, and drops cached
+    validation results for keys that were added or revoked.
+    """
+    if update_fields is not None and 'api_keys' not in update_fields:
+        return
+    if created and not instance.api_keys:
+        return
+    
+    changed = TenantAPIKey.objects.sync_for_tenant(instance)
+    for key_hash in changed:
+        CacheService.delete(CacheKeys.format(CacheKeys.API_KEY, key_hash=key_hash))
+
+
+@receiver(post_save, sender=Tenant)
+def invalidate_rate_limits(sender, instance, created, update_fields=None, **kwargs):
+    """Drop the cached rate limits when a tenant may have changed tier."""
+    if created or (update_fields is not None and 'subscription_tier' not in update_fields):
+        return
+    
+    CacheService.delete(CacheKeys.format(CacheKeys.TENANT_RATE_LIMITS, tenant_id=str(instance.id)))
+
+
+@receiver(post_save, sender=SubscriptionTier)
+def invalidate_tier_rate_limits(sender, instance, created, **kwargs):
+    """Drop every tenant's cached rate limits when a tier is edited."""
+    if created:
+        return
+    
+    CacheService.delete_pattern(CacheKeys.format(CacheKeys.TENANT_RATE_LIMITS, tenant_id='*'))
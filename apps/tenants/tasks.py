@@ -264,6 +264,56 @@ def process_due_subscriptions():
     }
 
 
+@shared_task
+def materialize_wallet_ledgers():
+    """
+    Apply pending wallet ledger entries to wallet balances.
+    
+    Only does work when WALLET_LEDGER_MODE is enabled. Should run
+    frequently (e.g., every 30 seconds) so balances stay close to real time.
+    """
+    from apps.tenants.models import TenantWallet, WalletLedgerEntry
+    from apps.tenants.services import WalletService
+    
+    wallet_ids = list(
+        WalletLedgerEntry.objects.pending()
+        .values_list('wallet_id', flat=True)
+        .distinct()
+    )
+    
+    entries_applied = 0
+    for wallet in TenantWallet.objects.filter(id__in=wallet_ids):
+        try:
+            entries_applied += WalletService.materialize_ledger(wallet)
+        except Exception as e:
+            logger.error(
+                f"Failed to materialize ledger for wallet {wallet.id}: {str(e)}",
+                exc_info=True
+            )
+    
+    return {
+        'wallets_processed': len(wallet_ids),
+        'entries_applied': entries_applied
+    }
+
+
+@shared_task
+def flush_api_key_usage():
+    """
+    Write buffered API key last-used times to TenantAPIKey.
+    
+    Should run frequently (e.g., every minute); usage between flushes
+    collapses to one update per key.
+    """
+    from apps.tenants.services.api_key_usage import APIKeyUsage
+    
+    updated = APIKeyUsage.flush()
+    if updated:
+        logger.info(f"Flushed API key usage for {updated} keys")
+    
+    return {'keys_updated': updated}
+
+
 # Helper functions for payment and notifications
 
 def _charge_payment_method(payment_method_id, amount, customer_email, metadata):
@@ -0,0 +1,168 @@
+"""
+Tests for indexed API key validation and coalesced last-used tracking.
+"""
+import pytest
+from collections import defaultdict
+from unittest.mock import patch
+
+from apps.tenants.models import Tenant, TenantAPIKey
+from apps.tenants.services import SettingsService
+from apps.tenants.services.api_key_usage import APIKeyUsage, LAST_USED_KEY
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-key-lookup-tests',
+    }
+}
+
+
+class FakeRedis:
+    """In-memory stand-in for the hash commands used by APIKeyUsage."""
+
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hset(self, key, field, value):
+        self.hashes[key][field] = str(value).encode()
+
+    def hgetall(self, key):
+        return {field.encode(): value for field, value in self.hashes.get(key, {}).items()}
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+class FakePipeline:
+    """Buffers commands and runs them on execute()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def command(*args):
+            self.calls.append((name, args))
+        return command
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args) for name, args in self.calls]
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with patch('apps.tenants.services.api_key_usage._redis_client', return_value=redis):
+        yield redis
+
+
+@pytest.fixture
+def local_cache(settings):
+    from django.core.cache import cache
+    settings.CACHES = LOCMEM_CACHES
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def tenant(db):
+    return Tenant.objects.create(
+        name='Key Shop',
+        slug='key-shop',
+        status='active',
+        whatsapp_number='+254700000421'
+    )
+
+
+@pytest.fixture
+def other_tenant(db):
+    return Tenant.objects.create(
+        name='Other Key Shop',
+        slug='other-key-shop',
+        status='active',
+        whatsapp_number='+254700000422'
+    )
+
+
+@pytest.mark.django_db
+class TestAPIKeyLookup:
+    """Keys are mirrored into TenantAPIKey and validated by hash."""
+
+    def test_generated_key_is_indexed_and_validates(self, tenant, other_tenant, fake_redis, local_cache):
+        plain_key, metadata = SettingsService.generate_api_key(tenant, 'Production')
+
+        assert TenantAPIKey.objects.filter(tenant=tenant, key_hash=metadata['key_hash']).exists()
+        assert SettingsService.validate_api_key(tenant, plain_key)
+        assert not SettingsService.validate_api_key(other_tenant, plain_key)
+        assert not SettingsService.validate_api_key(tenant, 'not-a-key')
+        assert Tenant.objects.by_api_key(tenant.id, metadata['key_hash']) == tenant
+
+    def test_initial_key_is_indexed(self, tenant):
+        entries = Tenant.objects.get(id=tenant.id).api_keys
+
+        assert set(TenantAPIKey.objects.filter(tenant=tenant).values_list('key_hash', flat=True)) == {
+            entry['key_hash'] for entry in entries
+        }
+
+    def test_cached_validation_does_not_query_or_write(
+        self, tenant, fake_redis, local_cache, django_assert_num_queries
+    ):
+        plain_key, _ = SettingsService.generate_api_key(tenant, 'Production')
+        updated_at = Tenant.objects.get(id=tenant.id).updated_at
+
+        with django_assert_num_queries(1):
+            assert SettingsService.validate_api_key(tenant, plain_key)
+        with django_assert_num_queries(0):
+            assert SettingsService.validate_api_key(tenant, plain_key)
+
+        assert Tenant.objects.get(id=tenant.id).updated_at == updated_at
+
+    def test_revoked_key_rejected_despite_cache(self, tenant, fake_redis, local_cache):
+        plain_key, metadata = SettingsService.generate_api_key(tenant, 'Production')
+        assert SettingsService.validate_api_key(tenant, plain_key)
+
+        SettingsService.revoke_api_key(tenant, metadata['key_hash'])
+
+        assert not TenantAPIKey.objects.filter(key_hash=metadata['key_hash']).exists()
+        assert not SettingsService.validate_api_key(tenant, plain_key)
+
+
+@pytest.mark.django_db
+class TestAPIKeyUsage:
+    """Usage is buffered and flushed to the key rows in one batch."""
+
+    def test_usage_flushed_to_key_row(self, tenant, fake_redis, local_cache):
+        plain_key, metadata = SettingsService.generate_api_key(tenant, 'Production')
+        for _ in range(3):
+            SettingsService.validate_api_key(tenant, plain_key)
+
+        assert TenantAPIKey.objects.get(key_hash=metadata['key_hash']).last_used_at is None
+        assert list(fake_redis.hashes[LAST_USED_KEY]) == [metadata['key_hash']]
+
+        assert APIKeyUsage.flush() == 1
+        assert APIKeyUsage.flush() == 0
+
+        record = TenantAPIKey.objects.get(key_hash=metadata['key_hash'])
+        assert record.last_used_at is not None
+        listed = {
+            key['name']: key.get('last_used_at') for key in SettingsService.list_api_keys(tenant)
+        }
+        assert listed['Production'] == record.last_used_at.isoformat()
+
+    def test_redis_down_updates_key_row_only(self, tenant, local_cache):
+        plain_key, metadata = SettingsService.generate_api_key(tenant, 'Production')
+        updated_at = Tenant.objects.get(id=tenant.id).updated_at
+
+        with patch(
+            'apps.tenants.services.api_key_usage._redis_client',
+            side_effect=ConnectionError('down')
+        ):
+            assert SettingsService.validate_api_key(tenant, plain_key)
+
+        assert TenantAPIKey.objects.get(key_hash=metadata['key_hash']).last_used_at is not None
+        assert Tenant.objects.get(id=tenant.id).updated_at == updated_at
@@ -0,0 +1,263 @@
+"""
+Tests for atomic wallet balance updates, ledger mode and batch settlement.
+"""
+import pytest
+from decimal import Decimal
+
+from apps.tenants.models import (
+    Tenant, SubscriptionTier, TenantWallet, Transaction, WalletAudit, WalletLedgerEntry
+)
+from apps.tenants.services import WalletService, InsufficientBalance
+from apps.tenants.tasks import materialize_wallet_ledgers
+
+
+@pytest.fixture
+def tier(db):
+    return SubscriptionTier.objects.create(
+        name='Growth',
+        monthly_price=Decimal('99.00'),
+        yearly_price=Decimal('950.00'),
+        payment_facilitation=True,
+        transaction_fee_percentage=Decimal('2.0')
+    )
+
+
+@pytest.fixture
+def wallet_tenant(db, tier):
+    return Tenant.objects.create(
+        name='Ledger Shop',
+        slug='ledger-shop',
+        status='active',
+        subscription_tier=tier,
+        whatsapp_number='+254700000001'
+    )
+
+
+@pytest.fixture
+def wallet(wallet_tenant):
+    return TenantWallet.objects.create(
+        tenant=wallet_tenant,
+        balance=Decimal('100.00'),
+        currency='KES'
+    )
+
+
+@pytest.mark.django_db
+class TestAtomicBalanceUpdates:
+    """Direct mode applies balance changes with F() updates."""
+
+    def test_credit_uses_current_row_balance(self, wallet_tenant, wallet):
+        # Simulate a concurrent credit that this process has not seen
+        TenantWallet.objects.filter(pk=wallet.pk).update(balance=Decimal('150.00'))
+
+        txn, audit = WalletService.credit_wallet(wallet_tenant, Decimal('25.00'))
+
+        wallet.refresh_from_db()
+        assert wallet.balance == Decimal('175.00')
+        assert audit.previous_balance == Decimal('150.00')
+        assert audit.new_balance == Decimal('175.00')
+        assert txn.status == 'completed'
+
+    def test_debit_insufficient_balance_leaves_wallet_unchanged(self, wallet_tenant, wallet):
+        with pytest.raises(InsufficientBalance):
+            WalletService.debit_wallet(wallet_tenant, Decimal('500.00'))
+
+        wallet.refresh_from_db()
+        assert wallet.balance == Decimal('100.00')
+        assert Transaction.objects.filter(wallet=wallet).count() == 0
+
+    def test_process_customer_payment_credits_net_amount(self, wallet_tenant, wallet):
+        result = WalletService.process_customer_payment(
+            wallet_tenant, Decimal('50.00'), 'order', None
+        )
+
+        wallet.refresh_from_db()
+        assert result['fee_amount'] == Decimal('1.00')
+        assert wallet.balance == Decimal('149.00')
+        assert result['wallet_audit'].new_balance == Decimal('149.00')
+
+
+@pytest.mark.django_db
+class TestSettlePayments:
+    """Batch settlement credits many payments in one transaction."""
+
+    def test_settle_payments_direct_mode(self, wallet_tenant, wallet):
+        result = WalletService.settle_payments(wallet_tenant, [
+            {'amount': Decimal('100.00'), 'reference_type': 'order'},
+            {'amount': Decimal('50.00'), 'reference_type': 'order'},
+        ])
+
+        wallet.refresh_from_db()
+        assert result['gross_amount'] == Decimal('150.00')
+        assert result['fee_amount'] == Decimal('3.00')
+        assert result['net_amount'] == Decimal('147.00')
+        assert wallet.balance == Decimal('247.00')
+        assert len(result['fee_transactions']) == 2
+
+        audits = result['wallet_audits']
+        assert audits[0].previous_balance == Decimal('100.00')
+        assert audits[0].new_balance == Decimal('198.00')
+        assert audits[1].new_balance == Decimal('247.00')
+
+    def test_settle_payments_empty_batch(self, wallet_tenant, wallet):
+        result = WalletService.settle_payments(wallet_tenant, [])
+
+        wallet.refresh_from_db()
+        assert result['net_amount'] == Decimal('0')
+        assert wallet.balance == Decimal('100.00')
+
+
+@pytest.mark.django_db
+class TestLedgerMode:
+    """Ledger mode appends entries and materializes them later."""
+
+    @pytest.fixture(autouse=True)
+    def ledger_mode(self, settings):
+        settings.WALLET_LEDGER_MODE = True
+
+    def test_credit_appends_entry_without_touching_balance(self, wallet_tenant, wallet):
+        txn, audit = WalletService.credit_wallet(wallet_tenant, Decimal('40.00'))
+
+        wallet.refresh_from_db()
+        assert audit is None
+        assert wallet.balance == Decimal('100.00')
+        assert WalletLedgerEntry.objects.pending_for_wallet(wallet).count() == 1
+        assert WalletService.get_wallet_balance(wallet_tenant)['balance'] == Decimal('140.00')
+
+    def test_materialize_ledger_writes_audits(self, wallet_tenant, wallet):
+        WalletService.credit_wallet(wallet_tenant, Decimal('40.00'))
+        WalletService.settle_payments(wallet_tenant, [{'amount': Decimal('10.00')}])
+
+        result = materialize_wallet_ledgers()
+
+        wallet.refresh_from_db()
+        assert result['entries_applied'] == 2
+        assert wallet.balance == Decimal('149.80')
+        assert WalletLedgerEntry.objects.pending().count() == 0
+        assert WalletAudit.objects.filter(wallet=wallet).count() == 2
+
+    def test_debit_materializes_pending_credits_first(self, wallet_tenant, wallet):
+        WalletService.credit_wallet(wallet_tenant, Decimal('50.00'))
+
+        txn, audit = WalletService.debit_wallet(wallet_tenant, Decimal('120.00'))
+
+        wallet.refresh_from_db()
+        assert wallet.balance == Decimal('30.00')
+        assert audit.previous_balance == Decimal('150.00')
+
+
+@pytest.mark.django_db
+class TestWithdrawalBalanceChecks:
+    """Withdrawals and downgrades see the real balance."""
+
+    @pytest.fixture
+    def users(self, db):
+        from apps.rbac.models import User
+        return (
+            User.objects.create(email='initiator@example.com'),
+            User.objects.create(email='approver@example.com'),
+        )
+
+    def _initiate(self, tenant, amount, initiator):
+        from apps.tenants.services.withdrawal_service import WithdrawalService
+        return WithdrawalService.initiate_withdrawal(
+            tenant=tenant,
+            amount=amount,
+            method_type='mpesa',
+            method_details={'phone_number': '254712345678'},
+            initiated_by=initiator
+        )
+
+    def test_approve_debits_current_row_balance(self, wallet_tenant, wallet, users):
+        from unittest.mock import patch
+        from apps.tenants.services.withdrawal_service import WithdrawalService
+
+        txn = self._initiate(wallet_tenant, Decimal('100.00'), users[0])
+        # A concurrent credit lands after the withdrawal was loaded
+        WalletService.credit_wallet(wallet_tenant, Decimal('25.00'))
+
+        with patch.object(WithdrawalService, '_process_withdrawal', return_value={}):
+            WithdrawalService.approve_withdrawal(txn, users[1])
+
+        wallet.refresh_from_db()
+        assert wallet.balance == Decimal('25.00')
+
+    def test_approve_rejects_overdrawn_wallet(self, wallet_tenant, wallet, users):
+        from unittest.mock import patch
+        from apps.tenants.services import withdrawal_service
+        from apps.tenants.services.withdrawal_service import WithdrawalService
+
+        txn = self._initiate(wallet_tenant, Decimal('100.00'), users[0])
+        TenantWallet.objects.filter(pk=wallet.pk).update(balance=Decimal('40.00'))
+
+        with patch.object(WithdrawalService, '_process_withdrawal') as mock_payout:
+            with pytest.raises(withdrawal_service.InsufficientBalance):
+                WithdrawalService.approve_withdrawal(txn, users[1])
+
+        mock_payout.assert_not_called()
+        wallet.refresh_from_db()
+        assert wallet.balance == Decimal('40.00')
+
+    def test_payout_runs_after_debit_is_recorded(self, wallet_tenant, wallet, users):
+        from unittest.mock import patch
+        from apps.tenants.services.withdrawal_service import WithdrawalService
+
+        txn = self._initiate(wallet_tenant, Decimal('100.00'), users[0])
+        seen = {}
+
+        def payout(**kwargs):
+            row = Transaction.objects.get(pk=txn.pk)
+            seen['status'] = row.status
+            seen['balance'] = TenantWallet.objects.get(pk=wallet.pk).balance
+            return {'provider': 'mpesa'}
+
+        with patch.object(WithdrawalService, '_process_withdrawal', side_effect=payout):
+            WithdrawalService.approve_withdrawal(txn, users[1])
+
+        assert seen == {'status': 'processing', 'balance': Decimal('0.00')}
+        txn.refresh_from_db()
+        assert txn.status == 'completed'
+        assert txn.approved_by == users[1]
+
+    def test_failed_payout_is_credited_back(self, wallet_tenant, wallet, users):
+        from unittest.mock import patch
+        from apps.tenants.services.withdrawal_service import WithdrawalError, WithdrawalService
+
+        txn = self._initiate(wallet_tenant, Decimal('100.00'), users[0])
+
+        with patch.object(WithdrawalService, '_process_withdrawal', side_effect=RuntimeError('timeout')):
+            with pytest.raises(WithdrawalError):
+                WithdrawalService.approve_withdrawal(txn, users[1])
+
+        txn.refresh_from_db()
+        wallet.refresh_from_db()
+        assert txn.status == 'failed'
+        assert wallet.balance == Decimal('100.00')
+        assert list(
+            WalletAudit.objects.filter(transaction=txn).order_by('created_at').values_list('amount', flat=True)
+        ) == [Decimal('-100.00'), Decimal('100.00')]
+
+    def test_initiate_counts_pending_ledger_credits(self, wallet_tenant, wallet, users, settings):
+        settings.WALLET_LEDGER_MODE = True
+        WalletService.credit_wallet(wallet_tenant, Decimal('50.00'))
+
+        txn = self._initiate(wallet_tenant, Decimal('150.00'), users[0])
+
+        assert txn.status == 'pending'
+
+    def test_downgrade_blocked_by_pending_ledger_credits(self, wallet_tenant, settings):
+        from apps.tenants.services.payment_facilitation_service import (
+            PaymentFacilitationService, WalletBalanceNotZero
+        )
+        settings.WALLET_LEDGER_MODE = True
+        TenantWallet.objects.create(tenant=wallet_tenant, balance=Decimal('0'), currency='KES')
+        WalletService.credit_wallet(wallet_tenant, Decimal('50.00'))
+        basic = SubscriptionTier.objects.create(
+            name='Basic',
+            monthly_price=Decimal('10.00'),
+            yearly_price=Decimal('100.00'),
+            payment_facilitation=False
+        )
+
+        with pytest.raises(WalletBalanceNotZero):
+            PaymentFacilitationService.validate_tier_downgrade(wallet_tenant, basic)
@@ -20,6 +20,7 @@ from drf_spectacular.types import OpenApiTypes
 
 from apps.core.permissions import HasTenantScopes
 from apps.rbac.models import AuditLog
+from apps.tenants.models import TenantAPIKey
 from apps.tenants.serializers_settings import (
     APIKeySerializer,
     APIKeyCreateSerializer,
@@ -131,6 +132,13 @@ def api_keys_view(request):
         # Return list of API keys with masked values
         api_keys = request.tenant.api_keys or []
         
+        # Usage is tracked on the indexed rows rather than in the JSON entries
+        last_used = TenantAPIKey.objects.last_used_map(request.tenant)
+        api_keys = [
+            {**key, 'last_used_at': last_used[key['key_hash']]} if key.get('key_hash') in last_used else key
+            for key in api_keys
+        ]
+        
         # Serialize keys using APIKeySerializer
         serializer = APIKeySerializer(api_keys, many=True)
         
@@ -1,10 +1,16 @@
 """
 ASGI config for Tulia AI.
+
+Serve with uvicorn workers, e.g.
+``gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker``;
+see docs/production-deployment.md.
 """
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Tells settings and the async provider clients this process serves ASGI
+os.environ.setdefault('ASGI_MODE', 'true')
 
 application = get_asgi_application()
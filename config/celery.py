@@ -143,6 +143,48 @@ app.conf.beat_schedule = {
         # 'schedule': crontab(hour=10, minute=0),
     },
     
+    # Fold pending wallet ledger entries into balances (WALLET_LEDGER_MODE)
+    'materialize-wallet-ledgers': {
+        'task': 'apps.tenants.tasks.materialize_wallet_ledgers',
+        'schedule': 30.0,  # Every 30 seconds
+    },
+    
+    # Reschedule inbound message bursts whose task was lost
+    'requeue-stale-message-bursts': {
+        'task': 'apps.bot.tasks.requeue_stale_message_bursts',
+        'schedule': 60.0,  # Every minute
+    },
+    
+    # Write hot conversation states back to Postgres (BOT_STATE_HOT_CACHE)
+    'flush-conversation-states': {
+        'task': 'apps.bot.tasks.flush_conversation_states',
+        'schedule': 30.0,  # Every 30 seconds
+    },
+    
+    # Re-enqueue fast-ack Twilio webhooks left in the outbox
+    'requeue-stale-twilio-webhooks': {
+        'task': 'apps.integrations.tasks.requeue_stale_twilio_webhooks',
+        'schedule': 60.0,  # Every minute
+    },
+    
+    # Fold buffered campaign delivery/engagement counters into MessageCampaign
+    'flush-campaign-counters': {
+        'task': 'apps.messaging.tasks.flush_campaign_counters',
+        'schedule': 10.0,  # Every 10 seconds
+    },
+    
+    # Flush real-time analytics counters into AnalyticsDaily
+    'flush-realtime-analytics': {
+        'task': 'analytics.flush_realtime_counters',
+        'schedule': 300.0,  # Every 5 minutes
+    },
+    
+    # Write buffered API key last-used times to TenantAPIKey
+    'flush-api-key-usage': {
+        'task': 'apps.tenants.tasks.flush_api_key_usage',
+        'schedule': 60.0,  # Every minute
+    },
+    
     # Send onboarding reminders daily
     'send-onboarding-reminders': {
         'task': 'apps.tenants.tasks.send_onboarding_reminders',
@@ -110,11 +110,22 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# ASGI serving (gunicorn with uvicorn workers, see docs/production-deployment.md)
+# config/asgi.py sets ASGI_MODE for its own process; async provider clients
+# then pool connections per event loop.
+ASGI_APPLICATION = 'config.asgi.application'
+ASGI_MODE = env.bool('ASGI_MODE', default=False)
+
 # Database
 DATABASES = {
     'default': env.db('DATABASE_URL'),
 }
-DATABASES['default']['CONN_MAX_AGE'] = env('DB_CONN_MAX_AGE')
+# Django does not reliably reuse or close persistent connections under ASGI,
+# so CONN_MAX_AGE defaults to 0 there (pool with PgBouncer instead)
+if ASGI_MODE:
+    DATABASES['default']['CONN_MAX_AGE'] = env.int('DB_CONN_MAX_AGE', default=0)
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = env('DB_CONN_MAX_AGE')
 
 # Configure based on database engine
 if 'postgresql' in DATABASES['default']['ENGINE']:
@@ -183,6 +194,9 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'apps.core.exceptions.custom_exception_handler',
 }
 
+# Default pagination mode for list APIs that support keyset cursors ('page' or 'cursor')
+API_DEFAULT_PAGINATION = env('API_DEFAULT_PAGINATION', default='page')
+
 # DRF Spectacular (OpenAPI)
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Tulia AI WhatsApp Commerce API',
@@ -436,6 +450,8 @@ curl -X POST https://api.trytulia.com/v1/wallet/withdrawals/{transaction_id}/app
 if not DEBUG:
     # Redirect all HTTP requests to HTTPS
     SECURE_SSL_REDIRECT = True
+    # Prometheus scrapes workers directly over the internal network
+    SECURE_REDIRECT_EXEMPT = [r'^metrics$']
     
     # HSTS (HTTP Strict Transport Security)
     # Tells browsers to only access site via HTTPS for 1 year
@@ -624,9 +640,19 @@ RATELIMIT_ENABLE = RATE_LIMIT_ENABLED  # Enable/disable rate limiting
 # Use custom view for rate limit responses (returns 429 instead of 403)
 RATELIMIT_VIEW = 'apps.core.exceptions.ratelimit_view'
 
+# Per-tenant token buckets (apps.core.rate_limiting.RateLimitMiddleware)
+# Each process leases up to RATE_LIMIT_LEASE_MAX tokens from Redis at a time
+# and spends them locally; a lease not spent within RATE_LIMIT_LEASE_TTL
+# seconds is refunded. RATE_LIMIT_LEASE_MAX=1 consults Redis on every request.
+RATE_LIMIT_LEASE_MAX = env.int('RATE_LIMIT_LEASE_MAX', default=20)
+RATE_LIMIT_LEASE_TTL = env.float('RATE_LIMIT_LEASE_TTL', default=2.0)
+
 # Logging Configuration
 LOG_LEVEL = env('LOG_LEVEL')
 JSON_LOGS = env('JSON_LOGS')
+# Format and write log records on background threads (QueueHandler/QueueListener)
+# instead of the request or task thread; see apps.core.logging.install_queue_handlers
+LOG_QUEUE_HANDLERS = env.bool('LOG_QUEUE_HANDLERS', default=False)
 
 LOGGING = {
     'version': 1,
@@ -776,6 +802,26 @@ if SENTRY_DSN:
         enable_tracing=True,
     )
 
+# Prometheus metrics: one registry per process, merged across workers in
+# Redis and served at /metrics (Bearer METRICS_AUTH_TOKEN when set)
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=False)
+METRICS_AUTH_TOKEN = env('METRICS_AUTH_TOKEN', default=None)
+METRICS_FLUSH_INTERVAL = env.float('METRICS_FLUSH_INTERVAL', default=10.0)  # seconds
+METRICS_MAX_SERIES = env.int('METRICS_MAX_SERIES', default=1000)  # label sets per metric
+METRICS_TENANT_BUCKETS = env.int('METRICS_TENANT_BUCKETS', default=16)
+METRICS_TRACKED_TENANTS = env.list('METRICS_TRACKED_TENANTS', default=[])  # tenant IDs kept as labels
+
+# Twilio Configuration
+TWILIO_HTTP_TIMEOUT = env.int('TWILIO_HTTP_TIMEOUT', default=10)  # seconds
+TWILIO_CLIENT_CACHE_SIZE = env.int('TWILIO_CLIENT_CACHE_SIZE', default=256)  # tenants per process
+TWILIO_MAX_CONCURRENT_SENDS_PER_TENANT = env.int('TWILIO_MAX_CONCURRENT_SENDS_PER_TENANT', default=10)
+# Webhook ingress: verify, enqueue and acknowledge; persistence and bot
+# dispatch run in process_twilio_webhook workers
+TWILIO_WEBHOOK_FAST_ACK = env.bool('TWILIO_WEBHOOK_FAST_ACK', default=False)
+TWILIO_ROUTE_CACHE_TTL = env.int('TWILIO_ROUTE_CACHE_TTL', default=60)  # seconds
+TWILIO_WEBHOOK_REQUEUE_AFTER = env.int('TWILIO_WEBHOOK_REQUEUE_AFTER', default=300)  # seconds
+TWILIO_WEBHOOK_MAX_REQUEUES = env.int('TWILIO_WEBHOOK_MAX_REQUEUES', default=10)
+
 # OpenAI/Claude Configuration
 OPENAI_API_KEY = env('OPENAI_API_KEY', default=None)
 OPENAI_MODEL = env('OPENAI_MODEL', default='gpt-4o-mini')
@@ -794,6 +840,36 @@ MAX_DOCUMENT_SIZE = env.int('MAX_DOCUMENT_SIZE', default=10 * 1024 * 1024)  # 10
 ALLOWED_DOCUMENT_TYPES = ['pdf', 'txt']
 DOCUMENT_STORAGE_PATH = os.path.join(BASE_DIR, 'media', 'documents')
 
+# Document ingestion pipeline: chunks per embedding request and number of
+# embed/upsert batches kept in flight concurrently
+RAG_INGEST_EMBED_BATCH_SIZE = env.int('RAG_INGEST_EMBED_BATCH_SIZE', default=64)
+RAG_INGEST_CONCURRENCY = env.int('RAG_INGEST_CONCURRENCY', default=4)
+
+# Inbound burst coalescing: queue rapid messages per conversation and run
+# the bot once after the burst has been quiet for the window
+BOT_BURST_COALESCING = env.bool('BOT_BURST_COALESCING', default=False)
+BOT_BURST_WINDOW_SECONDS = env.int('BOT_BURST_WINDOW_SECONDS', default=5)
+BOT_BURST_MAX_WAIT_SECONDS = env.int('BOT_BURST_MAX_WAIT_SECONDS', default=15)
+BOT_BURST_LOCK_TIMEOUT = env.int('BOT_BURST_LOCK_TIMEOUT', default=120)  # seconds
+BOT_BURST_REQUEUE_AFTER = env.int('BOT_BURST_REQUEUE_AFTER', default=60)  # seconds past max wait
+
+# Conversation state hot cache: keep ConversationState in Redis with
+# per-field delta writes and flush it to ConversationSession periodically
+BOT_STATE_HOT_CACHE = env.bool('BOT_STATE_HOT_CACHE', default=False)
+BOT_STATE_CACHE_TTL = env.int('BOT_STATE_CACHE_TTL', default=86400)  # seconds
+
+# Tenant runtime snapshot L1: keep tenant, settings, agent config and feature
+# flags in an in-process LRU across messages, invalidated over Redis pub/sub
+BOT_TENANT_RUNTIME_L1 = env.bool('BOT_TENANT_RUNTIME_L1', default=False)
+BOT_TENANT_RUNTIME_L1_SIZE = env.int('BOT_TENANT_RUNTIME_L1_SIZE', default=512)  # tenants
+BOT_TENANT_RUNTIME_TTL = env.int('BOT_TENANT_RUNTIME_TTL', default=300)  # seconds
+
+# Per-node profiling: time, SQL queries, cache lookups and LLM tokens for
+# every graph node and tool; a sampled fraction of messages stores its
+# profile on an AgentInteraction
+BOT_NODE_PROFILING = env.bool('BOT_NODE_PROFILING', default=False)
+BOT_NODE_PROFILE_SAMPLE_RATE = env.float('BOT_NODE_PROFILE_SAMPLE_RATE', default=0.01)  # fraction of messages
+
 # RAG retrieval settings
 RAG_CHUNK_SIZE = env.int('RAG_CHUNK_SIZE', default=400)  # tokens
 RAG_CHUNK_OVERLAP = env.int('RAG_CHUNK_OVERLAP', default=50)  # tokens
@@ -801,9 +877,30 @@ RAG_TOP_K_RESULTS = env.int('RAG_TOP_K_RESULTS', default=5)
 RAG_SEMANTIC_WEIGHT = env.float('RAG_SEMANTIC_WEIGHT', default=0.7)
 RAG_KEYWORD_WEIGHT = env.float('RAG_KEYWORD_WEIGHT', default=0.3)
 
+# In-process LRU of hydrated search chunks (entries, seconds)
+RAG_CHUNK_CACHE_SIZE = env.int('RAG_CHUNK_CACHE_SIZE', default=2048)
+RAG_CHUNK_CACHE_TTL = env.int('RAG_CHUNK_CACHE_TTL', default=300)
+
 # Subscription Configuration
 DEFAULT_TRIAL_DAYS = env.int('DEFAULT_TRIAL_DAYS', default=14)
 
+# Wallet Configuration
+# Ledger mode appends payment credits to wallet_ledger_entries and folds them
+# into the wallet balance periodically, so concurrent payment callbacks never
+# wait on the wallet row lock.
+WALLET_LEDGER_MODE = env.bool('WALLET_LEDGER_MODE', default=False)
+WALLET_LEDGER_BATCH_SIZE = env.int('WALLET_LEDGER_BATCH_SIZE', default=500)
+
+# Analytics Configuration
+# Real-time counters live in Redis hashes per tenant/day and are flushed
+# into AnalyticsDaily periodically; the nightly rollup recomputes exact values.
+ANALYTICS_COUNTER_TTL = env.int('ANALYTICS_COUNTER_TTL', default=172800)  # 2 days
+
+# Campaign delivery/engagement counters: buffer increments in Redis and
+# fold them into MessageCampaign with one UPDATE per campaign per flush
+CAMPAIGN_COUNTER_BUFFERING = env.bool('CAMPAIGN_COUNTER_BUFFERING', default=False)
+CAMPAIGN_COUNTER_TTL = env.int('CAMPAIGN_COUNTER_TTL', default=86400)  # seconds
+
 # Email Configuration
 EMAIL_BACKEND = env('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = env('EMAIL_HOST', default='localhost')
@@ -914,6 +1011,13 @@ MPESA_API_URL = env('MPESA_API_URL', default='https://sandbox.safaricom.co.ke')
 MPESA_B2C_SHORTCODE = env('MPESA_B2C_SHORTCODE', default=None)
 MPESA_B2C_SECURITY_CREDENTIAL = env('MPESA_B2C_SECURITY_CREDENTIAL', default=None)
 
+# M-Pesa Daraja client: pooled HTTP connections per credential set, with
+# access tokens renewed in the background this long before they expire
+MPESA_HTTP_POOL_SIZE = env.int('MPESA_HTTP_POOL_SIZE', default=20)
+MPESA_HTTP_TIMEOUT = env.int('MPESA_HTTP_TIMEOUT', default=30)  # seconds
+MPESA_TOKEN_REFRESH_MARGIN = env.int('MPESA_TOKEN_REFRESH_MARGIN', default=300)  # seconds
+MPESA_CLIENT_CACHE_SIZE = env.int('MPESA_CLIENT_CACHE_SIZE', default=64)  # credential sets per process
+
 # PesaLink (Bank-to-Bank Transfers)
 PESALINK_API_KEY = env('PESALINK_API_KEY', default=None)
 PESALINK_API_SECRET = env('PESALINK_API_SECRET', default=None)
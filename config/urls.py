@@ -5,9 +5,14 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from apps.core.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
+    # Prometheus scrape endpoint
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    
     # API Documentation
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
     path('schema/swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),